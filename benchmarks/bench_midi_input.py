@@ -0,0 +1,125 @@
+"""MIDI input benchmark: raw-bytes fast path vs mido.Message construction.
+
+Feeds a mix of note-on/off, CC, pitch bend and aftertouch through
+``MidiInputController.on_midi`` into an engine-style deque, comparing:
+
+  legacy  -- the old callback, which built a ``mido.Message`` per event
+  raw     -- ``MidiInputController.on_midi`` forwarding raw byte tuples
+
+Run from the repo root::
+
+    python benchmarks/bench_midi_input.py [--events 200000]
+
+Numbers are events per second through the input callback (higher is
+better).
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.midi_input import MidiInputController  # noqa: E402
+from core.deps import mido  # noqa: E402
+from core.routing import compile_routes  # noqa: E402
+
+
+class _LegacyController(MidiInputController):
+    """The input callback vcpi used before the raw-bytes path."""
+
+    def on_midi(self, event, data=None):
+        raw, _dt = event
+        if not raw:
+            return
+        status = raw[0]
+        channel = status & 0x0F
+        msg_type = status & 0xF0
+        slot_index = self._engine.channel_map.get(channel)
+        if slot_index is None:
+            return
+        msg = None
+        if msg_type == 0x90 and len(raw) >= 3:
+            note, velocity = raw[1], raw[2]
+            if velocity == 0:
+                msg = mido.Message("note_off", note=note, channel=channel)
+            else:
+                msg = mido.Message("note_on", note=note, velocity=velocity,
+                                   channel=channel)
+        elif msg_type == 0x80 and len(raw) >= 3:
+            msg = mido.Message("note_off", note=raw[1], channel=channel)
+        elif msg_type == 0xB0 and len(raw) >= 3:
+            msg = mido.Message("control_change", control=raw[1],
+                               value=raw[2], channel=channel)
+        elif msg_type == 0xE0 and len(raw) >= 3:
+            value = (raw[2] << 7) | raw[1]
+            msg = mido.Message("pitchwheel", pitch=value - 8192, channel=channel)
+        elif msg_type == 0xD0 and len(raw) >= 2:
+            msg = mido.Message("aftertouch", value=raw[1], channel=channel)
+        if msg is not None:
+            self._sink(slot_index, msg)
+
+
+def _events(count: int) -> list:
+    """rtmidi-style ``(bytes, delta)`` events on channels 1-4."""
+    rng = random.Random(0)
+    out = []
+    for _ in range(count):
+        ch = rng.randrange(4)
+        kind = rng.random()
+        if kind < 0.4:
+            raw = [0x90 | ch, rng.randrange(128), rng.randrange(128)]
+        elif kind < 0.6:
+            raw = [0x80 | ch, rng.randrange(128), 0]
+        elif kind < 0.85:
+            raw = [0xB0 | ch, rng.randrange(128), rng.randrange(128)]
+        elif kind < 0.95:
+            raw = [0xE0 | ch, rng.randrange(128), rng.randrange(128)]
+        else:
+            raw = [0xD0 | ch, rng.randrange(128)]
+        out.append((raw, 0.0))
+    return out
+
+
+def _run(controller_cls, events: list, repeats: int = 5) -> float:
+    queue: collections.deque = collections.deque()
+    channel_map = {0: 0, 1: 1, 2: 2, 3: 3}
+    engine = SimpleNamespace(channel_map=channel_map, routes=compile_routes(channel_map, []),
+                             enqueue_midi=lambda slot, msg: queue.append((slot, msg)))
+    on_midi = controller_cls(engine).on_midi
+    best = float("inf")
+    for _ in range(repeats):
+        queue.clear()
+        t0 = time.perf_counter()
+        for event in events:
+            on_midi(event)
+        best = min(best, time.perf_counter() - t0)
+    if len(queue) != len(events):
+        raise SystemExit(f"{controller_cls.__name__} forwarded {len(queue)} of {len(events)}")
+    return len(events) / best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--events", type=int, default=200_000, help="events per run")
+    args = ap.parse_args()
+
+    events = _events(args.events)
+    cases = [("raw", MidiInputController)]
+    if mido is not None:
+        cases.insert(0, ("legacy", _LegacyController))
+    print(f"{args.events} events, best of 5")
+    for label, cls in cases:
+        print(f"  {label:<8} {_run(cls, events) / 1e6:8.3f} Mevents/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Sequencer timing benchmark: note-on lateness and thread CPU cost.
+
+Runs the real ``Sequencer`` thread against a stub host whose
+``engine.enqueue_midi`` records ``time.perf_counter_ns()`` for every
+message, in two modes:
+
+  freewheel  -- Link disabled; beats come from ``time.monotonic()``
+  link       -- a mocked ``LinkSync`` whose timeline starts at an
+                arbitrary beat, read through ``LinkSync.beat``
+
+Each active bank plays a full pattern; banks cycle through 1/16, 1/12,
+1/8 and 1/4 resolutions, so several banks share grid points and the rest
+interleave.  Lateness is each note-on's send time minus its ideal time
+on the grid; negative values mean it fired early.
+
+Run from the repo root::
+
+    python benchmarks/bench_sequencer.py [--seconds 2] [--bpm 60,120,300] [--banks 1,4,16]
+
+Use ``--max-p99-ms`` / ``--max-ms`` as a regression gate: the script
+exits non-zero when any case exceeds them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import deps  # noqa: E402
+from core.scheduler import MidiScheduler  # noqa: E402
+from core.sequencer import BAR_TICKS, PPQ, Sequencer  # noqa: E402
+
+RESOLUTIONS = (16, 12, 8, 4)
+LINK_START_BEAT = 1234.375  # mid-bar, so the Link path cannot rely on beat 0
+
+
+class _StubEngine:
+    def __init__(self):
+        self.sent: list[tuple[int, int, object]] = []  # (perf_counter_ns, slot, msg)
+        self.output_delay = 0.0
+
+    def enqueue_midi(self, slot_index: int, msg):
+        self.sent.append((time.perf_counter_ns(), slot_index, msg))
+
+
+class _MockLink:
+    """Enough of ``LinkSync`` for the sequencer: a steady shared timeline."""
+
+    def __init__(self, bpm: float, enabled: bool):
+        self.bpm = bpm
+        self.enabled = enabled
+        self.num_peers = 1 if enabled else 0
+        self.origin_ns = time.perf_counter_ns()
+
+    @property
+    def beat(self) -> float | None:
+        if not self.enabled:
+            return None
+        elapsed = time.perf_counter_ns() - self.origin_ns
+        return LINK_START_BEAT + elapsed * self.bpm / 60e9
+
+
+def _thread_cpu(thread: threading.Thread | None) -> float | None:
+    """CPU seconds used so far by *thread*, where the OS exposes it."""
+    if thread is None or thread.ident is None:
+        return None
+    try:
+        clock = time.pthread_getcpuclockid(thread.ident)
+        return time.clock_gettime(clock)
+    except (AttributeError, OSError):
+        return None
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def measure(mode: str, bpm: float, banks: int, seconds: float) -> dict:
+    """Run one case and return lateness (ms) and CPU statistics."""
+    engine = _StubEngine()
+    link = _MockLink(bpm, enabled=(mode == "link"))
+    host = SimpleNamespace(engine=engine, link=link, scheduler=MidiScheduler())
+    seq = Sequencer(host)
+    for bi in range(banks):
+        res = RESOLUTIONS[bi % len(RESOLUTIONS)]
+        seq.set_bank(bi, ["c"] * res)
+        seq.configure_bank(bi, resolution=res)
+
+    offset_ns = time.perf_counter_ns() - time.monotonic_ns()
+    for bi in range(banks):
+        seq.link(bi, bi)
+    cpu_start = _thread_cpu(seq._thread)
+    time.sleep(seconds)
+    cpu_end = _thread_cpu(seq._thread)
+    if mode == "link":
+        origin_ns = link.origin_ns - LINK_START_BEAT * 60e9 / bpm
+    else:
+        origin_ns = seq._free_anchor[0] * 1e9 + offset_ns
+    seq.stop()
+    host.scheduler.stop(flush=False)
+
+    ns_per_tick = 60e9 / (bpm * PPQ)
+    late_ms = []
+    for sent_ns, slot, msg in engine.sent:
+        if msg.type != "note_on":
+            continue
+        grid = BAR_TICKS // RESOLUTIONS[slot % len(RESOLUTIONS)]
+        tick = (sent_ns - origin_ns) / ns_per_tick
+        ideal_ns = origin_ns + round(tick / grid) * grid * ns_per_tick
+        late_ms.append((sent_ns - ideal_ns) / 1e6)
+
+    cpu_ms = None
+    if cpu_start is not None and cpu_end is not None:
+        cpu_ms = (cpu_end - cpu_start) * 1000.0
+    return {
+        "mode": mode,
+        "bpm": bpm,
+        "banks": banks,
+        "events": len(late_ms),
+        "mean_ms": sum(late_ms) / len(late_ms) if late_ms else 0.0,
+        "p99_ms": _percentile(late_ms, 0.99) if late_ms else 0.0,
+        "max_ms": max(late_ms) if late_ms else 0.0,
+        "cpu_ms": cpu_ms,
+        "cpu_pct": cpu_ms / (seconds * 10.0) if cpu_ms is not None else None,
+    }
+
+
+def _floats(text: str) -> list[float]:
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=1.0, help="run time per case")
+    ap.add_argument("--bpm", default="60,120,180,240,300", help="comma-separated tempos")
+    ap.add_argument("--banks", default="1,4,8,16", help="comma-separated active bank counts")
+    ap.add_argument("--modes", default="freewheel,link", help="freewheel and/or link")
+    ap.add_argument("--max-p99-ms", type=float, help="fail if any case's p99 exceeds this")
+    ap.add_argument("--max-ms", type=float, help="fail if any case's max exceeds this")
+    args = ap.parse_args()
+
+    if deps.mido is None:
+        raise SystemExit("mido is required")
+
+    print(f"{'mode':<10} {'bpm':>5} {'banks':>5} {'events':>7} "
+          f"{'mean ms':>8} {'p99 ms':>8} {'max ms':>8} {'cpu ms':>8} {'cpu %':>6}")
+    failed = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        for bpm in _floats(args.bpm):
+            for banks in [int(v) for v in _floats(args.banks)]:
+                r = measure(mode, bpm, banks, args.seconds)
+                cpu = "n/a" if r["cpu_ms"] is None else f"{r['cpu_ms']:.1f}"
+                pct = "n/a" if r["cpu_pct"] is None else f"{r['cpu_pct']:.2f}"
+                print(f"{mode:<10} {bpm:>5g} {banks:>5} {r['events']:>7} "
+                      f"{r['mean_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['max_ms']:>8.3f} "
+                      f"{cpu:>8} {pct:>6}")
+                if ((args.max_p99_ms is not None and r["p99_ms"] > args.max_p99_ms)
+                        or (args.max_ms is not None and r["max_ms"] > args.max_ms)):
+                    failed.append(r)
+    if failed:
+        raise SystemExit(f"{len(failed)} case(s) over the lateness limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""WAV decode benchmark: native chunk parser vs the ``wave`` module path.
+
+Compares, for a 24-bit stereo file:
+
+  legacy  -- ``wave.readframes`` plus the old per-byte int32 OR/shift decode
+  native  -- ``sampler.wav.read_wav`` (one ``np.fromfile`` read, padded-word
+             view and arithmetic shift)
+
+Run from the repo root::
+
+    python benchmarks/bench_wav.py [--seconds 30]
+
+Numbers are decoded frames per second (higher is better).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.deps import np  # noqa: E402
+from sampler.wav import read_wav  # noqa: E402
+
+RATE = 48000
+
+
+def _legacy_read_24(path: Path) -> np.ndarray:
+    """The decode path vcpi used before the native parser."""
+    with wave.open(str(path), "rb") as handle:
+        channels = handle.getnchannels()
+        raw = handle.readframes(handle.getnframes())
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+    data = packed[:, 0] | (packed[:, 1] << 8) | (packed[:, 2] << 16)
+    sign_bit = 1 << 23
+    data = (data ^ sign_bit) - sign_bit
+    pcm = data.astype(np.float32) / 8388608.0
+    return np.ascontiguousarray(pcm.reshape(-1, channels).T)
+
+
+def _write_24bit(path: Path, seconds: float):
+    frames = int(seconds * RATE)
+    rng = np.random.default_rng(0)
+    values = rng.integers(-(1 << 23), 1 << 23, size=frames * 2, dtype=np.int32)
+    raw = values.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(2)
+        handle.setsampwidth(3)
+        handle.setframerate(RATE)
+        handle.writeframes(raw)
+    return frames
+
+
+def _best_of(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=30.0, help="test file length")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench24.wav"
+        frames = _write_24bit(path, args.seconds)
+        legacy = _legacy_read_24(path)
+        native, _ = read_wav(path)
+        if not np.array_equal(legacy, native):
+            raise SystemExit("decoders disagree")
+
+        print(f"24-bit stereo, {args.seconds:g} s at {RATE} Hz")
+        for label, fn in (("legacy", lambda: _legacy_read_24(path)),
+                          ("native", lambda: read_wav(path))):
+            fps = frames / _best_of(fn)
+            print(f"  {label:<8} {fps / 1e6:8.2f} Mframes/s")
+
+
+if __name__ == "__main__":
+    main()
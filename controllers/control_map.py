@@ -0,0 +1,553 @@
+"""Control-surface mappings: CCs and notes to mixer and parameter targets.
+
+A ``ControlMap`` is a named preset binding controls -- a CC number or a
+note number, on any channel -- to targets:
+
+  gain <slot>          -- slot gain (value / 127)
+  master               -- master gain
+  mute <slot>          -- toggle mute (note-on, or CC value > 0)
+  solo <slot>          -- toggle solo
+  param <slot> <name>  -- a plugin parameter by name, scaled to its range
+  knob <slot> <n>      -- the slot's n-th plugin parameter
+
+A ``ControlMapper`` runs one surface with one map: a page of a
+control-surface driver (see ``controllers.surface``), or the generic
+MIDI inputs (which only consult CC bindings).  Whenever its map
+changes it is compiled into two flat 128-entry arrays of bound handlers
+-- one per status type, indexed by data byte 1 -- so the rtmidi callback
+does an index and a call.  Each array is replaced with a single
+reference assignment, so the input thread never sees a half-built one.
+
+MIDI learn: ``learn()`` arms a mapper; the next control it sees is
+captured as ``learned`` instead of being applied, and
+``ControlMaps.bind_learned`` binds it to a target in the surface's map.
+
+With soft takeover, a CC bound to a gain or parameter only moves its
+target once the control reaches the target's value (or crosses it), so
+a fader that was moved on another page or a gain changed from the CLI
+does not jump.  Parameter values are only known once this mapper has
+set them; until then they follow the control immediately.
+
+Parameter names and ranges come from a ``ParamCache`` built on the main
+thread at load time, so handlers never touch plugin objects on the
+input thread.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Optional
+
+from core.models import NUM_SLOTS
+
+logger = logging.getLogger(__name__)
+
+NUM_CONTROLS = 128
+CONTROL_KINDS = ("cc", "note")
+TARGET_KINDS = ("gain", "master", "mute", "solo", "param", "knob")
+# Targets a fader or knob moves continuously (soft takeover applies).
+CONTINUOUS_TARGETS = frozenset(("gain", "master", "param", "knob"))
+TAKEOVER_WINDOW = 2  # CC steps either side of the target's value
+
+
+@dataclass(frozen=True)
+class Target:
+    """What a control drives; *slot* and *index* are 0-based."""
+    kind: str
+    slot: Optional[int] = None
+    param: Optional[str] = None
+    index: Optional[int] = None
+
+    def describe(self) -> str:
+        """1-based summary, e.g. ``slot 2 knob 3``."""
+        match self.kind:
+            case "master":
+                return "master gain"
+            case "param":
+                return f"slot {self.slot + 1} param {self.param}"
+            case "knob":
+                return f"slot {self.slot + 1} knob {self.index + 1}"
+            case _:
+                return f"slot {self.slot + 1} {self.kind}"
+
+    def to_dict(self) -> dict[str, Any]:
+        """1-based form used by sessions."""
+        data: dict[str, Any] = {"target": self.kind}
+        if self.slot is not None:
+            data["slot"] = self.slot + 1
+        if self.param is not None:
+            data["param"] = self.param
+        if self.index is not None:
+            data["knob"] = self.index + 1
+        return data
+
+
+def make_target(kind: str, slot: Optional[int] = None, param: Optional[str] = None,
+                index: Optional[int] = None) -> Target:
+    """Validated ``Target`` from internal (0-based) slot and knob index."""
+    if kind not in TARGET_KINDS:
+        raise ValueError(f"target must be one of: {', '.join(TARGET_KINDS)}")
+    if kind == "master":
+        return Target("master")
+    if slot is None or not 0 <= int(slot) < NUM_SLOTS:
+        raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+    slot = int(slot)
+    if kind == "param":
+        if not param or not str(param).strip():
+            raise ValueError("param target needs a parameter name")
+        return Target("param", slot, param=str(param).strip())
+    if kind == "knob":
+        if index is None or not 0 <= int(index) < NUM_CONTROLS:
+            raise ValueError(f"knob must be 1-{NUM_CONTROLS}")
+        return Target("knob", slot, index=int(index))
+    return Target(kind, slot)
+
+
+def target_from_dict(data: dict) -> Target:
+    """Inverse of ``Target.to_dict``."""
+    if not isinstance(data, dict):
+        raise ValueError("target must be an object")
+    slot = data.get("slot")
+    knob = data.get("knob")
+    return make_target(data.get("target"), int(slot) - 1 if slot is not None else None,
+                       data.get("param"), int(knob) - 1 if knob is not None else None)
+
+
+def parse_target(words: list[str]) -> Target:
+    """Parse 1-based CLI words: ``gain 3``, ``master``, ``param 2 cutoff``, ``knob 1 4``."""
+    if not words:
+        raise ValueError("missing target")
+    kind = words[0].lower()
+    if kind == "master":
+        return make_target(kind)
+    if len(words) < 2:
+        raise ValueError(f"'{kind}' target needs a slot")
+    try:
+        slot = int(words[1]) - 1
+        index = int(words[2]) - 1 if kind == "knob" and len(words) > 2 else None
+    except ValueError:
+        raise ValueError("slot and knob must be numbers") from None
+    if kind == "knob":
+        return make_target(kind, slot, index=index)
+    return make_target(kind, slot, param=" ".join(words[2:]) or None)
+
+
+def _control(kind: str, number: int) -> tuple[str, int]:
+    if kind not in CONTROL_KINDS:
+        raise ValueError("control must be 'cc' or 'note'")
+    number = int(number)
+    if not 0 <= number < NUM_CONTROLS:
+        raise ValueError(f"{kind} number must be 0-{NUM_CONTROLS - 1}")
+    return kind, number
+
+
+@dataclass
+class ControlMap:
+    """A named preset: CC and note numbers to targets."""
+    name: str
+    cc: dict[int, Target] = field(default_factory=dict)
+    note: dict[int, Target] = field(default_factory=dict)
+
+    def bindings(self, kind: str) -> dict[int, Target]:
+        return self.cc if kind == "cc" else self.note
+
+    def describe(self) -> list[str]:
+        """One line per binding, CCs first."""
+        return [f"{kind} {number} -> {target.describe()}"
+                for kind in CONTROL_KINDS
+                for number, target in sorted(self.bindings(kind).items())]
+
+    def copy(self, name: str) -> ControlMap:
+        return ControlMap(name, dict(self.cc), dict(self.note))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {kind: {str(number): target.to_dict()
+                       for number, target in sorted(self.bindings(kind).items())}
+                for kind in CONTROL_KINDS}
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> ControlMap:
+        if not isinstance(data, dict):
+            raise ValueError("control map must be an object")
+        control_map = cls(name)
+        for kind in CONTROL_KINDS:
+            for number, target in data.get(kind, {}).items():
+                kind, number = _control(kind, number)
+                control_map.bindings(kind)[number] = target_from_dict(target)
+        return control_map
+
+
+# -- parameter cache ---------------------------------------------------------
+
+class ParamCache:
+    """Plugin parameter names and ranges per slot, for the input thread."""
+
+    def __init__(self, engine):
+        self._engine = engine
+        # slot_index -> [(param_name, (min, max)), ...]
+        self._entries: dict[int, list[tuple[str, tuple[float, float]]]] = {}
+        self._ranges: dict[int, dict[str, tuple[float, float]]] = {}
+
+    def get(self, slot_index: int) -> Optional[list[tuple[str, tuple[float, float]]]]:
+        return self._entries.get(slot_index)
+
+    def range(self, slot_index: int, name: str) -> Optional[tuple[float, float]]:
+        ranges = self._ranges.get(slot_index)
+        return ranges.get(name) if ranges is not None else None
+
+    def invalidate(self, slot_index: Optional[int] = None):
+        """Clear cached parameter names/ranges. Call when instruments are loaded/removed."""
+        if slot_index is not None:
+            self._entries.pop(slot_index, None)
+            self._ranges.pop(slot_index, None)
+        else:
+            self._entries.clear()
+            self._ranges.clear()
+
+    def build(self, slot_index: int) -> list[tuple[str, tuple[float, float]]]:
+        """Build and cache param name + range list for a slot.
+
+        Only caches when we get valid-looking parameter data.  Returns
+        an empty list *without* caching on transient failures or when the
+        plugin reports degenerate ranges (e.g. during reload).
+        """
+        slot = self._engine.slots[slot_index]
+        if slot is None or slot.plugin is None:
+            return []
+        entries: list[tuple[str, tuple[float, float]]] = []
+        try:
+            for name in slot.plugin.parameters:
+                try:
+                    r = slot.plugin.parameters[name].range
+                    lo, hi = float(r[0]), float(r[1])
+                    entries.append((name, (lo, hi)))
+                except Exception:
+                    entries.append((name, (0.0, 1.0)))
+        except Exception:
+            logger.debug("slot %d param cache build failed (transient)", slot_index + 1)
+            return []
+        # Reject if all ranges are degenerate (lo==hi) — plugin likely
+        # still initialising after a reload.
+        if entries and all(lo == hi for _, (lo, hi) in entries):
+            logger.debug("slot %d param cache rejected (all ranges degenerate)", slot_index + 1)
+            return []
+        self._ranges[slot_index] = dict(entries)
+        self._entries[slot_index] = entries
+        return entries
+
+
+# -- mapper ------------------------------------------------------------------
+
+class ControlMapper:
+    """Apply one surface's control map through compiled lookup arrays."""
+
+    def __init__(self, engine, params: ParamCache, control_map: ControlMap,
+                 on_toggle: Optional[Callable[[int], None]] = None,
+                 soft_takeover: bool = False):
+        self._engine = engine
+        self.params = params
+        self.on_toggle = on_toggle  # slot_index -> None, after mute/solo flips
+        self.soft_takeover = soft_takeover
+        # Last value seen per CC number; drivers share one list across pages.
+        self.positions = [-1] * NUM_CONTROLS
+        # Per slot: param name -> last CC value this mapper set it to.
+        self._values: list[dict[str, int]] = [{} for _ in range(NUM_SLOTS)]
+        self.cc: list[Optional[Callable[[int], None]]] = [None] * NUM_CONTROLS
+        self.note: list[Optional[Callable[[int], None]]] = [None] * NUM_CONTROLS
+        self.learning = False
+        self.learned: Optional[tuple[str, int]] = None
+        self.use(control_map)
+
+    def use(self, control_map: ControlMap):
+        self.map = control_map
+        self.compile()
+
+    def compile(self):
+        """Rebuild the lookup arrays from the current map."""
+        for kind in CONTROL_KINDS:
+            table: list[Optional[Callable[[int], None]]] = [None] * NUM_CONTROLS
+            for number, target in self.map.bindings(kind).items():
+                handler = self._handler(target)
+                if kind == "cc" and self.soft_takeover and target.kind in CONTINUOUS_TARGETS:
+                    handler = partial(self._takeover, number, self._position(target), handler)
+                table[number] = handler
+            setattr(self, kind, table)
+
+    def _handler(self, target: Target) -> Callable[[int], None]:
+        match target.kind:
+            case "master":
+                return self._set_master
+            case "gain":
+                return partial(self._set_gain, target.slot)
+            case "mute":
+                return partial(self._toggle, target.slot, "muted")
+            case "solo":
+                return partial(self._toggle, target.slot, "solo")
+            case "param":
+                return partial(self._set_param, target.slot, target.param)
+            case _:
+                return partial(self._set_knob, target.slot, target.index)
+
+    def _position(self, target: Target) -> Callable[[], Optional[int]]:
+        """Callable giving the target's current value as a CC value."""
+        match target.kind:
+            case "master":
+                return self._master_position
+            case "gain":
+                return partial(self._gain_position, target.slot)
+            case "param":
+                return partial(self._values[target.slot].get, target.param)
+            case _:
+                return partial(self._knob_position, target.slot, target.index)
+
+    def learn(self):
+        """Capture the next control instead of applying it."""
+        self.learned = None
+        self.learning = True
+
+    def _capture(self, kind: str, number: int):
+        self.learning = False
+        self.learned = (kind, number)
+        logger.info("[MAP] learned %s %d for '%s'", kind, number, self.map.name)
+
+    # -- input thread --------------------------------------------------------
+
+    def handle_cc(self, number: int, value: int) -> bool:
+        """Apply a CC; returns False when it is not mapped."""
+        if self.learning:
+            self._capture("cc", number)
+            return True
+        handler = self.cc[number]
+        if handler is None:
+            return False
+        handler(value)
+        return True
+
+    def handle_note(self, number: int, velocity: int) -> bool:
+        """Apply a note-on; returns False when it is not mapped."""
+        if self.learning:
+            self._capture("note", number)
+            return True
+        handler = self.note[number]
+        if handler is None:
+            return False
+        handler(velocity)
+        return True
+
+    def _takeover(self, number: int, position: Callable[[], Optional[int]],
+                  handler: Callable[[int], None], value: int):
+        previous = self.positions[number]
+        self.positions[number] = value
+        current = position()
+        if (current is None or abs(value - current) <= TAKEOVER_WINDOW
+                or (previous >= 0 and (abs(previous - current) <= TAKEOVER_WINDOW
+                                       or (previous < current) != (value < current)))):
+            handler(value)
+        else:
+            logger.debug("CC %d at %d waits for takeover at %d", number, value, current)
+
+    def _master_position(self) -> int:
+        return round(self._engine.master_gain * 127)
+
+    def _gain_position(self, slot_index: int) -> Optional[int]:
+        slot = self._engine.slots[slot_index]
+        return round(slot.gain * 127) if slot else None
+
+    def _knob_position(self, slot_index: int, knob_index: int) -> Optional[int]:
+        params = self.params.get(slot_index)
+        if not params or knob_index >= len(params):
+            return None
+        return self._values[slot_index].get(params[knob_index][0])
+
+    def _set_master(self, value: int):
+        self._engine.master_gain = value / 127.0
+        logger.info("master gain -> %.2f", self._engine.master_gain)
+
+    def _set_gain(self, slot_index: int, value: int):
+        slot = self._engine.slots[slot_index]
+        if slot:
+            slot.gain = value / 127.0
+            logger.info("slot %d gain -> %.2f", slot_index + 1, slot.gain)
+        else:
+            logger.debug("slot %d gain ignored (empty slot)", slot_index + 1)
+
+    def _toggle(self, slot_index: int, attr: str, value: int):
+        if not value:
+            return  # button release
+        slot = self._engine.slots[slot_index]
+        if slot:
+            setattr(slot, attr, not getattr(slot, attr))
+            if attr == "muted":
+                state = "MUTED" if slot.muted else "unmuted"
+            else:
+                state = "SOLO" if slot.solo else "unsolo"
+            logger.info("[slot %d] %s: %s", slot_index + 1, slot.name, state)
+        else:
+            logger.debug("%s toggle ignored (slot %d empty)",
+                         "mute" if attr == "muted" else attr, slot_index + 1)
+        if self.on_toggle is not None:
+            self.on_toggle(slot_index)
+
+    def _set_param(self, slot_index: int, name: str, value: int):
+        bounds = self.params.range(slot_index, name)
+        if bounds is None:
+            logger.debug("slot %d %s ignored (no such param cached)", slot_index + 1, name)
+            return
+        lo, hi = bounds
+        self._values[slot_index][name] = value
+        self._engine.enqueue_param_change(slot_index, name, lo + (value / 127.0) * (hi - lo))
+
+    def _set_knob(self, slot_index: int, knob_index: int, value: int):
+        if self._engine.slots[slot_index] is None:
+            logger.debug("knob on slot %d ignored (empty slot)", slot_index + 1)
+            return
+        params = self.params.get(slot_index)
+        if not params:
+            logger.debug("slot %d knob ignored (param cache not ready)", slot_index + 1)
+            return
+        if knob_index >= len(params):
+            logger.debug("slot %d knob %d ignored (no mapped param)",
+                         slot_index + 1, knob_index + 1)
+            return
+        name, (lo, hi) = params[knob_index]
+        self._values[slot_index][name] = value
+        mapped = lo + (value / 127.0) * (hi - lo)
+        self._engine.enqueue_param_change(slot_index, name, mapped)
+        logger.debug("slot %d %s -> %s", slot_index + 1, name, mapped)
+
+
+# -- presets -----------------------------------------------------------------
+
+class ControlMaps:
+    """Named control-map presets and the mapper of each surface.
+
+    Surfaces register with ``add_surface`` and a default map of the same
+    name; a preset picked for a surface that is not open yet (e.g. by a
+    session restore) is applied when it registers.
+    """
+
+    def __init__(self, engine):
+        self._engine = engine
+        self.params = ParamCache(engine)
+        self._defaults: dict[str, ControlMap] = {}
+        self._default_of: dict[str, str] = {}  # surface -> its default map
+        self._selected: dict[str, str] = {}
+        self.presets: dict[str, ControlMap] = {}
+        self.mappers: dict[str, ControlMapper] = {}
+
+    def add_surface(self, surface: str, default: ControlMap,
+                    soft_takeover: bool = False) -> ControlMapper:
+        """Mapper for *surface*, created with *default* on first use."""
+        mapper = self.mappers.get(surface)
+        if mapper is not None:
+            return mapper
+        self._defaults[default.name] = default
+        self._default_of[surface] = default.name
+        if default.name not in self.presets:
+            self.presets[default.name] = default.copy(default.name)
+        name = self._selected.pop(surface, default.name)
+        if name not in self.presets:
+            logger.warning("[MAP] %s: no map named '%s', using '%s'", surface, name, default.name)
+            name = default.name
+        mapper = ControlMapper(self._engine, self.params, self.presets[name],
+                               soft_takeover=soft_takeover)
+        self.mappers[surface] = mapper
+        return mapper
+
+    def mapper(self, surface: str) -> ControlMapper:
+        if surface not in self.mappers:
+            raise ValueError(f"surface must be one of: {', '.join(self.mappers)}")
+        return self.mappers[surface]
+
+    def preset(self, name: str) -> ControlMap:
+        control_map = self.presets.get(name)
+        if control_map is None:
+            raise ValueError(f"no control map named '{name}'")
+        return control_map
+
+    def active(self) -> dict[str, str]:
+        """Preset name per surface."""
+        return {surface: mapper.map.name for surface, mapper in self.mappers.items()}
+
+    def _recompile(self, name: str):
+        for mapper in self.mappers.values():
+            if mapper.map.name == name:
+                mapper.compile()
+
+    # -- editing -------------------------------------------------------------
+
+    def create(self, name: str, source: Optional[str] = None) -> ControlMap:
+        """New preset, empty or copied from *source*."""
+        name = name.strip()
+        if not name:
+            raise ValueError("control map name must not be empty")
+        if name in self.presets:
+            raise ValueError(f"control map '{name}' already exists")
+        control_map = self.preset(source).copy(name) if source else ControlMap(name)
+        self.presets[name] = control_map
+        return control_map
+
+    def delete(self, name: str):
+        self.preset(name)
+        users = [s for s, mapper in self.mappers.items() if mapper.map.name == name]
+        if users:
+            raise ValueError(f"control map '{name}' is in use by {', '.join(users)}")
+        del self.presets[name]
+
+    def use(self, surface: str, name: str):
+        self.mapper(surface).use(self.preset(name))
+        logger.info("[MAP] %s -> '%s'", surface, name)
+
+    def bind(self, name: str, kind: str, number: int, target: Target):
+        kind, number = _control(kind, number)
+        self.preset(name).bindings(kind)[number] = target
+        self._recompile(name)
+
+    def unbind(self, name: str, kind: str, number: int):
+        kind, number = _control(kind, number)
+        if self.preset(name).bindings(kind).pop(number, None) is None:
+            raise ValueError(f"{kind} {number} is not mapped in '{name}'")
+        self._recompile(name)
+
+    def learn(self, surface: str):
+        self.mapper(surface).learn()
+
+    def bind_learned(self, surface: str, target: Target) -> tuple[str, int]:
+        """Bind the control last learned on *surface* in its map."""
+        mapper = self.mapper(surface)
+        if mapper.learned is None:
+            raise ValueError(f"nothing learned on {surface} yet; touch a control after 'learn'")
+        kind, number = mapper.learned
+        self.bind(mapper.map.name, kind, number, target)
+        mapper.learned = None
+        return kind, number
+
+    # -- persistence ---------------------------------------------------------
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "presets": {name: m.to_dict() for name, m in sorted(self.presets.items())},
+            "active": self.active(),
+        }
+
+    def restore(self, data: dict) -> list[str]:
+        """Restore presets and selections; returns error messages."""
+        errors = []
+        presets = {name: m.copy(name) for name, m in self._defaults.items()}
+        for name, entry in data.get("presets", {}).items():
+            try:
+                presets[name] = ControlMap.from_dict(name, entry)
+            except (AttributeError, KeyError, TypeError, ValueError) as exc:
+                errors.append(f"control map '{name}': {exc}")
+        self.presets = presets
+        active = dict(data.get("active", {}))
+        for surface, mapper in self.mappers.items():
+            name = active.pop(surface, self._default_of[surface])
+            if name not in presets:
+                errors.append(f"control map for {surface}: no map named '{name}'")
+                name = self._default_of[surface]
+            mapper.use(presets[name])
+        self._selected = {surface: str(name) for surface, name in active.items()}
+        return errors
@@ -0,0 +1,6 @@
+"""Control-surface driver profiles, one module per device.
+
+Each module defines ``PROFILE`` (a ``controllers.surface.DeviceProfile``).
+Modules are found by ``controllers.surface.driver_names`` without being
+imported; a driver is imported only when it is opened.
+"""
@@ -0,0 +1,28 @@
+"""Arturia BeatStep Pro in control mode (factory encoder CCs).
+
+The upper row of encoders sets slot gains, the lower row each slot's
+first parameter.  Encoders must be in absolute mode; soft takeover keeps
+them from jumping when a gain was changed elsewhere.  The pads keep
+playing notes through the BeatStep's normal MIDI input.
+"""
+
+from __future__ import annotations
+
+from controllers.surface import DeviceProfile
+from core.models import NUM_SLOTS
+
+ENCODER_CCS = (10, 74, 71, 76, 77, 93, 73, 75,      # upper row
+               114, 18, 19, 16, 17, 91, 79, 72)     # lower row
+
+_STRIPS = range(NUM_SLOTS)
+
+PROFILE = DeviceProfile(
+    name="beatstep_pro",
+    title="Arturia BeatStep Pro",
+    controls={f"encoder{n + 1}": ("cc", cc) for n, cc in enumerate(ENCODER_CCS)},
+    pages=({
+        **{f"encoder{s + 1}": f"gain {s + 1}" for s in _STRIPS},
+        **{f"encoder{s + 9}": f"knob {s + 1} 1" for s in _STRIPS},
+    },),
+    soft_takeover=True,
+)
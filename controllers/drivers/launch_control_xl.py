@@ -0,0 +1,59 @@
+"""Novation Launch Control XL, factory template 1 (MIDI channel 9).
+
+Three rows of knobs, a fader and two buttons per strip.  Page 1 maps
+the knob rows to each slot's parameters 1-3, page 2 to parameters 4-6;
+the track left/right buttons change page.  Pots are absolute, so soft
+takeover keeps a knob from jumping after a page change.
+"""
+
+from __future__ import annotations
+
+from controllers.surface import DeviceProfile
+from core.models import NUM_SLOTS
+
+CHANNEL = 8  # factory template 1
+
+KNOB_ROWS = (range(13, 21), range(29, 37), range(49, 57))  # send A, send B, pan
+FADER_CCS = range(77, 85)
+FOCUS_NOTES = (41, 42, 43, 44, 57, 58, 59, 60)     # upper buttons: mute
+CONTROL_NOTES = (73, 74, 75, 76, 89, 90, 91, 92)   # lower buttons: solo
+TRACK_LEFT_CC, TRACK_RIGHT_CC = 106, 107
+
+# Button LED velocities: off, amber and green at full brightness.
+LED_OFF, LED_AMBER, LED_GREEN = 0x0C, 0x3F, 0x3C
+
+_STRIPS = range(NUM_SLOTS)
+
+
+def _page(first_param: int) -> dict[str, str]:
+    return {
+        **{f"fader{s + 1}": f"gain {s + 1}" for s in _STRIPS},
+        **{f"knob{s + 1}{row}": f"knob {s + 1} {first_param + k}"
+           for s in _STRIPS for k, row in enumerate("abc")},
+        **{f"focus{s + 1}": f"mute {s + 1}" for s in _STRIPS},
+        **{f"control{s + 1}": f"solo {s + 1}" for s in _STRIPS},
+    }
+
+
+PROFILE = DeviceProfile(
+    name="launch_control_xl",
+    title="Novation Launch Control XL",
+    controls={
+        **{f"fader{s + 1}": ("cc", FADER_CCS[s]) for s in _STRIPS},
+        **{f"knob{s + 1}{row}": ("cc", KNOB_ROWS[k][s])
+           for s in _STRIPS for k, row in enumerate("abc")},
+        **{f"focus{s + 1}": ("note", FOCUS_NOTES[s]) for s in _STRIPS},
+        **{f"control{s + 1}": ("note", CONTROL_NOTES[s]) for s in _STRIPS},
+        "left": ("cc", TRACK_LEFT_CC),
+        "right": ("cc", TRACK_RIGHT_CC),
+    },
+    pages=(_page(1), _page(4)),
+    leds={
+        **{f"mute {s + 1}": (0x90 | CHANNEL, FOCUS_NOTES[s], LED_AMBER, LED_OFF)
+           for s in _STRIPS},
+        **{f"solo {s + 1}": (0x90 | CHANNEL, CONTROL_NOTES[s], LED_GREEN, LED_OFF)
+           for s in _STRIPS},
+    },
+    page_buttons=("left", "right"),
+    soft_takeover=True,
+)
@@ -0,0 +1,54 @@
+"""Akai MIDI Mix: 8 strips of 3 knobs, fader, mute and rec-arm buttons."""
+
+from __future__ import annotations
+
+from controllers.surface import DeviceProfile
+from core.models import NUM_SLOTS
+
+# -- CC numbers per channel strip (1-8) -------------------------------------
+
+FADER_CCS = [19, 23, 27, 31, 49, 53, 57, 61]
+
+KNOB_CCS = [
+    # (high, mid, low) per strip
+    (16, 17, 18),
+    (20, 21, 22),
+    (24, 25, 26),
+    (28, 29, 30),
+    (46, 47, 48),
+    (50, 51, 52),
+    (54, 55, 56),
+    (58, 59, 60),
+]
+
+MUTE_NOTES = [1, 4, 7, 10, 13, 16, 19, 22]
+SOLO_NOTES = [3, 6, 9, 12, 15, 18, 21, 24]
+
+MASTER_FADER_CC = 62
+
+_STRIPS = range(NUM_SLOTS)
+
+PROFILE = DeviceProfile(
+    name="midimix",
+    title="Akai MIDI Mix",
+    controls={
+        "master": ("cc", MASTER_FADER_CC),
+        **{f"fader{s + 1}": ("cc", FADER_CCS[s]) for s in _STRIPS},
+        **{f"knob{s + 1}{row}": ("cc", KNOB_CCS[s][k])
+           for s in _STRIPS for k, row in enumerate("abc")},
+        **{f"mute{s + 1}": ("note", MUTE_NOTES[s]) for s in _STRIPS},
+        **{f"arm{s + 1}": ("note", SOLO_NOTES[s]) for s in _STRIPS},
+    },
+    pages=({
+        "master": "master",
+        **{f"fader{s + 1}": f"gain {s + 1}" for s in _STRIPS},
+        **{f"knob{s + 1}{row}": f"knob {s + 1} {k + 1}"
+           for s in _STRIPS for k, row in enumerate("abc")},
+        **{f"mute{s + 1}": f"mute {s + 1}" for s in _STRIPS},
+        **{f"arm{s + 1}": f"solo {s + 1}" for s in _STRIPS},
+    },),
+    leds={
+        **{f"mute {s + 1}": (0x90, MUTE_NOTES[s], 127, 0) for s in _STRIPS},
+        **{f"solo {s + 1}": (0x90, SOLO_NOTES[s], 127, 0) for s in _STRIPS},
+    },
+)
@@ -0,0 +1,114 @@
+"""Controller LED feedback: diffed, coalesced and sent off-thread.
+
+An ``LedFeedback`` keeps the wanted value of every LED -- addressed by
+the status byte and note/CC number that drive it -- and the value last
+sent to the hardware.  ``set`` only records the wanted value and wakes
+the output thread; it never touches the port, so the rtmidi input
+callback, the web API and session restore never wait on a USB write.
+
+The output thread sends only the LEDs whose wanted value differs from
+the last one sent, so several changes to one LED before it runs
+collapse into one message (or none, if the LED ends up where it was).
+Opening a port calls ``reset``, which forgets what was sent so the next
+flush repaints every LED.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Optional
+
+from core.midi import MidiOutPort
+
+logger = logging.getLogger(__name__)
+
+
+class LedFeedback:
+    """Last-sent LED state per address and a thread that sends the diffs."""
+
+    def __init__(self, port: MidiOutPort, label: str = "LED"):
+        self._port = port
+        self.label = label
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # (status, number) -> value
+        self._wanted: dict[tuple[int, int], int] = {}
+        self._sent: dict[tuple[int, int], int] = {}
+        self._dirty: set[tuple[int, int]] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.messages_sent = 0
+
+    def set(self, status: int, number: int, value: int):
+        """Want an LED at *value*; returns without sending anything."""
+        key = (status, number)
+        with self._lock:
+            if self._wanted.get(key) == value:
+                return
+            self._wanted[key] = value
+            self._dirty.add(key)
+        self._wake.set()
+
+    def value(self, status: int, number: int) -> Optional[int]:
+        """The wanted value of an LED, or ``None`` if it was never set."""
+        return self._wanted.get((status, number))
+
+    def reset(self):
+        """Forget what the hardware shows; the next flush repaints everything."""
+        with self._lock:
+            self._sent.clear()
+            self._dirty.update(self._wanted)
+        self._wake.set()
+
+    def flush(self) -> int:
+        """Send every LED whose wanted value changed; returns messages sent."""
+        with self._lock:
+            keys, self._dirty = self._dirty, set()
+            changes = [(key, self._wanted[key]) for key in sorted(keys)
+                       if self._sent.get(key) != self._wanted[key]]
+        sent = 0
+        for i, ((status, number), value) in enumerate(changes):
+            if not self._port.is_open:
+                # Keep the rest for the next flush (after a re-open).
+                with self._lock:
+                    self._dirty.update(key for key, _ in changes[i:])
+                break
+            try:
+                self._port.send([status, number, value])
+            except Exception as exc:
+                logger.warning("[%s] failed to send %02X %d=%d: %s",
+                               self.label, status, number, value, exc)
+                with self._lock:
+                    self._dirty.add((status, number))
+                continue
+            with self._lock:
+                self._sent[(status, number)] = value
+            sent += 1
+        self.messages_sent += sent
+        return sent
+
+    # -- output thread -------------------------------------------------------
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"vcpi-{self.label}",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if not self._running:
+                return
+            self.flush()
@@ -1,8 +1,11 @@
 """Generic MIDI input controller.
 
 Any MIDI input device (keyboard, sequencer, etc.) is handled identically:
-parse incoming raw MIDI, look up engine.channel_map, and enqueue to the
-appropriate instrument slot.
+look up incoming raw MIDI in the engine's compiled route table and enqueue
+the raw bytes (see ``core.midi``) to the routed instrument slots --
+through *sink* when one is given (the host's arpeggiator router),
+otherwise straight into the engine.  CCs bound in the inputs' control map
+(see ``controllers.control_map``) drive their targets instead.
 """
 
 from __future__ import annotations
@@ -10,18 +13,25 @@ from __future__ import annotations
 import logging
 from typing import Optional
 
-from core.deps import HAS_MIDO, mido
-from core.midi import MidiInPort
+from core.midi import (
+    CHANNEL_PRESSURE, CONTROL_CHANGE, NOTE_OFF, NOTE_ON, PITCH_BEND, MidiInPort,
+)
+from core.routing import MASK_SLOTS
 
 
 logger = logging.getLogger(__name__)
 
+_NOTE_KINDS = frozenset((NOTE_ON, NOTE_OFF))
+_THREE_BYTE = frozenset((CONTROL_CHANGE, PITCH_BEND))
+
 
 class MidiInputController:
     """Forward MIDI input from any device into routed instrument slots."""
 
-    def __init__(self, engine, label: str = "MIDI-in"):
+    def __init__(self, engine, label: str = "MIDI-in", sink=None, mapper=None):
         self._engine = engine
+        self._sink = sink if sink is not None else engine.enqueue_midi
+        self._mapper = mapper
         self._port = MidiInPort()
         self.label = label  # human-readable name for logging / status
 
@@ -39,48 +49,50 @@ class MidiInputController:
         self._port.close()
 
     def on_midi(self, event, data=None):
-        """rtmidi callback forwarding MIDI into routed slots."""
+        """rtmidi callback forwarding MIDI into routed slots.
+
+        Slots come from the engine's compiled route table (see
+        ``core.routing``).  Events are forwarded as raw ``(status,
+        data1[, data2])`` tuples, with the slot's transpose applied to
+        notes; a note-on with velocity 0 becomes a note-off.  A CC bound
+        in the control map is consumed by its target.
+        """
         del data
 
         raw, _dt = event
-        if not raw or not HAS_MIDO:
+        if not raw:
             return
 
         status = raw[0]
         channel = status & 0x0F
-        msg_type = status & 0xF0
-
-        slot_index = self._engine.channel_map.get(channel)
-        if slot_index is None:
-            logger.debug("[%s] ch %d raw=%s dropped (unrouted)",
-                         self.label, channel + 1, raw)
-            return
+        kind = status & 0xF0
+        table = self._engine.routes
+        sink = self._sink
+        size = len(raw)
 
         try:
-            msg = None
-            if msg_type == 0x90 and len(raw) >= 3:
-                note, velocity = raw[1], raw[2]
-                if velocity == 0:
-                    msg = mido.Message("note_off", note=note, channel=channel)
+            if kind in _NOTE_KINDS and size >= 3:
+                velocity = raw[2]
+                cell = channel << 7 | raw[1]
+                if kind == NOTE_ON and velocity:
+                    mask = table.masks[cell]
+                    if table.zones[cell] is not None:
+                        mask = table.note_on_mask(cell, velocity)
                 else:
-                    msg = mido.Message("note_on", note=note, velocity=velocity,
-                                       channel=channel)
-            elif msg_type == 0x80 and len(raw) >= 3:
-                msg = mido.Message("note_off", note=raw[1], channel=channel)
-            elif msg_type == 0xB0 and len(raw) >= 3:
-                msg = mido.Message("control_change", control=raw[1],
-                                   value=raw[2], channel=channel)
-            elif msg_type == 0xE0 and len(raw) >= 3:
-                value = (raw[2] << 7) | raw[1]
-                msg = mido.Message("pitchwheel", pitch=value - 8192,
-                                   channel=channel)
-            elif msg_type == 0xD0 and len(raw) >= 2:
-                msg = mido.Message("aftertouch", value=raw[1], channel=channel)
-
-            if msg is not None:
-                self._engine.enqueue_midi(slot_index, msg)
-                logger.debug("[%s] ch %d -> slot %d: %s",
-                             self.label, channel + 1, slot_index + 1, msg)
+                    status = NOTE_OFF | channel
+                    mask = table.off_masks[cell]
+                notes = table.notes
+                for slot_index in MASK_SLOTS[mask]:
+                    sink(slot_index, (status, notes[slot_index][cell], velocity))
+            elif kind in _THREE_BYTE and size >= 3:
+                if (kind == CONTROL_CHANGE and self._mapper is not None
+                        and self._mapper.handle_cc(raw[1], raw[2])):
+                    return
+                for slot_index in MASK_SLOTS[table.channel_masks[channel]]:
+                    sink(slot_index, (status, raw[1], raw[2]))
+            elif kind == CHANNEL_PRESSURE and size >= 2:
+                for slot_index in MASK_SLOTS[table.channel_masks[channel]]:
+                    sink(slot_index, (status, raw[1]))
             else:
                 logger.debug("[%s] ch %d raw=%s ignored",
                              self.label, channel + 1, raw)
@@ -0,0 +1,231 @@
+"""Control-surface drivers: declarative device profiles on a shared core.
+
+A ``DeviceProfile`` describes a controller as data:
+
+  controls       -- control name -> ("cc" | "note", number)
+  pages          -- per page, control name -> target words ("gain 1",
+                    "knob 3 2", see ``controllers.control_map``)
+  leds           -- "mute <slot>" / "solo <slot>" -> (status, number,
+                    on value, off value) of the LED showing that state
+  page_buttons   -- (previous, next) control names, if the device pages
+  soft_takeover  -- faders and knobs pick a target up instead of jumping
+
+Profiles live one per module in ``controllers.drivers`` (a ``PROFILE``
+attribute).  ``driver_names`` lists that package without importing it,
+and ``load_profile`` imports only the driver asked for.
+
+``SurfaceDriver`` runs any profile.  Each page is a control-map surface
+-- ``<driver>`` for page 1, ``<driver>/2`` for page 2, ... -- so pages can
+be remapped and learned like any other surface.  The rtmidi callback
+checks the page-button arrays, then indexes the current page's compiled
+arrays and calls one handler; nothing is parsed or built per event.
+LEDs go through ``controllers.leds``, off the input thread.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import pkgutil
+from dataclasses import dataclass, field
+from typing import Optional
+
+from controllers.control_map import NUM_CONTROLS, ControlMap, ControlMaps, parse_target
+from controllers.leds import LedFeedback
+from core.midi import MidiInPort, MidiOutPort
+from core.models import NUM_SLOTS
+
+logger = logging.getLogger(__name__)
+
+DRIVERS_PACKAGE = "controllers.drivers"
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    """Controls, default pages and LEDs of one controller model."""
+    name: str
+    title: str
+    controls: dict[str, tuple[str, int]]
+    pages: tuple[dict[str, str], ...]
+    leds: dict[str, tuple[int, int, int, int]] = field(default_factory=dict)
+    page_buttons: Optional[tuple[str, str]] = None
+    soft_takeover: bool = False
+
+    def surface(self, page: int) -> str:
+        """Control-map surface name of a 0-based page."""
+        return self.name if page == 0 else f"{self.name}/{page + 1}"
+
+    def page_map(self, page: int) -> ControlMap:
+        """The default control map of a 0-based page."""
+        control_map = ControlMap(self.surface(page))
+        for control, words in self.pages[page].items():
+            kind, number = self.controls[control]
+            control_map.bindings(kind)[number] = parse_target(words.split())
+        return control_map
+
+
+def driver_names() -> list[str]:
+    """Drivers in ``controllers.drivers``; none of them is imported."""
+    package = importlib.import_module(DRIVERS_PACKAGE)
+    return sorted(info.name for info in pkgutil.iter_modules(package.__path__)
+                  if not info.name.startswith("_"))
+
+
+def load_profile(name: str) -> DeviceProfile:
+    """Import one driver module and return its ``PROFILE``."""
+    names = driver_names()
+    if name not in names:
+        raise ValueError(f"unknown driver '{name}'; available: {', '.join(names)}")
+    return importlib.import_module(f"{DRIVERS_PACKAGE}.{name}").PROFILE
+
+
+class SurfaceDriver:
+    """Run a ``DeviceProfile``: ports, paged control maps and LEDs."""
+
+    def __init__(self, engine, profile: DeviceProfile,
+                 control_maps: Optional[ControlMaps] = None):
+        self._engine = engine
+        self.profile = profile
+        self._in_port = MidiInPort()
+        self._out_port = MidiOutPort()
+        if control_maps is None:
+            control_maps = ControlMaps(engine)
+        self.control_maps = control_maps
+
+        # One mapper per page; physical control positions are shared.
+        positions = [-1] * NUM_CONTROLS
+        self.mappers = []
+        for page in range(len(profile.pages)):
+            mapper = control_maps.add_surface(profile.surface(page), profile.page_map(page),
+                                              profile.soft_takeover)
+            mapper.on_toggle = self._set_slot_leds
+            mapper.positions = positions
+            self.mappers.append(mapper)
+        self.page = 0
+        self.mapper = self.mappers[0]
+
+        # Page buttons: CC / note number -> page step (0: not a page button).
+        self._page_cc = [0] * NUM_CONTROLS
+        self._page_note = [0] * NUM_CONTROLS
+        if profile.page_buttons is not None:
+            for step, control in zip((-1, 1), profile.page_buttons):
+                kind, number = profile.controls[control]
+                (self._page_cc if kind == "cc" else self._page_note)[number] = step
+
+        # slot -> [(slot attribute, status, number, on, off)]
+        self._slot_leds: list[list[tuple[str, int, int, int, int]]] = [
+            [] for _ in range(NUM_SLOTS)]
+        for key, (status, number, on, off) in profile.leds.items():
+            target = parse_target(key.split())
+            if target.kind not in ("mute", "solo"):
+                raise ValueError(f"{profile.name}: LED '{key}' must show mute or solo")
+            attr = "muted" if target.kind == "mute" else "solo"
+            self._slot_leds[target.slot].append((attr, status, number, on, off))
+        self.leds = LedFeedback(self._out_port, f"{profile.name}-LED")
+
+    @property
+    def input_port_name(self) -> Optional[str]:
+        return self._in_port.name
+
+    @property
+    def output_port_name(self) -> Optional[str]:
+        return self._out_port.name
+
+    @property
+    def port_name(self) -> Optional[str]:
+        return self.input_port_name
+
+    # -- pages ---------------------------------------------------------------
+
+    def set_page(self, page: int):
+        """Switch to a 0-based page."""
+        if not 0 <= page < len(self.mappers):
+            raise ValueError(f"{self.profile.name} page must be 1-{len(self.mappers)}")
+        self.page = page
+        self.mapper = self.mappers[page]
+        logger.info("[%s] page %d", self.profile.name, page + 1)
+
+    def _step_page(self, step: int):
+        page = self.page + step
+        if 0 <= page < len(self.mappers):
+            self.set_page(page)
+
+    # -- ports ---------------------------------------------------------------
+
+    def open_input(self, port_index: int) -> str:
+        return self._in_port.open_input_port(port_index, self.on_midi)
+
+    def open_output(self, port_index: int) -> str:
+        name = self._out_port.open_output_port(port_index)
+        self._start_leds()
+        return name
+
+    def open_virtual_output(self, name: Optional[str] = None) -> str:
+        port_name = self._out_port.open_virtual_output_port(
+            name or f"vcpi-{self.profile.name}-LED")
+        self._start_leds()
+        return port_name
+
+    def close_input(self):
+        self._in_port.close()
+
+    def close_output(self):
+        self.leds.stop()
+        self._out_port.close()
+
+    def close(self):
+        self.close_input()
+        self.close_output()
+
+    # -- LEDs ----------------------------------------------------------------
+
+    def _start_leds(self):
+        # The hardware may show anything: repaint every LED from slot state.
+        self.leds.reset()
+        self.refresh_leds()
+        self.leds.start()
+
+    def _set_slot_leds(self, slot_index: int):
+        slot = self._engine.slots[slot_index]
+        for attr, status, number, on, off in self._slot_leds[slot_index]:
+            self.leds.set(status, number, on if slot and getattr(slot, attr) else off)
+
+    def refresh_leds(self, slot_indices: Optional[list[int]] = None):
+        """Bring LEDs in line with slot state; never blocks on MIDI."""
+        if slot_indices is None:
+            indices = range(NUM_SLOTS)
+        else:
+            indices = slot_indices
+        for idx in indices:
+            if 0 <= idx < NUM_SLOTS:
+                self._set_slot_leds(idx)
+
+    # -- input ---------------------------------------------------------------
+
+    def on_midi(self, event, data=None):
+        """rtmidi callback: page buttons, then the current page's map."""
+        del data
+
+        raw, _dt = event
+        if not raw:
+            return
+
+        msg_type = raw[0] & 0xF0
+
+        if msg_type == 0xB0 and len(raw) >= 3:
+            logger.debug("CC %d value=%d", raw[1], raw[2])
+            step = self._page_cc[raw[1]]
+            if step:
+                if raw[2]:
+                    self._step_page(step)
+            elif not self.mapper.handle_cc(raw[1], raw[2]):
+                logger.debug("unmapped CC %d ignored", raw[1])
+        elif msg_type == 0x90 and len(raw) >= 3 and raw[2] > 0:
+            logger.debug("note %d velocity=%d", raw[1], raw[2])
+            step = self._page_note[raw[1]]
+            if step:
+                self._step_page(step)
+            elif not self.mapper.handle_note(raw[1], raw[2]):
+                logger.debug("unmapped note %d ignored", raw[1])
+        else:
+            logger.debug("raw=%s ignored", raw)
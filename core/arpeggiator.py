@@ -0,0 +1,193 @@
+"""Per-slot arpeggiator between MIDI input routing and the engine.
+
+When a slot has an arpeggiator, note-ons and note-offs routed to it from
+MIDI inputs update its set of held keys instead of reaching the engine;
+everything else (CCs, pitch bend, ...) passes straight through.
+
+Each time the held keys change the arpeggiator compiles them into a
+``CompiledPattern`` -- one note per step at the arp rate, in the chosen
+order -- and hands it to the sequencer, which plays it like a bank: on
+the same clock (thread or audio), the same Link timeline, with note-offs
+on the shared scheduler.  The pattern is rotated so the first note of
+the new order lands on the next step.  Random mode draws its order once
+per change (``RANDOM_STEPS`` steps), so nothing is decided at play time.
+The sequencer starts when an arpeggiator is enabled and keeps running
+between chords; key events only swap the pattern.
+
+Modes:
+  up      -- lowest to highest
+  down    -- highest to lowest
+  random  -- a random held key every step
+  order   -- the order the keys were pressed
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional, TYPE_CHECKING
+
+from core.midi import NOTE_OFF, NOTE_ON, raw_bytes
+from core.models import NUM_SLOTS
+from core.sequencer import (
+    BAR_TICKS, DEFAULT_GATE, CompiledPattern, _check_gate, _parse_resolution,
+)
+
+if TYPE_CHECKING:
+    from core.host import VcpiCore
+
+logger = logging.getLogger(__name__)
+
+ARP_MODES = ("up", "down", "random", "order")
+DEFAULT_ARP_RATE = 16  # steps per bar
+RANDOM_STEPS = 32
+
+
+@dataclass
+class Arpeggiator:
+    """Settings and held keys of one slot's arpeggiator."""
+    mode: str = "up"
+    rate: int = DEFAULT_ARP_RATE
+    gate: float = DEFAULT_GATE
+    held: dict[int, int] = field(default_factory=dict)  # note -> velocity, press order
+
+    def order(self, rng: random.Random) -> list[tuple[int, int]]:
+        """(note, velocity) for one loop of the pattern."""
+        keys = list(self.held.items())
+        if self.mode == "up":
+            return sorted(keys)
+        if self.mode == "down":
+            return sorted(keys, reverse=True)
+        if self.mode == "random":
+            if len(keys) < 2:
+                return keys
+            return [rng.choice(keys) for _ in range(RANDOM_STEPS)]
+        return keys
+
+    def compile(self, start_tick: int, rng: random.Random) -> Optional[CompiledPattern]:
+        """Compile the held keys; the first note plays at *start_tick*."""
+        notes = self.order(rng)
+        if not notes:
+            return None
+        step = BAR_TICKS // self.rate
+        length = step * len(notes)
+        dur = max(1, int(round(step * self.gate)))
+        events = sorted(((start_tick + k * step) % length, note, vel)
+                        for k, (note, vel) in enumerate(notes))
+        ticks, keys, vels = zip(*events)
+        return CompiledPattern(length, ticks, keys, vels, (dur,) * len(events))
+
+
+def _check_mode(mode: str) -> str:
+    key = str(mode).strip().lower()
+    if key not in ARP_MODES:
+        raise ValueError(f"unknown arp mode '{mode}' (use {', '.join(ARP_MODES)})")
+    return key
+
+
+class ArpRouter:
+    """Routes slot-bound MIDI through the slot's arpeggiator, if it has one.
+
+    ``enqueue(slot, msg)`` has the signature of
+    ``AudioEngine.enqueue_midi`` so MIDI inputs can use either.
+    """
+
+    def __init__(self, host: VcpiCore):
+        self._host = host
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self.arps: dict[int, Arpeggiator] = {}
+
+    def _slot(self, slot_index: int) -> int:
+        if not 0 <= slot_index < NUM_SLOTS:
+            raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+        return slot_index
+
+    # -- settings ------------------------------------------------------------
+
+    def configure(self, slot_index: int, *, mode=None, rate=None, gate=None) -> Arpeggiator:
+        """Enable or change a slot's arpeggiator; unset arguments are kept.
+
+        *rate* is steps per bar (``16`` or ``"1/16"``).
+        """
+        self._slot(slot_index)
+        mode = _check_mode(mode) if mode is not None else None
+        if rate is not None:
+            rate = _parse_resolution(rate)
+            if rate is None:
+                raise ValueError("arp rate must be steps per bar, e.g. 16 or 1/16")
+        gate = _check_gate(gate) if gate is not None else None
+        with self._lock:
+            arp = self.arps.get(slot_index)
+            if arp is None:
+                arp = self.arps[slot_index] = Arpeggiator()
+            if mode is not None:
+                arp.mode = mode
+            if rate is not None:
+                arp.rate = rate
+            if gate is not None:
+                arp.gate = gate
+            self._update(slot_index, arp)
+        # The sequencer runs from here on, so key presses never start it.
+        self._host.sequencer.enable_arp(slot_index)
+        logger.info("[ARP] slot %d: %s 1/%d gate %g", slot_index + 1,
+                    arp.mode, arp.rate, arp.gate)
+        return arp
+
+    def disable(self, slot_index: int):
+        """Remove a slot's arpeggiator; held keys are released."""
+        self._slot(slot_index)
+        with self._lock:
+            arp = self.arps.pop(slot_index, None)
+        if arp is not None:
+            self._host.sequencer.disable_arp(slot_index)
+            logger.info("[ARP] slot %d: off", slot_index + 1)
+
+    # -- MIDI path -----------------------------------------------------------
+
+    def enqueue(self, slot_index: int, msg):
+        """Feed note messages to the slot's arpeggiator, pass the rest on."""
+        arp = self.arps.get(slot_index)
+        if arp is not None:
+            data = raw_bytes(msg)
+            kind = data[0] & 0xF0 if len(data) == 3 else None
+            if kind in (NOTE_ON, NOTE_OFF):
+                with self._lock:
+                    arp.held.pop(data[1], None)
+                    if kind == NOTE_ON and data[2] > 0:
+                        arp.held[data[1]] = data[2]
+                    self._update(slot_index, arp)
+                return
+        self._host.engine.enqueue_midi(slot_index, msg)
+
+    def _update(self, slot_index: int, arp: Arpeggiator):
+        sequencer = self._host.sequencer
+        if not arp.held:
+            sequencer.set_arp(slot_index, None)
+            return
+        step = BAR_TICKS // arp.rate
+        pattern = arp.compile(sequencer.next_step_tick(step), self._rng)
+        sequencer.set_arp(slot_index, pattern)
+
+    # -- persistence ---------------------------------------------------------
+
+    def snapshot(self) -> dict[str, Any]:
+        """Settings by 1-based slot, for session persistence."""
+        return {str(slot + 1): {"mode": arp.mode, "rate": arp.rate, "gate": arp.gate}
+                for slot, arp in sorted(self.arps.items())}
+
+    def restore(self, data: dict) -> list[str]:
+        """Restore settings; returns error messages for entries that failed."""
+        errors = []
+        for slot in list(self.arps):
+            self.disable(slot)
+        for key, entry in data.items():
+            try:
+                self.configure(int(key) - 1, mode=entry.get("mode", "up"),
+                               rate=entry.get("rate", DEFAULT_ARP_RATE),
+                               gate=entry.get("gate", DEFAULT_GATE))
+            except (AttributeError, TypeError, ValueError) as exc:
+                errors.append(f"arp slot {key}: {exc}")
+        return errors
@@ -0,0 +1,147 @@
+"""Rolling capture of the MIDI reaching the slots, with .mid export.
+
+Every event queued for a slot -- from MIDI inputs, the sequencer, the
+arpeggiators and scheduled note-offs, all of which go through
+``AudioEngine.enqueue_midi`` -- and every event from the audio-clock
+sequencer is written to a ring buffer as ``(timestamp_ns, slot, raw
+bytes)``.  The buffer is two preallocated arrays: monotonic nanoseconds
+and a 32-bit word packing slot, status and both data bytes.  Recording
+an event is a counter step and two array stores; nothing is allocated
+for a raw-tuple event and nothing blocks.  When the buffer is full the
+oldest events are overwritten and counted as overflow.
+
+``write_midi_file`` turns a capture into a type-1 Standard MIDI File
+with one track per slot, at the tempo it is given.
+"""
+
+from __future__ import annotations
+
+import itertools
+import struct
+from array import array
+from pathlib import Path
+from time import monotonic_ns
+from typing import Optional
+
+from core.midi import raw_bytes
+
+DEFAULT_CAPACITY = 1 << 16  # events
+MAX_CAPACITY = 1 << 22
+PPQ = 480  # ticks per quarter note in exported files
+
+_TWO_BYTE = frozenset((0xC0, 0xD0))  # program change, channel pressure
+_SLOT_LIMIT = 0x100  # slots fit the top byte of a packed event
+
+
+class MidiCapture:
+    """Fixed-size ring buffer of ``(timestamp_ns, slot, raw bytes)``."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = True):
+        capacity = int(capacity)
+        if not 1 <= capacity <= MAX_CAPACITY:
+            raise ValueError(f"capture size must be 1-{MAX_CAPACITY} events")
+        self.capacity = capacity
+        self.enabled = enabled
+        self._times = array("q", bytes(8 * capacity))
+        self._events = array("I", bytes(4 * capacity))
+        self._counter = itertools.count()
+        self.written = 0  # events recorded since the last clear
+
+    def record(self, slot_index: int, msg, at_ns: Optional[int] = None):
+        """Store one event; called from input, sequencer and audio threads.
+
+        Events for slots that cannot be packed are dropped rather than
+        raising on a real-time thread.
+        """
+        data = msg if type(msg) is tuple else raw_bytes(msg)
+        size = len(data)
+        if size < 2 or data[0] >= 0xF0:  # channel messages only
+            return
+        if not 0 <= slot_index < _SLOT_LIMIT:
+            return
+        n = next(self._counter)  # atomic under the GIL
+        i = n % self.capacity
+        self._times[i] = monotonic_ns() if at_ns is None else at_ns
+        self._events[i] = (slot_index << 24 | (data[0] & 0xFF) << 16
+                           | (data[1] & 0x7F) << 8 | (data[2] & 0x7F if size > 2 else 0))
+        self.written = n + 1
+
+    def clear(self):
+        self._counter = itertools.count()
+        self.written = 0
+
+    def events(self) -> list[tuple[int, int, tuple[int, ...]]]:
+        """Held events as ``(timestamp_ns, slot, bytes)``, oldest first."""
+        end = self.written
+        out = []
+        for n in range(max(0, end - self.capacity), end):
+            i = n % self.capacity
+            packed = self._events[i]
+            status = packed >> 16 & 0xFF
+            if status & 0xF0 in _TWO_BYTE:
+                data: tuple[int, ...] = (status, packed >> 8 & 0x7F)
+            else:
+                data = (status, packed >> 8 & 0x7F, packed & 0x7F)
+            out.append((self._times[i], packed >> 24, data))
+        out.sort(key=lambda event: event[0])
+        return out
+
+    def stats(self) -> dict[str, object]:
+        written = self.written
+        return {
+            "enabled": self.enabled,
+            "capacity": self.capacity,
+            "events": min(written, self.capacity),
+            "overflow": max(0, written - self.capacity),
+        }
+
+
+# -- Standard MIDI File export -------------------------------------------------
+
+def _vlq(value: int) -> bytes:
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _track(chunks: list[bytes]) -> bytes:
+    body = b"".join(chunks) + b"\x00\xff\x2f\x00"  # end of track
+    return b"MTrk" + struct.pack(">I", len(body)) + body
+
+
+def _meta_name(name: str) -> bytes:
+    text = name.encode("utf-8")
+    return b"\x00\xff\x03" + _vlq(len(text)) + text
+
+
+def write_midi_file(path: Path, events: list[tuple[int, int, tuple[int, ...]]],
+                    bpm: float, names: Optional[dict[int, str]] = None) -> int:
+    """Write captured *events* as a type-1 .mid, one track per slot.
+
+    Time starts at the first event.  Returns the number of tracks with
+    events.
+    """
+    names = names or {}
+    tempo = round(60_000_000 / bpm)
+    conductor = [_meta_name("vcpi capture"),
+                 b"\x00\xff\x51\x03" + tempo.to_bytes(3, "big")]
+    tracks: dict[int, list[bytes]] = {}
+    last_tick: dict[int, int] = {}
+    start = events[0][0] if events else 0
+    ticks_per_ns = bpm * PPQ / 60e9
+    for at_ns, slot, data in events:
+        tick = round((at_ns - start) * ticks_per_ns)
+        chunks = tracks.get(slot)
+        if chunks is None:
+            label = f"Slot {slot + 1}" + (f": {names[slot]}" if slot in names else "")
+            chunks = tracks[slot] = [_meta_name(label)]
+            last_tick[slot] = 0
+        chunks.append(_vlq(tick - last_tick[slot]) + bytes(data))
+        last_tick[slot] = tick
+    header = b"MThd" + struct.pack(">IHHH", 6, 1, len(tracks) + 1, PPQ)
+    data = header + _track(conductor) + b"".join(_track(tracks[s]) for s in sorted(tracks))
+    Path(path).write_bytes(data)
+    return len(tracks)
@@ -0,0 +1,221 @@
+"""Persistent index of the built-in sample packs.
+
+The catalog keeps per-file metadata (rate, channels, length) and a small
+min/max peak overview for every WAV under ``sampler/samples`` in a JSON
+index next to the packs (``.catalog.json``).  Lookups are served from
+memory; ``refresh()`` only re-reads files whose mtime or size changed, and
+skips the per-file pass entirely when no pack directory has changed.
+
+Kept free of the audio stack so the CLI client can use it for tab
+completion; numpy is imported only when peaks have to be computed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 2
+CATALOG_INDEX_NAME = ".catalog.json"
+PEAK_BINS = 128
+
+
+def _scan_wav(path: Path) -> dict[str, Any]:
+    """Read header metadata and a min/max peak overview for one WAV."""
+    from sampler.wav import read_wav_with_info  # numpy only when scanning
+
+    audio, info = read_wav_with_info(path)
+    meta: dict[str, Any] = {
+        "sample_rate": info.sample_rate,
+        "channels": info.channels,
+        "sample_width": info.sample_width,
+        "encoding": info.encoding,
+        "frames": info.frames,
+        "duration": round(info.frames / info.sample_rate, 4) if info.sample_rate else 0.0,
+    }
+    if info.root_note is not None:
+        meta["root_note"] = info.root_note
+    if info.loops:
+        meta["loops"] = [[loop.start, loop.end] for loop in info.loops]
+    meta["peaks"] = _peaks(audio)
+    return meta
+
+
+def _peaks(audio) -> dict[str, list[float]]:
+    frames = int(audio.shape[1])
+    bins = max(1, min(PEAK_BINS, frames))
+    usable = frames - frames % bins
+    chunks = audio[:, :usable].reshape(audio.shape[0], bins, -1)
+    lows = chunks.min(axis=(0, 2))
+    highs = chunks.max(axis=(0, 2))
+    return {
+        "min": [round(float(v), 4) for v in lows],
+        "max": [round(float(v), 4) for v in highs],
+    }
+
+
+class SampleCatalog:
+    """Incrementally refreshed index of ``<root>/<pack>/<sample>.wav``."""
+
+    def __init__(self, root: Path, index_path: Optional[Path] = None):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else self.root / CATALOG_INDEX_NAME
+        self._lock = threading.Lock()
+        self._packs: dict[str, dict[str, Any]] = {}
+        self._root_mtime: Optional[int] = None
+        self._loaded = False
+
+    # -- index file ----------------------------------------------------------
+
+    def _load_index(self):
+        self._loaded = True
+        try:
+            data = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+            return
+        packs = data.get("packs")
+        if isinstance(packs, dict):
+            self._packs = packs
+
+    def _save_index(self):
+        data = {"version": CATALOG_VERSION, "packs": self._packs}
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp, self.index_path)
+        except OSError:
+            # Read-only installs still get the in-memory index.
+            logger.debug("[catalog] cannot write %s", self.index_path, exc_info=True)
+
+    # -- refresh -------------------------------------------------------------
+
+    def refresh(self, full: bool = False) -> bool:
+        """Bring the index up to date; return True if anything changed.
+
+        Without *full*, packs whose directory mtime is unchanged are
+        trusted as-is, which catches added, removed and renamed files.
+        *full* also stats every file to catch in-place rewrites.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load_index()
+            try:
+                root_mtime = self.root.stat().st_mtime_ns
+                resolved_root = self.root.resolve()
+            except OSError:
+                changed = bool(self._packs)
+                self._packs = {}
+                return changed
+
+            changed = False
+            if full or root_mtime != self._root_mtime:
+                pack_dirs = {
+                    entry.name: entry
+                    for entry in self.root.iterdir()
+                    if entry.is_dir() and not entry.name.startswith(".")
+                }
+                for name in set(self._packs) - set(pack_dirs):
+                    del self._packs[name]
+                    changed = True
+                self._root_mtime = root_mtime
+            else:
+                pack_dirs = {name: self.root / name for name in self._packs}
+
+            for name, pack_dir in pack_dirs.items():
+                changed |= self._refresh_pack(name, pack_dir, resolved_root, full)
+
+            if changed:
+                self._save_index()
+            return changed
+
+    def _refresh_pack(self, name: str, pack_dir: Path, root: Path, full: bool) -> bool:
+        try:
+            dir_mtime = pack_dir.stat().st_mtime_ns
+            pack_dir.resolve().relative_to(root)
+        except (OSError, ValueError):
+            return self._packs.pop(name, None) is not None
+
+        pack = self._packs.get(name)
+        if pack is not None and pack.get("mtime_ns") == dir_mtime and not full:
+            return False
+
+        old_samples = pack.get("samples", {}) if pack else {}
+        samples: dict[str, dict[str, Any]] = {}
+        changed = pack is None or pack.get("mtime_ns") != dir_mtime
+        for wav in pack_dir.glob("*.wav"):
+            try:
+                if not wav.is_file():
+                    continue
+                wav.resolve().relative_to(root)
+                stat = wav.stat()
+            except (OSError, ValueError):
+                continue
+            cached = old_samples.get(wav.name)
+            if (cached is not None and cached.get("mtime_ns") == stat.st_mtime_ns
+                    and cached.get("size") == stat.st_size):
+                samples[wav.name] = cached
+                continue
+            entry: dict[str, Any] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            try:
+                entry.update(_scan_wav(wav))
+            except Exception as exc:
+                entry["error"] = str(exc) or type(exc).__name__
+            samples[wav.name] = entry
+            changed = True
+
+        if set(samples) != set(old_samples):
+            changed = True
+        self._packs[name] = {"mtime_ns": dir_mtime, "samples": samples}
+        return changed
+
+    # -- lookups -------------------------------------------------------------
+
+    def packs(self) -> list[str]:
+        with self._lock:
+            return sorted(self._packs, key=str.lower)
+
+    def entries(self, pack: str) -> list[dict[str, Any]]:
+        """Sample entries of *pack* (without peaks), sorted by file name."""
+        with self._lock:
+            samples = self._packs.get(pack, {}).get("samples", {})
+            out = []
+            for filename in sorted(samples, key=str.lower):
+                meta = samples[filename]
+                item = {"name": Path(filename).stem, "filename": filename}
+                for key in ("sample_rate", "channels", "frames", "duration"):
+                    if key in meta:
+                        item[key] = meta[key]
+                out.append(item)
+            return out
+
+    def samples(self, pack: str) -> list[str]:
+        return sorted(entry["name"] for entry in self.entries(pack))
+
+    def entry(self, pack: str, sample: str) -> Optional[dict[str, Any]]:
+        """Full metadata (including peaks) for one sample, or None."""
+        with self._lock:
+            samples = self._packs.get(pack, {}).get("samples", {})
+            meta = samples.get(f"{sample}.wav")
+            return dict(meta) if meta is not None else None
+
+
+_catalogs: dict[Path, SampleCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def catalog_for(root: Path) -> SampleCatalog:
+    """Shared catalog instance for a samples root (one per process)."""
+    key = Path(root).expanduser().resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = SampleCatalog(key)
+        return catalog
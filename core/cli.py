@@ -9,13 +9,17 @@ from __future__ import annotations
 import cmd
 import inspect
 import os
+import time
 from pathlib import Path
 
+from controllers.control_map import parse_target
+from controllers.surface import driver_names
 from core.deps import HAS_PEDALBOARD, HAS_LINK, HAS_RTMIDI, HAS_MIDO, HAS_SOUNDDEVICE, sd
+from core.catalog import catalog_for
 from core.host import VcpiCore
 from core.midi import list_midi_input_ports, list_midi_output_ports
 from core.models import NUM_SLOTS
-from core.sequencer import NUM_SEQ_BANKS, midi_to_note_name
+from core.sequencer import NUM_SEQ_BANKS, format_step, midi_to_note_name, parse_drum_note
 from graph.signal_flow import render_signal_flow
 from graph.plugin_info import render_plugin_info
 from graph.knobs import render_knobs
@@ -44,6 +48,43 @@ def _slot_to_internal(user_slot: int) -> int:
     return user_slot - 1
 
 
+def _seq_line(bank) -> str:
+    """One-line description of a sequence bank for ``seq`` listings."""
+    if bank.is_drum:
+        k = len(bank.lanes)
+        steps = f"drum kit, {k} lane{'s' if k != 1 else ''}"
+        n = max(len(lane.hits) for lane in bank.lanes)
+    else:
+        steps = " ".join(format_step(s) for s in bank.steps)
+        n = len(bank.steps)
+    if bank.resolution is None:
+        bars = bank.bars or 1
+        timing = f"{n} step{'s' if n != 1 else ''} over {bars} bar{'s' if bars > 1 else ''}"
+    else:
+        beats = bank.length_beats
+        timing = f"1/{bank.resolution}, loop {beats:g} beat{'s' if beats != 1 else ''}"
+    extras = []
+    if bank.velocity != 100:
+        extras.append(f"vel {bank.velocity}")
+    if bank.gate != 0.9:
+        extras.append(f"gate {bank.gate:g}")
+    if bank.is_drum and bank.accent != 127:
+        extras.append(f"accent {bank.accent}")
+    if extras:
+        timing += ", " + ", ".join(extras)
+    link = f" -> slot {bank.linked_slot + 1}" if bank.linked_slot is not None else ""
+    return f"{steps}  ({timing}){link}"
+
+
+def _lane_lines(bank) -> list[str]:
+    """One line per drum lane of *bank*, for ``seq`` listings."""
+    return [
+        f"    lane {li + 1}: slot {lane.slot + 1} {midi_to_note_name(lane.note)} "
+        f"({lane.note})  {lane.hits}{'  [muted]' if lane.muted else ''}"
+        for li, lane in enumerate(bank.lanes)
+    ]
+
+
 def _ch_to_internal(user_ch: int) -> int:
     """Convert 1-based user MIDI channel to 0-based, with validation."""
     if not 1 <= user_ch <= 16:
@@ -51,6 +92,37 @@ def _ch_to_internal(user_ch: int) -> int:
     return user_ch - 1
 
 
+def _parse_range(text: str, parse) -> tuple[int, int]:
+    """``lo-hi`` (or a single value) parsed with *parse*."""
+    low, sep, high = text.partition("-")
+    if not sep:
+        value = parse(text)
+        return value, value
+    return parse(low), parse(high)
+
+
+def _parse_route_add(parts: list[str]) -> dict:
+    """Keyword arguments for ``add_route_rule`` from ``midi route add`` args."""
+    if len(parts) < 2 or len(parts) % 2:
+        raise ValueError("usage: midi route add <ch> <slot[,slot...]> "
+                         "[notes <lo>-<hi>] [vel <lo>-<hi>] [transpose <n>]")
+    kwargs: dict = {
+        "midi_channel": _ch_to_internal(int(parts[0])),
+        "slot_indices": [_slot_to_internal(int(s)) for s in parts[1].split(",") if s],
+    }
+    for key, value in zip(parts[2::2], parts[3::2]):
+        key = key.lower()
+        if key == "notes":
+            kwargs["notes"] = _parse_range(value, parse_drum_note)
+        elif key in ("vel", "velocity"):
+            kwargs["velocities"] = _parse_range(value, int)
+        elif key == "transpose":
+            kwargs["transpose"] = int(value)
+        else:
+            raise ValueError(f"unknown route option '{key}' (use notes, vel, transpose)")
+    return kwargs
+
+
 class HostCLI(cmd.Cmd):
     intro = (
         "\n"
@@ -59,7 +131,7 @@ class HostCLI(cmd.Cmd):
         "Slots are numbered 1-8.  MIDI channels are numbered 1-16."
     )
     prompt = "vcpi> "
-    SLOT_TYPES = ("vst", "wav", "vcv", "fx", "clear")
+    SLOT_TYPES = ("vst", "wav", "pack", "vcv", "fx", "clear")
 
     def __init__(self, host: VcpiCore, stdout=None, owns_host: bool = True):
         super().__init__(stdout=stdout)
@@ -155,6 +227,7 @@ class HostCLI(cmd.Cmd):
         return (
             "slot <1-8> vst <path|vst_name> [name] | "
             "slot <1-8> wav <pack> <sample> [name] | "
+            "slot <1-8> pack <pack> [name] | "
             "slot <1-8> vcv <patch_name[.vcv]> [name] | "
             "slot <1-8|master> fx <path|vst_name> [name] | "
             "slot <1-8> clear | "
@@ -272,28 +345,18 @@ class HostCLI(cmd.Cmd):
         return sorted(v for v in values if v.lower().startswith(wanted))
 
     def _sample_pack_names(self) -> list[str]:
-        root = self._samples_root()
-        if not root.exists() or not root.is_dir():
-            return []
-        packs: list[str] = []
-        for entry in root.iterdir():
-            if entry.is_dir() and not entry.name.startswith("."):
-                packs.append(entry.name)
-        return sorted(packs)
+        catalog = catalog_for(self._samples_root())
+        catalog.refresh()
+        return catalog.packs()
 
     def _sample_names(self, pack_name: str) -> list[str]:
         pack = Path(pack_name.strip().strip("/"))
         if pack.is_absolute() or ".." in pack.parts:
             return []
 
-        pack_dir = self._samples_root() / pack
-        if not pack_dir.exists() or not pack_dir.is_dir():
-            return []
-
-        samples: list[str] = []
-        for wav in pack_dir.glob("*.wav"):
-            samples.append(wav.stem)
-        return sorted(samples)
+        catalog = catalog_for(self._samples_root())
+        catalog.refresh()
+        return catalog.samples(pack.as_posix())
 
     def _vcv_patch_names(self) -> list[str]:
         root = self._patches_root()
@@ -368,6 +431,11 @@ class HostCLI(cmd.Cmd):
                 return self._filter_prefix(self._sample_names(args_before[2]), text)
             return []
 
+        if mode == "pack":
+            if arg_index == 2:
+                return self._filter_prefix(self._sample_pack_names(), text)
+            return []
+
         if mode == "fx":
             if arg_index == 2:
                 return self._filter_prefix(["clear", *self._vst_names()], text)
@@ -423,7 +491,7 @@ class HostCLI(cmd.Cmd):
         return self._complete_slot_fx(text, prefix_tokens)
 
     def do_slot(self, arg):
-        """Slot management: slot <1-8> vst <path|name> [name] | slot <1-8> wav <pack> <sample> [name] | slot <1-8> vcv <patch> [name] | slot <1-8|master> fx <path|name> [name] | slot <1-8> clear | slot <1-8|master> fx clear <fx_index>"""
+        """Slot management: slot <1-8> vst <path|name> [name] | slot <1-8> wav <pack> <sample> [name] | slot <1-8> pack <pack> [name] | slot <1-8> vcv <patch> [name] | slot <1-8|master> fx <path|name> [name] | slot <1-8> clear | slot <1-8|master> fx clear <fx_index>"""
         text = arg.strip()
         if not text:
             self._print(f"Usage: {self._slot_usage()}")
@@ -591,6 +659,36 @@ class HostCLI(cmd.Cmd):
             self._print(f"  route with: midi link <channel 1-16> {slot_num}")
             return
 
+        # -- slot <num> pack <pack> [name] -----------------------------------
+        if mode == "pack":
+            rest = text.split(maxsplit=3)
+            if len(rest) < 3:
+                self._print("Usage: slot <1-8> pack <pack> [name]")
+                return
+            pack_name = rest[2].strip().strip("/")
+            display_name = rest[3].strip() if len(rest) > 3 else None
+
+            pack_path = Path(pack_name)
+            if not pack_name or pack_path.is_absolute() or ".." in pack_path.parts:
+                self._print("Error: invalid pack name")
+                return
+
+            try:
+                slot = self.host.load_pack(
+                    idx, str(Path("sampler") / "samples" / pack_path), display_name,
+                )
+            except Exception as e:
+                self._print(f"Error: {e}")
+                return
+
+            keymap = slot.plugin.keymap
+            self._print(f"  slot {slot_num} = {slot.name}")
+            self._print(f"  pack     : {slot.path}")
+            self._print(f"  zones    : {len(keymap.zones)} "
+                        f"(roots {', '.join(str(r) for r in keymap.roots)})")
+            self._print(f"  route with: midi link <channel 1-16> {slot_num}")
+            return
+
         self._print(f"Error: unknown subcommand '{mode}'")
         self._print(f"Usage: {self._slot_usage()}")
 
@@ -796,7 +894,8 @@ class HostCLI(cmd.Cmd):
         if arg.strip():
             self._print("Usage: flow")
             return
-        self._print(render_signal_flow(self.host.engine, self.host.channel_map))
+        self._print(render_signal_flow(self.host.engine, self.host.channel_map,
+                                       self.host.route_rules))
 
     def do_info(self, arg):
         """Show plugin info: info <slot 1-8> | info <slot 1-8> fx <fx_index> | info master <fx_index>"""
@@ -907,16 +1006,19 @@ class HostCLI(cmd.Cmd):
     # -- audio ---------------------------------------------------------------
 
     def do_audio(self, arg):
-        """Audio commands: audio start [device] | audio stop | audio devices
+        """Audio commands: audio start [device] | audio stop | audio devices | audio latency [offset_ms]
 
         Subcommands:
-          audio start [device]  -- start audio engine
-          audio stop            -- stop audio engine
-          audio devices         -- list available output devices
+          audio start [device]     -- start audio engine
+          audio stop               -- stop audio engine
+          audio devices            -- list available output devices
+          audio latency            -- show measured output latency and offset
+          audio latency <ms>       -- extra offset for Link alignment (+-250)
         """
         parts = arg.strip().split()
         if not parts:
-            self._print("Usage: audio start [device] | audio stop | audio devices")
+            self._print("Usage: audio start [device] | audio stop | audio devices "
+                        "| audio latency [offset_ms]")
             return
 
         sub = parts[0]
@@ -933,6 +1035,18 @@ class HostCLI(cmd.Cmd):
         elif sub == "stop":
             self.host.stop_audio()
 
+        elif sub == "latency":
+            engine = self.host.engine
+            if len(parts) > 1:
+                try:
+                    engine.set_latency_offset(float(parts[1]))
+                except ValueError as e:
+                    self._print(f"Error: {e}")
+                    return
+            self._print(f"  output latency {engine.output_latency * 1000.0:.1f} ms"
+                        f" + offset {engine.latency_offset_ms:+.1f} ms"
+                        f" = Link lead {engine.output_delay * 1000.0:.1f} ms")
+
         elif sub == "devices":
             if HAS_SOUNDDEVICE:
                 self._print(sd.query_devices())
@@ -945,7 +1059,7 @@ class HostCLI(cmd.Cmd):
     # -- MIDI (unified) ------------------------------------------------------
 
     def do_midi(self, arg):
-        """MIDI commands: midi ports input | midi ports output | midi input <port> | midi input close <index> | midi link <ch> <slot> | midi cut <ch>
+        """MIDI commands: midi ports input | midi ports output | midi input <port> | midi input close <index> | midi link <ch> <slot> | midi cut <ch> | midi route [add|del|clear] | midi coalesce [<slot> <n>|off] | midi clock [out|in <port> | off] | midi capture [on [events]|off|clear|save <file>]
 
         Subcommands:
           midi ports input       -- list MIDI input ports
@@ -954,13 +1068,34 @@ class HostCLI(cmd.Cmd):
           midi input close <idx> -- close a MIDI input by index
           midi link <ch> <slot>  -- route MIDI channel to slot
           midi cut <ch>          -- remove MIDI channel route
+          midi route             -- list channel links and route rules
+          midi route add <ch> <slot[,slot...]> [notes <lo>-<hi>] [vel <lo>-<hi>] [transpose <n>]
+                                 -- add a split / layer / velocity-zone rule
+          midi route del <n>     -- remove route rule n
+          midi route clear       -- remove all route rules
+          midi coalesce          -- show coalescing and dropped messages
+          midi coalesce <slot> <n>|off
+                                 -- keep n CC/bend/aftertouch values per block
+          midi clock             -- show MIDI clock state and jitter
+          midi clock out <port>  -- send 24 PPQN clock on an output port
+          midi clock in <port>   -- follow tempo/phase from an input port
+          midi clock off         -- stop sending/following clock
+          midi capture           -- show capture buffer use and overflow
+          midi capture on [events] | off
+                                 -- record slot MIDI into a ring buffer (default on)
+          midi capture clear     -- empty the capture buffer
+          midi capture save <file>
+                                 -- write the capture as a multi-track .mid
         """
         parts = arg.strip().split()
         if not parts:
             self._print(
                 "Usage: midi ports input | midi ports output | "
                 "midi input <port> | midi input close <index> | "
-                "midi link <ch> <slot> | midi cut <ch>"
+                "midi link <ch> <slot> | midi cut <ch> | "
+                "midi route [add|del|clear] | midi coalesce [<slot> <n>|off] | "
+                "midi clock [out|in <port> | off] | "
+                "midi capture [on [events]|off|clear|save <file>]"
             )
             return
 
@@ -1042,8 +1177,121 @@ class HostCLI(cmd.Cmd):
             self._print(f"  ch {parts[1]} unlinked")
             return
 
+        # --- midi route [add ... | del <n> | clear] -------------------------
+        if sub == "route":
+            action = parts[1].lower() if len(parts) > 1 else ""
+            try:
+                if action == "add":
+                    rule = self.host.add_route_rule(**_parse_route_add(parts[2:]))
+                    self._print(f"  R{len(self.host.route_rules)}: {rule.describe()}")
+                elif action == "del" and len(parts) == 3:
+                    rule = self.host.remove_route_rule(int(parts[2]) - 1)
+                    self._print(f"  removed: {rule.describe()}")
+                elif action == "clear":
+                    self.host.clear_route_rules()
+                    self._print("  Route rules cleared.")
+                elif not action:
+                    for ch, idx in sorted(self.host.channel_map.items()):
+                        self._print(f"  ch {ch + 1} -> slot {idx + 1}")
+                    for n, rule in enumerate(self.host.route_rules, start=1):
+                        self._print(f"  R{n}: {rule.describe()}")
+                    if not self.host.channel_map and not self.host.route_rules:
+                        self._print("  No MIDI routes.")
+                else:
+                    self._print("Usage: midi route | midi route add <ch> <slot[,slot...]> "
+                                "[notes <lo>-<hi>] [vel <lo>-<hi>] [transpose <n>] | "
+                                "midi route del <n> | midi route clear")
+            except ValueError as e:
+                self._print(f"Error: {e}")
+            return
+
+        # --- midi coalesce [<slot> <n>|off] ---------------------------------
+        if sub == "coalesce":
+            engine = self.host.engine
+            if len(parts) == 1:
+                stats = engine.midi_stats()
+                for idx in range(NUM_SLOTS):
+                    limit = engine.midi_coalesce.get(idx)
+                    dropped = engine.midi_dropped[idx]
+                    if limit or dropped:
+                        setting = f"{limit} per block" if limit else "off"
+                        self._print(f"  slot {idx + 1}: {setting}, {dropped} dropped")
+                if not stats["coalesce"] and not stats["dropped_total"]:
+                    self._print("  MIDI coalescing: off")
+                return
+            if len(parts) != 3:
+                self._print("Usage: midi coalesce [<slot> <n>|off]")
+                return
+            try:
+                idx = _slot_to_internal(int(parts[1]))
+                limit = 0 if parts[2].lower() == "off" else int(parts[2])
+                engine.set_midi_coalesce(idx, limit)
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            setting = f"{limit} value{'s' if limit != 1 else ''} per block" if limit else "off"
+            self._print(f"  slot {idx + 1} coalescing: {setting}")
+            return
+
+        # --- midi clock [out|in <port> | off] -------------------------------
+        if sub == "clock":
+            if len(parts) == 1:
+                stats = self.host.midi_clock.stats()
+                if stats["mode"] is None:
+                    self._print("  MIDI clock: off")
+                    return
+                jit = stats["jitter_ms"]
+                bpm = f", {stats['bpm']:.2f} BPM" if stats["bpm"] is not None else ""
+                self._print(f"  MIDI clock {stats['mode']}: {stats['port']} "
+                            f"({stats['pulses']} pulses{bpm})")
+                self._print(f"  jitter: avg {jit['mean']:.3f} / p99 {jit['p99']:.3f}"
+                            f" / max {jit['max']:.3f} ms")
+                return
+            mode = parts[1].lower()
+            if mode == "off":
+                self.host.stop_midi_clock()
+                self._print("  MIDI clock off")
+                return
+            if mode not in ("out", "in") or len(parts) < 3:
+                self._print("Usage: midi clock [out <port> | in <port> | off]")
+                return
+            try:
+                name = self.host.start_midi_clock(mode, parts[2])
+            except Exception as e:
+                self._print(f"Error: {e}")
+                return
+            arrow = "->" if mode == "out" else "<-"
+            self._print(f"  MIDI clock {mode} {arrow} {name}")
+            return
+
+        # --- midi capture [on [events] | off | clear | save <file>] ---------
+        if sub == "capture":
+            action = parts[1].lower() if len(parts) > 1 else None
+            try:
+                if action == "on" and len(parts) <= 3:
+                    self.host.set_midi_capture(True, parts[2] if len(parts) == 3 else None)
+                elif action == "off" and len(parts) == 2:
+                    self.host.set_midi_capture(False)
+                elif action == "clear" and len(parts) == 2:
+                    self.host.engine.capture.clear()
+                elif action == "save" and len(parts) == 3:
+                    path, count = self.host.save_midi_capture(parts[2])
+                    self._print(f"  Saved {count} events to {path}")
+                    return
+                elif action is not None:
+                    self._print("Usage: midi capture [on [events]|off|clear|save <file>]")
+                    return
+            except (OSError, ValueError) as e:
+                self._print(f"Error: {e}")
+                return
+            stats = self.host.engine.capture.stats()
+            state = "on" if stats["enabled"] else "off"
+            self._print(f"  MIDI capture {state}: {stats['events']}/{stats['capacity']} events, "
+                        f"{stats['overflow']} overwritten")
+            return
+
         self._print(
-            "Unknown midi subcommand. Use: ports, input, link, cut"
+            "Unknown midi subcommand. Use: ports, input, link, cut, route, coalesce, clock, capture"
         )
 
     def do_midimix(self, arg):
@@ -1082,6 +1330,256 @@ class HostCLI(cmd.Cmd):
 
         self._print("Usage: midimix input <port> | midimix output <port>")
 
+    def do_surface(self, arg):
+        """Control-surface drivers: surface | surface open <driver> <port> [out_port] | surface close <driver> | surface page <driver> <n>
+
+        Subcommands:
+          surface                      -- list drivers, their ports and page
+          surface open <driver> <port> [out_port]
+                                       -- open a driver's control input (and LED output)
+          surface close <driver>       -- close a driver's ports
+          surface page <driver> <n>    -- switch a paged driver to page n
+        """
+        parts = arg.strip().split()
+        if not parts:
+            for name in driver_names():
+                surface = self.host.surfaces.get(name)
+                if surface is None:
+                    self._print(f"  {name}: not loaded")
+                    continue
+                ports = f"in {surface.input_port_name or '-'}, out {surface.output_port_name or '-'}"
+                pages = len(surface.mappers)
+                page = f", page {surface.page + 1}/{pages}" if pages > 1 else ""
+                self._print(f"  {name} ({surface.profile.title}): {ports}{page}")
+            return
+
+        sub = parts[0].lower()
+        try:
+            if sub == "open" and len(parts) in (3, 4):
+                self.host.open_surface(parts[1], int(parts[2]))
+                if len(parts) == 4:
+                    self.host.open_surface_out(parts[1], int(parts[3]))
+                return
+            if sub == "close" and len(parts) == 2:
+                self.host.close_surface(parts[1])
+                return
+            if sub == "page" and len(parts) == 3:
+                surface = self.host.surfaces.get(parts[1])
+                if surface is None:
+                    raise ValueError(f"surface '{parts[1]}' is not open")
+                surface.set_page(int(parts[2]) - 1)
+                self._print(f"  {parts[1]}: page {parts[2]}")
+                return
+        except Exception as e:
+            self._print(f"Error: {e}")
+            return
+        self._print("Usage: surface | surface open <driver> <port> [out_port] | "
+                    "surface close <driver> | surface page <driver> <n>")
+
+    def do_devices(self, arg):
+        """Device monitor: devices | devices forget <n>
+
+        Every opened MIDI input, MIDI Mix port, surface port, MIDI clock
+        port and audio output is watched: it is closed when the device
+        goes away and reopened (by fuzzy name) when it comes back.
+        Devices a session could not open are waited for the same way.
+
+        Subcommands:
+          devices            -- watched devices and recent connection events
+          devices forget <n> -- stop reconnecting device n
+        """
+        parts = arg.strip().split()
+        if not parts:
+            watches = self.host.devices.watches()
+            if not watches:
+                self._print("  No devices watched.")
+            for i, watch in enumerate(watches, 1):
+                state = "connected" if watch.connected else "waiting"
+                error = f" ({watch.error})" if watch.error else ""
+                self._print(f"  [{i}] {watch.label}: {watch.name} -- {state}{error}")
+            events = self.host.devices.events()[-8:]
+            if events:
+                self._print("  Recent:")
+                for event in events:
+                    stamp = time.strftime("%H:%M:%S", time.localtime(event.time))
+                    self._print(f"    {stamp} {event.describe()}")
+            return
+
+        if parts[0].lower() == "forget" and len(parts) == 2:
+            try:
+                watch = self.host.forget_device(int(parts[1]) - 1)
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            self._print(f"  No longer watching {watch.label}: {watch.name}")
+            return
+
+        self._print("Usage: devices | devices forget <n>")
+
+    def do_map(self, arg):
+        """Control maps: map | map show [name] | map new <name> [from <name>] | map del <name> | map use <surface> <name> | map learn <surface> | map bind <surface> <target> | map set <name> cc|note <n> <target> | map unset <name> cc|note <n>
+
+        Surfaces are 'input' (all generic MIDI inputs, CCs only), 'midimix',
+        and each page of an opened driver ('launch_control_xl', 'launch_control_xl/2').
+
+        Targets:
+          gain <slot> | master | mute <slot> | solo <slot>
+          param <slot> <name>  -- a plugin parameter by name
+          knob <slot> <n>      -- the slot's n-th plugin parameter
+
+        Examples:
+          map learn input          -- then move a knob on the keyboard
+          map bind input param 2 cutoff
+          map new live from midimix
+          map set live cc 16 param 1 resonance
+          map use midimix live
+        """
+        parts = arg.strip().split()
+        maps = self.host.control_maps
+        sub = parts[0].lower() if parts else "list"
+        try:
+            if sub == "list":
+                active = maps.active()
+                for name, control_map in sorted(maps.presets.items()):
+                    used = [s for s, n in active.items() if n == name]
+                    self._print(f"  {name}: {len(control_map.cc) + len(control_map.note)} bindings"
+                                + (f"  [{', '.join(used)}]" if used else ""))
+                return
+            if sub == "show":
+                name = parts[1] if len(parts) > 1 else maps.active()["midimix"]
+                lines = maps.preset(name).describe()
+                if not lines:
+                    self._print(f"  {name}: no bindings")
+                for line in lines:
+                    self._print(f"  {line}")
+                return
+            if sub == "new" and len(parts) in (2, 4) and (len(parts) == 2 or parts[2] == "from"):
+                maps.create(parts[1], parts[3] if len(parts) == 4 else None)
+                self._print(f"  created map '{parts[1]}'")
+                return
+            if sub == "del" and len(parts) == 2:
+                maps.delete(parts[1])
+                self._print(f"  deleted map '{parts[1]}'")
+                return
+            if sub == "use" and len(parts) == 3:
+                maps.use(parts[1].lower(), parts[2])
+                self._print(f"  {parts[1].lower()} -> '{parts[2]}'")
+                return
+            if sub == "learn" and len(parts) == 2:
+                maps.learn(parts[1].lower())
+                self._print(f"  Touch a control on {parts[1].lower()}, then: map bind {parts[1].lower()} <target>")
+                return
+            if sub == "bind" and len(parts) >= 3:
+                surface = parts[1].lower()
+                target = parse_target(parts[2:])
+                kind, number = maps.bind_learned(surface, target)
+                self._print(f"  {kind} {number} -> {target.describe()}")
+                return
+            if sub == "set" and len(parts) >= 5:
+                target = parse_target(parts[4:])
+                maps.bind(parts[1], parts[2].lower(), int(parts[3]), target)
+                self._print(f"  {parts[2].lower()} {parts[3]} -> {target.describe()}")
+                return
+            if sub == "unset" and len(parts) == 4:
+                maps.unbind(parts[1], parts[2].lower(), int(parts[3]))
+                self._print(f"  {parts[2].lower()} {parts[3]} unmapped")
+                return
+        except ValueError as e:
+            self._print(f"Error: {e}")
+            return
+        self._print("Usage: map | map show [name] | map new <name> [from <name>] | map del <name> | "
+                    "map use <surface> <name> | map learn <surface> | map bind <surface> <target> | "
+                    "map set <name> cc|note <n> <target> | map unset <name> cc|note <n>")
+
+    # -- sampler settings ----------------------------------------------------
+
+    def do_sampler(self, arg):
+        """WAV sampler settings: sampler | sampler quality <linear|medium|high> [slot] | sampler mipmap <on|off> [slot] | sampler storage <float32|int16> [slot]
+
+        Subcommands:
+          sampler                          -- show defaults and per-slot settings
+          sampler quality <preset>         -- default for newly loaded WAV slots
+          sampler quality <preset> <slot>  -- realtime interpolation for one slot
+          sampler mipmap <on|off> [slot]   -- octave tables for pitched playback
+          sampler storage <mode> [slot]    -- in-memory sample format
+
+        'linear' is cheapest; 'medium' and 'high' use windowed-sinc
+        interpolation that stays clean when samples are pitched up.
+        Mipmaps pre-filter the sample once per octave in the background,
+        so even 'linear' stays alias-free when transposed upwards.
+        'int16' storage keeps 8/16-bit samples at half the memory of
+        'float32'; 24-bit and float files always stay float32.
+        """
+        parts = arg.strip().split()
+        if not parts:
+            self._print(f"  default quality : {self.host.sample_quality}")
+            self._print(f"  default mipmap  : {'on' if self.host.sample_mipmaps else 'off'}")
+            self._print(f"  default storage : {self.host.sample_storage}")
+            for idx, slot in enumerate(self.host.engine.slots):
+                plugin = getattr(slot, "plugin", None)
+                quality = getattr(plugin, "quality", None)
+                if slot is not None and slot.source_type in ("wav", "pack") and quality:
+                    mipmap = "on" if getattr(plugin, "mipmaps", False) else "off"
+                    memory = getattr(plugin, "memory_bytes", 0) / (1024 * 1024)
+                    self._print(
+                        f"  slot {idx + 1}: quality={quality} mipmap={mipmap} "
+                        f"storage={getattr(plugin, 'storage', '?')} memory={memory:.1f} MiB"
+                    )
+            return
+
+        sub = parts[0].lower()
+        if sub == "quality":
+            if len(parts) < 2:
+                self._print(f"  default quality : {self.host.sample_quality}")
+                return
+            slot_idx = None
+            try:
+                if len(parts) > 2:
+                    slot_idx = _slot_to_internal(int(parts[2]))
+                self.host.set_sample_quality(parts[1], slot_idx)
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            target = "default" if slot_idx is None else f"slot {slot_idx + 1}"
+            self._print(f"  {target} quality = {parts[1].lower()}")
+            return
+
+        if sub == "mipmap":
+            if len(parts) < 2 or parts[1].lower() not in ("on", "off"):
+                self._print("Usage: sampler mipmap <on|off> [slot]")
+                return
+            enabled = parts[1].lower() == "on"
+            slot_idx = None
+            try:
+                if len(parts) > 2:
+                    slot_idx = _slot_to_internal(int(parts[2]))
+                self.host.set_sample_mipmaps(enabled, slot_idx)
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            target = "default" if slot_idx is None else f"slot {slot_idx + 1}"
+            self._print(f"  {target} mipmap = {parts[1].lower()}")
+            return
+
+        if sub == "storage":
+            if len(parts) < 2:
+                self._print("Usage: sampler storage <float32|int16> [slot]")
+                return
+            slot_idx = None
+            try:
+                if len(parts) > 2:
+                    slot_idx = _slot_to_internal(int(parts[2]))
+                self.host.set_sample_storage(parts[1], slot_idx)
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            target = "default" if slot_idx is None else f"slot {slot_idx + 1}"
+            self._print(f"  {target} storage = {parts[1].lower()}")
+            return
+
+        self._print("Usage: sampler | sampler quality <linear|medium|high> [slot]"
+                    " | sampler mipmap <on|off> [slot] | sampler storage <float32|int16> [slot]")
+
     def do_note(self, arg):
         """Test note: note <slot 1-8> <midi_note> [vel] [dur_ms]"""
         parts = arg.strip().split()
@@ -1109,16 +1607,27 @@ class HostCLI(cmd.Cmd):
     # -- sequencer -----------------------------------------------------------
 
     def do_seq(self, arg):
-        """Sequencer: seq | seq <bank> <notes...> | seq link <bank> <slot> | seq cut <slot> | seq clear <bank>
+        """Sequencer: seq | seq <bank> <steps...> | seq <bank> res|bars|vel|gate|accent <value> | seq <bank> lane <n> <slot> <note> <hits> | seq <bank> lane <n> mute|unmute|clear | seq queue <bank> <steps...> | seq link <bank> <slot> | seq cut <slot> | seq clear <bank> | seq clock [thread|audio]
 
         Examples:
           seq                  -- show all sequence banks
           seq 1 d c b a        -- set bank 1 to D C B A (4 notes per bar)
           seq 1 c              -- set bank 1 to just C (1 note per bar)
           seq 3 C#5 Bb4        -- sharps/flats and octave suffixes work
+          seq 2 c - e:120 _    -- rest (-), velocity (:120), tie (_)
+          seq 2 c::0.25 d e    -- per-step gate (fraction of the step)
+          seq 2 res 16         -- fixed 1/16 steps (polymeter); 'fit' spreads
+          seq 2 bars 2         -- loop length in bars ('auto' to reset)
+          seq 2 vel 90         -- bank velocity; seq 2 gate 0.5 -- bank gate
+          seq 5 lane 1 1 36 x...x...x...x...   -- drum bank 5: kick on slot 1
+          seq 5 lane 2 2 38 ....X.......X...   -- snare lane (X = accent)
+          seq 5 lane 2 mute    -- mute / unmute / clear one lane
+          seq 5 accent 120     -- velocity of accented hits
+          seq queue 1 e g      -- replace bank 1 on the next bar (see song quantum)
           seq clear 1          -- clear bank 1
           seq link 1 5         -- attach sequence bank 1 to slot 5
           seq cut 5            -- remove sequences from slot 5
+          seq clock audio      -- sample-accurate timing from the audio clock
         """
         parts = arg.strip().split()
 
@@ -1130,14 +1639,42 @@ class HostCLI(cmd.Cmd):
                 if bank is None:
                     continue
                 any_bank = True
-                notes_str = " ".join(midi_to_note_name(n) for n in bank.notes)
-                if bank.linked_slot is not None:
-                    link_str = f" -> slot {bank.linked_slot + 1}"
-                else:
-                    link_str = ""
-                self._print(f"  seq {bi + 1}: {notes_str}{link_str}")
+                self._print(f"  seq {bi + 1}: {_seq_line(bank)}")
+                for line in _lane_lines(bank):
+                    self._print(line)
             if not any_bank:
-                self._print("  No sequences defined. Use: seq <bank> <note> [note ...]")
+                self._print("  No sequences defined. Use: seq <bank> <step> [step ...]")
+            self._print(f"  clock: {seq.clock}")
+            return
+
+        # --- seq clock [thread|audio] ---------------------------------------
+        if parts[0].lower() == "clock":
+            if len(parts) == 1:
+                self._print(f"  seq clock: {self.host.sequencer.clock}")
+                return
+            try:
+                self.host.sequencer.set_clock(parts[1])
+                self._print(f"  seq clock -> {self.host.sequencer.clock}")
+            except ValueError as e:
+                self._print(f"Error: {e}")
+            return
+
+        # --- seq queue <bank> <steps...> -----------------------------------
+        if parts[0].lower() == "queue":
+            if len(parts) < 3:
+                self._print(f"Usage: seq queue <bank 1-{NUM_SEQ_BANKS}> <step> [step ...]")
+                return
+            try:
+                bi = int(parts[1]) - 1
+                bank = self.host.sequencer.queue_bank(bi, parts[2:])
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            if self.host.sequencer.banks[bi] is bank:
+                self._print(f"  seq {bi + 1}: {_seq_line(bank)}")
+            else:
+                pending = self.host.sequencer.pending()[-1]
+                self._print(f"  seq {bi + 1}: queued for bar {pending['bar']}")
             return
 
         # --- seq link <bank> <slot> -----------------------------------------
@@ -1211,32 +1748,185 @@ class HostCLI(cmd.Cmd):
             if bank is None:
                 self._print(f"  seq {bank_num}: (empty)")
             else:
-                notes_str = " ".join(midi_to_note_name(n) for n in bank.notes)
-                if bank.linked_slot is not None:
-                    link_str = f" -> slot {bank.linked_slot + 1}"
+                self._print(f"  seq {bank_num}: {_seq_line(bank)}")
+                for line in _lane_lines(bank):
+                    self._print(line)
+            return
+
+        # seq <bank> lane <n> <slot> <note> <hits> | lane <n> mute|unmute|clear
+        option = parts[1].lower()
+        if option == "lane":
+            action = parts[3].lower() if len(parts) == 4 else None
+            if len(parts) < 6 and action not in ("mute", "unmute", "clear"):
+                self._print("Usage: seq <bank> lane <n> <slot> <note> <hits> "
+                            "| seq <bank> lane <n> mute|unmute|clear")
+                return
+            try:
+                li = int(parts[2]) - 1
+                if action == "clear":
+                    bank = self.host.sequencer.clear_lane(bi, li)
+                elif action is not None:
+                    bank = self.host.sequencer.mute_lane(bi, li, action == "mute")
                 else:
-                    link_str = ""
-                self._print(f"  seq {bank_num}: {notes_str}{link_str}")
+                    si = _slot_to_internal(int(parts[3]))
+                    bank = self.host.sequencer.set_lane(bi, li, si, parts[4], "".join(parts[5:]))
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            self._print(f"  seq {bank_num}: {_seq_line(bank) if bank.lanes else '(no lanes)'}")
+            for line in _lane_lines(bank):
+                self._print(line)
+            return
+
+        # seq <bank> res|bars|vel|gate|accent <value>
+        if option in ("res", "bars", "vel", "gate", "accent"):
+            if len(parts) != 3:
+                self._print(f"Usage: seq <bank> {option} <value>")
+                return
+            key = {"res": "resolution", "vel": "velocity"}.get(option, option)
+            try:
+                bank = self.host.sequencer.configure_bank(bi, **{key: parts[2]})
+            except ValueError as e:
+                self._print(f"Error: {e}")
+                return
+            self._print(f"  seq {bank_num}: {_seq_line(bank)}")
             return
 
-        # seq <bank> <note> [note ...]
-        note_names = parts[1:]
+        # seq <bank> <step> [step ...]
         try:
-            bank = self.host.sequencer.set_bank(bi, note_names)
+            bank = self.host.sequencer.set_bank(bi, parts[1:])
         except ValueError as e:
             self._print(f"Error: {e}")
             return
+        self._print(f"  seq {bank_num}: {_seq_line(bank)}")
 
-        notes_str = " ".join(midi_to_note_name(n) for n in bank.notes)
-        n = len(bank.notes)
-        if n == 1:
-            timing = "1 note/bar"
-        else:
-            timing = f"{n} notes/bar (1/{n} spacing)"
-        self._print(f"  seq {bank_num}: {notes_str}  ({timing})")
+    # -- song ----------------------------------------------------------------
+
+    def do_song(self, arg):
+        """Song mode: song | song add <banks> <bars> | song clear | song play [part] | song stop | song loop on|off | song quantum <beats>
+
+        A song is an ordered list of parts; each part plays a set of
+        sequence banks for a number of bars.  Part changes, 'song play'
+        jumps and 'song stop' wait for the next quantum boundary.
+
+        Examples:
+          song add 1,2 4       -- part: banks 1 and 2 for 4 bars
+          song add 1,2,3 8     -- part: banks 1-3 for 8 bars
+          song play            -- play from part 1 (on the next bar)
+          song play 2          -- jump to part 2 on the next boundary
+          song stop            -- leave song mode: all linked banks play
+          song loop off        -- end in silence after the last part
+          song quantum 16      -- switch on 4-bar (16 beat) boundaries
+        """
+        parts = arg.strip().split()
+        seq = self.host.sequencer
+
+        if not parts:
+            if not seq.song:
+                self._print("  No song parts. Use: song add <banks> <bars>")
+            for pi, part in enumerate(seq.song):
+                marker = ">" if seq.song_part == pi else " "
+                banks = ",".join(str(bi + 1) for bi in part.banks)
+                self._print(f"  {marker} part {pi + 1}: banks {banks}  ({part.bars} bar{'s' if part.bars > 1 else ''})")
+            state = f"part {seq.song_part + 1}" if seq.song_part is not None else "off"
+            self._print(f"  song: {state}, loop {'on' if seq.song_loop else 'off'}, "
+                        f"quantum {seq.quantum:g} beats")
+            for pending in seq.pending():
+                when = "next start" if pending["bar"] is None else f"bar {pending['bar']}"
+                self._print(f"  queued: {pending['change']} at {when}")
+            return
+
+        sub = parts[0].lower()
+        try:
+            if sub == "add":
+                if len(parts) != 3:
+                    self._print("Usage: song add <bank[,bank...]> <bars>")
+                    return
+                banks = [int(b) - 1 for b in parts[1].split(",") if b]
+                seq.add_song_part(banks, int(parts[2]))
+                self._print(f"  song part {len(seq.song)} added")
+            elif sub == "clear":
+                seq.song_stop()
+                seq.set_song([])
+                self._print("  song cleared")
+            elif sub == "play":
+                part = int(parts[1]) - 1 if len(parts) > 1 else 0
+                seq.song_play(part)
+                self._print(f"  song part {part + 1} queued")
+            elif sub == "stop":
+                seq.song_stop()
+                self._print("  song stop queued")
+            elif sub == "loop":
+                if len(parts) != 2 or parts[1].lower() not in ("on", "off"):
+                    self._print("Usage: song loop on|off")
+                    return
+                seq.set_song_loop(parts[1].lower() == "on")
+                self._print(f"  song loop {parts[1].lower()}")
+            elif sub == "quantum":
+                if len(parts) != 2:
+                    self._print(f"  song quantum: {seq.quantum:g} beats")
+                    return
+                seq.set_quantum(float(parts[1]))
+                self._print(f"  song quantum -> {seq.quantum:g} beats")
+            else:
+                self._print("Usage: song | song add <banks> <bars> | song clear | song play [part] | song stop | song loop on|off | song quantum <beats>")
+        except ValueError as e:
+            self._print(f"Error: {e}")
 
     # -- link ----------------------------------------------------------------
 
+    # -- arpeggiator ---------------------------------------------------------
+
+    def do_arp(self, arg):
+        """Arpeggiator: arp | arp <slot> up|down|random|order [rate] [gate] | arp <slot> rate|gate <value> | arp <slot> off
+
+        Notes routed to the slot from MIDI inputs are held by the
+        arpeggiator and played one per step on the sequencer clock.
+
+        Examples:
+          arp 2 up             -- arpeggiate slot 2, lowest to highest, 1/16
+          arp 2 order 1/8 0.5  -- press order, eighths, half-length notes
+          arp 2 rate 12        -- triplet eighths
+          arp 2 off            -- notes reach the slot directly again
+        """
+        parts = arg.strip().split()
+        arps = self.host.arpeggiators
+        if not parts:
+            if not arps.arps:
+                self._print("  No arpeggiators. Use: arp <slot> up|down|random|order")
+            for slot, arp in sorted(arps.arps.items()):
+                held = " ".join(midi_to_note_name(n) for n in arp.held)
+                self._print(f"  arp {slot + 1}: {arp.mode} 1/{arp.rate} gate {arp.gate:g}"
+                            + (f"  holding {held}" if held else ""))
+            return
+        try:
+            si = _slot_to_internal(int(parts[0]))
+            if len(parts) < 2:
+                arp = arps.arps.get(si)
+                if arp is None:
+                    self._print(f"  arp {si + 1}: off")
+                else:
+                    self._print(f"  arp {si + 1}: {arp.mode} 1/{arp.rate} gate {arp.gate:g}")
+                return
+            sub = parts[1].lower()
+            if sub == "off":
+                arps.disable(si)
+                self._print(f"  arp {si + 1}: off")
+                return
+            if sub in ("rate", "gate"):
+                if len(parts) != 3:
+                    self._print(f"Usage: arp <slot> {sub} <value>")
+                    return
+                arp = arps.configure(si, **{sub: parts[2]})
+            else:
+                arp = arps.configure(si, mode=sub,
+                                     rate=parts[2] if len(parts) > 2 else None,
+                                     gate=parts[3] if len(parts) > 3 else None)
+        except ValueError as e:
+            self._print(f"Error: {e}")
+            return
+        self._print(f"  arp {si + 1}: {arp.mode} 1/{arp.rate} gate {arp.gate:g}")
+
     def do_ableton(self, arg):
         """Ableton Link commands: ableton link [bpm] | ableton cut
 
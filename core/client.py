@@ -23,6 +23,7 @@ import socket
 import sys
 from pathlib import Path
 
+from core.catalog import catalog_for
 from core.paths import DEFAULT_SOCK_PATH
 
 # Must match the sentinel used by server.py
@@ -50,6 +51,7 @@ FALLBACK_COMMANDS = (
     "params",
     "load",
     "quit",
+    "sampler",
     "save",
     "set",
     "shutdown",
@@ -59,7 +61,7 @@ FALLBACK_COMMANDS = (
     "tempo",
 )
 
-SLOT_TYPES = ("vst", "wav", "vcv", "fx", "clear")
+SLOT_TYPES = ("vst", "wav", "pack", "vcv", "fx", "clear")
 
 
 def _filter_prefix(values: list[str], prefix: str) -> list[str]:
@@ -79,14 +81,9 @@ def _samples_root() -> Path:
 
 
 def _sample_pack_names() -> list[str]:
-    root = _samples_root()
-    if not root.exists() or not root.is_dir():
-        return []
-    return sorted(
-        entry.name
-        for entry in root.iterdir()
-        if entry.is_dir() and not entry.name.startswith(".")
-    )
+    catalog = catalog_for(_samples_root())
+    catalog.refresh()
+    return catalog.packs()
 
 
 def _sample_names(pack_name: str) -> list[str]:
@@ -94,11 +91,9 @@ def _sample_names(pack_name: str) -> list[str]:
     if pack.is_absolute() or ".." in pack.parts:
         return []
 
-    pack_dir = _samples_root() / pack
-    if not pack_dir.exists() or not pack_dir.is_dir():
-        return []
-
-    return sorted(wav.stem for wav in pack_dir.glob("*.wav"))
+    catalog = catalog_for(_samples_root())
+    catalog.refresh()
+    return catalog.samples(pack.as_posix())
 
 
 def _patches_root() -> Path:
@@ -263,6 +258,11 @@ def _complete_slot_args(text: str, prefix_tokens: list[str]) -> list[str]:
             return _filter_prefix(_sample_names(args_before[2]), text)
         return []
 
+    if mode == "pack":
+        if arg_index == 2:
+            return _filter_prefix(_sample_pack_names(), text)
+        return []
+
     if mode == "fx":
         if arg_index == 2:
             return _filter_prefix(["clear", *_vst_names()], text)
@@ -0,0 +1,251 @@
+"""Device monitor: cached port lists, hotplug and background reconnects.
+
+Session restore used to retry every missing device on the calling thread
+(three tries, two seconds apart), so a controller left unplugged at boot
+held up the daemon, and a device unplugged later was never picked up
+again.  Devices are now *watched*:
+
+  - ``PortCache`` keeps the MIDI input, MIDI output and audio output
+    lists, enumerated at most once per ``max_age`` seconds, so resolving
+    a port name does not create an rtmidi client per lookup.
+  - ``DeviceMonitor`` runs one daemon thread that refreshes the lists of
+    watched kinds every ``interval`` seconds.  A watched connection whose
+    port vanished (or whose audio stream died) is closed; a port matching
+    a waiting watch's saved name (fuzzy, as for ``midi input <name>``) is
+    opened.  A failed open is retried when the port list changes again.
+    Callbacks run under the owner's device lock, so they never race the
+    commands that open and close the same devices, and opening from a
+    watch must not register the watch again.
+  - Every change is a numbered ``DeviceEvent``.  Clients read them in
+    ``/api/status`` (``devices``) and ``devices.events``; CLI clients are
+    shown new ones ahead of their next command's output.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PORT_KINDS = ("midi_in", "midi_out", "audio_out")
+POLL_INTERVAL = 1.0  # seconds
+MAX_EVENTS = 64  # recent events kept for clients
+
+
+@dataclass
+class Watch:
+    """A connection the monitor keeps open while its device is present."""
+    key: str
+    label: str
+    kind: str  # one of PORT_KINDS
+    name: str  # saved port / device name, matched fuzzily
+    open: Callable[[str], Any] = field(repr=False)  # called with the current name
+    close: Callable[[], Any] = field(repr=False)
+    is_open: Callable[[], bool] = field(repr=False)
+    connected: bool = False
+    error: Optional[str] = None  # last failed open, until the ports change
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"device": self.label, "port": self.name,
+                "connected": self.connected, "error": self.error}
+
+
+@dataclass(frozen=True)
+class DeviceEvent:
+    seq: int
+    time: float  # wall clock
+    event: str  # connected | disconnected | waiting | failed
+    device: str
+    port: str
+    detail: Optional[str] = None
+
+    def describe(self) -> str:
+        text = f"{self.device} '{self.port}' {self.event}"
+        return f"{text}: {self.detail}" if self.detail else text
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"seq": self.seq, "time": self.time, "event": self.event,
+                "device": self.device, "port": self.port, "detail": self.detail}
+
+
+class PortCache:
+    """Port and device name lists per kind, re-enumerated when stale."""
+
+    def __init__(self, listers: dict[str, Callable[[], list[str]]],
+                 max_age: float = POLL_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self._listers = listers
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._lists: dict[str, tuple[float, list[str]]] = {}
+
+    def get(self, kind: str, max_age: Optional[float] = None) -> list[str]:
+        """The cached list of *kind*, enumerated again if older than *max_age*."""
+        limit = self.max_age if max_age is None else max_age
+        with self._lock:
+            entry = self._lists.get(kind)
+        if entry is not None and self._clock() - entry[0] <= limit:
+            return entry[1]
+        return self.refresh(kind)
+
+    def refresh(self, kind: str) -> list[str]:
+        try:
+            ports = list(self._listers[kind]())
+        except KeyError:
+            raise ValueError(f"unknown port kind '{kind}'") from None
+        except Exception:
+            logger.debug("[Devices] listing %s failed", kind, exc_info=True)
+            ports = []
+        with self._lock:
+            self._lists[kind] = (self._clock(), ports)
+        return ports
+
+
+class DeviceMonitor:
+    """Background thread that reconnects watched devices on hotplug."""
+
+    def __init__(self, ports: PortCache,
+                 match: Callable[[str, list[str]], Optional[int]],
+                 interval: float = POLL_INTERVAL,
+                 lock: Optional[threading.RLock] = None):
+        self.ports = ports
+        self._match = match
+        self.interval = interval
+        # Held around each watch's check and open/close callbacks.
+        self._device_lock = lock if lock is not None else threading.RLock()
+        self._lock = threading.Lock()
+        self._watches: dict[str, Watch] = {}
+        self._seen: dict[str, list[str]] = {}
+        self._events: deque[DeviceEvent] = deque(maxlen=MAX_EVENTS)
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    # -- watches -------------------------------------------------------------
+
+    def watch(self, watch: Watch) -> Watch:
+        """Watch (or replace the watch on) ``watch.key``; starts the thread."""
+        with self._lock:
+            self._watches[watch.key] = watch
+        if not watch.connected:
+            self._publish("waiting", watch)
+        self.start()
+        return watch
+
+    def unwatch(self, key: str) -> Optional[Watch]:
+        with self._lock:
+            return self._watches.pop(key, None)
+
+    def watches(self) -> list[Watch]:
+        with self._lock:
+            return list(self._watches.values())
+
+    def waiting(self) -> dict[str, str]:
+        """Key -> saved name of every watch not currently connected."""
+        return {w.key: w.name for w in self.watches() if not w.connected}
+
+    # -- events --------------------------------------------------------------
+
+    def _publish(self, event: str, watch: Watch, detail: Optional[str] = None):
+        seq = next(self._seq)
+        entry = DeviceEvent(seq, time.time(), event, watch.label, watch.name, detail)
+        self._events.append(entry)
+        self.last_seq = seq
+        log = logger.warning if event in ("disconnected", "failed") else logger.info
+        log("[Devices] %s", entry.describe())
+
+    def events(self, since: int = 0) -> list[DeviceEvent]:
+        """Kept events numbered above *since*, oldest first."""
+        return [e for e in list(self._events) if e.seq > since]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._running,
+            "interval": self.interval,
+            "watching": [w.to_dict() for w in self.watches()],
+            "events": [e.to_dict() for e in self.events()],
+            "last_event": self.last_seq,
+        }
+
+    # -- polling -------------------------------------------------------------
+
+    def poll(self) -> bool:
+        """Refresh watched port lists once and connect/disconnect watches.
+
+        Returns whether any watched list changed since the last poll.
+        """
+        watches = self.watches()
+        lists: dict[str, list[str]] = {}
+        changed = False
+        for kind in {w.kind for w in watches}:
+            ports = self.ports.refresh(kind)
+            if ports != self._seen.get(kind):
+                self._seen[kind] = ports
+                changed = True
+            lists[kind] = ports
+
+        for watch in watches:
+            with self._device_lock:
+                self._update(watch, lists[watch.kind], changed)
+        return changed
+
+    def _update(self, watch: Watch, ports: list[str], changed: bool):
+        with self._lock:
+            if self._watches.get(watch.key) is not watch:
+                return  # forgotten or replaced meanwhile
+        index = self._match(watch.name, ports)
+        if watch.connected:
+            if index is not None and watch.is_open():
+                return
+            watch.connected = False
+            try:
+                watch.close()
+            except Exception:
+                logger.debug("[Devices] closing %s failed", watch.label, exc_info=True)
+            self._publish("disconnected", watch)
+        elif index is not None and (changed or watch.error is None):
+            try:
+                watch.open(ports[index])
+            except Exception as exc:
+                if str(exc) != watch.error:
+                    self._publish("failed", watch, str(exc))
+                watch.error = str(exc)
+                return
+            watch.connected = True
+            watch.error = None
+            self._publish("connected", watch)
+
+    def _run(self):
+        while self._running:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("[Devices] monitor poll failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="vcpi-devices",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            thread, self._thread = self._thread, None
+        self._wake.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
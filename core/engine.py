@@ -6,23 +6,32 @@ import collections
 import logging
 import os
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+from core.capture import MidiCapture
 from core.deps import HAS_SOUNDDEVICE, HAS_PEDALBOARD, Pedalboard, sd, np
+from core.midi import coalesce_events, plugin_event, raw_bytes
 from core.models import InstrumentSlot, NUM_SLOTS
+from core.routing import RouteRule, RouteTable, compile_routes
 from sampler import WavSamplerPlugin
 
 
 logger = logging.getLogger(__name__)
 
+MAX_LATENCY_OFFSET_MS = 250.0
+MAX_COALESCE = 16  # values per controller stream per block
+
 
 class AudioEngine:
     """
     Renders all instrument slots into a summed stereo output each audio block.
 
     Per callback:
-      1. Flush queued MIDI into each instrument plugin
+      1. Flush queued MIDI (plus events from block sources such as the
+         audio-clock sequencer) into each instrument plugin, thinning
+         controller streams on slots with coalescing enabled
       2. Apply queued parameter changes
       3. Render each instrument
       4. Apply per-slot insert effects
@@ -60,6 +69,31 @@ class AudioEngine:
 
         # Unified MIDI channel -> slot routing (shared by all controllers)
         self.channel_map: dict[int, int] = {}  # MIDI channel (0-15) -> slot index (0-7)
+        # Split / layer / velocity-zone rules on top of channel_map; both
+        # compile into ``routes``, which MIDI inputs index per event.
+        self.route_rules: list[RouteRule] = []
+        self.routes: RouteTable = compile_routes({}, [])
+
+        # Per-slot CC / pitch bend / aftertouch coalescing: slot index ->
+        # values kept per stream per block.  Counters are written by the
+        # audio thread only.
+        self.midi_coalesce: dict[int, int] = {}
+        self.midi_dropped: list[int] = [0] * NUM_SLOTS
+        # Every event queued for a slot, for ``midi capture save``.  Replaced
+        # (never resized) when its size changes.
+        self.capture = MidiCapture()
+
+        # Frames rendered since the engine was created (the audio clock).
+        self.frame_time: int = 0
+        # Callables ``source(frame_time, frames)`` run at the top of every
+        # block, returning ``(slot_index, msg, offset_frames)`` events.
+        self._block_sources: list = []
+
+        # Seconds from the start of the current block to the DAC, as
+        # measured from the stream, plus a user offset for what the
+        # stream cannot see (converters, speakers, a Bluetooth hop).
+        self.output_latency: float = 0.0
+        self.latency_offset_ms: float = 0.0
 
     # -- routing -------------------------------------------------------------
 
@@ -88,6 +122,7 @@ class AudioEngine:
         if prev_idx is None:
             logger.info("route set: ch %d -> slot %d",
                         midi_channel + 1, slot_index + 1)
+        self._compile_routes()
 
     def unroute(self, midi_channel: int):
         """Remove a MIDI channel routing."""
@@ -98,17 +133,116 @@ class AudioEngine:
                 slot.midi_channels.discard(midi_channel)
             logger.info("route removed: ch %d (slot %d)",
                         midi_channel + 1, idx + 1)
+            self._compile_routes()
+
+    def add_route_rule(self, rule: RouteRule) -> int:
+        """Append a split/layer/zone rule; returns its index."""
+        self.route_rules = self.route_rules + [rule]
+        self._compile_routes()
+        logger.info("route rule %d: %s", len(self.route_rules), rule.describe())
+        return len(self.route_rules) - 1
+
+    def remove_route_rule(self, index: int) -> RouteRule:
+        if not 0 <= index < len(self.route_rules):
+            raise ValueError(f"no route rule {index + 1}")
+        rule = self.route_rules[index]
+        self.route_rules = self.route_rules[:index] + self.route_rules[index + 1:]
+        self._compile_routes()
+        logger.info("route rule removed: %s", rule.describe())
+        return rule
+
+    def set_route_rules(self, rules: list[RouteRule]):
+        """Replace all split/layer/zone rules."""
+        self.route_rules = list(rules)
+        self._compile_routes()
+
+    def _compile_routes(self):
+        self.routes = compile_routes(self.channel_map, self.route_rules)
 
     # -- MIDI queueing -------------------------------------------------------
 
     def enqueue_midi(self, slot_index: int, msg):
-        """Thread-safe enqueue of a mido.Message for a given slot.
+        """Thread-safe enqueue of a MIDI event for a given slot.
+
+        *msg* is a raw ``(status, data1[, data2])`` tuple (MIDI inputs) or
+        a mido.Message (sequencer, scheduler); see ``core.midi``.
 
         Uses collections.deque which is thread-safe for append/popleft
         under CPython (no lock needed).
         """
+        capture = self.capture
+        if capture.enabled:
+            capture.record(slot_index, msg)
         self._midi_queue.append((slot_index, msg))
 
+    def set_midi_coalesce(self, slot_index: int, limit: int):
+        """Keep at most *limit* values per controller stream per block (0 = off)."""
+        if not 0 <= slot_index < NUM_SLOTS:
+            raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+        limit = int(limit)
+        if not 0 <= limit <= MAX_COALESCE:
+            raise ValueError(f"coalesce must be 0 (off) to {MAX_COALESCE} values per block")
+        coalesce = dict(self.midi_coalesce)
+        if limit:
+            coalesce[slot_index] = limit
+        else:
+            coalesce.pop(slot_index, None)
+        self.midi_coalesce = coalesce
+
+    def midi_stats(self) -> dict:
+        """Coalescing settings and dropped-message counts by 1-based slot."""
+        return {
+            "coalesce": {str(idx + 1): limit for idx, limit in sorted(self.midi_coalesce.items())},
+            "dropped": {str(idx + 1): n for idx, n in enumerate(self.midi_dropped) if n},
+            "dropped_total": sum(self.midi_dropped),
+        }
+
+    # -- block sources -------------------------------------------------------
+
+    def add_block_source(self, source):
+        """Register a per-block event source (idempotent).
+
+        Sources run on the audio thread and must not block.  The list is
+        replaced rather than mutated so the callback never sees it change
+        mid-iteration.
+        """
+        if source not in self._block_sources:
+            self._block_sources = self._block_sources + [source]
+
+    def remove_block_source(self, source):
+        self._block_sources = [s for s in self._block_sources if s != source]
+
+    # -- output latency ------------------------------------------------------
+
+    @property
+    def output_delay(self) -> float:
+        """Seconds until audio written now is heard: measured latency plus offset."""
+        return self.output_latency + self.latency_offset_ms / 1000.0
+
+    def set_latency_offset(self, ms: float):
+        ms = float(ms)
+        if not -MAX_LATENCY_OFFSET_MS <= ms <= MAX_LATENCY_OFFSET_MS:
+            raise ValueError(f"latency offset must be within +-{MAX_LATENCY_OFFSET_MS:g} ms")
+        self.latency_offset_ms = ms
+
+    def _measure_latency(self, time_info):
+        """Update ``output_latency`` from the callback's time info.
+
+        ``outputBufferDacTime - currentTime`` is when this block starts
+        playing; backends that leave the DAC time at 0 fall back to the
+        stream's reported output latency.
+        """
+        try:
+            latency = float(time_info.outputBufferDacTime) - float(time_info.currentTime)
+        except (AttributeError, TypeError, ValueError):
+            latency = 0.0
+        if not 0.0 < latency < 1.0:
+            stream_latency = getattr(self._stream, "latency", None)
+            if isinstance(stream_latency, (tuple, list)):
+                stream_latency = stream_latency[-1]
+            latency = float(stream_latency) if isinstance(stream_latency, (int, float)) else 0.0
+        self.output_latency = latency
+
     # -- Parameter change queueing -------------------------------------------
 
     def enqueue_param_change(self, slot_index: int, param_name: str, value):
@@ -123,31 +257,32 @@ class AudioEngine:
     # -- per-slot rendering (called from worker threads) ----------------------
 
     def _render_slot(self, idx: int, slot: InstrumentSlot,
-                     midi_msgs: list, frames: int) -> Optional[np.ndarray]:
+                     midi_events: list, frames: int) -> Optional[np.ndarray]:
         """Render one slot and return (frames, channels) audio or None.
 
         This runs on a pool worker thread.  pedalboard releases the GIL
         during process(), so multiple slots render in true parallel.
+        *midi_events* are ``(msg, offset_frames)`` pairs; this is where
+        they take the form the plugin wants -- raw bytes for the sampler,
+        ``(bytes, seconds)`` pairs for pedalboard.
         """
         try:
             if isinstance(slot.plugin, WavSamplerPlugin):
-                for msg in midi_msgs:
+                for msg, offset in midi_events:
                     try:
-                        slot.plugin.send_midi(msg)
+                        slot.plugin.send_raw(raw_bytes(msg), offset)
                     except Exception:
-                        logger.debug("[Audio] send_midi error slot %d", idx,
+                        logger.debug("[Audio] send_raw error slot %d", idx,
                                      exc_info=True)
                 silence = np.zeros((self.output_channels, frames),
                                    dtype=np.float32)
                 rendered = slot.plugin.process(silence, self.sample_rate)
             else:
-                duration = frames / self.sample_rate
-                for msg in midi_msgs:
-                    msg.time = 0
+                rate = self.sample_rate
                 rendered = slot.plugin.process(
-                    midi_msgs,
-                    duration=duration,
-                    sample_rate=self.sample_rate,
+                    [plugin_event(msg, offset / rate) for msg, offset in midi_events],
+                    duration=frames / rate,
+                    sample_rate=rate,
                     num_channels=self.output_channels,
                     buffer_size=frames,
                     reset=False,
@@ -176,6 +311,7 @@ class AudioEngine:
     def _callback(self, outdata, frames: int, time_info, status):
         if status:
             logger.warning("[Audio] %s", status)
+        self._measure_latency(time_info)
 
         # Use pre-allocated mix buffer (avoid allocation in RT path)
         if (self._mixed_buf is None
@@ -185,14 +321,44 @@ class AudioEngine:
         mixed = self._mixed_buf
         mixed[:] = 0.0
 
-        # Drain lock-free MIDI queue into per-slot lists
+        # Drain lock-free MIDI queue into per-slot lists of
+        # (msg, offset_frames).  Queued messages play at the top of the
+        # block; they stay as queued until the slot renders them.
         queues: dict[int, list] = {}
         while self._midi_queue:
             try:
                 slot_idx, msg = self._midi_queue.popleft()
             except IndexError:
                 break
-            queues.setdefault(slot_idx, []).append(msg)
+            queues.setdefault(slot_idx, []).append((msg, 0))
+
+        # Coalesce controller streams on slots that ask for it; notes and
+        # their order are untouched.
+        coalesce = self.midi_coalesce
+        if coalesce:
+            for slot_idx, events in queues.items():
+                limit = coalesce.get(slot_idx)
+                if limit and len(events) > limit:
+                    kept = coalesce_events(events, limit)
+                    self.midi_dropped[slot_idx] += len(events) - len(kept)
+                    queues[slot_idx] = kept
+
+        # Sample-accurate events from block sources (audio-clock sequencer).
+        capture = self.capture if self.capture.enabled else None
+        block_ns = time.monotonic_ns()
+        for source in self._block_sources:
+            try:
+                events = source(self.frame_time, frames)
+            except Exception:
+                logger.debug("[Audio] block source error", exc_info=True)
+                continue
+            for slot_idx, msg, offset in events:
+                offset = min(max(0, offset), frames - 1)
+                queues.setdefault(slot_idx, []).append((msg, offset))
+                if capture is not None:
+                    capture.record(slot_idx, msg,
+                                   block_ns + offset * 1_000_000_000 // self.sample_rate)
+        self.frame_time += frames
 
         # Apply queued parameter changes (drain lock-free deque).
         # Deduplicate: when a rotary floods CCs, only the final value per
@@ -224,9 +390,9 @@ class AudioEngine:
                 continue
             if slot.muted or (has_solo and not slot.solo):
                 continue
-            midi_msgs = queues.get(idx, [])
+            midi_events = queues.get(idx, [])
             fut = self._render_pool.submit(
-                self._render_slot, idx, slot, midi_msgs, frames)
+                self._render_slot, idx, slot, midi_events, frames)
             futures.append((idx, slot, fut))
 
         for idx, slot, fut in futures:
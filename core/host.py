@@ -13,12 +13,22 @@ from typing import Optional
 
 from core import deps
 from controllers.akai_midimix import MidiMixController
+from controllers.control_map import ControlMap, ControlMaps
 from controllers.midi_input import MidiInputController
+from controllers.surface import SurfaceDriver, load_profile
+from core.arpeggiator import ArpRouter
+from core.capture import MidiCapture, write_midi_file
+from core.devices import DeviceMonitor, PortCache, Watch
 from core.engine import AudioEngine
 from core.link import LinkSync
 from core.midi import list_midi_input_ports, list_midi_output_ports
+from core.midiclock import CLOCK_MODES, MidiClock
 from core.models import InstrumentSlot, NUM_SLOTS
-from sampler import WavSamplerPlugin
+from core.routing import RouteRule, make_rule
+from core.scheduler import MidiScheduler
+from sampler import MultisamplePlugin, WavSamplerPlugin
+from sampler.resample import DEFAULT_PLAYBACK_QUALITY, resolve_quality
+from sampler.storage import DEFAULT_STORAGE, resolve_storage
 
 
 logger = logging.getLogger(__name__)
@@ -45,19 +55,46 @@ class VcpiCore:
         self.loaded_session_path: Optional[Path] = None
 
         self.engine = AudioEngine(sample_rate, buffer_size)
+        # One thread for every delayed MIDI event (note-offs, auditions).
+        self.scheduler = MidiScheduler()
         self.link = LinkSync()
         self.patches_dir = Path(
             os.environ.get(PATCHES_DIR_ENV, DEFAULT_PATCHES_DIR)
         ).expanduser()
 
         self.midi_inputs: list[MidiInputController] = []
-        self.midimix = MidiMixController(self.engine)
+        # Held while opening/closing devices (MIDI inputs, surfaces, the
+        # clock port, the audio stream) and listing audio devices: the
+        # device monitor thread does the same as CLI and server commands.
+        self._device_lock = threading.RLock()
+        # Cached port lists and the thread reconnecting devices on hotplug.
+        self.devices = DeviceMonitor(PortCache({
+            "midi_in": list_midi_input_ports,
+            "midi_out": list_midi_output_ports,
+            "audio_out": self._audio_output_names,
+        }), self._match_port, lock=self._device_lock)
+        # Control-map presets and the mappers of the MIDI Mix and inputs.
+        self.control_maps = ControlMaps(self.engine)
+        self.control_maps.add_surface("input", ControlMap("input"))
+        self.midimix = MidiMixController(self.engine, self.control_maps)
+        # Control-surface drivers by name; others are loaded when opened.
+        self.surfaces: dict[str, SurfaceDriver] = {"midimix": self.midimix}
         sequencer_module = importlib.import_module("core.sequencer")
         self.sequencer = sequencer_module.Sequencer(self)
+        self.midi_clock = MidiClock(self)
+        # Slot-bound MIDI from inputs passes through here (arpeggiators).
+        self.arpeggiators = ArpRouter(self)
 
         # Remember the most recently selected/active audio output device name.
         self._audio_output_name: Optional[str] = None
 
+        # Default realtime interpolation for newly loaded WAV slots.
+        self.sample_quality: str = DEFAULT_PLAYBACK_QUALITY
+        # Whether newly loaded WAV slots build octave mipmap tables.
+        self.sample_mipmaps: bool = False
+        # In-memory storage for newly loaded WAV slots (float32 | int16).
+        self.sample_storage: str = DEFAULT_STORAGE
+
     @property
     def channel_map(self) -> dict[int, int]:
         return self.engine.channel_map
@@ -75,6 +112,14 @@ class VcpiCore:
     def mixer_midi_out_name(self) -> Optional[str]:
         return self.midimix.output_port_name
 
+    @property
+    def surface_port_names(self) -> dict[str, dict[str, Optional[str]]]:
+        """Input/output port names of open driver surfaces (MIDI Mix aside)."""
+        return {driver: {"in": surface.input_port_name, "out": surface.output_port_name}
+                for driver, surface in self.surfaces.items()
+                if surface is not self.midimix
+                and (surface.input_port_name or surface.output_port_name)}
+
     @property
     def audio_output_name(self) -> Optional[str]:
         """Most recently selected/active audio output device name."""
@@ -173,6 +218,25 @@ class VcpiCore:
 
         raise ValueError(f"{kind} port '{port_name}' not found")
 
+    @staticmethod
+    def _match_port(port_name: str, ports: list[str]) -> Optional[int]:
+        """Index of *port_name* in *ports* by the rules above, or None."""
+        try:
+            return VcpiCore._resolve_port_index_by_name(port_name, ports, "")
+        except ValueError:
+            return None
+
+    def _resolve_cached_port(self, token: str, kind: str, label: str) -> int:
+        """Resolve a port name against the cached list of *kind*.
+
+        A name missing from the cache is looked up again in a fresh
+        enumeration, in case the device was plugged in since.
+        """
+        index = self._match_port(token, self.devices.ports.get(kind))
+        if index is not None:
+            return index
+        return self._resolve_port_index_by_name(token, self.devices.ports.refresh(kind), label)
+
     def _resolve_midi_input_port(self, port: int | str) -> int:
         if isinstance(port, int):
             return port
@@ -181,8 +245,7 @@ class VcpiCore:
         if token.isdigit():
             return int(token)
 
-        ports = list_midi_input_ports()
-        return self._resolve_port_index_by_name(token, ports, "MIDI input")
+        return self._resolve_cached_port(token, "midi_in", "MIDI input")
 
     def _resolve_midi_output_port(self, port: int | str) -> int:
         if isinstance(port, int):
@@ -192,8 +255,7 @@ class VcpiCore:
         if token.isdigit():
             return int(token)
 
-        ports = list_midi_output_ports()
-        return self._resolve_port_index_by_name(token, ports, "MIDI output")
+        return self._resolve_cached_port(token, "midi_out", "MIDI output")
 
     # -- plugin management ---------------------------------------------------
 
@@ -410,21 +472,18 @@ class VcpiCore:
         # Atomic slot assignment (GIL guarantees reference store is atomic).
         self.engine.slots[slot_index] = slot
 
-        # Build param cache for MIDI Mix (C++ property introspection).
-        self.midimix.invalidate_param_cache(slot_index)
-        self.midimix._build_param_cache(slot_index)
+        # Build param cache for control maps (C++ property introspection).
+        self.control_maps.params.invalidate(slot_index)
+        self.control_maps.params.build(slot_index)
 
         elapsed = time.monotonic() - t0
         logger.info("[INST] slot %d ready (%.2fs)", slot_index + 1, elapsed)
         return slot
 
-    def load_wav(self, slot_index: int, wav_path: str,
-                 name: Optional[str] = None) -> InstrumentSlot:
-        """Load a WAV file as a one-shot sampler instrument into a slot."""
-        if not 0 <= slot_index < NUM_SLOTS:
-            raise ValueError(f"slot must be 1-{NUM_SLOTS}")
-
-        path = Path(wav_path).expanduser()
+    @staticmethod
+    def _resolve_sample_path(raw_path: str) -> Path:
+        """Resolve a relative sample path against the cwd, then the repo."""
+        path = Path(raw_path).expanduser()
         if not path.is_absolute():
             cwd_candidate = Path.cwd() / path
             repo_candidate = Path(__file__).resolve().parent.parent / path
@@ -434,12 +493,39 @@ class VcpiCore:
                 path = repo_candidate
             else:
                 path = cwd_candidate
+        return path
 
-        resolved = str(path)
+    def load_wav(self, slot_index: int, wav_path: str,
+                 name: Optional[str] = None,
+                 quality: Optional[str] = None,
+                 mipmaps: Optional[bool] = None,
+                 storage: Optional[str] = None) -> InstrumentSlot:
+        """Load a WAV file as a one-shot sampler instrument into a slot.
+
+        *quality* selects the realtime interpolation preset for pitched
+        playback; it defaults to ``sample_quality``.  Sample-rate
+        conversion at load time always uses the high-quality sinc path.
+        *mipmaps* (default ``sample_mipmaps``) builds band-limited octave
+        tables in the background for alias-free transposition.  *storage*
+        (default ``sample_storage``) picks float32 or compact int16 samples.
+        """
+        if not 0 <= slot_index < NUM_SLOTS:
+            raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+        if quality is None:
+            quality = self.sample_quality
+        if mipmaps is None:
+            mipmaps = self.sample_mipmaps
+        storage = resolve_storage(storage or self.sample_storage)
+        resolve_quality(quality)
+
+        resolved = str(self._resolve_sample_path(wav_path))
         plugin = WavSamplerPlugin.from_file(
             resolved,
             target_sample_rate=self.sample_rate,
             output_channels=self.engine.output_channels,
+            quality=quality,
+            mipmaps=bool(mipmaps),
+            storage=storage,
         )
         self._set_plugin_info_type(plugin, "Sample")
 
@@ -450,11 +536,115 @@ class VcpiCore:
             source_type="wav",
         )
         self.engine.slots[slot_index] = slot
-        self.midimix.invalidate_param_cache(slot_index)
-        self.midimix._build_param_cache(slot_index)
+        self.control_maps.params.invalidate(slot_index)
+        self.control_maps.params.build(slot_index)
         logger.info("[WAV] slot %d loaded from %s", slot_index + 1, resolved)
         return slot
 
+    def load_pack(self, slot_index: int, pack_path: str,
+                  name: Optional[str] = None,
+                  quality: Optional[str] = None,
+                  mipmaps: Optional[bool] = None,
+                  storage: Optional[str] = None) -> InstrumentSlot:
+        """Load a sample pack directory as a keymapped multisample instrument.
+
+        The keymap comes from the pack's ``keymap.json`` or from note names
+        in the file names; zones decode lazily on first use.  *quality*,
+        *mipmaps* and *storage* behave as in ``load_wav``.
+        """
+        if not 0 <= slot_index < NUM_SLOTS:
+            raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+        if quality is None:
+            quality = self.sample_quality
+        resolve_quality(quality)
+        if mipmaps is None:
+            mipmaps = self.sample_mipmaps
+        storage = resolve_storage(storage or self.sample_storage)
+
+        resolved = str(self._resolve_sample_path(pack_path))
+        plugin = MultisamplePlugin.from_pack(
+            resolved,
+            target_sample_rate=self.sample_rate,
+            output_channels=self.engine.output_channels,
+            quality=quality,
+            mipmaps=bool(mipmaps),
+            storage=storage,
+        )
+        self._set_plugin_info_type(plugin, "Multisample")
+
+        slot = InstrumentSlot(
+            name=name or Path(resolved).name,
+            path=resolved,
+            plugin=plugin,
+            source_type="pack",
+        )
+        self.engine.slots[slot_index] = slot
+        self.control_maps.params.invalidate(slot_index)
+        self.control_maps.params.build(slot_index)
+        logger.info("[WAV] slot %d loaded pack %s (%d zones)",
+                    slot_index + 1, resolved, len(plugin.keymap.zones))
+        return slot
+
+    def _sampler_plugin(self, slot_index: int) -> WavSamplerPlugin:
+        """Return the WAV/pack sampler plugin in a slot or raise ValueError."""
+        if not 0 <= slot_index < NUM_SLOTS:
+            raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+        slot = self.engine.slots[slot_index]
+        if slot is None:
+            raise ValueError(f"Slot {slot_index + 1} is empty")
+        if not isinstance(slot.plugin, WavSamplerPlugin):
+            raise ValueError(f"Slot {slot_index + 1} is not a WAV sampler")
+        return slot.plugin
+
+    def set_sample_quality(self, quality: str,
+                           slot_index: Optional[int] = None) -> None:
+        """Set realtime interpolation for one WAV slot, or the global default.
+
+        The global default only affects slots loaded afterwards.
+        """
+        resolve_quality(quality)
+        if slot_index is None:
+            self.sample_quality = quality.strip().lower()
+            logger.info("[WAV] default quality -> %s", self.sample_quality)
+            return
+
+        plugin = self._sampler_plugin(slot_index)
+        plugin.quality = quality
+        logger.info("[WAV] slot %d quality -> %s", slot_index + 1, plugin.quality)
+
+    def set_sample_mipmaps(self, enabled: bool,
+                           slot_index: Optional[int] = None) -> None:
+        """Enable octave mipmap tables for one WAV slot, or the global default.
+
+        The global default only affects slots loaded afterwards.
+        """
+        if slot_index is None:
+            self.sample_mipmaps = bool(enabled)
+            logger.info("[WAV] default mipmaps -> %s", "on" if enabled else "off")
+            return
+
+        self._sampler_plugin(slot_index).mipmaps = bool(enabled)
+        logger.info("[WAV] slot %d mipmaps -> %s", slot_index + 1, "on" if enabled else "off")
+
+    def set_sample_storage(self, storage: str,
+                           slot_index: Optional[int] = None) -> None:
+        """Set in-memory sample storage for one WAV slot, or the global default.
+
+        ``int16`` halves memory for 8/16-bit sources; switching a loaded slot
+        re-reads its samples through the shared cache.  The global default
+        only affects slots loaded afterwards.
+        """
+        storage = resolve_storage(storage)
+        if slot_index is None:
+            self.sample_storage = storage
+            logger.info("[WAV] default storage -> %s", storage)
+            return
+
+        plugin = self._sampler_plugin(slot_index)
+        plugin.storage = storage
+        logger.info("[WAV] slot %d storage -> %s (%d bytes)",
+                    slot_index + 1, storage, plugin.memory_bytes)
+
     def remove_instrument(self, slot_index: int) -> InstrumentSlot:
         """Unload and clear one instrument slot."""
         if not 0 <= slot_index < NUM_SLOTS:
@@ -465,7 +655,9 @@ class VcpiCore:
             raise ValueError(f"Slot {slot_index + 1} is already empty")
 
         self.engine.slots[slot_index] = None
-        self.midimix.invalidate_param_cache(slot_index)
+        # Note-offs still pending for the old instrument have nowhere to go.
+        self.scheduler.cancel_matching(slot=slot_index)
+        self.control_maps.params.invalidate(slot_index)
         logger.info("[INST] removed slot %d (%s)", slot_index + 1, slot.name)
         return slot
 
@@ -540,42 +732,173 @@ class VcpiCore:
     def unroute(self, midi_channel: int):
         self.engine.unroute(midi_channel)
 
+    @property
+    def route_rules(self) -> list[RouteRule]:
+        return self.engine.route_rules
+
+    def add_route_rule(self, midi_channel: int, slot_indices, notes=None,
+                       velocities=None, transpose: int = 0) -> RouteRule:
+        """Add a split/layer/velocity-zone rule (0-based channel and slots)."""
+        rule = make_rule(midi_channel, slot_indices, notes, velocities, transpose)
+        self.engine.add_route_rule(rule)
+        return rule
+
+    def remove_route_rule(self, index: int) -> RouteRule:
+        return self.engine.remove_route_rule(index)
+
+    def clear_route_rules(self):
+        self.engine.set_route_rules([])
+
     # -- MIDI controllers ----------------------------------------------------
 
-    def open_midi_input(self, port_index: int | str) -> MidiInputController:
-        """Open any MIDI input port and add it to the active inputs list."""
-        port_index = self._resolve_midi_input_port(port_index)
-        ctrl = MidiInputController(self.engine)
-        name = ctrl.open(port_index)
-        self.midi_inputs.append(ctrl)
-        logger.info("[MIDI IN] Opened: %s", name)
-        return ctrl
+    def open_midi_input(self, port_index: int | str,
+                        watch: bool = True) -> MidiInputController:
+        """Open any MIDI input port and add it to the active inputs list.
+
+        With *watch*, the device monitor reopens it after a replug.
+        """
+        with self._device_lock:
+            port_index = self._resolve_midi_input_port(port_index)
+            ctrl = MidiInputController(self.engine, sink=self.arpeggiators.enqueue,
+                                       mapper=self.control_maps.mapper("input"))
+            name = ctrl.open(port_index)
+            self.midi_inputs.append(ctrl)
+            logger.info("[MIDI IN] Opened: %s", name)
+            if watch:
+                self.watch_device("midi_input", name, connected=True)
+            return ctrl
 
     def close_midi_input(self, index: int):
         """Close and remove a MIDI input by its position in midi_inputs."""
-        if not 0 <= index < len(self.midi_inputs):
-            raise ValueError(
-                f"MIDI input index must be 1-{len(self.midi_inputs)}")
-        ctrl = self.midi_inputs.pop(index)
-        ctrl.close()
+        with self._device_lock:
+            if not 0 <= index < len(self.midi_inputs):
+                raise ValueError(
+                    f"MIDI input index must be 1-{len(self.midi_inputs)}")
+            ctrl = self.midi_inputs.pop(index)
+            self.devices.unwatch(self._midi_input_key(ctrl.label))
+            ctrl.close()
         logger.info("[MIDI IN] Closed: %s", ctrl.label)
 
-    def open_mixer_midi(self, port_index: int | str):
-        port_index = self._resolve_midi_input_port(port_index)
-        name = self.midimix.open_input(port_index)
-        logger.info("[MIDI Mix IN] Opened: %s", name)
-
-    def open_mixer_midi_out(self, port_index: int | str):
-        port_index = self._resolve_midi_output_port(port_index)
-        name = self.midimix.open_output(port_index)
-        logger.info("[MIDI Mix OUT] Opened: %s", name)
+    def _drop_midi_input(self, port_name: str):
+        """Close the inputs on a port that went away (the watch stays)."""
+        with self._device_lock:
+            for ctrl in [c for c in self.midi_inputs
+                         if self._match_port(port_name, [c.label]) is not None]:
+                self.midi_inputs.remove(ctrl)
+                ctrl.close()
+
+    def open_mixer_midi(self, port_index: int | str, watch: bool = True):
+        with self._device_lock:
+            port_index = self._resolve_midi_input_port(port_index)
+            name = self.midimix.open_input(port_index)
+            logger.info("[MIDI Mix IN] Opened: %s", name)
+            if watch:
+                self.watch_device("midimix_in", name, connected=True)
+
+    def open_mixer_midi_out(self, port_index: int | str, watch: bool = True):
+        with self._device_lock:
+            port_index = self._resolve_midi_output_port(port_index)
+            name = self.midimix.open_output(port_index)
+            logger.info("[MIDI Mix OUT] Opened: %s", name)
+            if watch:
+                self.watch_device("midimix_out", name, connected=True)
 
     def open_virtual_mixer_midi_out(self, name: str = "vcpi-MIDI-Mix-LED"):
         port_name = self.midimix.open_virtual_output(name)
         logger.info("[MIDI Mix OUT] Opened virtual: %s", port_name)
 
     def refresh_mixer_leds(self, slot_indices: Optional[list[int]] = None):
-        self.midimix.refresh_leds(slot_indices)
+        for surface in self.surfaces.values():
+            surface.refresh_leds(slot_indices)
+
+    def _surface(self, driver: str) -> SurfaceDriver:
+        with self._device_lock:
+            surface = self.surfaces.get(driver)
+            if surface is None:
+                surface = SurfaceDriver(self.engine, load_profile(driver), self.control_maps)
+                self.surfaces[driver] = surface
+            return surface
+
+    def open_surface(self, driver: str, port_index: int | str,
+                     watch: bool = True) -> SurfaceDriver:
+        """Open a control-surface driver's input port (loading the driver)."""
+        with self._device_lock:
+            port_index = self._resolve_midi_input_port(port_index)
+            surface = self._surface(driver)
+            name = surface.open_input(port_index)
+            logger.info("[SURFACE] %s in: %s", driver, name)
+            if watch:
+                self.watch_device("surface_in", name, driver=driver, connected=True)
+            return surface
+
+    def open_surface_out(self, driver: str, port_index: int | str,
+                         watch: bool = True) -> SurfaceDriver:
+        """Open a control-surface driver's LED output port."""
+        with self._device_lock:
+            port_index = self._resolve_midi_output_port(port_index)
+            surface = self._surface(driver)
+            name = surface.open_output(port_index)
+            logger.info("[SURFACE] %s out: %s", driver, name)
+            if watch:
+                self.watch_device("surface_out", name, driver=driver, connected=True)
+            return surface
+
+    def close_surface(self, driver: str):
+        with self._device_lock:
+            surface = self.surfaces.get(driver)
+            if surface is None:
+                raise ValueError(f"surface '{driver}' is not open")
+            self.devices.unwatch(f"surface:{driver}:in")
+            self.devices.unwatch(f"surface:{driver}:out")
+            surface.close()
+        logger.info("[SURFACE] %s closed", driver)
+
+    def set_midi_capture(self, enabled: bool, capacity: Optional[int | str] = None):
+        """Turn the MIDI capture on or off; a new size starts an empty buffer."""
+        capture = self.engine.capture
+        if capacity is not None:
+            try:
+                capacity = int(capacity)
+            except ValueError:
+                raise ValueError("capture size must be a number of events") from None
+        if capacity is not None and capacity != capture.capacity:
+            capture = MidiCapture(capacity, enabled)
+            self.engine.capture = capture
+        capture.enabled = enabled
+        logger.info("[CAPTURE] %s (%d events)", "on" if enabled else "off", capture.capacity)
+
+    def save_midi_capture(self, path: str | Path) -> tuple[Path, int]:
+        """Write the captured MIDI to a .mid file at the current tempo."""
+        path = Path(path).expanduser()
+        if not path.suffix:
+            path = path.with_suffix(".mid")
+        events = self.engine.capture.events()
+        if not events:
+            raise ValueError("nothing captured yet")
+        names = {idx: slot.name for idx, slot in enumerate(self.engine.slots) if slot}
+        write_midi_file(path, events, self.link.bpm, names)
+        logger.info("[CAPTURE] saved %d events to %s", len(events), path)
+        return path, len(events)
+
+    def start_midi_clock(self, mode: str, port_index: int | str, watch: bool = True) -> str:
+        """Send (``out``) or follow (``in``) MIDI clock on a port."""
+        mode = str(mode).strip().lower()
+        if mode not in CLOCK_MODES:
+            raise ValueError(f"MIDI clock mode must be one of: {', '.join(CLOCK_MODES)}")
+        with self._device_lock:
+            if mode == "out":
+                name = self.midi_clock.start_out(self._resolve_midi_output_port(port_index))
+            else:
+                name = self.midi_clock.start_in(self._resolve_midi_input_port(port_index))
+            if watch:
+                self.watch_device("midi_clock", name, mode=mode, connected=True)
+        return name
+
+    def stop_midi_clock(self):
+        with self._device_lock:
+            for mode in CLOCK_MODES:
+                self.devices.unwatch(f"midi_clock:{mode}")
+            self.midi_clock.stop()
 
     # -- convenience ---------------------------------------------------------
 
@@ -588,8 +911,8 @@ class VcpiCore:
         on = deps.mido.Message("note_on", note=note, velocity=velocity)
         off = deps.mido.Message("note_off", note=note)
         self.engine.enqueue_midi(slot_index, on)
-        threading.Timer(duration, self.engine.enqueue_midi,
-                        args=(slot_index, off)).start()
+        self.scheduler.call_later(duration, self.engine.enqueue_midi, slot_index, off,
+                                  slot=slot_index)
 
     # -- audio / link --------------------------------------------------------
 
@@ -654,28 +977,164 @@ class VcpiCore:
         logger.warning("[Audio] could not fuzzy-match device '%s', passing as-is", name)
         return name
 
-    def start_audio(self, output_device=None):
-        if isinstance(output_device, str):
-            token = output_device.strip()
-            if token.isdigit():
-                output_device = int(token)
-            elif not token:
-                output_device = None
-            else:
-                output_device = self._resolve_audio_device_by_name(token)
+    def start_audio(self, output_device=None, watch: bool = True):
+        with self._device_lock:
+            if isinstance(output_device, str):
+                token = output_device.strip()
+                if token.isdigit():
+                    output_device = int(token)
+                elif not token:
+                    output_device = None
+                else:
+                    output_device = self._resolve_audio_device_by_name(token)
+
+            self.engine.start(output_device)
+
+            current = self._active_audio_output_name()
+            if current:
+                self._audio_output_name = current
+            elif isinstance(output_device, str):
+                self._audio_output_name = output_device
+            elif isinstance(output_device, int):
+                self._audio_output_name = str(output_device)
+            if watch and self._audio_output_name:
+                self.watch_device("audio_output", self._audio_output_name, connected=True)
 
-        self.engine.start(output_device)
+    def stop_audio(self):
+        with self._device_lock:
+            self.devices.unwatch("audio_output")
+            self.engine.stop()
 
-        current = self._active_audio_output_name()
-        if current:
-            self._audio_output_name = current
-        elif isinstance(output_device, str):
-            self._audio_output_name = output_device
-        elif isinstance(output_device, int):
-            self._audio_output_name = str(output_device)
+    def rescan_audio_devices(self) -> bool:
+        """Let PortAudio see audio devices plugged in since it started.
 
-    def stop_audio(self):
-        self.engine.stop()
+        PortAudio lists devices once, when it initialises; re-initialising
+        is the only way to find new ones and is only safe with no stream
+        open.  Main thread only: the server calls this while an audio
+        output is waited for.  Returns whether a rescan was done.
+        """
+        if not deps.HAS_SOUNDDEVICE or deps.sd is None:
+            return False
+        if "audio_output" not in self.devices.waiting():
+            return False
+        with self._device_lock:
+            if self.engine._stream is not None:
+                return False
+            try:
+                deps.sd._terminate()
+                deps.sd._initialize()
+            except Exception:
+                logger.debug("[Audio] PortAudio rescan failed", exc_info=True)
+                return False
+        return True
+
+    def _audio_output_names(self) -> list[str]:
+        """Names of the audio devices with outputs (as PortAudio last saw them)."""
+        if not deps.HAS_SOUNDDEVICE or deps.sd is None:
+            return []
+        with self._device_lock:
+            devices = deps.sd.query_devices()
+        names = []
+        for info in devices:
+            try:
+                max_out = int(info.get("max_output_channels", 0))
+            except (TypeError, ValueError):
+                max_out = 0
+            if max_out > 0:
+                names.append(str(info.get("name", "")).strip())
+        return names
+
+    # -- device monitor ------------------------------------------------------
+
+    @staticmethod
+    def _midi_input_key(port_name: str) -> str:
+        return f"midi_in:{VcpiCore._strip_alsa_suffix(port_name).lower()}"
+
+    def watch_device(self, device: str, port: str, *, connected: bool = False,
+                     driver: Optional[str] = None,
+                     mode: Optional[str] = None) -> Optional[Watch]:
+        """Keep a device connected to *port* from the device monitor.
+
+        *device* is ``audio_output``, ``midi_input``, ``midimix_in``,
+        ``midimix_out``, ``surface_in`` / ``surface_out`` (with *driver*)
+        or ``midi_clock`` (with *mode*).  A watch that is not *connected*
+        is opened as soon as a port matching *port* appears.  Returns None
+        when the MIDI or audio backend is not installed.
+        """
+        if device == "audio_output":
+            if not deps.HAS_SOUNDDEVICE:
+                return None
+        elif not deps.HAS_RTMIDI:
+            return None
+
+        if device == "audio_output":
+            watch = Watch("audio_output", "audio output", "audio_out", port,
+                          self._reopen_audio, self.engine.stop,
+                          lambda: self.engine.running)
+        elif device == "midi_input":
+            watch = Watch(self._midi_input_key(port), "MIDI in", "midi_in", port,
+                          lambda name: self.open_midi_input(name, watch=False),
+                          lambda: self._drop_midi_input(port),
+                          lambda: any(c.port_name for c in self.midi_inputs
+                                      if self._match_port(port, [c.label]) is not None))
+        elif device in ("midimix_in", "midimix_out"):
+            out = device == "midimix_out"
+            watch = Watch(device, "MIDI Mix out" if out else "MIDI Mix in",
+                          "midi_out" if out else "midi_in", port,
+                          lambda name: (self.open_mixer_midi_out if out
+                                        else self.open_mixer_midi)(name, watch=False),
+                          self.midimix.close_output if out else self.midimix.close_input,
+                          lambda: (self.midimix.output_port_name if out
+                                   else self.midimix.input_port_name) is not None)
+        elif device in ("surface_in", "surface_out") and driver:
+            load_profile(driver)  # unknown drivers fail here, not on hotplug
+            out = device == "surface_out"
+            side = "out" if out else "in"
+            opener = self.open_surface_out if out else self.open_surface
+
+            def _surface_open() -> bool:
+                surface = self.surfaces.get(driver)
+                if surface is None:
+                    return False
+                return (surface.output_port_name if out
+                        else surface.input_port_name) is not None
+
+            watch = Watch(f"surface:{driver}:{side}", f"{driver} {side}",
+                          "midi_out" if out else "midi_in", port,
+                          lambda name: opener(driver, name, watch=False),
+                          lambda: (self._surface(driver).close_output() if out
+                                   else self._surface(driver).close_input()),
+                          _surface_open)
+        elif device == "midi_clock" and mode in CLOCK_MODES:
+            for other in CLOCK_MODES:
+                if other != mode:
+                    self.devices.unwatch(f"midi_clock:{other}")
+            watch = Watch(f"midi_clock:{mode}", f"MIDI clock {mode}",
+                          "midi_out" if mode == "out" else "midi_in", port,
+                          lambda name: self.start_midi_clock(mode, name, watch=False),
+                          self.midi_clock.stop, lambda: self.midi_clock.mode == mode)
+        else:
+            raise ValueError(f"cannot watch device '{device}'")
+        watch.connected = connected
+        return self.devices.watch(watch)
+
+    def _reopen_audio(self, name: str):
+        with self._device_lock:
+            if self.engine._stream is not None:
+                self.engine.stop()
+            self.start_audio(name, watch=False)
+
+    def forget_device(self, index: int) -> Watch:
+        """Stop watching the *index*-th (0-based) watched device."""
+        watches = self.devices.watches()
+        if not 0 <= index < len(watches):
+            if not watches:
+                raise ValueError("no devices are watched")
+            raise ValueError(f"device number must be 1-{len(watches)}")
+        watch = watches[index]
+        self.devices.unwatch(watch.key)
+        logger.info("[Devices] no longer watching %s '%s'", watch.label, watch.name)
+        return watch
 
     def start_link(self, bpm: Optional[float] = None):
         if bpm is not None:
@@ -705,11 +1164,15 @@ class VcpiCore:
 
     def shutdown(self):
         self.save_session()
+        self.devices.stop()
         self.sequencer.stop()
+        self.scheduler.stop()
         self.engine.shutdown()  # stops audio stream + render thread pool
         for ctrl in self.midi_inputs:
             ctrl.close()
         self.midi_inputs.clear()
-        self.midimix.close()
+        for surface in self.surfaces.values():
+            surface.close()
+        self.midi_clock.stop()
         self.stop_link()
         logger.info("[Host] Shutdown complete")
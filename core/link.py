@@ -3,31 +3,58 @@
 LinkSync wraps the ``aalink`` library to provide:
 
 * Shared tempo (``bpm`` property, bidirectional with Link peers).
+* A local timeline model: the aalink event loop samples the Link
+  session every ``TIMELINE_REFRESH_SECONDS`` and publishes an immutable
+  :class:`LinkTimeline` (monotonic time, beat, tempo).  Any thread --
+  the sequencer, the audio callback -- computes beats, phases and the
+  time of a future beat from the latest snapshot without touching the
+  aalink loop.
 * Beat-grid synchronisation via :meth:`sync` -- blocks the calling
   thread until the shared Link timeline reaches the next *n*-th beat
-  boundary.  This is the mechanism the internal sequencer uses to
-  align its bar start/end with Ableton Live and other Link peers.
+  boundary, sleeping on the local timeline.
 """
 
 from __future__ import annotations
 
 import asyncio
-import concurrent.futures
 import logging
+import math
 import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
 
 from core.deps import HAS_LINK, aalink
 
 logger = logging.getLogger(__name__)
 
+TIMELINE_REFRESH_SECONDS = 0.02
+SYNC_MAX_SLEEP = 0.05  # re-read the timeline at least this often in sync()
+
+
+@dataclass(frozen=True)
+class LinkTimeline:
+    """Snapshot of the Link timeline: *beat* at ``time.monotonic()`` *time*."""
+    time: float
+    beat: float
+    bpm: float
+
+    def beat_at(self, t: float) -> float:
+        return self.beat + (t - self.time) * self.bpm / 60.0
+
+    def time_at(self, beat: float) -> float:
+        return self.time + (beat - self.beat) * 60.0 / self.bpm
+
+    def phase(self, t: float, quantum: float = 4.0) -> float:
+        """Position inside the current *quantum* (0 <= phase < quantum)."""
+        return self.beat_at(t) % quantum
+
 
 class LinkSync:
     """Minimal wrapper around aalink for tempo sync.
 
-    The async ``aalink.Link.sync(quantum)`` call is bridged to a
-    blocking :meth:`sync` that any thread can call.  Internally it
-    schedules the coroutine on the dedicated aalink event loop and
-    waits on a :class:`concurrent.futures.Future`.
+    The aalink event loop only refreshes the timeline snapshot; readers
+    never schedule work on it.
     """
 
     def __init__(self, bpm: float = 120.0):
@@ -36,6 +63,8 @@ class LinkSync:
         self._enabled = False
         self._loop: asyncio.AbstractEventLoop | None = None
         self._loop_thread: threading.Thread | None = None
+        # Replaced wholesale by the refresher, so readers need no lock.
+        self._timeline: Optional[LinkTimeline] = None
 
     def _start_loop_thread(self) -> asyncio.AbstractEventLoop:
         if self._loop is not None and self._loop_thread is not None and self._loop_thread.is_alive():
@@ -90,9 +119,13 @@ class LinkSync:
             self._link = self._make_link()
             self._link.enabled = True
             self._enabled = True
+            self._refresh_timeline()
+            loop = self._start_loop_thread()
+            loop.call_soon_threadsafe(asyncio.ensure_future, self._refresh_loop())
         except Exception:
             self._link = None
             self._enabled = False
+            self._timeline = None
             self._stop_loop_thread()
             raise
 
@@ -101,14 +134,44 @@ class LinkSync:
             self._link.enabled = False
             self._link = None
         self._enabled = False
+        self._timeline = None
         self._stop_loop_thread()
 
+    # -- local timeline ------------------------------------------------------
+
+    def _refresh_timeline(self):
+        """Sample the Link session and publish a new ``LinkTimeline``."""
+        link = self._link
+        if link is None:
+            return
+        try:
+            t0 = time.monotonic()
+            beat = float(link.beat)
+            t1 = time.monotonic()
+            bpm = float(link.tempo)
+        except Exception:
+            return
+        if bpm > 0:
+            self._timeline = LinkTimeline((t0 + t1) / 2.0, beat, bpm)
+
+    async def _refresh_loop(self):
+        while self._enabled and self._link is not None:
+            self._refresh_timeline()
+            await asyncio.sleep(TIMELINE_REFRESH_SECONDS)
+
+    def timeline(self) -> Optional[LinkTimeline]:
+        """Latest timeline snapshot, or None when Link is disabled."""
+        return self._timeline if self._enabled else None
+
     @property
     def enabled(self) -> bool:
         return self._enabled
 
     @property
     def bpm(self) -> float:
+        timeline = self.timeline()
+        if timeline is not None:
+            return timeline.bpm
         return self._link.tempo if self._link else self._bpm
 
     @bpm.setter
@@ -116,19 +179,39 @@ class LinkSync:
         self._bpm = value
         if self._link:
             self._link.tempo = value
+            self._refresh_timeline()
 
     @property
     def num_peers(self) -> int:
         return self._link.num_peers if self._link else 0
 
+    @property
+    def beat(self) -> float | None:
+        """Current beat on the shared Link timeline, or None when disabled.
+
+        Extrapolated from the latest snapshot, so it is cheap enough for
+        the audio callback.
+        """
+        timeline = self.timeline()
+        if timeline is None:
+            return None
+        return timeline.beat_at(time.monotonic())
+
+    def phase(self, quantum: float = 4.0) -> float | None:
+        """Current position inside *quantum* beats, or None when disabled."""
+        timeline = self.timeline()
+        if timeline is None:
+            return None
+        return timeline.phase(time.monotonic(), quantum)
+
     # -- beat-grid sync (thread-safe) ----------------------------------------
 
     def sync(self, beats: float, timeout: float = 4.0) -> float:
         """Block until the Link timeline reaches the next *beats* boundary.
 
-        This is a thread-safe wrapper around ``await link.sync(beats)``.
-        It schedules the coroutine on the aalink event loop and waits
-        for the result.
+        Sleeps on the local timeline, re-reading the snapshot at least
+        every ``SYNC_MAX_SLEEP`` seconds so tempo changes from peers are
+        followed.
 
         Args:
             beats:   Quantum value -- e.g. 4 for a full bar, 1 for a
@@ -136,25 +219,25 @@ class LinkSync:
             timeout: Maximum seconds to wait (safety net).
 
         Returns:
-            The beat number at which the sync resolved (from aalink).
+            The boundary beat that was reached.
 
         Raises:
-            RuntimeError: If Link is not enabled or the event loop is
-                not running.
+            RuntimeError: If Link is not enabled.
+            TimeoutError: If the boundary is not reached in *timeout*.
         """
-        link = self._link
-        loop = self._loop
-        if link is None or loop is None or not self._enabled:
+        timeline = self.timeline()
+        if timeline is None:
             raise RuntimeError("Link is not enabled")
-
-        fut: concurrent.futures.Future[float] = concurrent.futures.Future()
-
-        async def _sync():
-            try:
-                beat = await link.sync(beats)
-                fut.set_result(beat)
-            except Exception as exc:
-                fut.set_exception(exc)
-
-        loop.call_soon_threadsafe(asyncio.ensure_future, _sync())
-        return fut.result(timeout=timeout)
+        target = (math.floor(timeline.beat_at(time.monotonic()) / beats) + 1) * beats
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            timeline = self.timeline()
+            if timeline is None:
+                raise RuntimeError("Link is not enabled")
+            wait = timeline.time_at(target) - now
+            if wait <= 0:
+                return target
+            if now > deadline:
+                raise TimeoutError(f"Link beat {target:g} not reached in {timeout:g}s")
+            time.sleep(min(wait, SYNC_MAX_SLEEP))
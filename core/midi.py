@@ -1,4 +1,13 @@
-"""Low-level MIDI input/output port wrappers (python-rtmidi)."""
+"""Low-level MIDI input/output port wrappers (python-rtmidi).
+
+Channel messages travel from MIDI inputs to the slots as raw tuples,
+``(status, data1[, data2])`` -- the bytes rtmidi delivered, with nothing
+parsed or validated on the input thread.  They are turned into the form
+a consumer wants only at the slot boundary: ``(bytes, seconds)`` pairs
+for pedalboard plugins, while the WAV sampler reads the bytes directly.
+Internal producers (sequencer, scheduler) may still queue mido messages;
+``raw_bytes`` gives the same tuple for either.
+"""
 
 from __future__ import annotations
 
@@ -6,6 +15,85 @@ from typing import Callable, Optional
 
 from core.deps import HAS_RTMIDI, rtmidi
 
+# Channel voice status nibbles (status & 0xF0).
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+POLY_PRESSURE = 0xA0
+CONTROL_CHANGE = 0xB0
+CHANNEL_PRESSURE = 0xD0
+PITCH_BEND = 0xE0
+
+
+def raw_bytes(msg) -> tuple[int, ...]:
+    """Raw bytes of a queued MIDI event as a tuple.
+
+    Raw tuples come back as they are; message objects (mido, or anything
+    with ``type``/``note``/``velocity``) are encoded from their fields.
+    Returns ``()`` for objects that are neither.
+    """
+    if type(msg) is tuple:
+        return msg
+    kind = getattr(msg, "type", "")
+    channel = int(getattr(msg, "channel", 0))
+    if kind == "note_on":
+        return (NOTE_ON | channel, int(msg.note), int(getattr(msg, "velocity", 64)))
+    if kind == "note_off":
+        return (NOTE_OFF | channel, int(getattr(msg, "note", 0)), int(getattr(msg, "velocity", 0)))
+    encode = getattr(msg, "bytes", None)
+    return tuple(encode()) if callable(encode) else ()
+
+
+def plugin_event(msg, seconds: float) -> tuple[bytes, float]:
+    """A queued MIDI event as pedalboard's ``(bytes, timestamp)`` pair."""
+    return bytes(raw_bytes(msg)), seconds
+
+
+# -- coalescing ----------------------------------------------------------------
+
+# Controllers whose every message matters: bank select, data entry and
+# (N)RPN sequences, switch pedals, and channel mode messages.
+KEEP_CONTROLLERS = frozenset((0, 6, 32, 38, 64, 65, 66, 67, 68, 69,
+                              96, 97, 98, 99, 100, 101, *range(120, 128)))
+
+
+def _stream_key(data: tuple[int, ...]):
+    """Key of the continuous stream a message belongs to, or None."""
+    kind = data[0] & 0xF0
+    if kind == CONTROL_CHANGE:
+        return None if data[1] in KEEP_CONTROLLERS else (data[0], data[1])
+    if kind == POLY_PRESSURE:
+        return data[0], data[1]
+    if kind in (PITCH_BEND, CHANNEL_PRESSURE):
+        return data[0]
+    return None
+
+
+def coalesce_events(events: list, limit: int) -> list:
+    """Thin continuous-controller streams to at most *limit* messages.
+
+    *events* are one slot's ``(msg, offset)`` pairs for a block.  Each
+    stream (a CC number, pitch bend, channel or poly aftertouch on one
+    channel) keeps *limit* evenly spaced messages, always including its
+    last; notes and every other message stay as they are.  Kept messages
+    keep their place, so the order against notes does not change.
+    """
+    streams: dict = {}
+    for i, (msg, _offset) in enumerate(events):
+        data = raw_bytes(msg)
+        if len(data) >= 2:
+            key = _stream_key(data)
+            if key is not None:
+                streams.setdefault(key, []).append(i)
+    drop: set[int] = set()
+    for indices in streams.values():
+        count = len(indices)
+        if count > limit:
+            keep = {indices[(k + 1) * count // limit - 1] for k in range(limit)}
+            drop.update(i for i in indices if i not in keep)
+    if not drop:
+        return events
+    return [event for i, event in enumerate(events) if i not in drop]
+
 
 def list_midi_input_ports() -> list[str]:
     if not HAS_RTMIDI:
@@ -0,0 +1,244 @@
+"""MIDI clock (24 PPQN) output and input sync.
+
+Clock out (master) sends timing clock (``0xF8``) 24 times per beat on an
+output port, with start (``0xFA``) and stop (``0xFC``).  Pulses follow
+the sequencer timebase -- the Link timeline when Link is enabled, the
+beat the audio clock plays while it runs, otherwise the sequencer's
+freewheel clock -- so external gear lands on the same beats as the
+internal sequencer.  Start is sent on the next bar
+of that timebase; when the timebase jumps (the sequencer restarts, a
+Link peer moves the timeline) the gear is stopped and restarted on the
+next bar.  The pulse thread sleeps until just before each pulse and
+spins the last fraction of a millisecond.
+
+Clock in (slave) derives tempo and phase from an incoming clock.  Pulse
+intervals go through an exponential smoothing filter before they set the
+tempo; each pulse after a start pulls the sequencer's freewheel clock
+towards the beat it marks, and the audio clock slews after it.  Phase is only followed while Link is off
+(Link owns the timeline when it is on).
+
+Both directions measure jitter: clock out the lateness of each pulse
+against its ideal time, clock in the deviation of each pulse interval
+from the smoothed interval.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+from core.midi import MidiInPort, MidiOutPort
+
+if TYPE_CHECKING:
+    from core.host import VcpiCore
+
+logger = logging.getLogger(__name__)
+
+PPQN = 24  # MIDI clock pulses per beat
+CLOCK, START, CONTINUE, STOP = 0xF8, 0xFA, 0xFB, 0xFC
+CLOCK_MODES = ("out", "in")
+
+START_QUANTUM = 4  # beats: clock out starts the gear on the next bar
+SPIN_SECONDS = 0.0005  # clock out: busy-wait this close to a pulse
+MAX_WAIT_SECONDS = 0.05
+
+SMOOTHING = 0.05  # clock in: weight of each new pulse interval
+PHASE_GAIN = 0.1  # clock in: fraction of the phase error corrected per pulse
+MAX_PULSE_GAP = 0.25  # seconds; a longer gap (< 10 BPM) restarts the filter
+MIN_BPM, MAX_BPM = 20.0, 400.0
+
+JITTER_WINDOW = 512  # recent pulses kept for the jitter percentiles
+
+
+class MidiClock:
+    """MIDI clock master (``out``) or slave (``in``) on one port."""
+
+    def __init__(self, host: VcpiCore, clock: Callable[[], float] = time.monotonic):
+        self._host = host
+        self._clock = clock
+        self.mode: Optional[str] = None
+        self._out = MidiOutPort()
+        self._in = MidiInPort()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self._pulses = 0          # pulses sent, or received since the last start
+        self._playing = False     # clock in: between start/continue and stop
+        self._last_pulse: Optional[float] = None
+        self._interval: Optional[float] = None  # smoothed pulse interval (s)
+
+        self._jitter: deque[float] = deque(maxlen=JITTER_WINDOW)
+        self._jitter_max = 0.0
+
+    @property
+    def port_name(self) -> Optional[str]:
+        if self.mode == "out":
+            return self._out.name
+        if self.mode == "in":
+            return self._in.name
+        return None
+
+    # -- control -------------------------------------------------------------
+
+    def start_out(self, port_index: int) -> str:
+        """Send clock on an output port, following the sequencer timebase."""
+        self.stop()
+        name = self._out.open_output_port(port_index)
+        self._begin("out")
+        self._thread = threading.Thread(
+            target=self._run_out, name="vcpi-midi-clock", daemon=True)
+        self._thread.start()
+        logger.info("[CLOCK] out -> %s", name)
+        return name
+
+    def start_in(self, port_index: int) -> str:
+        """Follow the clock arriving on an input port."""
+        self.stop()
+        name = self._in.open_input_port(port_index, self.on_midi)
+        self._begin("in")
+        logger.info("[CLOCK] in <- %s", name)
+        return name
+
+    def stop(self):
+        """Stop either direction and close its port (idempotent)."""
+        mode, self.mode = self.mode, None
+        if mode == "out":
+            self._stop_event.set()
+            if self._thread is not None:
+                self._thread.join(timeout=2.0)
+                self._thread = None
+            try:
+                self._out.send([STOP])
+            except Exception:
+                pass
+            self._out.close()
+        elif mode == "in":
+            self._in.close()
+        if mode is not None:
+            logger.info("[CLOCK] %s stopped", mode)
+
+    def _begin(self, mode: str):
+        self.mode = mode
+        self._stop_event.clear()
+        self._pulses = 0
+        self._playing = False
+        self._last_pulse = None
+        self._interval = None
+        self._jitter.clear()
+        self._jitter_max = 0.0
+
+    def _record_jitter(self, seconds: float):
+        self._jitter.append(seconds)
+        if abs(seconds) > self._jitter_max:
+            self._jitter_max = abs(seconds)
+
+    # -- clock out -----------------------------------------------------------
+
+    def _run_out(self):
+        sequencer = self._host.sequencer
+        send = self._out.send
+        pulse: Optional[int] = None  # absolute pulse index sent next
+        started = False
+        while not self._stop_event.is_set():
+            now = self._clock()
+            at = sequencer.timebase_beat() * PPQN
+            if pulse is not None and (at < pulse - PPQN or at - pulse > PPQN):
+                # The timebase jumped: restart the gear on the next bar.
+                if started:
+                    send([STOP])
+                pulse = None
+            if pulse is None:
+                pulse = math.ceil(at / (START_QUANTUM * PPQN)) * START_QUANTUM * PPQN
+                started = False
+            due = now + (pulse - at) * 60.0 / (self._host.link.bpm * PPQN)
+            if due - now > SPIN_SECONDS:
+                self._stop_event.wait(timeout=min(due - now - SPIN_SECONDS, MAX_WAIT_SECONDS))
+                continue
+            while self._clock() < due:
+                pass
+            try:
+                if not started:
+                    send([START])
+                    started = True
+                send([CLOCK])
+            except Exception as exc:
+                logger.warning("[CLOCK] send failed: %s", exc)
+                self._stop_event.wait(timeout=MAX_WAIT_SECONDS)
+                continue
+            self._record_jitter(self._clock() - due)
+            self._pulses += 1
+            pulse += 1
+
+    # -- clock in ------------------------------------------------------------
+
+    def on_midi(self, event, data=None):
+        """rtmidi callback for the clock input port."""
+        del data
+        raw, _dt = event
+        if not raw:
+            return
+        status = raw[0]
+        if status == CLOCK:
+            self._on_pulse(self._clock())
+        elif status == START:
+            self._pulses = -1  # the next pulse is beat 0
+            self._playing = True
+        elif status == CONTINUE:
+            self._playing = True
+        elif status == STOP:
+            self._playing = False
+
+    def _on_pulse(self, now: float):
+        last, self._last_pulse = self._last_pulse, now
+        if last is not None:
+            interval = now - last
+            if interval > MAX_PULSE_GAP or interval <= 0:
+                self._interval = None
+            elif self._interval is None:
+                self._interval = interval
+            else:
+                self._record_jitter(interval - self._interval)
+                self._interval += SMOOTHING * (interval - self._interval)
+            if self._interval is not None:
+                bpm = min(MAX_BPM, max(MIN_BPM, 60.0 / (self._interval * PPQN)))
+                bpm = round(bpm, 2)
+                if bpm != self._host.link.bpm:
+                    self._host.link.bpm = bpm
+        if self._playing:
+            self._pulses += 1
+            self._host.sequencer.align_clock(self._pulses / PPQN, now, PHASE_GAIN)
+
+    # -- metrics -------------------------------------------------------------
+
+    @property
+    def bpm(self) -> Optional[float]:
+        """Tempo measured from the incoming clock (clock in only)."""
+        if self.mode != "in" or self._interval is None:
+            return None
+        return 60.0 / (self._interval * PPQN)
+
+    def stats(self) -> dict[str, Any]:
+        """Mode, port, pulse count and jitter (ms) of recent pulses."""
+        jitter = sorted(abs(j) for j in self._jitter)
+        if jitter:
+            mean_ms = sum(jitter) / len(jitter) * 1000.0
+            p99_ms = jitter[min(len(jitter) - 1, int(len(jitter) * 0.99))] * 1000.0
+        else:
+            mean_ms = p99_ms = 0.0
+        bpm = self.bpm
+        return {
+            "mode": self.mode,
+            "port": self.port_name,
+            "pulses": self._pulses,
+            "playing": self._playing if self.mode == "in" else self.mode == "out",
+            "bpm": round(bpm, 2) if bpm is not None else None,
+            "jitter_ms": {
+                "mean": round(mean_ms, 3),
+                "p99": round(p99_ms, 3),
+                "max": round(self._jitter_max * 1000.0, 3),
+            },
+        }
@@ -21,7 +21,7 @@ class InstrumentSlot:
     muted: bool = False
     solo: bool = False
     enabled: bool = True
-    source_type: str = "plugin"  # plugin | wav | vcv
+    source_type: str = "plugin"  # plugin | wav | pack | vcv
     vcv_patch_path: str = ""     # .vcv patch file (when source_type == "vcv")
     _effects_board: object = field(default=None, repr=False, compare=False)
 
@@ -31,6 +31,7 @@ class InstrumentSlot:
 
         Format:
           sample::<pack>:<stem>   for WAV samples
+          pack::<pack>            for multisample packs
           vst3::<name>            for VST3 plugins
           vcv::<patch stem>       for VCV/Cardinal patches
         """
@@ -43,6 +44,8 @@ class InstrumentSlot:
                 pack = "?"
             stem = Path(self.path).stem
             return f"sample::{pack}:{stem}"
+        if self.source_type == "pack":
+            return f"pack::{Path(self.path).name}"
         if self.source_type == "vcv":
             patch_stem = Path(self.vcv_patch_path).stem if self.vcv_patch_path else self.name
             return f"vcv::{patch_stem}"
@@ -0,0 +1,165 @@
+"""MIDI routing matrix: channel, note and velocity ranges to slots.
+
+A route rule sends one MIDI channel -- optionally narrowed to a note
+range and a velocity range -- to one or more slots, with a transpose:
+
+  split           -- rules on the same channel with disjoint note ranges
+  layer           -- one rule (or several) sending the same keys to many slots
+  velocity zones  -- rules with disjoint velocity ranges
+
+The plain channel routes of ``midi link`` (``AudioEngine.channel_map``)
+are full-range rules without transpose.
+
+Whenever rules change they are compiled into a ``RouteTable``: a 16x128
+array of slot bitmasks indexed by ``channel << 7 | note``, the output
+note per slot and cell (transpose applied), and per-channel masks for
+messages that carry no note (CC, pitch bend, aftertouch).  Routing an
+event is then a couple of array indexes.  The table is replaced with a
+single reference assignment, so the input thread never sees a half-built
+one.
+
+Velocity zones are the one case a 16x128 table cannot index directly:
+cells covered by a rule with a velocity range keep a short tuple of
+``(low, high, mask)`` zones that note-ons check.  Note-offs go to every
+slot a note-on on that key could have reached, whatever the velocity.
+When two rules send the same key to the same slot with different
+transposes, the later rule's note wins.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from core.models import NUM_SLOTS
+
+NUM_CHANNELS = 16
+NUM_NOTES = 128
+CELLS = NUM_CHANNELS * NUM_NOTES
+FULL_NOTES = (0, 127)
+FULL_VELOCITIES = (1, 127)
+MAX_TRANSPOSE = 48
+
+# Slot indices set in each mask, so a lookup never loops over bits.
+MASK_SLOTS: tuple[tuple[int, ...], ...] = tuple(
+    tuple(i for i in range(NUM_SLOTS) if mask >> i & 1) for mask in range(1 << NUM_SLOTS)
+)
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    """Channel (0-15), note and velocity ranges to slot indices (0-7)."""
+    channel: int
+    slots: tuple[int, ...]
+    notes: tuple[int, int] = FULL_NOTES
+    velocities: tuple[int, int] = FULL_VELOCITIES
+    transpose: int = 0
+
+    @property
+    def zoned(self) -> bool:
+        return self.velocities != FULL_VELOCITIES
+
+    def describe(self) -> str:
+        """One-line, 1-based summary, e.g. ``ch 1 notes 0-59 -> slot 1,2``."""
+        text = f"ch {self.channel + 1}"
+        if self.notes != FULL_NOTES:
+            text += f" notes {self.notes[0]}-{self.notes[1]}"
+        if self.zoned:
+            text += f" vel {self.velocities[0]}-{self.velocities[1]}"
+        if self.transpose:
+            text += f" transpose {self.transpose:+d}"
+        return text + " -> slot " + ",".join(str(s + 1) for s in self.slots)
+
+    def to_dict(self) -> dict[str, Any]:
+        """1-based form used by sessions and the typed API."""
+        return {
+            "channel": self.channel + 1,
+            "slots": [s + 1 for s in self.slots],
+            "notes": list(self.notes),
+            "velocities": list(self.velocities),
+            "transpose": self.transpose,
+        }
+
+
+def _range(value, low: int, high: int, label: str) -> tuple[int, int]:
+    try:
+        lo, hi = (int(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{label} must be a [low, high] pair") from None
+    if not low <= lo <= hi <= high:
+        raise ValueError(f"{label} must satisfy {low} <= low <= high <= {high}")
+    return lo, hi
+
+
+def make_rule(channel: int, slots, notes=None, velocities=None, transpose: int = 0) -> RouteRule:
+    """Validated ``RouteRule`` from internal (0-based) channel and slots."""
+    if not 0 <= channel < NUM_CHANNELS:
+        raise ValueError("MIDI channel must be 1-16")
+    slots = tuple(sorted({int(s) for s in slots}))
+    if not slots:
+        raise ValueError("a route needs at least one slot")
+    if not all(0 <= s < NUM_SLOTS for s in slots):
+        raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+    notes = _range(notes, 0, 127, "note range") if notes is not None else FULL_NOTES
+    velocities = (_range(velocities, 1, 127, "velocity range")
+                  if velocities is not None else FULL_VELOCITIES)
+    transpose = int(transpose)
+    if not -MAX_TRANSPOSE <= transpose <= MAX_TRANSPOSE:
+        raise ValueError(f"transpose must be within +-{MAX_TRANSPOSE}")
+    return RouteRule(channel, slots, notes, velocities, transpose)
+
+
+def rule_from_dict(data: dict) -> RouteRule:
+    """Inverse of ``RouteRule.to_dict``."""
+    if not isinstance(data, dict):
+        raise ValueError("route must be an object")
+    return make_rule(int(data["channel"]) - 1, [int(s) - 1 for s in data["slots"]],
+                     data.get("notes"), data.get("velocities"), data.get("transpose", 0))
+
+
+class RouteTable:
+    """Compiled routing: every lookup is an array index."""
+
+    __slots__ = ("masks", "zones", "off_masks", "notes", "channel_masks")
+
+    def __init__(self):
+        self.masks = [0] * CELLS       # note-on slots, rules without velocity range
+        self.zones: list[Optional[tuple[tuple[int, int, int], ...]]] = [None] * CELLS
+        self.off_masks = [0] * CELLS   # note-off slots: every rule on the key
+        self.notes = [bytearray(range(NUM_NOTES)) * NUM_CHANNELS for _ in range(NUM_SLOTS)]
+        self.channel_masks = [0] * NUM_CHANNELS  # CC / pitch bend / aftertouch
+
+    def note_on_mask(self, cell: int, velocity: int) -> int:
+        mask = self.masks[cell]
+        zones = self.zones[cell]
+        if zones is not None:
+            for low, high, bits in zones:
+                if low <= velocity <= high:
+                    mask |= bits
+        return mask
+
+
+def compile_routes(channel_map: dict[int, int], rules: list[RouteRule]) -> RouteTable:
+    """Compile channel links and rules into a ``RouteTable``."""
+    table = RouteTable()
+    full = [RouteRule(ch, (slot,)) for ch, slot in sorted(channel_map.items())]
+    for rule in full + list(rules):
+        base = rule.channel << 7
+        for slot in rule.slots:
+            table.channel_masks[rule.channel] |= 1 << slot
+        for note in range(rule.notes[0], rule.notes[1] + 1):
+            out = note + rule.transpose
+            if not 0 <= out < NUM_NOTES:
+                continue
+            cell = base | note
+            bits = 0
+            for slot in rule.slots:
+                bits |= 1 << slot
+                table.notes[slot][cell] = out
+            table.off_masks[cell] |= bits
+            if rule.zoned:
+                low, high = rule.velocities
+                table.zones[cell] = (table.zones[cell] or ()) + ((low, high, bits),)
+            else:
+                table.masks[cell] |= bits
+    return table
@@ -0,0 +1,201 @@
+"""Shared scheduler thread for delayed MIDI events.
+
+Note-offs from the sequencer and audition notes from ``send_note`` used to
+start one ``threading.Timer`` -- a full OS thread -- per note.  Everything
+delayed now goes through one ``MidiScheduler``: a heap ordered by due time
+and a single daemon thread that sleeps until the earliest entry.
+
+Events can be tagged with a slot and/or sequence bank so that clearing a
+bank or unloading a slot cancels what is still pending for it.  Lateness
+(how far past its due time an event actually ran) and queue depth are
+tracked for the status panel.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+LATENESS_WINDOW = 512  # recent events kept for the lateness percentiles
+
+
+@dataclass(order=True)
+class ScheduledEvent:
+    """One pending callback; ordered by (due, seq) on the heap."""
+
+    due: float
+    seq: int
+    callback: Callable[..., Any] = field(compare=False)
+    args: tuple = field(default=(), compare=False)
+    slot: Optional[int] = field(default=None, compare=False)
+    bank: Optional[int] = field(default=None, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class MidiScheduler:
+    """Single-thread heap scheduler for delayed MIDI callbacks."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._heap: list[ScheduledEvent] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self._scheduled = 0
+        self._fired = 0
+        self._cancelled = 0
+        self._late: deque[float] = deque(maxlen=LATENESS_WINDOW)
+        self._late_max = 0.0
+
+    # -- scheduling ----------------------------------------------------------
+
+    def call_at(self, due: float, callback: Callable[..., Any], *args,
+                slot: Optional[int] = None,
+                bank: Optional[int] = None) -> ScheduledEvent:
+        """Run ``callback(*args)`` at clock time *due*."""
+        event = ScheduledEvent(due, next(self._seq), callback, args, slot, bank)
+        with self._cond:
+            heapq.heappush(self._heap, event)
+            self._scheduled += 1
+            if not self._running:
+                self._start_locked()
+            elif self._heap[0] is event:
+                self._cond.notify()
+        return event
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args,
+                   slot: Optional[int] = None,
+                   bank: Optional[int] = None) -> ScheduledEvent:
+        """Run ``callback(*args)`` after *delay* seconds."""
+        return self.call_at(self._clock() + max(0.0, delay), callback, *args,
+                            slot=slot, bank=bank)
+
+    def cancel(self, event: ScheduledEvent) -> bool:
+        """Cancel one pending event; return False if it already ran."""
+        with self._cond:
+            if event.cancelled or event not in self._heap:
+                return False
+            event.cancelled = True
+            self._heap.remove(event)
+            heapq.heapify(self._heap)
+            self._cancelled += 1
+            return True
+
+    def cancel_matching(self, slot: Optional[int] = None,
+                        bank: Optional[int] = None, flush: bool = False) -> int:
+        """Cancel pending events tagged with *slot* and/or *bank*.
+
+        With *flush* the matching callbacks run immediately instead of
+        being dropped -- used for note-offs, so clearing a sequence bank
+        does not leave notes hanging.  Returns the number of events.
+        """
+        if slot is None and bank is None:
+            return 0
+        with self._cond:
+            matched = [e for e in self._heap
+                       if (slot is None or e.slot == slot)
+                       and (bank is None or e.bank == bank)]
+            if not matched:
+                return 0
+            for event in matched:
+                event.cancelled = True
+            self._heap = [e for e in self._heap if not e.cancelled]
+            heapq.heapify(self._heap)
+            if not flush:
+                self._cancelled += len(matched)
+        if flush:
+            for event in sorted(matched):
+                self._run(event)
+        return len(matched)
+
+    # -- thread --------------------------------------------------------------
+
+    def _start_locked(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._loop, name="vcpi-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True):
+        """Stop the thread; pending events run now unless *flush* is False."""
+        with self._cond:
+            if not self._running:
+                pending: list[ScheduledEvent] = []
+            else:
+                self._running = False
+                pending = sorted(self._heap)
+                self._heap = []
+                self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=2.0)
+        if flush:
+            for event in pending:
+                self._run(event)
+        else:
+            self._cancelled += len(pending)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0].due - self._clock()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(timeout=delay)
+                if not self._running:
+                    return
+                event = heapq.heappop(self._heap)
+            late = self._clock() - event.due
+            self._late.append(late)
+            if late > self._late_max:
+                self._late_max = late
+            self._run(event)
+
+    def _run(self, event: ScheduledEvent):
+        self._fired += 1
+        try:
+            event.callback(*event.args)
+        except Exception:
+            logger.warning("[SCHED] scheduled callback failed", exc_info=True)
+
+    # -- metrics -------------------------------------------------------------
+
+    @property
+    def depth(self) -> int:
+        """Number of events waiting to run."""
+        return len(self._heap)
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth, event counters and lateness (ms) of recent events."""
+        late = sorted(self._late)
+        if late:
+            mean_ms = sum(late) / len(late) * 1000.0
+            p99_ms = late[min(len(late) - 1, int(len(late) * 0.99))] * 1000.0
+        else:
+            mean_ms = p99_ms = 0.0
+        return {
+            "running": self._running,
+            "depth": self.depth,
+            "scheduled": self._scheduled,
+            "fired": self._fired,
+            "cancelled": self._cancelled,
+            "late_ms": {
+                "mean": round(mean_ms, 3),
+                "p99": round(p99_ms, 3),
+                "max": round(self._late_max * 1000.0, 3),
+            },
+        }
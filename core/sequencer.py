@@ -1,29 +1,76 @@
 """Internal step sequencer -- tempo-synced note patterns attached to slots.
 
-Each *sequence bank* (1-based, up to NUM_SEQ_BANKS) holds a list of note
-names that loop over one bar.  When a bank is linked to a slot the
-sequencer thread sends note-on / note-off messages into that slot's MIDI
-queue at the correct tempo-derived intervals.
-
-Timing model
-~~~~~~~~~~~~
+Each *sequence bank* (1-based, up to NUM_SEQ_BANKS) holds a list of steps
+that loop at the current tempo.  When a bank is linked to a slot the
+sequencer sends note-on / note-off messages into that slot's MIDI queue.
+
+Pattern model
+~~~~~~~~~~~~~
+A step is a note, a rest (``-`` or ``.``) or a tie (``_``, which holds the
+previous note through another step).  A note may carry its own velocity
+and gate: ``C4:110`` or ``C4:110:0.5`` (gate as a fraction of the step,
+``C4::0.5`` keeps the bank velocity).
+
+  - By default the steps are spread evenly over the bank's length (one
+    bar unless ``bars`` is set): 1 note plays once per bar, 4 notes play
+    as quarter notes, etc. -- the original behaviour.
+  - With a resolution (steps per bar, e.g. 16) every step has a fixed
+    length.  The pattern then loops after its own number of steps, or
+    after ``bars`` bars when set, so banks of different lengths drift
+    against each other (polymeter).
+
+Whenever a bank is edited its steps are compiled into a
+``CompiledPattern``: sorted integer tick arrays (``PPQ`` ticks per beat)
+of note-ons with their note, velocity and duration.  Ties are merged into
+one longer note at compile time.  Playback walks a per-bank pointer
+through those arrays, so nothing is searched or rounded at play time.
+Every pattern is anchored to beat 0 of the timeline.
+
+Drum banks
+~~~~~~~~~~
+Instead of note steps a bank can hold *drum lanes*: each lane targets a
+slot and a note and has a row of hits (``x`` hit, ``X`` accent, ``.`` or
+``-`` rest).  All lanes share the bank's step clock (1/16 by default) and
+compile into one event list with a target slot per event, so a whole kit
+is a single walk per step.  Muted lanes are left out at compile time;
+accented hits use the bank's ``accent`` velocity.  A drum bank needs no
+``seq link`` -- it plays as soon as it has a lane.
+
+Song mode and queued switches
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+A song is an ordered list of parts; each part names the banks that play
+and for how many bars.  ``seq queue`` edits and song part changes do not
+take effect immediately but on the next quantum boundary (a bar by
+default; with Link the boundary is on the shared timeline, like a Link
+quantum).  Every switch is prepared when it is queued -- the banks it
+installs and the tuple of (bank, pattern, slot) entries that play
+afterwards -- so at the boundary the playback side just swaps references.
+
+Timing
+~~~~~~
   - One bar = 4 beats at the current BPM.
-  - Notes are evenly spaced across the bar.  If there is 1 note it plays
-    once per bar (on beat 1).  If there are 4 notes each plays on a
-    quarter-note boundary, etc.
-
-Ableton Link bar alignment
-~~~~~~~~~~~~~~~~~~~~~~~~~~
-When Ableton Link is enabled (``ableton link``), the sequencer uses
-``LinkSync.sync()`` to sleep until the shared Link beat-grid boundary
-rather than free-running on wall-clock time.  This means:
-
-  - The first note of every bar aligns with the downbeat as seen by
-    Ableton Live and all other Link peers.
-  - Tempo changes from any peer are followed automatically.
-  - If Link is disabled or aalink is not installed, the sequencer falls
-    back to the original wall-clock timing (still tempo-synced via the
-    ``bpm`` property, but not phase-aligned with external peers).
+  - The thread clock sleeps until the earliest next event of all linked
+    banks and fires everything due at that tick.  Without Ableton Link
+    beat 0 is the moment playback starts; when Link is enabled
+    (``ableton link``) the beat is read from the shared Link timeline, so
+    bar 1 of every pattern aligns with the downbeat seen by Ableton Live
+    and the other peers, and tempo changes from any peer are followed.
+
+Audio clock
+~~~~~~~~~~~
+With ``seq clock audio`` there is no sequencer thread.  The audio engine
+calls ``Sequencer._render_block`` at the top of every block; it advances a
+beat position by the block's length at the current tempo (slewed towards
+the Link beat at the block's DAC time when Link is on, or towards an
+external MIDI clock fed through ``align_clock``), walks the events that
+fall inside the block, and returns them with exact frame offsets.  Notes are then
+sample-accurate instead of landing on whichever block drains them.  The
+audio clock only advances while the audio stream runs.
+
+The block source never waits: events are raw ``(status, data1, data2)``
+tuples, a switch whose lock is busy is applied a block later, and
+``stop()`` leaves the pending note-offs to the audio thread, which sends
+them in one last block and unregisters itself.
 
 Note names are case-insensitive: c, C#, Db, d, ... b.  The default octave
 is 4 (middle C = C4 = MIDI 60).  An explicit octave suffix is allowed:
@@ -32,12 +79,18 @@ is 4 (middle C = C4 = MIDI 60).  An explicit octave suffix is allowed:
 
 from __future__ import annotations
 
+import bisect
+import collections
 import logging
+import math
 import re
 import threading
 import time
-from dataclasses import dataclass, field
-from typing import Optional, TYPE_CHECKING
+from dataclasses import dataclass, field, replace
+from typing import Callable, Optional, TYPE_CHECKING
+
+from core.midi import NOTE_OFF, NOTE_ON
+from core.models import NUM_SLOTS
 
 if TYPE_CHECKING:
     from core.host import VcpiCore
@@ -45,6 +98,39 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 NUM_SEQ_BANKS = 16  # max sequence banks (1-16 user-facing)
+ARP_WALK_BASE = NUM_SEQ_BANKS  # walk / note-off tag of slot N's arpeggiator: base + N
+NUM_WALKS = NUM_SEQ_BANKS + NUM_SLOTS
+SEQ_CLOCKS = ("thread", "audio")
+DEFAULT_SEQ_CLOCK = "thread"
+
+PPQ = 960  # ticks per beat
+BAR_TICKS = 4 * PPQ
+DEFAULT_GATE = 0.9  # fraction of a step before the note-off
+MAX_SEQ_BARS = 64
+MAX_SONG_PARTS = 64
+MAX_DRUM_LANES = 16
+DEFAULT_DRUM_RESOLUTION = 16
+DEFAULT_QUANTUM = 4.0  # beats: queued switches land on the next bar
+REST_TOKENS = ("-", ".")
+TIE_TOKEN = "_"
+HIT_TOKEN, ACCENT_TOKEN = "x", "X"
+
+# Thread clock: longest single sleep, so tempo changes are picked up, and
+# how early (seconds) an event may fire rather than sleeping again.
+MAX_WAIT_SECONDS = 0.05
+FIRE_EARLY_SECONDS = 0.0002
+
+# Audio clock: how long stop() waits for the audio thread to send the
+# pending note-offs, and the release velocity of generated note-offs
+# (mido's default, as the thread clock sends them).
+AUDIO_STOP_TIMEOUT = 0.5
+NOTE_OFF_VELOCITY = 64
+
+# Audio clock vs Link: beyond this error (beats) jump instead of slewing.
+LINK_RESYNC_BEATS = 1.0
+LINK_SLEW = 0.1  # fraction of the Link error corrected per block
+# Audio clock vs an external clock: followed while aligned this recently.
+ALIGN_HOLD_SECONDS = 0.5
 
 # ---------------------------------------------------------------------------
 # Note-name -> MIDI number conversion
@@ -96,16 +182,347 @@ def midi_to_note_name(midi: int) -> str:
     return f"{_MIDI_TO_NAME[semitone]}{octave}"
 
 
+# ---------------------------------------------------------------------------
+# Steps and compiled patterns
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Step:
+    """One sequencer step: a note, a rest (``note=None``) or a tie."""
+    note: Optional[int] = None
+    velocity: Optional[int] = None  # None: the bank velocity
+    gate: Optional[float] = None    # fraction of the step; None: the bank gate
+    tie: bool = False
+
+
+def _check_velocity(value) -> int:
+    velocity = int(value)
+    if not 1 <= velocity <= 127:
+        raise ValueError("velocity must be 1-127")
+    return velocity
+
+
+def _check_slot(value) -> int:
+    """A 0-based slot index in range; sessions store slots 1-based."""
+    slot = int(value)
+    if not 0 <= slot < NUM_SLOTS:
+        raise ValueError(f"slot must be 1-{NUM_SLOTS}")
+    return slot
+
+
+def _check_gate(value) -> float:
+    gate = float(value)
+    if not 0.0 < gate <= 1.0:
+        raise ValueError("gate must be > 0 and <= 1")
+    return gate
+
+
+def parse_step(token: str) -> Step:
+    """Parse ``C4``, ``C4:110``, ``C4:110:0.5``, ``C4::0.5``, ``-``/``.`` or ``_``.
+
+    Raises ValueError on unrecognised input.
+    """
+    token = token.strip()
+    if token in REST_TOKENS:
+        return Step()
+    if token == TIE_TOKEN:
+        return Step(tie=True)
+    parts = token.split(":")
+    if len(parts) > 3:
+        raise ValueError(f"invalid step: {token!r}")
+    note = note_name_to_midi(parts[0])
+    try:
+        velocity = _check_velocity(parts[1]) if len(parts) > 1 and parts[1] else None
+        gate = _check_gate(parts[2]) if len(parts) > 2 and parts[2] else None
+    except ValueError as exc:
+        raise ValueError(f"invalid step {token!r}: {exc}") from None
+    return Step(note, velocity, gate)
+
+
+def format_step(step: Step) -> str:
+    """Inverse of ``parse_step``."""
+    if step.tie:
+        return TIE_TOKEN
+    if step.note is None:
+        return REST_TOKENS[0]
+    text = midi_to_note_name(step.note)
+    if step.gate is not None:
+        vel = "" if step.velocity is None else str(step.velocity)
+        return f"{text}:{vel}:{step.gate:g}"
+    if step.velocity is not None:
+        return f"{text}:{step.velocity}"
+    return text
+
+
+@dataclass(frozen=True)
+class CompiledPattern:
+    """Note events of one loop of a bank, sorted by tick.
+
+    ``ticks[i]`` is the note-on tick within the loop; ``durations[i]`` is
+    the number of ticks until its note-off (which may fall in the next
+    loop).  ``length`` is the loop length in ticks.  ``slots`` is empty
+    for note banks (every event goes to the linked slot) and holds each
+    event's target slot for drum banks.
+    """
+    length: int
+    ticks: tuple[int, ...] = ()
+    notes: tuple[int, ...] = ()
+    velocities: tuple[int, ...] = ()
+    durations: tuple[int, ...] = ()
+    slots: tuple[int, ...] = ()
+
+    def locate(self, tick: float) -> tuple[int, int]:
+        """Return ``(loop, index)`` of the first event at or after *tick*."""
+        cycle = math.floor(tick / self.length)
+        index = bisect.bisect_left(self.ticks, tick - cycle * self.length)
+        if index == len(self.ticks):
+            return cycle + 1, 0
+        return cycle, index
+
+
+def _step_grid(n: int, resolution: Optional[int],
+               bars: Optional[int]) -> tuple[list[int], int]:
+    """Start ticks of *n* steps (plus the end of the last) and the loop length."""
+    if resolution is None:
+        length = BAR_TICKS * (bars or 1)
+        return [k * length // max(n, 1) for k in range(n + 1)], length
+    step_ticks = BAR_TICKS // resolution
+    length = BAR_TICKS * bars if bars else max(n, 1) * step_ticks
+    return [k * step_ticks for k in range(n + 1)], length
+
+
+def compile_steps(steps: list[Step], resolution: Optional[int], bars: Optional[int],
+                  velocity: int, gate: float) -> CompiledPattern:
+    """Compile *steps* into a ``CompiledPattern``.
+
+    *resolution* is steps per bar, or None to spread the steps over
+    *bars* (default 1).  With a resolution the loop is *bars* long, or
+    exactly as long as the steps when *bars* is None.
+    """
+    starts, length = _step_grid(len(steps), resolution, bars)
+    held: list[list] = []  # [first step, last step, note, velocity, gate]
+    current = None
+    for k, step in enumerate(steps):
+        if step.tie:
+            if current is not None:
+                current[1] = k
+            continue
+        if step.note is None:
+            current = None
+            continue
+        current = [k, k, step.note,
+                   velocity if step.velocity is None else step.velocity,
+                   gate if step.gate is None else step.gate]
+        held.append(current)
+
+    events = []
+    for first, last, note, vel, note_gate in held:
+        on = starts[first]
+        if on >= length:
+            break
+        last_len = starts[last + 1] - starts[last]
+        off = starts[last] + max(1, int(round(last_len * note_gate)))
+        events.append((on, note, vel, off - on))
+    if not events:
+        return CompiledPattern(length)
+    ticks, notes, vels, durs = zip(*events)
+    return CompiledPattern(length, ticks, notes, vels, durs)
+
+
+@dataclass(frozen=True)
+class DrumLane:
+    """One drum lane: a row of hits sent to *slot* (0-based) as *note*."""
+    slot: int
+    note: int
+    hits: str       # one character per step: x hit, X accent, . rest
+    muted: bool = False
+
+    def __post_init__(self):
+        # Lane slots reach the engine as queue and capture indices.
+        _check_slot(self.slot)
+
+
+def parse_hits(text: str) -> str:
+    """Normalise a hit row: ``x``/``X`` kept, ``-`` and ``.`` become ``.``.
+
+    ``|`` and spaces may separate beats and are dropped.  Raises
+    ValueError on anything else.
+    """
+    row = []
+    for ch in text:
+        if ch in "| ":
+            continue
+        if ch in (HIT_TOKEN, ACCENT_TOKEN):
+            row.append(ch)
+        elif ch in REST_TOKENS:
+            row.append(REST_TOKENS[1])
+        else:
+            raise ValueError(f"invalid hit {ch!r} (use x, X, . or -)")
+    if not row:
+        raise ValueError("a drum lane needs at least one step")
+    return "".join(row)
+
+
+def parse_drum_note(value) -> int:
+    """A lane note: a MIDI number (``36``) or a note name (``C1``)."""
+    text = str(value).strip()
+    if text.isdigit():
+        note = int(text)
+        if not 0 <= note <= 127:
+            raise ValueError("note must be 0-127")
+        return note
+    return note_name_to_midi(text)
+
+
+def compile_lanes(lanes: list[DrumLane], resolution: Optional[int], bars: Optional[int],
+                  velocity: int, accent: int, gate: float) -> CompiledPattern:
+    """Compile drum lanes into one ``CompiledPattern`` with per-event slots.
+
+    The lanes share one step grid as long as the longest lane; shorter
+    lanes rest for the remaining steps.  Muted lanes are skipped.
+    """
+    starts, length = _step_grid(max((len(l.hits) for l in lanes), default=0),
+                                resolution, bars)
+    events = []
+    for lane in lanes:
+        if lane.muted:
+            continue
+        for k, hit in enumerate(lane.hits):
+            on = starts[k]
+            if on >= length:
+                break
+            if hit not in (HIT_TOKEN, ACCENT_TOKEN):
+                continue
+            dur = max(1, int(round((starts[k + 1] - on) * gate)))
+            events.append((on, lane.note, accent if hit == ACCENT_TOKEN else velocity,
+                           dur, lane.slot))
+    if not events:
+        return CompiledPattern(length)
+    events.sort(key=lambda e: e[0])  # stable: lanes keep their order per step
+    ticks, notes, vels, durs, slots = zip(*events)
+    return CompiledPattern(length, ticks, notes, vels, durs, slots)
+
+
 # ---------------------------------------------------------------------------
 # Sequence bank data
 # ---------------------------------------------------------------------------
 
 @dataclass
 class SequenceBank:
-    """One named sequence pattern."""
-    notes: list[int] = field(default_factory=list)  # MIDI note numbers
+    """One sequence pattern and its compiled event arrays.
+
+    A bank holds either note ``steps`` or drum ``lanes``.  Call
+    ``compile()`` after changing any field other than ``linked_slot``;
+    ``Sequencer`` does this for every edit it makes.
+    """
+    steps: list[Step] = field(default_factory=list)
     velocity: int = 100
     linked_slot: Optional[int] = None  # 0-based slot index, or None
+    gate: float = DEFAULT_GATE
+    resolution: Optional[int] = None   # steps per bar; None spreads the steps
+    bars: Optional[int] = None         # loop length in bars; None: automatic
+    lanes: list[DrumLane] = field(default_factory=list)
+    accent: int = 127                  # velocity of accented drum hits
+    pattern: CompiledPattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.compile()
+
+    def compile(self) -> CompiledPattern:
+        # Replaced in one assignment, so the playback side sees either
+        # the old pattern or the new one, never a half-built one.
+        if self.lanes:
+            self.pattern = compile_lanes(self.lanes, self.resolution, self.bars,
+                                         self.velocity, self.accent, self.gate)
+        else:
+            self.pattern = compile_steps(self.steps, self.resolution, self.bars,
+                                         self.velocity, self.gate)
+        return self.pattern
+
+    @property
+    def is_drum(self) -> bool:
+        return bool(self.lanes)
+
+    @property
+    def routed(self) -> bool:
+        """Whether the bank has somewhere to play: a linked slot or drum lanes."""
+        return self.linked_slot is not None or bool(self.lanes)
+
+    @property
+    def notes(self) -> list[int]:
+        """MIDI notes of the note steps, in order (rests and ties skipped)."""
+        return [s.note for s in self.steps if s.note is not None and not s.tie]
+
+    @property
+    def length_beats(self) -> float:
+        return self.pattern.length / PPQ
+
+
+def _parse_resolution(value) -> Optional[int]:
+    if value is None or str(value).strip().lower() in ("fit", "0"):
+        return None
+    text = str(value).strip()
+    if text.startswith("1/"):
+        text = text[2:]
+    resolution = int(text)
+    if resolution <= 0 or BAR_TICKS % resolution:
+        raise ValueError(f"resolution must divide {BAR_TICKS} (e.g. 4, 8, 12, 16, 32) or be 'fit'")
+    return resolution
+
+
+def _parse_bars(value) -> Optional[int]:
+    if value is None or str(value).strip().lower() in ("auto", "0"):
+        return None
+    bars = int(value)
+    if not 1 <= bars <= MAX_SEQ_BARS:
+        raise ValueError(f"bars must be 1-{MAX_SEQ_BARS} or 'auto'")
+    return bars
+
+
+# ---------------------------------------------------------------------------
+# Song parts and queued switches
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class SongPart:
+    """One song section: the banks (0-based) that play, for *bars* bars."""
+    banks: tuple[int, ...]
+    bars: int
+
+
+# One playback plan entry: (bank_idx, pattern, slot_idx); drum banks carry
+# their slots per event and have slot_idx None.
+PlanEntry = tuple[int, CompiledPattern, Optional[int]]
+
+
+@dataclass(frozen=True)
+class _Switch:
+    """A change applied at a tick boundary.
+
+    *tick* None means "as soon as playback runs".  *plan* and *active* are
+    filled in by ``Sequencer._replan`` from the state the earlier pending
+    switches leave behind.
+    """
+    tick: Optional[int]
+    banks: tuple[tuple[int, SequenceBank], ...] = ()  # bank replacements
+    song_part: Optional[int] = None  # song part entered (0-based); past the
+                                     # last part: loop to 1, or end in silence
+    song_off: bool = False           # leave song mode: all linked banks play
+    plan: tuple[PlanEntry, ...] = ()
+    active: Optional[frozenset[int]] = None
+
+
+def _switch_key(switch: _Switch) -> float:
+    return -math.inf if switch.tick is None else switch.tick
+
+
+def _build_plan(banks, active: Optional[frozenset[int]]) -> tuple[PlanEntry, ...]:
+    return tuple(
+        (bi, bank.pattern, bank.linked_slot)
+        for bi, bank in enumerate(banks)
+        if bank is not None and bank.routed and bank.pattern.ticks
+        and (active is None or bi in active)
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -113,106 +530,642 @@ class SequenceBank:
 # ---------------------------------------------------------------------------
 
 class Sequencer:
-    """Manages sequence banks and a tempo-synced playback thread.
+    """Manages sequence banks and tempo-synced playback.
 
-    The thread wakes up at each step boundary and fires note-on events
-    into the host's MIDI queue.  Note-off is sent just before the next
-    step (95 % of step duration) to avoid overlapping sustain.
+    On the thread clock the playback thread sleeps until the next event
+    of any linked bank and fires its note-ons into the host's MIDI queue.
+    Note-offs are queued on the host's shared ``MidiScheduler``, tagged
+    with the bank and slot so clearing either cancels them.
     """
 
-    NOTE_OFF_RATIO = 0.9  # fraction of step duration before note-off
-
     def __init__(self, host: VcpiCore):
         self._host = host
         self.banks: list[Optional[SequenceBank]] = [None] * NUM_SEQ_BANKS
 
         self._running = False
         self._thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
-
-        # Per-bank playback cursor (step index within the pattern).
-        self._cursors: list[int] = [0] * NUM_SEQ_BANKS
+        self._wake = threading.Event()
+
+        # Per-bank playback pointer: (pattern, loop, index, end tick of the
+        # last walk).  Re-located with a bisect when the pattern changes
+        # or the walk does not continue where the previous one stopped.
+        self._walks: list[Optional[tuple[CompiledPattern, int, int, float]]] = (
+            [None] * NUM_WALKS)
+
+        # What plays now, and what is queued to change it.  ``_plan`` is
+        # rebuilt on every edit and swapped wholesale by switches.
+        self._lock = threading.Lock()
+        self._plan: tuple[PlanEntry, ...] = ()
+        self._active: Optional[frozenset[int]] = None  # None: every linked bank
+        # Arpeggiator patterns by slot; they play in every plan, song or not.
+        # ``_arp_slots`` are the slots with an arpeggiator, keys held or not.
+        self._arps: dict[int, PlanEntry] = {}
+        self._arp_slots: frozenset[int] = frozenset()
+        self._switches: list[_Switch] = []
+        self._position = 0.0  # end tick of the last walk
+        self.quantum = DEFAULT_QUANTUM
+
+        self.song: list[SongPart] = []
+        self.song_loop = True
+        self.song_part: Optional[int] = None  # part playing, None outside song mode
+        self._song_next: Optional[tuple[int, float]] = None  # (part, start tick)
+
+        # Thread clock without Link: (monotonic time, beat, bpm).  External
+        # clock followers pull it into phase through ``align_clock``.
+        self._free_anchor: Optional[tuple[float, float, float]] = None
+        self._aligned_at: Optional[float] = None  # monotonic time of the last pull
+
+        # Audio-clock state, owned by the audio thread once started.
+        self.clock = DEFAULT_SEQ_CLOCK
+        # (frame, beat, beats per frame): the beat at any engine frame.
+        self._anchor: Optional[tuple[int, float, float]] = None
+        self._block_clock: Optional[tuple[int, float]] = None  # (frame, monotonic) of the last block
+        self._audio_offs: list[tuple[float, int, int, int]] = []  # (beat, bank, slot, note)
+        self._audio_flush: collections.deque = collections.deque()  # banks to release
+        self._audio_stop: Optional[threading.Event] = None  # set once the offs are out
 
     # -- bank management -----------------------------------------------------
 
-    def set_bank(self, bank_index: int, note_names: list[str],
-                 velocity: int = 100) -> SequenceBank:
-        """Create / overwrite a sequence bank from note name strings."""
+    def _bank_index(self, bank_index: int) -> int:
         if not 0 <= bank_index < NUM_SEQ_BANKS:
             raise ValueError(f"bank must be 1-{NUM_SEQ_BANKS}")
-        midi_notes = [note_name_to_midi(n) for n in note_names]
+        return bank_index
+
+    def set_bank(self, bank_index: int, note_names: list[str],
+                 velocity: Optional[int] = None) -> SequenceBank:
+        """Create / overwrite a bank's steps from step tokens.
+
+        Tokens are note names with optional ``:velocity[:gate]``, rests
+        (``-`` / ``.``) and ties (``_``).  Resolution, length, gate and
+        velocity of an existing bank are kept unless *velocity* is given.
+        """
+        self._bank_index(bank_index)
+        steps = [parse_step(n) for n in note_names]
+        if not steps:
+            raise ValueError("a sequence needs at least one step")
+        if velocity is not None:
+            velocity = _check_velocity(velocity)
         bank = self.banks[bank_index]
         if bank is None:
-            bank = SequenceBank(notes=midi_notes, velocity=velocity)
+            bank = SequenceBank(steps=steps, velocity=velocity or 100)
             self.banks[bank_index] = bank
         else:
-            bank.notes = midi_notes
-            bank.velocity = velocity
-        self._cursors[bank_index] = 0
+            self._check_kind(bank_index, drum=False)
+            bank.steps = steps
+            if velocity is not None:
+                bank.velocity = velocity
+            bank.compile()
+        self._replan()
         logger.info("[SEQ] bank %d set: %s", bank_index + 1,
-                    [midi_to_note_name(n) for n in midi_notes])
+                    " ".join(format_step(s) for s in steps))
+        return bank
+
+    def configure_bank(self, bank_index: int, *, resolution=None, bars=None,
+                       velocity=None, gate=None, accent=None) -> SequenceBank:
+        """Change a bank's timing or defaults and recompile it.
+
+        *resolution* is steps per bar (``16`` or ``"1/16"``) or ``"fit"``;
+        *bars* is the loop length in bars or ``"auto"``; *accent* is the
+        velocity of accented drum hits.  Arguments left as None are
+        unchanged.
+        """
+        self._bank_index(bank_index)
+        bank = self.banks[bank_index]
+        if bank is None:
+            raise ValueError(f"sequence bank {bank_index + 1} is empty")
+        if resolution is not None:
+            bank.resolution = _parse_resolution(resolution)
+        if bars is not None:
+            bank.bars = _parse_bars(bars)
+        if velocity is not None:
+            bank.velocity = _check_velocity(velocity)
+        if gate is not None:
+            bank.gate = _check_gate(gate)
+        if accent is not None:
+            bank.accent = _check_velocity(accent)
+        bank.compile()
+        self._replan()
         return bank
 
     def clear_bank(self, bank_index: int):
         """Remove a sequence bank and detach it from any slot."""
-        if not 0 <= bank_index < NUM_SEQ_BANKS:
-            raise ValueError(f"bank must be 1-{NUM_SEQ_BANKS}")
+        self._bank_index(bank_index)
         self.banks[bank_index] = None
-        self._cursors[bank_index] = 0
+        self._walks[bank_index] = None
+        self._replan()
+        # Send pending note-offs now rather than leaving notes hanging.
+        self._release_bank(bank_index)
 
     def link(self, bank_index: int, slot_index: int):
         """Attach sequence bank to a slot."""
-        if not 0 <= bank_index < NUM_SEQ_BANKS:
-            raise ValueError(f"bank must be 1-{NUM_SEQ_BANKS}")
+        self._bank_index(bank_index)
         bank = self.banks[bank_index]
         if bank is None:
             raise ValueError(f"sequence bank {bank_index + 1} is empty")
+        if bank.is_drum:
+            raise ValueError(f"sequence bank {bank_index + 1} is a drum bank; "
+                             "its lanes pick their own slots")
         bank.linked_slot = slot_index
-        self._cursors[bank_index] = 0
+        self._replan()
         logger.info("[SEQ] bank %d -> slot %d", bank_index + 1, slot_index + 1)
         # Auto-start the playback thread when a link is made.
         self.start()
 
     def detach_slot(self, slot_index: int):
-        """Remove any sequence link(s) from the given slot."""
-        for bank in self.banks:
-            if bank is not None and bank.linked_slot == slot_index:
+        """Remove any sequence link(s) from the given slot.
+
+        Drum lanes that target the slot are muted rather than removed.
+        """
+        for bi, bank in enumerate(self.banks):
+            if bank is None:
+                continue
+            if bank.linked_slot == slot_index:
                 bank.linked_slot = None
+                self._release_bank(bi)
+            elif any(l.slot == slot_index and not l.muted for l in bank.lanes):
+                bank.lanes = [replace(l, muted=True) if l.slot == slot_index else l
+                              for l in bank.lanes]
+                bank.compile()
+                self._release_bank(bi)
+        self._replan()
         # If no banks are linked any more, stop the thread.
-        if not any(b is not None and b.linked_slot is not None
-                   for b in self.banks):
+        if not self._any_routed():
             self.stop()
 
     def detach_bank(self, bank_index: int):
         """Remove the link from a specific bank."""
-        if not 0 <= bank_index < NUM_SEQ_BANKS:
-            raise ValueError(f"bank must be 1-{NUM_SEQ_BANKS}")
+        self._bank_index(bank_index)
         bank = self.banks[bank_index]
         if bank is not None:
             bank.linked_slot = None
-        if not any(b is not None and b.linked_slot is not None
-                   for b in self.banks):
+            self._release_bank(bank_index)
+        self._replan()
+        if not self._any_routed():
             self.stop()
 
+    def _any_routed(self) -> bool:
+        return (bool(self._arps) or bool(self._arp_slots)
+                or any(b is not None and b.routed for b in self.banks))
+
+    def _check_kind(self, bank_index: int, drum: bool):
+        bank = self.banks[bank_index]
+        if bank is not None and bank.is_drum != drum and (bank.steps or bank.lanes):
+            kind = "a drum bank" if bank.is_drum else "a note bank"
+            raise ValueError(f"sequence bank {bank_index + 1} is {kind} "
+                             f"(seq clear {bank_index + 1} first)")
+
+    # -- drum lanes ----------------------------------------------------------
+
+    def set_lane(self, bank_index: int, lane_index: int, slot_index: int,
+                 note, hits: str) -> SequenceBank:
+        """Create or overwrite drum lane *lane_index* (0-based) of a bank.
+
+        *note* is a MIDI number or note name; *hits* a row like
+        ``x...X...``.  An empty bank becomes a drum bank at 1/16 and
+        playback starts; a bank holding note steps is refused.
+        """
+        self._bank_index(bank_index)
+        self._check_kind(bank_index, drum=True)
+        bank = self.banks[bank_index]
+        count = len(bank.lanes) if bank is not None else 0
+        if not 0 <= lane_index < MAX_DRUM_LANES:
+            raise ValueError(f"lane must be 1-{MAX_DRUM_LANES}")
+        if lane_index > count:
+            raise ValueError(f"next free lane is {count + 1}")
+        _check_slot(slot_index)
+        old = bank.lanes[lane_index] if lane_index < count else None
+        lane = DrumLane(slot_index, parse_drum_note(note), parse_hits(hits),
+                        muted=old.muted if old is not None else False)
+        if bank is None:
+            bank = SequenceBank(lanes=[lane], resolution=DEFAULT_DRUM_RESOLUTION)
+            self.banks[bank_index] = bank
+        else:
+            lanes = list(bank.lanes)
+            if old is None:
+                lanes.append(lane)
+                if count == 0 and bank.resolution is None:
+                    bank.resolution = DEFAULT_DRUM_RESOLUTION
+            else:
+                lanes[lane_index] = lane
+            bank.lanes = lanes
+            bank.compile()
+        if old is not None and old.slot != lane.slot:
+            self._release_bank(bank_index)
+        self._replan()
+        logger.info("[SEQ] bank %d lane %d -> slot %d note %d: %s", bank_index + 1,
+                    lane_index + 1, slot_index + 1, lane.note, lane.hits)
+        self.start()
+        return bank
+
+    def mute_lane(self, bank_index: int, lane_index: int, muted: bool = True) -> SequenceBank:
+        """Mute or unmute one drum lane; the bank is recompiled without it."""
+        bank = self._drum_bank(bank_index, lane_index)
+        bank.lanes = [replace(l, muted=bool(muted)) if i == lane_index else l
+                      for i, l in enumerate(bank.lanes)]
+        bank.compile()
+        self._replan()
+        return bank
+
+    def clear_lane(self, bank_index: int, lane_index: int) -> SequenceBank:
+        """Remove one drum lane; later lanes move up by one."""
+        bank = self._drum_bank(bank_index, lane_index)
+        bank.lanes = [l for i, l in enumerate(bank.lanes) if i != lane_index]
+        bank.compile()
+        self._replan()
+        self._release_bank(bank_index)
+        if not self._any_routed():
+            self.stop()
+        return bank
+
+    def _drum_bank(self, bank_index: int, lane_index: int) -> SequenceBank:
+        self._bank_index(bank_index)
+        bank = self.banks[bank_index]
+        if bank is None or not bank.is_drum:
+            raise ValueError(f"sequence bank {bank_index + 1} has no drum lanes")
+        if not 0 <= lane_index < len(bank.lanes):
+            raise ValueError(f"lane must be 1-{len(bank.lanes)}")
+        return bank
+
+    def queue_bank(self, bank_index: int, note_names: list[str]) -> SequenceBank:
+        """Like ``set_bank`` but takes effect on the next quantum boundary.
+
+        The new pattern is compiled now; a stopped sequencer applies it
+        at once.  Returns the bank that will be installed.
+        """
+        self._bank_index(bank_index)
+        steps = [parse_step(n) for n in note_names]
+        if not steps:
+            raise ValueError("a sequence needs at least one step")
+        self._check_kind(bank_index, drum=False)
+        if not self._running:
+            return self.set_bank(bank_index, note_names)
+        current = self.banks[bank_index]
+        if current is None:
+            bank = SequenceBank(steps=steps)
+        else:
+            bank = SequenceBank(
+                steps=steps, velocity=current.velocity, linked_slot=current.linked_slot,
+                gate=current.gate, resolution=current.resolution, bars=current.bars)
+        self._queue(_Switch(self._boundary(), banks=((bank_index, bank),)))
+        logger.info("[SEQ] bank %d queued: %s", bank_index + 1,
+                    " ".join(format_step(s) for s in steps))
+        return bank
+
+    # -- arpeggiators --------------------------------------------------------
+
+    def enable_arp(self, slot_index: int):
+        """Keep playback running for a slot's arpeggiator, keys held or not."""
+        self._arp_slots = self._arp_slots | {slot_index}
+        self.start()
+
+    def disable_arp(self, slot_index: int):
+        """Silence a slot's arpeggiator; playback stops if nothing else plays."""
+        self._arp_slots = self._arp_slots - {slot_index}
+        self.set_arp(slot_index, None)
+        if not self._any_routed():
+            self.stop()
+
+    def set_arp(self, slot_index: int, pattern: Optional[CompiledPattern]):
+        """Play *pattern* into a slot as its arpeggiator, or silence it with None.
+
+        The pattern joins every playback plan next to the banks; its
+        note-offs are tagged ``ARP_WALK_BASE + slot_index``.  Called from
+        MIDI input threads on every key change, so it only swaps the
+        pattern: playback is started and stopped by ``enable_arp`` and
+        ``disable_arp``, and the timebase runs on between chords.
+        """
+        walk_id = ARP_WALK_BASE + slot_index
+        with self._lock:
+            if pattern is None or not pattern.ticks:
+                stopped = self._arps.pop(slot_index, None) is not None
+            else:
+                self._arps[slot_index] = (walk_id, pattern, slot_index)
+                stopped = False
+            self._replan_locked()
+        self._wake.set()
+        if stopped:
+            self._release_bank(walk_id)
+
+    def next_step_tick(self, step_ticks: int) -> int:
+        """The next multiple of *step_ticks* that has not been played yet."""
+        return self._boundary(step_ticks)
+
+    # -- song mode -----------------------------------------------------------
+
+    def set_song(self, parts: list[tuple[list[int], int]]):
+        """Replace the song with ``(bank indices, bars)`` parts (0-based banks)."""
+        if len(parts) > MAX_SONG_PARTS:
+            raise ValueError(f"a song has at most {MAX_SONG_PARTS} parts")
+        song = []
+        for banks, bars in parts:
+            indices = tuple(sorted({self._bank_index(int(b)) for b in banks}))
+            if not indices:
+                raise ValueError("a song part needs at least one bank")
+            bars = int(bars)
+            if not 1 <= bars <= MAX_SEQ_BARS:
+                raise ValueError(f"part length must be 1-{MAX_SEQ_BARS} bars")
+            song.append(SongPart(indices, bars))
+        self.song = song
+        if self.song_part is not None and self.song_part >= len(song):
+            self.song_stop()
+        self._replan()
+
+    def add_song_part(self, banks: list[int], bars: int) -> SongPart:
+        """Append one part to the song."""
+        self.set_song([(p.banks, p.bars) for p in self.song] + [(banks, bars)])
+        return self.song[-1]
+
+    def song_play(self, part: int = 0):
+        """Play the song from *part* (0-based).
+
+        While the sequencer runs this is queued for the next quantum
+        boundary -- a jump when a song is already playing.
+        """
+        if not self.song:
+            raise ValueError("the song has no parts (use: song add <banks> <bars>)")
+        if not 0 <= part < len(self.song):
+            raise ValueError(f"part must be 1-{len(self.song)}")
+        tick = self._boundary() if self._running else None
+        self._queue(_Switch(tick, song_part=part), replace_song=True)
+        logger.info("[SEQ] song part %d queued", part + 1)
+
+    def song_stop(self):
+        """Leave song mode on the next boundary; every linked bank plays again."""
+        tick = self._boundary() if self._running else None
+        self._queue(_Switch(tick, song_off=True), replace_song=True)
+
+    def set_song_loop(self, loop: bool):
+        self.song_loop = bool(loop)
+        self._replan()
+
+    def set_quantum(self, beats: float):
+        """Set the boundary queued switches wait for, in beats."""
+        beats = float(beats)
+        if not 0.25 <= beats <= 4.0 * MAX_SEQ_BARS or (beats * PPQ) % 1:
+            raise ValueError(f"quantum must be 0.25-{4 * MAX_SEQ_BARS} beats")
+        self.quantum = beats
+
+    def pending(self) -> list[dict]:
+        """Queued switches, for listings: tick, bar and what they change."""
+        out = []
+        for sw in list(self._switches):
+            part = self._song_target(sw)
+            if sw.song_part is not None:
+                what = "song end" if part is None else f"song part {part + 1}"
+            elif sw.song_off:
+                what = "song off"
+            else:
+                what = "bank " + ", ".join(str(bi + 1) for bi, _ in sw.banks)
+            bar = None if sw.tick is None else sw.tick // BAR_TICKS + 1
+            out.append({"tick": sw.tick, "bar": bar, "change": what})
+        return out
+
+    # -- plans and switches --------------------------------------------------
+
+    def _boundary(self, q: Optional[int] = None) -> int:
+        """The next quantum boundary (absolute tick) not yet played.
+
+        *q* overrides the quantum, in ticks.
+        """
+        if q is None:
+            q = int(round(self.quantum * PPQ))
+        # The walk position is exclusive: a boundary right on it has not
+        # been played yet.  The live beat of the thread clock has.
+        boundary = math.ceil(self._position / q) * q
+        if self.clock == "thread":
+            beat = self._live_beat()
+            if beat is not None:
+                boundary = max(boundary, (math.floor(beat * PPQ / q) + 1) * q)
+        return boundary
+
+    def _live_beat(self) -> Optional[float]:
+        """Current beat of the running thread clock, read without side effects."""
+        if self._link_enabled:
+            return self._link_beat()
+        anchor = self._free_anchor
+        if anchor is None:
+            return None
+        return anchor[1] + (time.monotonic() - anchor[0]) * anchor[2] / 60.0
+
+    def timebase_beat(self) -> float:
+        """Beat of the shared timebase, for clock outputs.
+
+        The Link timeline when Link is enabled; the beat the audio clock
+        is playing while it runs; otherwise the freewheel clock -- started
+        here at beat 0 if the sequencer has not run yet.
+        """
+        if self._link_enabled:
+            beat = self._host.link.beat
+            if beat is not None:
+                return beat
+        if self.clock == "audio" and self._running:
+            beat = self._audio_beat(time.monotonic())
+            if beat is not None:
+                return beat
+        if self._free_anchor is None:
+            self._free_anchor = (time.monotonic(), 0.0, self._bpm)
+        return self._free_beat()
+
+    def align_clock(self, beat: float, when: float, gain: float = 1.0):
+        """Pull the clock towards *beat* at monotonic time *when*.
+
+        *gain* is the fraction of the error corrected; errors beyond
+        ``LINK_RESYNC_BEATS`` jump.  Used by external clock followers;
+        does nothing while Link drives the timeline.  The freewheel clock
+        is corrected here; while it is fed, the audio clock slews towards
+        it block by block (``_advance_clock``), as it does towards Link,
+        and the first pull starts from the beat the audio clock plays.
+        """
+        if self._link_enabled:
+            return
+        bpm = self._bpm
+        anchor = self._free_anchor
+        if self.clock == "audio" and self._running and self._aligned_beat(when) is None:
+            current = self._audio_beat(when)
+        elif anchor is not None:
+            current = anchor[1] + (when - anchor[0]) * anchor[2] / 60.0
+        else:
+            current = None
+        if current is None or abs(beat - current) > LINK_RESYNC_BEATS:
+            current = beat
+        else:
+            current += (beat - current) * gain
+        self._free_anchor = (when, current, bpm)
+        self._aligned_at = when
+        self._wake.set()
+
+    def _queue(self, switch: _Switch, replace_song: bool = False):
+        with self._lock:
+            if replace_song:
+                self._switches = [sw for sw in self._switches
+                                  if sw.song_part is None and not sw.song_off]
+                self._song_next = None
+            self._switches.append(switch)
+            self._switches.sort(key=_switch_key)
+            self._replan_locked()
+        self._wake.set()
+
+    def _replan(self):
+        with self._lock:
+            self._replan_locked()
+        self._wake.set()
+
+    def _replan_locked(self):
+        """Rebuild the current plan and each pending switch's plan.
+
+        Switches are prepared in order, each starting from the banks and
+        active set the previous ones leave behind.
+        """
+        banks = list(self.banks)
+        active = self._active
+        arps = tuple(self._arps[slot] for slot in sorted(self._arps))
+        self._plan = _build_plan(banks, active) + arps
+        prepared = []
+        for sw in self._switches:
+            for bi, bank in sw.banks:
+                if banks[bi] is not None:
+                    bank.linked_slot = banks[bi].linked_slot
+                banks[bi] = bank
+            if sw.song_part is not None:
+                part = self._song_target(sw)
+                active = frozenset(self.song[part].banks) if part is not None else frozenset()
+            elif sw.song_off:
+                active = None
+            prepared.append(replace(sw, plan=_build_plan(banks, active) + arps, active=active))
+        self._switches = prepared
+
+    def _rebase_switches(self):
+        """Make pending switches apply at once when playback (re)starts.
+
+        Their ticks belong to the previous run's timeline.  A song that
+        was playing resumes at the start of its current part.
+        """
+        with self._lock:
+            edits = [replace(sw, tick=None) for sw in self._switches
+                     if sw.song_part is None and not sw.song_off]
+            song = [replace(sw, tick=None) for sw in self._switches
+                    if sw.song_part is not None or sw.song_off][:1]
+            if self.song_part is not None:
+                song = [_Switch(None, song_part=self.song_part)]
+            self._switches = edits + song
+            self._song_next = None
+            self._position = 0.0
+            self._replan_locked()
+
+    def _take_switch(self, t1: float, t0: float, blocking: bool = True) -> Optional[float]:
+        """Apply the first switch due before *t1*; return the tick it applied at.
+
+        Without *blocking* a busy lock leaves the switch for the next call.
+        """
+        if not self._lock.acquire(blocking):
+            return None
+        try:
+            if not self._switches:
+                return None
+            sw = self._switches[0]
+            if sw.tick is not None and sw.tick >= t1:
+                return None
+            del self._switches[0]
+            at = t0 if sw.tick is None else max(float(sw.tick), t0)
+            for bi, bank in sw.banks:
+                self.banks[bi] = bank
+            self._plan = sw.plan
+            self._active = sw.active
+            part = self._song_target(sw)
+            if part is not None:
+                self.song_part = part
+                start = at
+                if sw.tick is None:
+                    # Started from stopped: the part begins on the current boundary.
+                    q = int(round(self.quantum * PPQ))
+                    start = math.floor(at / q) * q
+                self._song_next = (part, start)
+            elif sw.song_part is not None or sw.song_off:
+                self.song_part = None
+                self._song_next = None
+            return at
+        finally:
+            self._lock.release()
+
+    def _song_target(self, switch: _Switch) -> Optional[int]:
+        """The part a song switch enters, resolving the wrap after the last one."""
+        part = switch.song_part
+        if part is None or part < len(self.song):
+            return part
+        return 0 if self.song_loop and self.song else None
+
+    def _schedule_song_next(self, blocking: bool = True):
+        """Queue the part after the one just entered (after the walk, not at it).
+
+        Without *blocking* a busy lock leaves it for the next walk.
+        """
+        if not self._lock.acquire(blocking):
+            return
+        try:
+            if self._song_next is None:
+                return
+            part, start = self._song_next
+            self._song_next = None
+            if part >= len(self.song):
+                return
+            end = int(start) + self.song[part].bars * BAR_TICKS
+            self._switches.append(_Switch(end, song_part=part + 1))
+            self._switches.sort(key=_switch_key)
+            self._replan_locked()
+        finally:
+            self._lock.release()
+
+    def _release_bank(self, bank_index: int):
+        """Send a bank's pending note-offs now (thread or audio clock)."""
+        self._host.scheduler.cancel_matching(bank=bank_index, flush=True)
+        if self._running and self.clock == "audio":
+            self._audio_flush.append(bank_index)
+
     # -- playback thread -----------------------------------------------------
 
+    def set_clock(self, mode: str):
+        """Switch between the ``thread`` and ``audio`` clocks."""
+        key = str(mode).strip().lower()
+        if key not in SEQ_CLOCKS:
+            raise ValueError(f"unknown sequencer clock '{mode}' (use {', '.join(SEQ_CLOCKS)})")
+        if key == self.clock:
+            return
+        was_running = self._running
+        self.stop()
+        self.clock = key
+        logger.info("[SEQ] clock -> %s", key)
+        if was_running:
+            self.start()
+
     def start(self):
-        """Start the sequencer playback thread (idempotent)."""
+        """Start playback on the configured clock (idempotent)."""
         if self._running:
             return
         self._running = True
-        self._stop_event.clear()
+        self._walks = [None] * NUM_WALKS
+        self._rebase_switches()
+        if self.clock == "audio":
+            self._anchor = None
+            self._block_clock = None
+            self._host.engine.add_block_source(self._render_block)
+            logger.info("[SEQ] audio-clock playback started")
+            return
+        self._wake.clear()
         self._thread = threading.Thread(
             target=self._run, name="vcpi-sequencer", daemon=True)
         self._thread.start()
         logger.info("[SEQ] playback thread started")
 
     def stop(self):
-        """Stop the sequencer playback thread (idempotent)."""
+        """Stop playback (idempotent)."""
         if not self._running:
             return
         self._running = False
-        self._stop_event.set()  # wake up the sleep immediately
+        if self.clock == "audio":
+            self._stop_audio_clock()
+            logger.info("[SEQ] audio-clock playback stopped")
+            return
+        self._wake.set()  # wake up the sleep immediately
         if self._thread is not None:
             self._thread.join(timeout=2.0)
             self._thread = None
@@ -222,93 +1175,225 @@ class Sequencer:
     def _bpm(self) -> float:
         return self._host.link.bpm
 
+    def _link_beat(self) -> Optional[float]:
+        """The Link beat that audio rendered now will be heard at.
+
+        Link beat times refer to when sound leaves the speakers, so the
+        engine's output delay (measured DAC latency plus the user offset)
+        is added: notes are rendered that much ahead of the shared beat.
+        """
+        beat = self._host.link.beat
+        if beat is None:
+            return None
+        return beat + self._host.engine.output_delay * self._bpm / 60.0
+
     @property
     def _link_enabled(self) -> bool:
         return self._host.link.enabled
 
-    # -- internal helpers ----------------------------------------------------
+    # -- event walking -------------------------------------------------------
 
-    def _smallest_quantum(self) -> float:
-        """Return the smallest step size (in beats) across all active banks.
+    def _due(self, t0: float, t1: float,
+             blocking: bool = True) -> list[tuple[int, int, int, int, int, int]]:
+        """Events of the playing banks with ``t0 <= tick < t1``, in tick order.
 
-        When Link is enabled the sequencer sleeps in increments of this
-        quantum so that every active bank's steps land on the grid.
-        A bank with *n* notes has a step size of 4/n beats (4 beats per
-        bar).  The GCD-style smallest value ensures we wake up often
-        enough for the densest pattern while still aligning coarser
-        patterns to the same grid.
+        Returns ``(tick, bank_idx, slot_idx, note, velocity, duration)``
+        with absolute ticks.  Switches due inside the range split the walk
+        at their tick.  Consecutive calls that continue at the previous
+        *t1* just advance each bank's pointer.  Without *blocking* (the
+        audio thread) switches whose lock is busy wait for the next call.
         """
-        from math import gcd
-        nums: list[int] = []
-        for bank in self.banks:
-            if bank is not None and bank.linked_slot is not None and bank.notes:
-                nums.append(len(bank.notes))
-        if not nums:
-            return 1.0  # quarter note fallback
-        # LCM of all step counts gives the common grid divisor.
-        lcm = nums[0]
-        for n in nums[1:]:
-            lcm = lcm * n // gcd(lcm, n)
-        return 4.0 / lcm  # beats
-
-    def _fire_banks(self, beat_position: float, quantum_beats: float,
-                    mido) -> list[tuple[int, int, float]]:
-        """Fire notes for all banks whose step falls on the current beat.
-
-        *beat_position* is the current position within the bar (0.0 to
-        4.0).  Each bank's cursor is derived directly from this position
-        so that every bank always starts from the beginning of the bar.
-
-        Returns a list of (slot_idx, midi_note, note_dur_seconds) for
-        note-off scheduling.
+        due: list[tuple[int, int, int, int, int, int]] = []
+        while self._switches:
+            plan = self._plan
+            at = self._take_switch(t1, t0, blocking)
+            if at is None:
+                break
+            if at > t0:
+                self._walk(plan, t0, at, due)
+                t0 = at
+        self._walk(self._plan, t0, t1, due)
+        self._position = t1
+        if self._song_next is not None:
+            self._schedule_song_next(blocking)
+        due.sort()
+        return due
+
+    def _walk(self, plan: tuple[PlanEntry, ...], t0: float, t1: float, due: list):
+        for bi, pattern, slot in plan:
+            ticks, slots = pattern.ticks, pattern.slots
+            walk = self._walks[bi]
+            if walk is not None and walk[0] is pattern and walk[3] == t0:
+                cycle, index = walk[1], walk[2]
+            else:
+                cycle, index = pattern.locate(t0)
+            length, count = pattern.length, len(ticks)
+            tick = cycle * length + ticks[index]
+            while tick < t1:
+                due.append((tick, bi, slots[index] if slots else slot, pattern.notes[index],
+                            pattern.velocities[index], pattern.durations[index]))
+                index += 1
+                if index == count:
+                    index = 0
+                    cycle += 1
+                tick = cycle * length + ticks[index]
+            self._walks[bi] = (pattern, cycle, index, t1)
+
+    def _next_tick(self, t0: float) -> Optional[int]:
+        """Absolute tick of the first event or switch at or after *t0*."""
+        best = None
+        switches = self._switches
+        if switches:
+            best = math.ceil(t0) if switches[0].tick is None else max(switches[0].tick, math.ceil(t0))
+        for bi, pattern, _ in self._plan:
+            walk = self._walks[bi]
+            if walk is not None and walk[0] is pattern and walk[3] == t0:
+                cycle, index = walk[1], walk[2]
+            else:
+                cycle, index = pattern.locate(t0)
+            tick = cycle * pattern.length + pattern.ticks[index]
+            if best is None or tick < best:
+                best = tick
+        return best
+
+    def _fire_due(self, t0: float, t1: float, mido) -> int:
+        """Send note-ons for ``[t0, t1)`` now and schedule their note-offs."""
+        enqueue = self._host.engine.enqueue_midi
+        scheduler = self._host.scheduler
+        sec_per_tick = 60.0 / (self._bpm * PPQ)
+        due = self._due(t0, t1)
+        for _, bi, slot_idx, note, vel, dur in due:
+            enqueue(slot_idx, mido.Message("note_on", note=note, velocity=vel))
+            off = mido.Message("note_off", note=note)
+            scheduler.call_later(dur * sec_per_tick, enqueue, slot_idx, off,
+                                 slot=slot_idx, bank=bi)
+        return len(due)
+
+    # -- audio clock ---------------------------------------------------------
+
+    def _stop_audio_clock(self):
+        """Have the audio thread send the pending note-offs and unregister.
+
+        ``_render_block`` owns the off list, so it sends the offs in the
+        block after the request and removes itself.  Without a running
+        stream no block is in flight: the offs are queued from here.
         """
-        bpm = self._bpm
-        beat_dur = 60.0 / bpm  # seconds per beat
-        fired: list[tuple[int, int, float]] = []
-
-        for bi, bank in enumerate(self.banks):
-            if bank is None or bank.linked_slot is None or not bank.notes:
-                continue
-
-            n_steps = len(bank.notes)
-            bank_quantum = 4.0 / n_steps  # beats per step for this bank
-
-            # Derive the step index for this bank from the bar position.
-            # beat_position 0.0 -> step 0, beat_position bank_quantum -> step 1, etc.
-            bar_step = beat_position / bank_quantum
-            step_idx = round(bar_step) % n_steps
-
-            # Only fire if we are close to an exact step boundary for this bank.
-            if abs(bar_step - round(bar_step)) > 0.01:
-                continue
-
-            midi_note = bank.notes[step_idx]
-            slot_idx = bank.linked_slot
-            vel = bank.velocity
-
-            on = mido.Message("note_on", note=midi_note, velocity=vel)
-            self._host.engine.enqueue_midi(slot_idx, on)
-
-            step_dur_secs = bank_quantum * beat_dur
-            fired.append((slot_idx, midi_note, step_dur_secs))
-
-            self._cursors[bi] = (step_idx + 1) % n_steps
-
-        return fired
-
-    def _schedule_note_offs(self, fired: list[tuple[int, int, float]],
-                            mido) -> None:
-        """Schedule note-off messages for all recently fired notes."""
-        for slot_idx, midi_note, step_dur in fired:
-            off_delay = step_dur * self.NOTE_OFF_RATIO
-
-            def _send_off(si=slot_idx, mn=midi_note, _mido=mido):
-                off = _mido.Message("note_off", note=mn)
-                self._host.engine.enqueue_midi(si, off)
-
-            off_timer = threading.Timer(off_delay, _send_off)
-            off_timer.daemon = True
-            off_timer.start()
+        engine = self._host.engine
+        done = threading.Event()
+        self._audio_stop = done
+        if getattr(engine, "running", False) and done.wait(AUDIO_STOP_TIMEOUT):
+            return
+        engine.remove_block_source(self._render_block)
+        self._audio_stop = None
+        self._audio_flush.clear()
+        pending, self._audio_offs = self._audio_offs, []
+        for _, _, slot_idx, note in pending:
+            engine.enqueue_midi(slot_idx, (NOTE_OFF, note, NOTE_OFF_VELOCITY))
+
+    def _advance_clock(self, frame_time: int, frames: int) -> tuple[float, float]:
+        """Return the [start, end) beat range of the block at *frame_time*.
+
+        Beats map linearly to engine frames through an anchor that is only
+        moved at block boundaries -- on tempo changes and while following
+        Link or an external clock -- so consecutive blocks share their
+        boundary exactly and a step is never fired twice or skipped.
+        """
+        now = time.monotonic()
+        self._block_clock = (frame_time, now)
+        bpf = self._bpm / (60.0 * self._host.engine.sample_rate)
+        target = self._link_beat() if self._link_enabled else self._aligned_beat(now)
+        anchor = self._anchor
+        if anchor is None:
+            anchor = (frame_time, target if target is not None else 0.0, bpf)
+        else:
+            beat = anchor[1] + (frame_time - anchor[0]) * anchor[2]
+            if target is not None:
+                error = target - beat
+                if abs(error) > LINK_RESYNC_BEATS:
+                    beat = target
+                else:
+                    # Slew towards the target so the clock never jumps or runs backwards.
+                    stretch = error * LINK_SLEW / (frames * bpf)
+                    bpf *= 1.0 + max(-0.5, min(0.5, stretch))
+            if beat != anchor[1] + (frame_time - anchor[0]) * anchor[2] or bpf != anchor[2]:
+                anchor = (frame_time, beat, bpf)
+        self._anchor = anchor
+        start = anchor[1] + (frame_time - anchor[0]) * anchor[2]
+        return start, anchor[1] + (frame_time + frames - anchor[0]) * anchor[2]
+
+    def _aligned_beat(self, now: float) -> Optional[float]:
+        """The external clock's beat at *now*, while ``align_clock`` is fed."""
+        aligned_at, anchor = self._aligned_at, self._free_anchor
+        if aligned_at is None or anchor is None or now - aligned_at > ALIGN_HOLD_SECONDS:
+            return None
+        return anchor[1] + (now - anchor[0]) * anchor[2] / 60.0
+
+    def _audio_beat(self, when: float) -> Optional[float]:
+        """Beat of the audio clock at monotonic time *when*, from the last block."""
+        anchor, block = self._anchor, self._block_clock
+        if anchor is None or block is None:
+            return None
+        frame = block[0] + (when - block[1]) * self._host.engine.sample_rate
+        return anchor[1] + (frame - anchor[0]) * anchor[2]
+
+    def _frame_of(self, beat: float) -> int:
+        """Engine frame at which *beat* falls (rounded to the nearest)."""
+        frame, anchor_beat, bpf = self._anchor
+        return frame + int(round((beat - anchor_beat) / bpf))
+
+    def _render_block(self, frame_time: int, frames: int) -> list[tuple[int, tuple, int]]:
+        """Engine block source: events for the next *frames* frames.
+
+        Returns ``(slot_idx, (status, data1, data2), offset)`` tuples
+        sorted by offset, with note-offs ahead of note-ons at the same
+        offset.  After ``stop()`` it returns every pending note-off at
+        offset 0 and unregisters itself.
+        """
+        if frames <= 0:
+            return []
+
+        stop = self._audio_stop
+        if stop is not None:
+            self._audio_stop = None
+            self._host.engine.remove_block_source(self._render_block)
+            self._audio_flush.clear()
+            pending, self._audio_offs = self._audio_offs, []
+            stop.set()
+            return [(slot_idx, (NOTE_OFF, note, NOTE_OFF_VELOCITY), 0)
+                    for _, _, slot_idx, note in pending]
+
+        b0, b1 = self._advance_clock(frame_time, frames)
+        events: list[tuple[int, int, int, tuple]] = []  # (offset, order, slot, msg)
+
+        def _offset(beat: float) -> int:
+            return min(frames - 1, max(0, self._frame_of(beat) - frame_time))
+
+        while self._audio_flush:
+            bank_idx = self._audio_flush.popleft()
+            keep = []
+            for off in self._audio_offs:
+                if off[1] == bank_idx:
+                    events.append((0, 0, off[2], (NOTE_OFF, off[3], NOTE_OFF_VELOCITY)))
+                else:
+                    keep.append(off)
+            self._audio_offs = keep
+
+        for tick, bi, slot_idx, note, vel, dur in self._due(b0 * PPQ, b1 * PPQ, blocking=False):
+            events.append((_offset(tick / PPQ), 1, slot_idx, (NOTE_ON, note, vel)))
+            self._audio_offs.append(((tick + dur) / PPQ, bi, slot_idx, note))
+
+        if self._audio_offs:
+            keep = []
+            for off in self._audio_offs:
+                if off[0] < b1:
+                    events.append((_offset(off[0]), 0, off[2],
+                                   (NOTE_OFF, off[3], NOTE_OFF_VELOCITY)))
+                else:
+                    keep.append(off)
+            self._audio_offs = keep
+
+        events.sort(key=lambda e: (e[0], e[1]))
+        return [(slot_idx, msg, offset) for offset, _, slot_idx, msg in events]
 
     # -- main playback loops -------------------------------------------------
 
@@ -329,130 +1414,65 @@ class Sequencer:
                 self._run_freewheel(mido)
 
     def _run_link(self, mido):
-        """Link-synced loop: sleep on beat-grid boundaries.
-
-        Uses ``LinkSync.sync(quantum)`` to block until the shared Link
-        timeline reaches the next grid point.  The beat number returned
-        by Link is used to derive the bar-relative position so that all
-        banks always start from the beginning of the bar.
-        """
-        link = self._host.link
-
+        """Link-synced loop: beats come from ``LinkSync``'s local timeline snapshot."""
         logger.info("[SEQ] entering Link-synced loop")
-
-        while self._running and self._link_enabled:
-            quantum = self._smallest_quantum()
-
-            # No active banks -- idle briefly.
-            if quantum >= 4.0 and not any(
-                b is not None and b.linked_slot is not None and b.notes
-                for b in self.banks
-            ):
-                self._stop_event.wait(timeout=0.05)
-                continue
-
-            # Block until the next beat-grid boundary.
-            try:
-                beat = link.sync(quantum, timeout=4.0)
-            except RuntimeError:
-                # Link was disabled while we were waiting.
-                break
-            except Exception as exc:
-                logger.warning("[SEQ] link.sync error: %s", exc)
-                self._stop_event.wait(timeout=0.01)
-                continue
-
-            if not self._running:
-                break
-
-            # Derive bar-relative position (0.0 to 4.0) from the
-            # absolute Link beat number.
-            beat_position = beat % 4.0
-
-            fired = self._fire_banks(beat_position, quantum, mido)
-            self._schedule_note_offs(fired, mido)
-
+        self._play(mido, self._link_beat, lambda: self._link_enabled)
         logger.info("[SEQ] leaving Link-synced loop")
 
     def _run_freewheel(self, mido):
-        """Wall-clock loop (original behaviour, no Link phase alignment).
-
-        Used when Ableton Link is not enabled.  Still reads ``bpm`` from
-        the LinkSync object for tempo, but times steps with
-        ``time.monotonic()`` sleeps.
+        """Wall-clock loop (no Link phase alignment).
 
-        A shared bar-start time ensures all banks align to bar
-        boundaries -- every bank's step position is derived from the
-        elapsed time within the current bar, so all patterns restart
-        together at the top of each bar.
+        Beat 0 is the moment the loop starts; the beat advances on
+        ``time.monotonic()`` at the current ``bpm`` and is re-anchored
+        whenever the tempo changes.
         """
-        now = time.monotonic()
-        bar_start = now  # shared reference for bar alignment
-
+        self._free_anchor = (time.monotonic(), 0.0, self._bpm)
         logger.info("[SEQ] entering freewheel loop")
+        self._play(mido, self._free_beat, lambda: not self._link_enabled)
+        logger.info("[SEQ] leaving freewheel loop")
 
-        while self._running and not self._link_enabled:
-            bpm = self._bpm
-            bar_duration = 240.0 / bpm  # 4 beats in seconds
-            now = time.monotonic()
-
-            # Work out where we are inside the current bar.
-            elapsed = now - bar_start
-            # If we've gone past the bar boundary, snap to a new bar.
-            if elapsed >= bar_duration:
-                # Advance bar_start to the most recent bar boundary.
-                bars_elapsed = int(elapsed / bar_duration)
-                bar_start += bars_elapsed * bar_duration
-                elapsed = now - bar_start
-
-            beat_position = (elapsed / bar_duration) * 4.0  # 0.0 – 4.0
-
-            # Find the smallest step duration across active banks so we
-            # can wake up at the next grid point.
-            smallest_step_dur = None
-            has_active = False
-            for bank in self.banks:
-                if bank is None or bank.linked_slot is None or not bank.notes:
-                    continue
-                has_active = True
-                sd = bar_duration / len(bank.notes)
-                if smallest_step_dur is None or sd < smallest_step_dur:
-                    smallest_step_dur = sd
-
-            if not has_active or smallest_step_dur is None:
-                self._stop_event.wait(timeout=0.05)
+    def _free_beat(self) -> float:
+        now = time.monotonic()
+        anchor_time, anchor_beat, anchor_bpm = self._free_anchor
+        beat = anchor_beat + (now - anchor_time) * anchor_bpm / 60.0
+        bpm = self._bpm
+        if bpm != anchor_bpm:
+            self._free_anchor = (now, beat, bpm)
+        return beat
+
+    def _play(self, mido, beat_now: Callable[[], Optional[float]],
+              active: Callable[[], bool]):
+        """Sleep until the next event of any linked bank and fire it.
+
+        Waits are capped at ``MAX_WAIT_SECONDS`` and cut short by bank
+        edits, so tempo changes and new patterns are picked up.  If the
+        beat jumps back, or the next event is more than a beat overdue (a
+        Link peer moved the timeline, or the thread stalled), the walk
+        restarts from the current beat instead of catching up.
+        """
+        cursor: Optional[float] = None  # first tick not yet fired
+        while self._running and active():
+            self._wake.clear()
+            beat = beat_now()
+            if beat is None:
+                self._wake.wait(timeout=MAX_WAIT_SECONDS)
                 continue
-
-            # Determine the next grid time we should fire at.
-            # Grid times within the bar: 0, smallest_step_dur, 2*smallest_step_dur, ...
-            steps_so_far = elapsed / smallest_step_dur
-            next_step_index = int(steps_so_far + 0.5)  # nearest integer step
-            # Are we close enough to fire now?
-            current_grid_time = next_step_index * smallest_step_dur
-            delta = current_grid_time - elapsed
-
-            if delta > 0.001:
-                # Not yet at a grid point -- sleep until the next one.
-                self._stop_event.wait(timeout=delta)
-                if not self._running:
-                    break
-                now = time.monotonic()
-                elapsed = now - bar_start
-                if elapsed >= bar_duration:
-                    bars_elapsed = int(elapsed / bar_duration)
-                    bar_start += bars_elapsed * bar_duration
-                    elapsed = now - bar_start
-                beat_position = (elapsed / bar_duration) * 4.0
-
-            # Fire all banks whose step boundary aligns with this moment.
-            quantum = self._smallest_quantum()
-            fired = self._fire_banks(beat_position, quantum, mido)
-            self._schedule_note_offs(fired, mido)
-
-            # Brief sleep to avoid busy-spinning on the same grid point.
-            self._stop_event.wait(timeout=0.001)
-
-        logger.info("[SEQ] leaving freewheel loop")
+            now = beat * PPQ
+            if cursor is None or cursor - now > PPQ:
+                cursor = math.floor(now)
+            tick = self._next_tick(cursor)
+            if tick is None:
+                self._wake.wait(timeout=MAX_WAIT_SECONDS)
+                continue
+            if now - tick > PPQ:
+                cursor = math.floor(now)
+                continue
+            delay = (tick - now) * 60.0 / (self._bpm * PPQ)
+            if delay > FIRE_EARLY_SECONDS:
+                self._wake.wait(timeout=min(delay, MAX_WAIT_SECONDS))
+                continue
+            self._fire_due(cursor, tick + 1, mido)
+            cursor = tick + 1
 
     # -- serialisation helpers -----------------------------------------------
 
@@ -463,36 +1483,86 @@ class Sequencer:
             if bank is None:
                 result.append(None)
                 continue
-            result.append({
-                "notes": [midi_to_note_name(n) for n in bank.notes],
+            entry = {
+                "steps": [format_step(s) for s in bank.steps],
                 "velocity": bank.velocity,
+                "gate": bank.gate,
+                "resolution": bank.resolution,
+                "bars": bank.bars,
                 "linked_slot": (bank.linked_slot + 1)
                                if bank.linked_slot is not None else None,
-            })
+            }
+            if bank.is_drum:
+                entry["accent"] = bank.accent
+                entry["lanes"] = [
+                    {"slot": l.slot + 1, "note": l.note, "hits": l.hits, "mute": l.muted}
+                    for l in bank.lanes
+                ]
+            result.append(entry)
         return result
 
     def restore(self, data: list[Optional[dict]]):
-        """Restore banks from session data."""
+        """Restore banks from session data.
+
+        Sessions saved before steps existed store plain ``notes``; those
+        load as evenly spread one-bar patterns, as they always played.
+        """
         had_link = False
         for bi, entry in enumerate(data):
             if bi >= NUM_SEQ_BANKS:
                 break
+            self._walks[bi] = None
             if entry is None:
                 self.banks[bi] = None
                 continue
             try:
-                note_names = entry.get("notes", [])
-                midi_notes = [note_name_to_midi(n) for n in note_names]
-                vel = entry.get("velocity", 100)
+                tokens = entry.get("steps")
+                if tokens is None:
+                    tokens = entry.get("notes", [])
+                lanes = [
+                    DrumLane(int(lane["slot"]) - 1, parse_drum_note(lane["note"]),
+                             parse_hits(lane["hits"]), bool(lane.get("mute", False)))
+                    for lane in entry.get("lanes", [])[:MAX_DRUM_LANES]
+                ]
                 linked = entry.get("linked_slot")
-                slot_idx = (int(linked) - 1) if linked is not None else None
+                slot_idx = (_check_slot(int(linked) - 1)
+                            if linked is not None and not lanes else None)
                 self.banks[bi] = SequenceBank(
-                    notes=midi_notes, velocity=vel, linked_slot=slot_idx)
-                self._cursors[bi] = 0
-                if slot_idx is not None:
+                    steps=[] if lanes else [parse_step(t) for t in tokens],
+                    velocity=_check_velocity(entry.get("velocity", 100)),
+                    linked_slot=slot_idx,
+                    gate=_check_gate(entry.get("gate", DEFAULT_GATE)),
+                    resolution=_parse_resolution(entry.get("resolution")),
+                    bars=_parse_bars(entry.get("bars")),
+                    lanes=lanes,
+                    accent=_check_velocity(entry.get("accent", 127)),
+                )
+                if self.banks[bi].routed:
                     had_link = True
             except Exception as exc:
                 logger.warning("[SEQ] restore bank %d failed: %s", bi + 1, exc)
                 self.banks[bi] = None
+        self._replan()
         if had_link:
             self.start()
+
+    def song_snapshot(self) -> dict:
+        """Serialise the song, loop flag and quantum for session persistence."""
+        return {
+            "parts": [{"banks": [bi + 1 for bi in part.banks], "bars": part.bars}
+                      for part in self.song],
+            "loop": self.song_loop,
+            "quantum": self.quantum,
+            "playing": self.song_part is not None,
+            "part": (self.song_part + 1) if self.song_part is not None else None,
+        }
+
+    def song_restore(self, data: dict):
+        """Restore the song; a song that was playing resumes at its part."""
+        self.set_song([([int(b) - 1 for b in part.get("banks", [])], part.get("bars", 1))
+                       for part in data.get("parts", [])])
+        self.song_loop = bool(data.get("loop", True))
+        self.set_quantum(data.get("quantum", DEFAULT_QUANTUM))
+        if data.get("playing") and self.song:
+            part = int(data.get("part") or 1) - 1
+            self.song_play(part if 0 <= part < len(self.song) else 0)
@@ -30,15 +30,19 @@ import signal
 import socket
 import sys
 import threading
+import time
 from pathlib import Path
 from typing import Any, Iterator, NamedTuple
 
 from core import deps
 from core.host import VcpiCore
+from core.catalog import catalog_for
 from core.cli import HostCLI
 from core.midi import list_midi_input_ports, list_midi_output_ports
 from core.models import NUM_SLOTS, InstrumentSlot
 from core.paths import DEFAULT_SOCK_PATH
+from core.routing import MAX_TRANSPOSE
+from core.sequencer import MAX_SONG_PARTS, NUM_SEQ_BANKS
 from graph.plugin_info import render_plugin_info
 
 # Sentinel that marks the end of a command's output.
@@ -92,6 +96,9 @@ class VcpiServer:
         self._running = False
         # Commands enqueued by reader threads, executed on the main thread.
         self._cmd_queue: queue.Queue[_CommandRequest] = queue.Queue()
+        # Last device event each CLI client has been shown.
+        self._device_cursors: dict[str, int] = {}
+        self._next_audio_rescan = 0.0
 
     # ------------------------------------------------------------------
 
@@ -141,6 +148,9 @@ class VcpiServer:
 
                 # 2. Drain command queue — execute on main thread
                 self._drain_commands()
+
+                # 3. Let PortAudio find a waited-for audio output (main thread)
+                self._rescan_audio_devices()
         finally:
             self.stop()
 
@@ -159,6 +169,17 @@ class VcpiServer:
             finally:
                 req.result.set()
 
+    def _rescan_audio_devices(self):
+        """Re-initialise PortAudio once per monitor interval, if needed."""
+        now = time.monotonic()
+        if now < self._next_audio_rescan:
+            return
+        self._next_audio_rescan = now + self.host.devices.interval
+        try:
+            self.host.rescan_audio_devices()
+        except Exception:
+            logger.debug("audio device rescan failed", exc_info=True)
+
     def stop(self):
         """Shut down the server and clean up."""
         self._running = False
@@ -211,6 +232,7 @@ class VcpiServer:
         """Serve one connected CLI client (reader thread — I/O only)."""
         client_id = f"client-{id(conn):x}"
         logger.info("%s connected", client_id)
+        self._device_cursors[client_id] = self.host.devices.last_seq
         try:
             rfile = conn.makefile("r", encoding="utf-8", errors="replace")
             wfile = conn.makefile("w", encoding="utf-8")
@@ -258,6 +280,7 @@ class VcpiServer:
                 conn.close()
             except OSError:
                 pass
+            self._device_cursors.pop(client_id, None)
             logger.info("%s disconnected", client_id)
 
     def _run_command(self, line: str, client_id: str) -> tuple[str | None, bool]:
@@ -282,7 +305,7 @@ class VcpiServer:
         # cmd.Cmd.onecmd() returns True when the command wants to exit.
         stop = cli.onecmd(line)
 
-        output = buf.getvalue()
+        output = self._device_notices(client_id) + buf.getvalue()
         shutdown_requested = bool(getattr(cli, "_shutdown_requested", False))
 
         if shutdown_requested:
@@ -297,6 +320,17 @@ class VcpiServer:
 
         return output, False
 
+    def _device_notices(self, client_id: str) -> str:
+        """Device events the client has not seen yet, one line each."""
+        since = self._device_cursors.get(client_id)
+        if since is None:
+            return ""
+        events = self.host.devices.events(since)
+        if not events:
+            return ""
+        self._device_cursors[client_id] = events[-1].seq
+        return "".join(f"[Devices] {event.describe()}\n" for event in events)
+
     # ------------------------------------------------------------------
 
     @staticmethod
@@ -343,6 +377,15 @@ class VcpiServer:
                 return {"ok": True, "slots": self._slots_payload()}
             case "samples":
                 return self._samples_payload()
+            case "samples.peaks":
+                self._require_payload_keys(
+                    payload,
+                    {"pack", "sample"},
+                    "samples.peaks payload must contain only pack and sample",
+                )
+                pack = self._sample_catalog_segment_from_payload(payload, "pack")
+                sample = self._sample_name_from_payload(payload)
+                return self._sample_peaks_payload(pack, sample)
             case "fx.plugins":
                 return self._fx_plugins_payload()
             case "sessions":
@@ -351,6 +394,14 @@ class VcpiServer:
                 return self._audio_devices_payload()
             case "flow":
                 return {"ok": True, "flow": self._flow_payload()}
+            case "devices.events":
+                self._require_payload_keys(
+                    payload, {"since"}, "devices.events payload must contain only optional since",
+                )
+                since = self._int_range_from_payload(payload, "since", 0, 2**63 - 1, default=0)
+                devices = self.host.devices
+                return {"ok": True, "events": [event.to_dict() for event in devices.events(since)],
+                        "last_event": devices.last_seq}
             case "slot.info":
                 idx = self._slot_index_from_payload(payload)
                 return self._slot_info_payload(idx)
@@ -437,6 +488,46 @@ class VcpiServer:
                     "status": self._status_payload(),
                     "slots": self._slots_payload(),
                 }
+            case "midi.routes":
+                return {"ok": True, "routes": self._routes_payload()}
+            case "midi.routes.add":
+                self._require_payload_keys(
+                    payload,
+                    {"channel", "slots", "notes", "velocities", "transpose"},
+                    "route payload must contain only channel, slots, notes, velocities and transpose",
+                )
+                channel = self._midi_channel_from_payload(payload)
+                slots = payload.get("slots")
+                if (not isinstance(slots, list) or not slots
+                        or any(isinstance(v, bool) or not isinstance(v, int) for v in slots)):
+                    raise _JsonOperationError(f"slots must be a non-empty list of integers 1-{NUM_SLOTS}")
+                ranges = {}
+                for key in ("notes", "velocities"):
+                    value = payload.get(key)
+                    if value is None:
+                        continue
+                    if (not isinstance(value, list) or len(value) != 2
+                            or any(isinstance(v, bool) or not isinstance(v, int) for v in value)):
+                        raise _JsonOperationError(f"{key} must be a [low, high] pair of integers")
+                    ranges[key] = value
+                transpose = self._int_range_from_payload(
+                    payload, "transpose", -MAX_TRANSPOSE, MAX_TRANSPOSE, default=0)
+                try:
+                    self.host.add_route_rule(channel - 1, [v - 1 for v in slots],
+                                             transpose=transpose, **ranges)
+                except ValueError as exc:
+                    raise _JsonOperationError(str(exc)) from exc
+                return {"ok": True, "routes": self._routes_payload()}
+            case "midi.routes.remove":
+                count = len(self.host.route_rules)
+                if not count:
+                    raise _JsonOperationError("there are no route rules")
+                rule = self._int_range_from_payload(payload, "rule", 1, count)
+                self.host.remove_route_rule(rule - 1)
+                return {"ok": True, "routes": self._routes_payload()}
+            case "midi.routes.clear":
+                self.host.clear_route_rules()
+                return {"ok": True, "routes": self._routes_payload()}
             case "midi.ports":
                 return self._midi_ports_payload()
             case "midi.input.open":
@@ -487,6 +578,16 @@ class VcpiServer:
                 sample = self._sample_name_from_payload(payload)
                 name = self._optional_sample_display_name_from_payload(payload)
                 return self._slot_wav_load_payload(idx, pack, sample, name)
+            case "slot.pack.load":
+                self._require_payload_keys(
+                    payload,
+                    {"slot", "pack", "name"},
+                    "slot.pack.load payload must contain only slot, pack, and optional name",
+                )
+                idx = self._slot_index_from_payload(payload)
+                pack = self._sample_catalog_segment_from_payload(payload, "pack")
+                name = self._optional_sample_display_name_from_payload(payload)
+                return self._slot_pack_load_payload(idx, pack, name)
             case "master.gain":
                 gain = self._gain_from_payload(payload)
                 self.host.engine.master_gain = gain
@@ -507,6 +608,42 @@ class VcpiServer:
                 slot.solo = self._slot_bool_from_payload(payload, "solo", slot.solo)
                 self.host.refresh_mixer_leds([idx])
                 return {"ok": True, "slot": self._slot_payload(idx, slot)}
+            case "song":
+                return {"ok": True, "song": self._song_payload()}
+            case "song.set":
+                parts = self._song_parts_from_payload(payload)
+                loop = self._bool_from_payload(payload, "loop", self.host.sequencer.song_loop)
+                quantum = payload.get("quantum", self.host.sequencer.quantum)
+                if isinstance(quantum, bool) or not isinstance(quantum, (int, float)):
+                    raise _JsonOperationError("quantum must be a number of beats")
+                try:
+                    self.host.sequencer.set_quantum(quantum)
+                    self.host.sequencer.set_song(parts)
+                except ValueError as exc:
+                    raise _JsonOperationError(str(exc)) from exc
+                self.host.sequencer.set_song_loop(loop)
+                return {"ok": True, "song": self._song_payload()}
+            case "song.play":
+                part = self._int_range_from_payload(payload, "part", 1, MAX_SONG_PARTS, default=1)
+                try:
+                    self.host.sequencer.song_play(part - 1)
+                except ValueError as exc:
+                    raise _JsonOperationError(str(exc)) from exc
+                return {"ok": True, "song": self._song_payload()}
+            case "song.stop":
+                self.host.sequencer.song_stop()
+                return {"ok": True, "song": self._song_payload()}
+            case "seq.queue":
+                bank = self._int_range_from_payload(payload, "bank", 1, NUM_SEQ_BANKS)
+                steps = payload.get("steps")
+                if (not isinstance(steps, list) or not steps
+                        or not all(isinstance(step, str) for step in steps)):
+                    raise _JsonOperationError("steps must be a non-empty list of strings")
+                try:
+                    self.host.sequencer.queue_bank(bank - 1, steps)
+                except ValueError as exc:
+                    raise _JsonOperationError(str(exc)) from exc
+                return {"ok": True, "bank": bank, "song": self._song_payload()}
             case "slot.clear" | "slot.unload":
                 idx = self._slot_index_from_payload(payload)
                 _ = self._loaded_slot(idx)
@@ -533,6 +670,27 @@ class VcpiServer:
             raise _JsonOperationError(f"slot must be 1-{NUM_SLOTS}")
         return value - 1
 
+    @staticmethod
+    def _song_parts_from_payload(payload: dict[str, Any]) -> list[tuple[list[int], int]]:
+        parts = payload.get("parts")
+        if not isinstance(parts, list):
+            raise _JsonOperationError("parts must be a list of {banks, bars} objects")
+        result = []
+        for part in parts:
+            if not isinstance(part, dict):
+                raise _JsonOperationError("parts must be a list of {banks, bars} objects")
+            banks = part.get("banks")
+            bars = part.get("bars")
+            if (not isinstance(banks, list) or not banks
+                    or any(isinstance(b, bool) or not isinstance(b, int) for b in banks)):
+                raise _JsonOperationError(f"banks must be a non-empty list of integers 1-{NUM_SEQ_BANKS}")
+            if any(not 1 <= b <= NUM_SEQ_BANKS for b in banks):
+                raise _JsonOperationError(f"banks must be 1-{NUM_SEQ_BANKS}")
+            if isinstance(bars, bool) or not isinstance(bars, int):
+                raise _JsonOperationError("bars must be an integer")
+            result.append(([b - 1 for b in banks], bars))
+        return result
+
     @staticmethod
     def _midi_channel_from_payload(payload: dict[str, Any]) -> int:
         value = payload.get("channel")
@@ -1177,37 +1335,50 @@ class VcpiServer:
         root = self._samples_root()
         packs: list[dict[str, Any]] = []
         samples_by_pack: dict[str, list[str]] = {}
-        if root.exists() and root.is_dir():
-            for pack_dir in sorted(root.iterdir(), key=lambda path: path.name.lower()):
-                if not pack_dir.is_dir() or pack_dir.name.startswith("."):
-                    continue
+        catalog = catalog_for(root)
+        catalog.refresh(full=True)
+        for pack_name in catalog.packs():
+            try:
+                pack_name = self._safe_catalog_segment(pack_name, "pack")
+            except _JsonOperationError:
+                continue
+
+            sample_entries: list[dict[str, Any]] = []
+            for entry in catalog.entries(pack_name):
                 try:
-                    pack_name = self._safe_catalog_segment(pack_dir.name, "pack")
-                    safe_pack_dir = self._require_sample_path_within_root(pack_dir, root)
+                    self._safe_catalog_segment(entry["name"], "sample")
                 except _JsonOperationError:
                     continue
+                sample_entries.append(entry)
 
-                sample_entries: list[dict[str, str]] = []
-                for wav_file in sorted(safe_pack_dir.glob("*.wav"), key=lambda path: path.name.lower()):
-                    if not wav_file.is_file():
-                        continue
-                    try:
-                        safe_wav_file = self._require_sample_path_within_root(wav_file, root)
-                        sample_name = self._safe_catalog_segment(safe_wav_file.stem, "sample")
-                    except _JsonOperationError:
-                        continue
-                    sample_entries.append({"name": sample_name, "filename": safe_wav_file.name})
-
-                sample_names = [entry["name"] for entry in sample_entries]
-                packs.append({"name": pack_name, "samples": sample_entries})
-                samples_by_pack[pack_name] = sample_names
+            sample_names = [entry["name"] for entry in sample_entries]
+            packs.append({"name": pack_name, "samples": sample_entries})
+            samples_by_pack[pack_name] = sample_names
         return {"ok": True, "packs": packs, "samples": samples_by_pack}
 
+    def _sample_peaks_payload(self, pack: str, sample: str) -> dict[str, Any]:
+        self._sample_file_path(pack, sample)
+        catalog = catalog_for(self._samples_root())
+        catalog.refresh()
+        meta = catalog.entry(pack, sample)
+        if meta is None:
+            raise _JsonOperationError(f"sample not found: {pack}/{sample}", status=404)
+        if "peaks" not in meta:
+            raise _JsonOperationError(f"sample {pack}/{sample} is unreadable: {meta.get('error', 'unknown error')}")
+        return {
+            "ok": True,
+            "pack": pack,
+            "sample": sample,
+            "sample_rate": meta["sample_rate"],
+            "channels": meta["channels"],
+            "frames": meta["frames"],
+            "duration": meta["duration"],
+            "peaks": meta["peaks"],
+        }
+
     def _sample_file_path(self, pack: str, sample: str) -> Path:
         root = self._samples_root()
-        pack_dir = self._require_sample_path_within_root(root / pack, root)
-        if not pack_dir.exists() or not pack_dir.is_dir():
-            raise _JsonOperationError(f"sample pack not found: {pack}", status=404)
+        pack_dir = self._sample_pack_path(pack)
 
         sample_path = self._require_sample_path_within_root(pack_dir / f"{sample}.wav", root)
         if not sample_path.exists() or not sample_path.is_file():
@@ -1231,6 +1402,27 @@ class VcpiServer:
             "status": status,
         }
 
+    def _sample_pack_path(self, pack: str) -> Path:
+        root = self._samples_root()
+        pack_dir = self._require_sample_path_within_root(root / pack, root)
+        if not pack_dir.exists() or not pack_dir.is_dir():
+            raise _JsonOperationError(f"sample pack not found: {pack}", status=404)
+        return pack_dir
+
+    def _slot_pack_load_payload(self, idx: int, pack: str, name: str | None) -> dict[str, Any]:
+        pack_dir = self._sample_pack_path(pack)
+        try:
+            self.host.load_pack(idx, str(pack_dir), name)
+        except ValueError as exc:
+            raise _JsonOperationError(str(exc)) from exc
+        status = self._status_payload()
+        return {
+            "ok": True,
+            "slot": self._slot_payload(idx, self.host.engine.slots[idx]),
+            "slots": self._slots_payload(),
+            "status": status,
+        }
+
     def _fx_catalog_entries(self) -> list[tuple[str, Path]]:
         root = self._fx_root().resolve()
         entries: list[tuple[str, Path]] = []
@@ -1391,6 +1583,8 @@ class VcpiServer:
             "type": self._safe_plugin_attr(plugin, "info_type", "Unknown"),
             "latency_samples": self._safe_plugin_attr(plugin, "reported_latency_samples", 0),
             "parameters": {"count": self._safe_parameter_count(plugin)},
+            "memory_bytes": self._safe_plugin_attr(plugin, "memory_bytes", None),
+            "storage": self._safe_plugin_attr(plugin, "storage", None),
             "rendered": self._render_plugin_info(plugin, label),
         }
 
@@ -1661,20 +1855,44 @@ class VcpiServer:
                 "output": self.host.audio_output_name,
                 "master_gain": self.host.engine.master_gain,
                 "master_effects": len(getattr(self.host.engine, "master_effects", [])),
+                "latency_ms": {
+                    "output": round(self.host.engine.output_latency * 1000.0, 2),
+                    "offset": self.host.engine.latency_offset_ms,
+                },
             },
             "midi": {
                 "inputs": self.host.midi_input_names,
                 "mixer_input": self.host.mixer_midi_name,
                 "mixer_output": self.host.mixer_midi_out_name,
                 "routing": routing,
+                "route_rules": len(self.host.route_rules),
+                "coalesce": self.host.engine.midi_stats(),
+                "capture": self.host.engine.capture.stats(),
+                "clock": self.host.midi_clock.stats(),
             },
             "link": {
                 "enabled": self.host.link.enabled,
                 "bpm": self.host.link.bpm,
             },
+            "scheduler": self.host.scheduler.stats(),
+            "devices": self.host.devices.stats(),
             "slots_loaded": sum(1 for slot in self.host.engine.slots if slot is not None),
         }
 
+    def _routes_payload(self) -> dict[str, Any]:
+        return {
+            "channels": {str(ch + 1): slot_idx + 1
+                         for ch, slot_idx in sorted(self.host.channel_map.items())},
+            "rules": [{"rule": n, **rule.to_dict()}
+                      for n, rule in enumerate(self.host.route_rules, start=1)],
+        }
+
+    def _song_payload(self) -> dict[str, Any]:
+        sequencer = self.host.sequencer
+        song = sequencer.song_snapshot()
+        song["pending"] = sequencer.pending()
+        return song
+
     def _slots_payload(self) -> list[dict[str, Any]]:
         return [self._slot_payload(idx, slot) for idx, slot in enumerate(self.host.engine.slots)]
 
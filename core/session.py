@@ -1,13 +1,18 @@
 """Session persistence -- save and restore host state to a JSON file.
 
 Saved state includes:
-  - Per-slot: source kind (plugin/wav), instrument path, name, gain, muted,
-    solo, insert effect paths/names, and all plugin parameter values
+  - Per-slot: source kind (plugin/wav/pack), instrument path, name, gain,
+    muted, solo, insert effect paths/names, and all plugin parameter values
+    (WAV and pack slots also keep interpolation quality, mipmaps, storage)
   - Master effects: paths, names, and parameter values
-  - Master gain
-  - MIDI channel -> slot routing
+  - Master gain and the default WAV sampler quality, mipmap and storage
+  - MIDI channel -> slot routing and split/layer/velocity-zone route rules
+  - Per-slot MIDI controller coalescing
+  - MIDI capture on/off and buffer size (not the captured events)
+  - Control-map presets and the preset used by each control surface
   - Link BPM and enabled state
-  - Audio/MIDI device connection targets
+  - Audio/MIDI device connection targets, including devices the device
+    monitor is still waiting for
 
 The session file is human-readable JSON so it can be hand-edited if needed.
 """
@@ -16,11 +21,11 @@ from __future__ import annotations
 
 import json
 import logging
-import time
 from pathlib import Path
 from typing import Optional, TYPE_CHECKING
 
 from core.models import NUM_SLOTS
+from core.routing import rule_from_dict
 
 if TYPE_CHECKING:
     from core.host import VcpiCore
@@ -101,6 +106,15 @@ def snapshot(host: VcpiCore) -> dict:
         }
         if slot.source_type == "vcv" and slot.vcv_patch_path:
             slot_entry["vcv_patch_path"] = slot.vcv_patch_path
+        quality = getattr(slot.plugin, "quality", None)
+        if slot.source_type in ("wav", "pack") and isinstance(quality, str):
+            slot_entry["quality"] = quality
+        mipmaps = getattr(slot.plugin, "mipmaps", None)
+        if slot.source_type in ("wav", "pack") and isinstance(mipmaps, bool):
+            slot_entry["mipmaps"] = mipmaps
+        storage = getattr(slot.plugin, "storage", None)
+        if slot.source_type in ("wav", "pack") and isinstance(storage, str):
+            slot_entry["storage"] = storage
         slots_data.append(slot_entry)
 
     master_fx_data = []
@@ -115,11 +129,28 @@ def snapshot(host: VcpiCore) -> dict:
     # Routing: store as 1-based for readability in the JSON file
     routing = {str(ch + 1): idx + 1 for ch, idx in host.channel_map.items()}
 
+    # Devices unplugged (or not yet plugged in) stay in the session.
+    waiting = host.devices.waiting()
+    surfaces = host.surface_port_names
+    midi_clock = ({"mode": host.midi_clock.mode, "port": host.midi_clock.port_name}
+                  if host.midi_clock.mode else None)
+    for key, name in waiting.items():
+        kind, _, rest = key.partition(":")
+        if kind == "surface":
+            driver, _, side = rest.rpartition(":")
+            ports = surfaces.setdefault(driver, {"in": None, "out": None})
+            ports[side] = ports.get(side) or name
+        elif kind == "midi_clock" and midi_clock is None:
+            midi_clock = {"mode": rest, "port": name}
+
     connections = {
-        "audio_output": host.audio_output_name,
-        "midi_inputs": host.midi_input_names,
-        "midi_mix_in": host.mixer_midi_name,
-        "midi_mix_out": host.mixer_midi_out_name,
+        "audio_output": host.audio_output_name or waiting.get("audio_output"),
+        "midi_inputs": host.midi_input_names + [
+            name for key, name in waiting.items() if key.startswith("midi_in:")],
+        "midi_mix_in": host.mixer_midi_name or waiting.get("midimix_in"),
+        "midi_mix_out": host.mixer_midi_out_name or waiting.get("midimix_out"),
+        "surfaces": surfaces,
+        "midi_clock": midi_clock,
     }
 
     return {
@@ -129,11 +160,23 @@ def snapshot(host: VcpiCore) -> dict:
         "bpm": host.link.bpm,
         "link_enabled": host.link.enabled,
         "master_gain": host.engine.master_gain,
+        "latency_offset_ms": host.engine.latency_offset_ms,
+        "midi_coalesce": host.engine.midi_stats()["coalesce"],
+        "midi_capture": {"enabled": host.engine.capture.enabled,
+                         "capacity": host.engine.capture.capacity},
+        "sample_quality": host.sample_quality,
+        "sample_mipmaps": host.sample_mipmaps,
+        "sample_storage": host.sample_storage,
         "routing": routing,
+        "route_rules": [rule.to_dict() for rule in host.route_rules],
         "slots": slots_data,
         "master_effects": master_fx_data,
         "connections": connections,
         "sequences": host.sequencer.snapshot(),
+        "seq_clock": host.sequencer.clock,
+        "song": host.sequencer.song_snapshot(),
+        "arpeggiators": host.arpeggiators.snapshot(),
+        "control_maps": host.control_maps.snapshot(),
     }
 
 
@@ -181,6 +224,40 @@ def restore(host: VcpiCore, path: Optional[Path] = None):
     mg = data.get("master_gain")
     if mg is not None:
         host.engine.master_gain = mg
+    latency_offset = data.get("latency_offset_ms")
+    if latency_offset is not None:
+        try:
+            host.engine.set_latency_offset(latency_offset)
+        except (TypeError, ValueError) as e:
+            errors.append(f"latency offset: {e}")
+    for slot_str, limit in data.get("midi_coalesce", {}).items():
+        try:
+            host.engine.set_midi_coalesce(int(slot_str) - 1, limit)
+        except (TypeError, ValueError) as e:
+            errors.append(f"MIDI coalesce slot {slot_str}: {e}")
+    capture = data.get("midi_capture")
+    if isinstance(capture, dict):
+        try:
+            host.set_midi_capture(bool(capture.get("enabled", True)), capture.get("capacity"))
+        except (TypeError, ValueError) as e:
+            errors.append(f"MIDI capture: {e}")
+
+    # -- Sampler defaults ----------------------------------------------------
+    sample_quality = data.get("sample_quality")
+    if isinstance(sample_quality, str):
+        try:
+            host.set_sample_quality(sample_quality)
+        except ValueError as e:
+            errors.append(f"sample quality: {e}")
+    sample_mipmaps = data.get("sample_mipmaps")
+    if isinstance(sample_mipmaps, bool):
+        host.set_sample_mipmaps(sample_mipmaps)
+    sample_storage = data.get("sample_storage")
+    if isinstance(sample_storage, str):
+        try:
+            host.set_sample_storage(sample_storage)
+        except ValueError as e:
+            errors.append(f"sample storage: {e}")
 
     # -- Slots ---------------------------------------------------------------
     for idx, slot_data in enumerate(data.get("slots", [])):
@@ -195,7 +272,19 @@ def restore(host: VcpiCore, path: Optional[Path] = None):
         try:
             match slot_kind:
                 case "wav":
-                    slot = host.load_wav(idx, plugin_path, slot_data.get("name"))
+                    slot = host.load_wav(
+                        idx, plugin_path, slot_data.get("name"),
+                        quality=slot_data.get("quality"),
+                        mipmaps=slot_data.get("mipmaps"),
+                        storage=slot_data.get("storage"),
+                    )
+                case "pack":
+                    slot = host.load_pack(
+                        idx, plugin_path, slot_data.get("name"),
+                        quality=slot_data.get("quality"),
+                        mipmaps=slot_data.get("mipmaps"),
+                        storage=slot_data.get("storage"),
+                    )
                 case "vcv":
                     vcv_patch = slot_data.get("vcv_patch_path", "")
                     if vcv_patch:
@@ -243,73 +332,78 @@ def restore(host: VcpiCore, path: Optional[Path] = None):
             host.route(ch_internal, slot_internal)
         except Exception as e:
             errors.append(f"route ch {ch_str} -> slot {slot_num}: {e}")
+    rules = []
+    for n, rule_data in enumerate(data.get("route_rules", []), start=1):
+        try:
+            rules.append(rule_from_dict(rule_data))
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(f"route rule {n}: {e}")
+    host.engine.set_route_rules(rules)
 
     # -- Sequences -----------------------------------------------------------
+    seq_clock = data.get("seq_clock")
+    if isinstance(seq_clock, str):
+        try:
+            host.sequencer.set_clock(seq_clock)
+        except ValueError as e:
+            errors.append(f"sequencer clock: {e}")
+    song_data = data.get("song")
+    if isinstance(song_data, dict):
+        # Before the banks, so a playing song starts with its part when
+        # restoring the links starts playback.
+        try:
+            host.sequencer.song_restore(song_data)
+        except (TypeError, ValueError) as e:
+            errors.append(f"song: {e}")
     seq_data = data.get("sequences")
     if isinstance(seq_data, list):
         host.sequencer.restore(seq_data)
+    arp_data = data.get("arpeggiators")
+    if isinstance(arp_data, dict):
+        errors.extend(host.arpeggiators.restore(arp_data))
+
+    # -- Control maps --------------------------------------------------------
+    map_data = data.get("control_maps")
+    if isinstance(map_data, dict):
+        errors.extend(host.control_maps.restore(map_data))
 
     # -- Device connections --------------------------------------------------
     connections = data.get("connections", {})
     if not isinstance(connections, dict):
         connections = {}
 
-    # Maximum retries and delay for USB devices that may not be ready at boot.
-    max_retries = 3
-    retry_delay = 2.0  # seconds
-
-    def _restore_port(label: str, value, opener, retries: int = max_retries):
+    # One attempt each; a device that is missing is handed to the device
+    # monitor, which opens it when it appears.
+    def _restore_port(label: str, value, opener, device: str, **target):
         if value is None:
             return
         if isinstance(value, str) and not value.strip():
             return
-        last_exc = None
-        for attempt in range(retries):
+        try:
+            opener(value)
+            return
+        except Exception as exc:
+            error = exc
+        if isinstance(value, str):
             try:
-                opener(value)
-                if attempt > 0:
-                    logger.info("[Session] %s connected on attempt %d", label, attempt + 1)
+                watch = host.watch_device(device, value, **target)
+            except ValueError as exc:
+                error, watch = exc, None
+            if watch is not None:
+                logger.info("[Session] %s '%s' not available (%s); waiting for it",
+                            label, value, error)
                 return
-            except Exception as exc:
-                last_exc = exc
-                if attempt < retries - 1:
-                    logger.debug(
-                        "[Session] %s attempt %d failed (%s), retrying in %.1fs",
-                        label, attempt + 1, exc, retry_delay,
-                    )
-                    time.sleep(retry_delay)
-        errors.append(f"{label} '{value}': {last_exc}")
+        errors.append(f"{label} '{value}': {error}")
 
-    def _restore_audio(name: str, retries: int = max_retries):
-        last_exc = None
-        for attempt in range(retries):
-            try:
-                if host.engine.running:
-                    if host.audio_output_name != name:
-                        host.stop_audio()
-                        host.start_audio(name)
-                else:
-                    host.start_audio(name)
-                if attempt > 0:
-                    logger.info("[Session] audio output connected on attempt %d", attempt + 1)
+    def _open_audio(name: str):
+        if host.engine.running:
+            if host.audio_output_name == name:
                 return
-            except Exception as exc:
-                last_exc = exc
-                if attempt < retries - 1:
-                    logger.debug(
-                        "[Session] audio output attempt %d failed (%s), retrying in %.1fs",
-                        attempt + 1, exc, retry_delay,
-                    )
-                    time.sleep(retry_delay)
-        errors.append(f"audio output '{name}': {last_exc}")
-
-    audio_output = connections.get("audio_output")
-    audio_selected = audio_output is not None
-    if isinstance(audio_output, str) and not audio_output.strip():
-        audio_selected = False
+            host.stop_audio()
+        host.start_audio(name)
 
-    if audio_selected and isinstance(audio_output, str):
-        _restore_audio(audio_output)
+    _restore_port("audio output", connections.get("audio_output"), _open_audio,
+                  "audio_output")
 
     midi_inputs = connections.get("midi_inputs")
     if isinstance(midi_inputs, list):
@@ -318,10 +412,30 @@ def restore(host: VcpiCore, path: Optional[Path] = None):
             if port_name in already_open:
                 logger.debug("[Session] MIDI in '%s' already open, skipping", port_name)
                 continue
-            _restore_port(f"MIDI in '{port_name}'", port_name, host.open_midi_input)
+            _restore_port("MIDI in", port_name, host.open_midi_input, "midi_input")
 
-    _restore_port("MIDI mix in", connections.get("midi_mix_in"), host.open_mixer_midi)
-    _restore_port("MIDI mix out", connections.get("midi_mix_out"), host.open_mixer_midi_out)
+    _restore_port("MIDI mix in", connections.get("midi_mix_in"), host.open_mixer_midi,
+                  "midimix_in")
+    _restore_port("MIDI mix out", connections.get("midi_mix_out"), host.open_mixer_midi_out,
+                  "midimix_out")
+
+    surfaces = connections.get("surfaces")
+    if isinstance(surfaces, dict):
+        for driver, ports in surfaces.items():
+            if not isinstance(ports, dict):
+                continue
+            _restore_port(f"{driver} in", ports.get("in"),
+                          lambda port, d=driver: host.open_surface(d, port),
+                          "surface_in", driver=driver)
+            _restore_port(f"{driver} out", ports.get("out"),
+                          lambda port, d=driver: host.open_surface_out(d, port),
+                          "surface_out", driver=driver)
+
+    midi_clock = connections.get("midi_clock")
+    if isinstance(midi_clock, dict) and midi_clock.get("mode") in ("out", "in"):
+        _restore_port(f"MIDI clock {midi_clock['mode']}", midi_clock.get("port"),
+                      lambda port: host.start_midi_clock(midi_clock["mode"], port),
+                      "midi_clock", mode=midi_clock["mode"])
 
     # -- Report --------------------------------------------------------------
     if errors:
@@ -18,7 +18,7 @@ from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Protocol, cast
-from urllib.parse import urlsplit
+from urllib.parse import unquote, urlsplit
 
 from core.client import (
     END_OF_RESPONSE,
@@ -35,8 +35,9 @@ JSON_REQUEST_PREFIX = "__vcpi_json__ "
 WEB_DIR = Path(__file__).resolve().parent.parent / "web"
 HELP_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
 SESSION_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+SAMPLE_PEAKS_RE = re.compile(r"^/api/samples/([^/]+)/([^/]+)/peaks$")
 SLOT_READ_RE = re.compile(r"^/api/slots/([^/]+)/(info|params)$")
-SLOT_ACTION_RE = re.compile(r"^/api/slots/([^/]+)/(gain|mute|solo|clear|unload|note|params|wav)$")
+SLOT_ACTION_RE = re.compile(r"^/api/slots/([^/]+)/(gain|mute|solo|clear|unload|note|params|wav|pack)$")
 SLOT_FX_LOAD_RE = re.compile(r"^/api/slots/([^/]+)/fx$")
 SLOT_FX_CLEAR_RE = re.compile(r"^/api/slots/([^/]+)/fx/([^/]+)/clear$")
 MASTER_FX_PARAMS_RE = re.compile(r"^/api/master/fx/([^/]+)/params$")
@@ -490,6 +491,8 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
             self._handle_json_get("slots")
         elif path == "/api/samples":
             self._handle_json_get("samples")
+        elif path.startswith("/api/samples/"):
+            self._handle_sample_peaks_get(path)
         elif path == "/api/fx/plugins":
             self._handle_json_get("fx.plugins")
         elif path == "/api/sessions":
@@ -498,8 +501,12 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
             self._handle_json_get("audio.devices")
         elif path == "/api/midi/ports":
             self._handle_json_get("midi.ports")
+        elif path == "/api/midi/routes":
+            self._handle_json_get("midi.routes")
         elif path == "/api/flow":
             self._handle_json_get("flow")
+        elif path == "/api/song":
+            self._handle_json_get("song")
         elif path.startswith("/api/master/fx/"):
             self._handle_master_fx_params_get(path)
         elif path.startswith("/api/slots/"):
@@ -525,6 +532,12 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
             self._handle_midi_link()
         elif path == "/api/midi/cut":
             self._handle_midi_cut()
+        elif path == "/api/midi/routes":
+            self._handle_json_post("midi.routes.add")
+        elif path == "/api/midi/routes/remove":
+            self._handle_json_post("midi.routes.remove")
+        elif path == "/api/midi/routes/clear":
+            self._handle_json_post("midi.routes.clear", {})
         elif path == "/api/midi/inputs":
             self._handle_midi_input_open()
         elif path.startswith("/api/midi/inputs/"):
@@ -535,6 +548,14 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
             self._handle_master_fx_load_post()
         elif path.startswith("/api/master/fx/"):
             self._handle_master_fx_post(path)
+        elif path == "/api/song":
+            self._handle_json_post("song.set")
+        elif path == "/api/song/play":
+            self._handle_json_post("song.play")
+        elif path == "/api/song/stop":
+            self._handle_json_post("song.stop", {})
+        elif path == "/api/seq/queue":
+            self._handle_json_post("seq.queue")
         elif path == "/api/session/save":
             self._handle_session_save()
         elif path == "/api/session/load":
@@ -678,6 +699,21 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
         operation = "slot.info" if match.group(2) == "info" else "slot.params"
         self._handle_json_get(operation, {"slot": slot})
 
+    def _handle_sample_peaks_get(self, path: str) -> None:
+        match = SAMPLE_PEAKS_RE.fullmatch(path)
+        if match is None:
+            _send_json(self, HTTPStatus.BAD_REQUEST, {"ok": False, "error": "sample peaks route must be /api/samples/{pack}/{sample}/peaks"})
+            return
+
+        try:
+            pack = self._safe_sample_segment(unquote(match.group(1)), "pack")
+            sample = self._safe_sample_segment(unquote(match.group(2)), "sample")
+        except ValueError as exc:
+            _send_json(self, HTTPStatus.BAD_REQUEST, {"ok": False, "error": str(exc)})
+            return
+
+        self._handle_json_get("samples.peaks", {"pack": pack, "sample": sample})
+
     def _handle_master_fx_params_get(self, path: str) -> None:
         match = MASTER_FX_PARAMS_RE.fullmatch(path)
         if match is None:
@@ -938,7 +974,7 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
     def _handle_slot_action(self, path: str) -> None:
         match = SLOT_ACTION_RE.fullmatch(path)
         if match is None:
-            _send_json(self, HTTPStatus.BAD_REQUEST, {"ok": False, "error": "slot route must be /api/slots/{1-8}/{gain|mute|solo|clear|unload|note|params|wav}"})
+            _send_json(self, HTTPStatus.BAD_REQUEST, {"ok": False, "error": "slot route must be /api/slots/{1-8}/{gain|mute|solo|clear|unload|note|params|wav|pack}"})
             return
 
         try:
@@ -949,6 +985,8 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
             action = match.group(2)
             if action == "wav" and "slot" in body:
                 raise ValueError("slot WAV payload must contain only pack, sample, and optional name")
+            if action == "pack" and "slot" in body:
+                raise ValueError("slot pack payload must contain only pack and optional name")
             payload = dict(body)
             payload["slot"] = slot
             if action == "params":
@@ -969,6 +1007,9 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
             elif action == "wav":
                 self._validate_wav_load_payload(payload)
                 operation = "slot.wav.load"
+            elif action == "pack":
+                self._validate_pack_load_payload(payload)
+                operation = "slot.pack.load"
             else:
                 operation = f"slot.{action}"
         except json.JSONDecodeError as exc:
@@ -1321,6 +1362,19 @@ class VcpiWebHandler(BaseHTTPRequestHandler):
                 raise ValueError(f"name must be at most {MAX_SAMPLE_DISPLAY_NAME_LENGTH} characters")
             payload["name"] = name
 
+    @classmethod
+    def _validate_pack_load_payload(cls, payload: dict[str, object]) -> None:
+        body_keys = set(payload) - {"slot"}
+        if not body_keys.issubset({"pack", "name"}):
+            raise ValueError("slot pack payload must contain only pack and optional name")
+
+        payload["pack"] = cls._safe_sample_segment(payload.get("pack"), "pack")
+        if "name" in payload:
+            name = cls._safe_sample_segment(payload.get("name"), "name")
+            if len(name) > MAX_SAMPLE_DISPLAY_NAME_LENGTH:
+                raise ValueError(f"name must be at most {MAX_SAMPLE_DISPLAY_NAME_LENGTH} characters")
+            payload["name"] = name
+
     @classmethod
     def _validate_fx_load_payload(cls, payload: dict[str, object], *, allow_slot: bool = False) -> None:
         allowed = {"plugin", "name"}
@@ -83,6 +83,13 @@ def render_plugin_info(plugin, label: str = "") -> str:
     if path:
         rows.append(("Path", path))
     rows.append(("Latency", f"{latency} samples"))
+    memory = getattr(plugin, "memory_bytes", None)
+    if isinstance(memory, int):
+        storage = _safe_attr(plugin, "sample_dtype")
+        rows.append(("Memory", f"{memory / (1024 * 1024):.2f} MiB ({storage})"))
+    loop = getattr(plugin, "loop", None)
+    if isinstance(loop, tuple) and len(loop) == 2:
+        rows.append(("Loop", f"{loop[0]}-{loop[1]} frames"))
     rows.append(("", ""))  # spacer
     rows.append(("Parameters", str(param_count)))
     if param_count > 0:
@@ -1,7 +1,8 @@
 """Full signal-flow ASCII graph for vcpi.
 
-Renders all 8 slots with MIDI routing, instrument, per-slot FX chains,
-gain/mute/solo state, master effects, and master gain in a single diagram.
+Renders all 8 slots with MIDI routing (channel links and route rules),
+instrument, per-slot FX chains, gain/mute/solo state, master effects, and
+master gain in a single diagram.
 """
 
 from __future__ import annotations
@@ -36,7 +37,7 @@ def _gain_bar(gain: float, width: int = 10) -> str:
     return "#" * filled + "-" * (width - filled)
 
 
-def render_signal_flow(engine, channel_map: dict) -> str:
+def render_signal_flow(engine, channel_map: dict, route_rules=()) -> str:
     """Return an ASCII signal-flow diagram of the entire mixer.
 
     Parameters
@@ -45,6 +46,8 @@ def render_signal_flow(engine, channel_map: dict) -> str:
         The running audio engine (provides slots, master_effects, master_gain).
     channel_map : dict
         MIDI channel (0-15) -> slot index (0-7) routing map.
+    route_rules : sequence of RouteRule
+        Split / layer / velocity-zone rules; slots list them as ``R<n>``.
     """
 
     # -- build reverse map: slot_index -> sorted MIDI channels ---------------
@@ -53,6 +56,10 @@ def render_signal_flow(engine, channel_map: dict) -> str:
         routes_by_slot.setdefault(slot_idx, []).append(ch)
     for chs in routes_by_slot.values():
         chs.sort()
+    rules_by_slot: dict[int, list[int]] = {}
+    for n, rule in enumerate(route_rules, start=1):
+        for slot_idx in rule.slots:
+            rules_by_slot.setdefault(slot_idx, []).append(n)
 
     any_solo = engine.any_solo()
 
@@ -74,9 +81,10 @@ def render_signal_flow(engine, channel_map: dict) -> str:
             slot_lines.append(f"  [S{num}] (empty)")
             continue
 
-        # MIDI channels routed to this slot
-        chs = routes_by_slot.get(i, [])
-        ch_str = ",".join(f"ch{c + 1:02d}" for c in chs) if chs else "---"
+        # MIDI channels and route rules feeding this slot
+        sources = [f"ch{c + 1:02d}" for c in routes_by_slot.get(i, [])]
+        sources += [f"R{n}" for n in rules_by_slot.get(i, [])]
+        ch_str = ",".join(sources) if sources else "---"
 
         # Instrument name
         inst_name = _plugin_name(slot.plugin)
@@ -109,6 +117,11 @@ def render_signal_flow(engine, channel_map: dict) -> str:
             f"         gain [{bar}] {slot.gain:.2f}{flags}"
         )
 
+    # -- route rules ---------------------------------------------------------
+    rule_lines = [f"  R{n}: {rule.describe()}" for n, rule in enumerate(route_rules, start=1)]
+    if rule_lines:
+        rule_lines.append("")
+
     # -- master section ------------------------------------------------------
     master_lines: list[str] = []
     if engine.master_effects:
@@ -122,7 +135,7 @@ def render_signal_flow(engine, channel_map: dict) -> str:
 
     # -- compose the box -----------------------------------------------------
     title = "vcpi Signal Flow"
-    all_content = slot_lines + [""] + master_lines
+    all_content = slot_lines + [""] + rule_lines + master_lines
 
     body_width = max(len(title), max(len(ln) for ln in all_content))
     border = "+" + "-" * (body_width + 2) + "+"
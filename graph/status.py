@@ -86,6 +86,9 @@ def render_status(host: VcpiCore) -> str:
     audio_state = "RUNNING" if engine.running else "STOPPED"
     rows.append(("Audio", f"{audio_state}  (sr={host.sample_rate} buf={host.buffer_size})"))
     rows.append(("Backend", _audio_backend_label(engine)))
+    rows.append(("Latency", f"out {engine.output_latency * 1000.0:.1f} ms"
+                            f" + offset {engine.latency_offset_ms:+.1f} ms"
+                            f"  (Link lead {engine.output_delay * 1000.0:.1f} ms)"))
 
     # -- Render pool ---------------------------------------------------------
     max_w, active = _pool_status(engine)
@@ -104,6 +107,20 @@ def render_status(host: VcpiCore) -> str:
 
     rows.append(("MIDIMix IN", host.mixer_midi_name or "closed"))
     rows.append(("MIDIMix OUT", host.mixer_midi_out_name or "closed"))
+    watches = host.devices.watches()
+    if watches:
+        connected = sum(1 for watch in watches if watch.connected)
+        waiting = ", ".join(watch.name for watch in watches if not watch.connected)
+        rows.append(("Devices", f"{connected}/{len(watches)} connected"
+                                + (f"  (waiting: {waiting})" if waiting else "")))
+
+    midi = engine.midi_stats()
+    kept = ", ".join(f"S{slot}:{n}" for slot, n in midi["coalesce"].items()) or "off"
+    rows.append(("Coalesce", f"{kept}  ({midi['dropped_total']} dropped)"))
+    capture = engine.capture.stats()
+    rows.append(("Capture", f"{'on' if capture['enabled'] else 'off'}  "
+                            f"{capture['events']}/{capture['capacity']} events"
+                            f"  ({capture['overflow']} overwritten)"))
 
     rows.append(("", ""))  # spacer
 
@@ -113,6 +130,26 @@ def render_status(host: VcpiCore) -> str:
     else:
         rows.append(("Link", "disabled"))
 
+    # -- MIDI clock ----------------------------------------------------------
+    clock = host.midi_clock.stats()
+    if clock["mode"] is None:
+        rows.append(("MIDI Clock", "off"))
+    else:
+        jit = clock["jitter_ms"]
+        if clock["mode"] == "out":
+            where = f"out -> {clock['port']}"
+        else:
+            bpm = "--" if clock["bpm"] is None else f"{clock['bpm']:.1f}"
+            where = f"in <- {clock['port']}  {bpm} BPM"
+        rows.append(("MIDI Clock", f"{where}  jitter avg {jit['mean']:.2f}"
+                                   f" / p99 {jit['p99']:.2f} / max {jit['max']:.2f} ms"))
+
+    # -- Scheduler -----------------------------------------------------------
+    sched = host.scheduler.stats()
+    late = sched["late_ms"]
+    rows.append(("Scheduler", f"{sched['depth']} queued  late avg {late['mean']:.2f}"
+                              f" / p99 {late['p99']:.2f} / max {late['max']:.2f} ms"))
+
     # -- Session -------------------------------------------------------------
     if host.loaded_session_path:
         rows.append(("Session", str(host.loaded_session_path)))
@@ -1,12 +1,32 @@
-"""Sampler sub-package -- WAV-backed instrument plugin."""
+"""Sampler sub-package -- WAV-backed instrument plugins."""
 
+from sampler.cache import load_sample
+from sampler.mipmap import MipmapSet
 from sampler.plugin import WavSamplerPlugin
-from sampler.wav import read_wav, resample_linear, adapt_channels, decode_pcm
+from sampler.multisample import Keymap, MultisamplePlugin, build_keymap
+from sampler.resample import RESAMPLE_QUALITIES, resample_sinc
+from sampler.storage import STORAGE_MODES
+from sampler.wav import (
+    SampleLoop, WavInfo, parse_wav, read_wav, read_wav_with_info,
+    resample_linear, adapt_channels, decode_pcm,
+)
 
 __all__ = [
     "WavSamplerPlugin",
+    "MultisamplePlugin",
+    "Keymap",
+    "build_keymap",
     "read_wav",
+    "read_wav_with_info",
+    "parse_wav",
+    "WavInfo",
+    "SampleLoop",
     "resample_linear",
+    "resample_sinc",
+    "RESAMPLE_QUALITIES",
+    "STORAGE_MODES",
+    "MipmapSet",
+    "load_sample",
     "adapt_channels",
     "decode_pcm",
 ]
@@ -0,0 +1,101 @@
+"""Shared cache of decoded, engine-ready samples.
+
+Decoding, sample-rate conversion, channel adaptation and the sustain-loop
+crossfade are done once per (file, mtime, target rate, channels, storage,
+loop override).  Entries are held weakly: a
+sample stays cached for as long as any slot plays it, so loading the same
+WAV into two slots (or reloading a session) shares one buffer and one set
+of mipmap tables.
+
+See ``sampler.storage`` for the float32 / int16 storage modes.
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from pathlib import Path
+from typing import Optional
+
+from core.deps import np
+from sampler.loop import LOOP_CROSSFADE_SECONDS, crossfade_loop, scale_loop
+from sampler.mipmap import MipmapSet
+from sampler.resample import DEFAULT_IMPORT_QUALITY, resample_sinc
+from sampler.storage import DEFAULT_STORAGE, resolve_storage, to_storage
+from sampler.wav import adapt_channels, read_wav_with_info
+
+
+class DecodedSample:
+    """One decoded sample plus its lazily built derived tables."""
+
+    def __init__(self, path: str, audio: np.ndarray, sample_rate: int,
+                 loop: Optional[tuple[int, int]] = None):
+        self.path = path
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.loop = loop  # (start, end) in decoded frames, end exclusive
+        self.storage = "int16" if audio.dtype == np.int16 else "float32"
+        self._mipmaps: MipmapSet | None = None
+        self._lock = threading.Lock()
+
+    def mipmaps(self) -> MipmapSet:
+        """Return this sample's mipmap set, starting the builder on first use."""
+        with self._lock:
+            if self._mipmaps is None:
+                self._mipmaps = MipmapSet(self.audio).start()
+            return self._mipmaps
+
+
+_cache: "weakref.WeakValueDictionary[tuple, DecodedSample]" = weakref.WeakValueDictionary()
+_cache_lock = threading.Lock()
+
+
+def load_sample(
+    path: Path,
+    target_sample_rate: int,
+    output_channels: int,
+    import_quality: str = DEFAULT_IMPORT_QUALITY,
+    storage: str = DEFAULT_STORAGE,
+    loop: Optional[tuple[int, int]] = None,
+) -> DecodedSample:
+    """Decode *path* for the engine, reusing a cached copy when possible.
+
+    *loop* overrides the file's ``smpl`` loop with source-frame
+    ``(start, last)`` points (see ``sampler.loop``).
+    """
+    resolved = path.expanduser().resolve()
+    stat = resolved.stat()
+    requested = resolve_storage(storage)
+    base = (str(resolved), stat.st_mtime_ns, stat.st_size,
+            int(target_sample_rate), int(output_channels), import_quality,
+            tuple(loop) if loop is not None else None)
+    key = base + (requested,)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    audio, info = read_wav_with_info(resolved)
+    storage = requested
+    if storage == "int16" and info.sample_width > 2:
+        storage = "float32"  # keep the extra resolution of 24/32-bit sources
+    audio = resample_sinc(audio, info.sample_rate, target_sample_rate, import_quality)
+    audio = adapt_channels(audio, output_channels)
+    if loop is None and info.loops:
+        loop = (info.loops[0].start, info.loops[0].end)
+    if loop is not None:
+        loop = scale_loop(loop, info.sample_rate, target_sample_rate, audio.shape[1])
+    if loop is not None:
+        fade = int(LOOP_CROSSFADE_SECONDS * target_sample_rate)
+        audio = crossfade_loop(audio, loop[0], loop[1], fade)
+    audio = to_storage(audio, storage)
+    audio.setflags(write=False)
+    decoded = DecodedSample(str(path), audio, int(target_sample_rate), loop)
+
+    with _cache_lock:
+        # Another thread may have decoded the same file meanwhile; keep one.
+        # Held under the resolved storage too, so an int16 request that fell
+        # back to float32 shares its buffer with float32 requests.
+        decoded = _cache.setdefault(base + (storage,), decoded)
+        return _cache.setdefault(key, decoded)
@@ -0,0 +1,82 @@
+"""Sustain loops for sampled instruments.
+
+Loop points come from the WAV ``smpl`` chunk or, for packs, a ``loop``
+entry in ``keymap.json``; both use source-file frames with an inclusive
+end, like the ``smpl`` chunk itself.  Ping-pong and backward loops are
+played forward.
+
+At load time the frames just before the loop end are crossfaded with the
+frames just before the loop start, so wrapping from the end back to the
+start continues the waveform without a click.  While a key is held the
+renderer folds positions back into the loop with plain arithmetic
+(``wrap_positions``) rather than a per-sample branch.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+from core.deps import np
+
+LOOP_CROSSFADE_SECONDS = 0.02
+LOOP_RELEASE_SECONDS = 0.05
+MIN_LOOP_FRAMES = 16
+
+
+def scale_loop(
+    loop: tuple[int, int],
+    src_rate: int,
+    dst_rate: int,
+    frames: int,
+) -> Optional[tuple[int, int]]:
+    """Map a source ``(start, last)`` loop to ``(start, end)`` decoded frames.
+
+    The returned end is exclusive.  Returns None when the loop is too short
+    or falls outside the decoded sample.
+    """
+    start, last = (int(v) for v in loop)
+    if start < 0 or last < start:
+        return None
+    ratio = dst_rate / src_rate if src_rate else 1.0
+    start = int(round(start * ratio))
+    end = min(int(frames), int(round((last + 1) * ratio)))
+    if end - start < MIN_LOOP_FRAMES:
+        return None
+    return start, end
+
+
+def crossfade_loop(audio: np.ndarray, start: int, end: int, fade: int) -> np.ndarray:
+    """Return a copy of float *audio* with a linear crossfade baked in.
+
+    Frames ``[end - fade, end)`` fade from their own content into the
+    frames preceding *start*; frame ``end - 1`` becomes ``start - 1``, so
+    the wrap continues the waveform exactly.  Loop points sit on matching
+    waveform, so the two sides are correlated and an equal-gain fade keeps
+    the level constant.
+    """
+    fade = min(int(fade), start, (end - start) // 2)
+    out = np.array(audio, dtype=np.float32, copy=True)
+    if fade <= 0:
+        return out
+    fade_in = (np.arange(fade, dtype=np.float32) + 1.0) / fade
+    out[:, end - fade:end] = (audio[:, end - fade:end] * (1.0 - fade_in)
+                              + audio[:, start - fade:start] * fade_in)
+    return out
+
+
+def wrap_positions(positions: np.ndarray, start: float, end: float) -> np.ndarray:
+    """Fold positions at or past *end* back into ``[start, end)``.
+
+    Positions before *start* are untouched.
+    """
+    length = end - start
+    laps = np.floor(np.maximum(positions - start, 0.0) / length)
+    return positions - laps * length
+
+
+def wrap_position(position: float, start: float, end: float) -> float:
+    """Scalar ``wrap_positions`` for the next-block start position."""
+    if position < end:
+        return position
+    return start + math.fmod(position - start, end - start)
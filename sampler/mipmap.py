@@ -0,0 +1,89 @@
+"""Pre-pitched, band-limited sample tables for fast transposition.
+
+Level 0 is the decoded sample.  Level *k* is the same audio low-passed and
+decimated by ``2 ** k`` with the high-quality sinc resampler, so reading
+it at ``rate / 2 ** k`` plays the note ``rate`` times faster without the
+content above the new Nyquist folding back.  Playback picks the level that
+keeps the residual ratio between roughly 0.71 and 1.41, where cheap
+interpolation is clean.
+
+Levels are built on a background thread; until a level exists playback
+uses the highest finished one, so enabling mipmaps never blocks a load.
+Levels keep the storage dtype of the base sample (float32 or int16).
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+
+from core.deps import np
+from sampler.storage import as_float, to_storage
+from sampler.resample import resample_sinc
+
+logger = logging.getLogger(__name__)
+
+MAX_MIPMAP_LEVELS = 5  # five octaves above the root
+MIN_MIPMAP_FRAMES = 64
+
+
+class MipmapSet:
+    """Octave-spaced decimated copies of one sample, built lazily."""
+
+    def __init__(self, base: np.ndarray, max_levels: int = MAX_MIPMAP_LEVELS):
+        self.max_levels = max(0, int(max_levels))
+        # Appending to a list is atomic under the GIL, so the render thread
+        # can read ``levels`` while the builder is still extending it.
+        self.levels: list[np.ndarray] = [base]
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self) -> "MipmapSet":
+        """Start the background builder (idempotent)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._build, name="vcpi-mipmap", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until every level is built; used by tests and benchmarks."""
+        return self._done.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the decimated levels (excluding the base sample)."""
+        return sum(level.nbytes for level in self.levels[1:])
+
+    def _build(self):
+        try:
+            base = self.levels[0]
+            level = as_float(base)
+            for _ in range(self.max_levels):
+                if level.shape[1] // 2 < MIN_MIPMAP_FRAMES:
+                    break
+                level = resample_sinc(level, 2, 1, "high")
+                if base.dtype == np.int16:
+                    self.levels.append(to_storage(level, "int16"))
+                else:
+                    self.levels.append(level)
+            logger.debug("[WAV] mipmap built: %d levels", len(self.levels) - 1)
+        except Exception:
+            logger.warning("[WAV] mipmap build failed", exc_info=True)
+        finally:
+            self._done.set()
+
+    def pick(self, rate: float) -> tuple[np.ndarray, int]:
+        """Return (table, level) whose residual ratio is closest to 1."""
+        if rate <= math.sqrt(2.0):
+            return self.levels[0], 0
+        levels = self.levels
+        level = min(len(levels) - 1, int(math.floor(math.log2(rate) + 0.5)))
+        return levels[level], level
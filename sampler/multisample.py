@@ -0,0 +1,434 @@
+"""Multisample instruments: keymapped zones with velocity layers.
+
+A pack directory such as ``sampler/samples/piano`` becomes one playable
+instrument.  Each WAV is a *zone* with a root note and a key/velocity
+range; a note plays the zone whose root is nearest, so pitch shifts stay
+within a few semitones.
+
+The keymap comes from an optional ``keymap.json`` manifest in the pack::
+
+    {"zones": [
+        {"sample": "c4-soft",   "root": "c4", "velocity": [1, 90]},
+        {"sample": "c4-bright", "root": "c4", "velocity": [91, 127]},
+        {"sample": "c5-high",   "root": 72, "keys": [67, 127]},
+        {"sample": "c3-pad",    "root": "c3", "loop": [24000, 71999]}
+    ]}
+
+``loop`` sets a sustain loop in source-file frames (inclusive end) and
+overrides any ``smpl`` chunk in the file; see ``sampler.loop``.
+
+Without a manifest, roots are parsed from file names (``c4-soft.wav``,
+``g3-ensemble.wav``, ``f#2.wav``; C4 is MIDI note 60).  Files sharing a
+root become velocity layers in alphabetical order, splitting 1-127 evenly.
+
+Zones are decoded on first use on a background thread through the shared
+sample cache, so loading a large pack is instant and memory grows only
+with the zones actually played.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from core.deps import np
+from core.midi import NOTE_OFF, NOTE_ON
+from sampler.cache import DecodedSample, load_sample
+from sampler.mipmap import MipmapSet
+from sampler.plugin import WavSamplerPlugin
+from sampler.resample import DEFAULT_IMPORT_QUALITY, DEFAULT_PLAYBACK_QUALITY
+from sampler.storage import DEFAULT_STORAGE, resolve_storage
+
+logger = logging.getLogger(__name__)
+
+KEYMAP_MANIFEST = "keymap.json"
+
+_NOTE_NAME_RE = re.compile(r"^([a-g])(#|s|b)?(-?\d)$", re.IGNORECASE)
+_NOTE_PREFIX_RE = re.compile(r"^([a-g])(#|s|b)?(-?\d)(?=$|[-_ .])", re.IGNORECASE)
+_PITCH_CLASSES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+
+_loader: Optional[ThreadPoolExecutor] = None
+_loader_lock = threading.Lock()
+
+
+def _loader_pool() -> ThreadPoolExecutor:
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vcpi-pack")
+        return _loader
+
+
+def note_number(value: object) -> int:
+    """Parse a MIDI note number or a name like ``c4`` / ``f#3`` / ``bb2``."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        note = value
+    elif isinstance(value, str) and _NOTE_NAME_RE.match(value.strip()):
+        note = _note_from_match(_NOTE_NAME_RE.match(value.strip()))
+    else:
+        raise ValueError(f"invalid note: {value!r}")
+    if not 0 <= note <= 127:
+        raise ValueError(f"note out of range: {value!r}")
+    return note
+
+
+def _note_from_match(match: re.Match) -> int:
+    pitch = _PITCH_CLASSES[match.group(1).lower()]
+    accidental = (match.group(2) or "").lower()
+    if accidental in ("#", "s"):
+        pitch += 1
+    elif accidental == "b":
+        pitch -= 1
+    return (int(match.group(3)) + 1) * 12 + pitch
+
+
+def root_from_filename(stem: str) -> Optional[int]:
+    """Return the root note encoded at the start of *stem*, if any."""
+    match = _NOTE_PREFIX_RE.match(stem)
+    if match is None:
+        return None
+    note = _note_from_match(match)
+    return note if 0 <= note <= 127 else None
+
+
+@dataclass(frozen=True)
+class Zone:
+    """One sample mapped to a key and velocity range."""
+
+    sample: str
+    path: str
+    root: int
+    lo_key: int
+    hi_key: int
+    lo_vel: int = 1
+    hi_vel: int = 127
+    loop: Optional[tuple[int, int]] = None
+
+
+class Keymap:
+    """Zones compiled to a 128x128 (note, velocity) -> zone index table."""
+
+    def __init__(self, zones: list[Zone]):
+        if not zones:
+            raise ValueError("keymap has no zones")
+        self.zones = list(zones)
+        table = np.full((128, 128), -1, dtype=np.int16)
+        # Later zones must not shadow earlier ones, so fill in reverse.
+        for idx in range(len(self.zones) - 1, -1, -1):
+            zone = self.zones[idx]
+            table[zone.lo_key:zone.hi_key + 1, zone.lo_vel:zone.hi_vel + 1] = idx
+        table.setflags(write=False)
+        self.table = table
+
+    def index(self, note: int, velocity: int) -> int:
+        """Zone index for a note, or -1 when nothing is mapped."""
+        if not (0 <= note <= 127 and 0 <= velocity <= 127):
+            return -1
+        return int(self.table[note, velocity])
+
+    def lookup(self, note: int, velocity: int) -> Optional[Zone]:
+        idx = self.index(note, velocity)
+        return self.zones[idx] if idx >= 0 else None
+
+    @property
+    def roots(self) -> list[int]:
+        return sorted({zone.root for zone in self.zones})
+
+
+def _nearest_root_ranges(roots: list[int]) -> dict[int, tuple[int, int]]:
+    """Split 0-127 so every key belongs to the closest root."""
+    ordered = sorted(set(roots))
+    ranges: dict[int, tuple[int, int]] = {}
+    for i, root in enumerate(ordered):
+        lo = 0 if i == 0 else (ordered[i - 1] + root) // 2 + 1
+        hi = 127 if i == len(ordered) - 1 else (root + ordered[i + 1]) // 2
+        ranges[root] = (lo, hi)
+    return ranges
+
+
+def _velocity_number(value: object) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"invalid velocity: {value!r}")
+    return value
+
+
+def _range_from_manifest(raw: object, key: str, default: tuple[int, int],
+                         low: int, parse) -> tuple[int, int]:
+    if raw is None:
+        return default
+    if not isinstance(raw, list) or len(raw) != 2:
+        raise ValueError(f"{key} must be a [low, high] pair")
+    lo, hi = (parse(v) for v in raw)
+    if not low <= lo <= hi <= 127:
+        raise ValueError(f"{key} range is invalid: {raw!r}")
+    return lo, hi
+
+
+def _loop_from_manifest(raw: object) -> Optional[tuple[int, int]]:
+    if raw is None:
+        return None
+    if (not isinstance(raw, list) or len(raw) != 2
+            or any(isinstance(v, bool) or not isinstance(v, int) for v in raw)):
+        raise ValueError("loop must be a [start, end] pair of frame numbers")
+    start, end = raw
+    if not 0 <= start < end:
+        raise ValueError(f"loop range is invalid: {raw!r}")
+    return start, end
+
+
+def _zones_from_manifest(pack_dir: Path, manifest: Path) -> list[Zone]:
+    try:
+        data = json.loads(manifest.read_text())
+    except (OSError, json.JSONDecodeError) as exc:
+        raise ValueError(f"invalid keymap manifest {manifest}: {exc}") from exc
+    entries = data.get("zones") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"keymap manifest {manifest} must contain a 'zones' list")
+
+    parsed = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("sample"), str):
+            raise ValueError("each keymap zone needs a 'sample' name")
+        stem = entry["sample"].strip()
+        if stem.lower().endswith(".wav"):
+            stem = stem[:-4]
+        path = pack_dir / f"{stem}.wav"
+        if not path.is_file() or path.resolve().parent != pack_dir.resolve():
+            raise ValueError(f"keymap sample not found: {stem}")
+        root = entry.get("root")
+        root = note_number(root) if root is not None else root_from_filename(stem)
+        if root is None:
+            raise ValueError(f"keymap zone {stem} needs a root note")
+        parsed.append((entry, stem, path, root))
+
+    ranges = _nearest_root_ranges([root for _, _, _, root in parsed])
+    zones = []
+    for entry, stem, path, root in parsed:
+        lo_key, hi_key = _range_from_manifest(entry.get("keys"), "keys", ranges[root], 0,
+                                             note_number)
+        lo_vel, hi_vel = _range_from_manifest(entry.get("velocity"), "velocity", (1, 127), 1,
+                                             _velocity_number)
+        loop = _loop_from_manifest(entry.get("loop"))
+        zones.append(Zone(stem, str(path), root, lo_key, hi_key, lo_vel, hi_vel, loop))
+    return zones
+
+
+def _zones_from_filenames(pack_dir: Path) -> list[Zone]:
+    by_root: dict[int, list[Path]] = {}
+    for wav in sorted(pack_dir.glob("*.wav"), key=lambda p: p.name.lower()):
+        root = root_from_filename(wav.stem)
+        if root is not None and wav.is_file():
+            by_root.setdefault(root, []).append(wav)
+
+    ranges = _nearest_root_ranges(list(by_root))
+    zones = []
+    for root in sorted(by_root):
+        layers = by_root[root]
+        lo_key, hi_key = ranges[root]
+        for i, wav in enumerate(layers):
+            lo_vel = 1 + (127 * i) // len(layers)
+            hi_vel = (127 * (i + 1)) // len(layers)
+            zones.append(Zone(wav.stem, str(wav), root, lo_key, hi_key, lo_vel, hi_vel))
+    return zones
+
+
+def build_keymap(pack_dir: Path) -> Keymap:
+    """Build the keymap for a pack from its manifest or file names."""
+    pack_dir = Path(pack_dir).expanduser()
+    if not pack_dir.is_dir():
+        raise FileNotFoundError(f"Sample pack not found: {pack_dir}")
+
+    manifest = pack_dir / KEYMAP_MANIFEST
+    if manifest.is_file():
+        zones = _zones_from_manifest(pack_dir, manifest)
+    else:
+        zones = _zones_from_filenames(pack_dir)
+    if not zones:
+        raise ValueError(f"Sample pack {pack_dir.name} has no note-named samples")
+    return Keymap(zones)
+
+
+class MultisamplePlugin(WavSamplerPlugin):
+    """WAV sampler that plays a keymapped, velocity-layered sample pack."""
+
+    info_type = "Multisample"
+
+    def __init__(
+        self,
+        path: str,
+        keymap: Keymap,
+        target_sample_rate: int,
+        output_channels: int,
+        max_voices: int = 32,
+        quality: str = DEFAULT_PLAYBACK_QUALITY,
+        mipmaps: bool = False,
+        import_quality: str = DEFAULT_IMPORT_QUALITY,
+        storage: str = DEFAULT_STORAGE,
+    ):
+        self.keymap = keymap
+        self._target_sample_rate = int(target_sample_rate)
+        self._loaded: dict[int, DecodedSample] = {}
+        self._zone_mipmaps: dict[int, MipmapSet] = {}
+        self._pending: set[int] = set()
+        self._failed: set[int] = set()
+        self._zone_lock = threading.Lock()
+        self._mipmaps_enabled = False
+
+        super().__init__(
+            path=path,
+            sample=np.zeros((output_channels, 0), dtype=np.float32),
+            output_channels=output_channels,
+            max_voices=max_voices,
+            quality=quality,
+            mipmaps=mipmaps,
+            storage=storage,
+            import_quality=import_quality,
+        )
+
+    @classmethod
+    def from_pack(
+        cls,
+        pack_dir: str,
+        target_sample_rate: int,
+        output_channels: int,
+        max_voices: int = 32,
+        quality: str = DEFAULT_PLAYBACK_QUALITY,
+        mipmaps: bool = False,
+        storage: str = DEFAULT_STORAGE,
+    ) -> "MultisamplePlugin":
+        path = Path(pack_dir).expanduser()
+        keymap = build_keymap(path)
+        return cls(
+            path=str(path),
+            keymap=keymap,
+            target_sample_rate=target_sample_rate,
+            output_channels=output_channels,
+            max_voices=max_voices,
+            quality=quality,
+            mipmaps=mipmaps,
+            storage=storage,
+        )
+
+    # -- zone loading --------------------------------------------------------
+
+    @property
+    def loaded_zones(self) -> int:
+        return len(self._loaded)
+
+    def preload(self):
+        """Decode every zone now (blocking)."""
+        for idx in range(len(self.keymap.zones)):
+            if idx not in self._loaded:
+                self._decode_zone(idx)
+
+    def _request_zone(self, idx: int):
+        with self._zone_lock:
+            if idx in self._loaded or idx in self._pending or idx in self._failed:
+                return
+            self._pending.add(idx)
+        _loader_pool().submit(self._decode_zone, idx)
+
+    def _decode_zone(self, idx: int):
+        zone = self.keymap.zones[idx]
+        try:
+            decoded = load_sample(Path(zone.path), self._target_sample_rate,
+                                  self.output_channels, self._import_quality,
+                                  self._storage, zone.loop)
+        except Exception:
+            logger.warning("[WAV] pack zone %s failed to load", zone.sample, exc_info=True)
+            with self._zone_lock:
+                self._pending.discard(idx)
+                self._failed.add(idx)
+            return
+        with self._zone_lock:
+            if self._mipmaps_enabled:
+                self._zone_mipmaps[idx] = decoded.mipmaps()
+            self._loaded[idx] = decoded
+            self._pending.discard(idx)
+        logger.debug("[WAV] pack zone %s decoded", zone.sample)
+
+    @property
+    def storage(self) -> str:
+        return self._storage
+
+    @storage.setter
+    def storage(self, value: str):
+        storage = resolve_storage(value)
+        if storage == self._storage:
+            return
+        self._storage = storage
+        # Convert already-played zones now; the rest load in the new mode.
+        for idx in list(self._loaded):
+            self._decode_zone(idx)
+
+    @property
+    def memory_bytes(self) -> int:
+        with self._zone_lock:
+            total = sum(int(d.audio.nbytes) for d in self._loaded.values())
+            total += sum(m.nbytes for m in self._zone_mipmaps.values())
+        return total
+
+    @property
+    def sample_dtype(self) -> str:
+        dtypes = sorted({str(d.audio.dtype) for d in list(self._loaded.values())})
+        return "/".join(dtypes) if dtypes else "-"
+
+    # -- playback ------------------------------------------------------------
+
+    @property
+    def mipmaps(self) -> bool:
+        return self._mipmaps_enabled
+
+    @mipmaps.setter
+    def mipmaps(self, enabled: bool):
+        with self._zone_lock:
+            self._mipmaps_enabled = bool(enabled)
+            if not enabled:
+                self._zone_mipmaps = {}
+                return
+            self._zone_mipmaps = {idx: decoded.mipmaps()
+                                  for idx, decoded in self._loaded.items()}
+
+    def send_raw(self, data, offset: int = 0):
+        """Spawn a voice on the zone mapped to the note and velocity."""
+        if len(data) < 3:
+            return
+        kind = data[0] & 0xF0
+        note, velocity = data[1], data[2]
+        if kind == NOTE_OFF or (kind == NOTE_ON and velocity == 0):
+            self._release_note(note)
+            return
+        if kind != NOTE_ON:
+            return
+
+        idx = self.keymap.index(note, velocity)
+        if idx < 0:
+            return
+        self._request_zone(idx)
+
+        root = self.keymap.zones[idx].root
+        if len(self._voices) >= self.max_voices:
+            self._voices.pop(0)
+        self._voices.append({
+            "position": 0.0,
+            "rate": float(2.0 ** ((note - root) / 12.0)),
+            "gain": max(0.0, min(1.0, velocity / 127.0)),
+            "note": note,
+            "held": True,
+            "delay": max(0, int(offset)),
+            "zone": idx,
+        })
+
+    def _voice_source(self, voice: dict):
+        idx = int(voice["zone"])
+        decoded = self._loaded.get(idx)
+        if decoded is None:
+            return False if idx in self._failed else None
+        mipmaps = self._zone_mipmaps.get(idx) if self._mipmaps_enabled else None
+        return decoded.audio, mipmaps, decoded.loop
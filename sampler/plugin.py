@@ -1,15 +1,32 @@
 """WavSamplerPlugin -- lightweight sampler with plugin-like API.
 
-Provides the same ``send_midi`` + ``process`` interface that the audio
-engine expects so WAV-backed instruments can sit alongside VST3 plugins.
+Provides the ``send_raw``/``send_midi`` + ``process`` interface that the
+audio engine expects so WAV-backed instruments can sit alongside VST3 plugins.
+
+Samples without loop points play as one-shots (note-off is ignored).
+Samples with a sustain loop (see ``sampler.loop``) loop while the key is
+held; on release they play on into the tail after the loop, or fade out
+over ``LOOP_RELEASE_SECONDS`` when there is no tail.
 """
 
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Optional
 
 from core.deps import np
-from sampler.wav import read_wav, resample_linear, adapt_channels
+from core.midi import NOTE_OFF, NOTE_ON, raw_bytes
+from sampler.cache import DecodedSample, load_sample
+from sampler.loop import LOOP_RELEASE_SECONDS, MIN_LOOP_FRAMES, wrap_position, wrap_positions
+from sampler.mipmap import MipmapSet
+from sampler.storage import DEFAULT_STORAGE, INT16_SCALE, resolve_storage, to_storage
+from sampler.resample import (
+    DEFAULT_IMPORT_QUALITY,
+    DEFAULT_PLAYBACK_QUALITY,
+    bank_for_step,
+    resolve_quality,
+    sinc_gather,
+)
 
 
 class WavSamplerPlugin:
@@ -26,15 +43,32 @@ class WavSamplerPlugin:
         output_channels: int,
         root_note: int = 60,
         max_voices: int = 32,
+        quality: str = DEFAULT_PLAYBACK_QUALITY,
+        mipmaps: bool = False,
+        decoded: Optional[DecodedSample] = None,
+        storage: str = DEFAULT_STORAGE,
+        import_quality: str = DEFAULT_IMPORT_QUALITY,
+        loop: Optional[tuple[int, int]] = None,
     ):
         self.path_to_plugin_file = path
         self.output_channels = output_channels
         self.root_note = int(root_note)
         self.max_voices = max(1, int(max_voices))
+        self.quality = quality
 
-        self._sample = sample.astype(np.float32)
+        self._storage = resolve_storage(storage)
+        self._import_quality = import_quality
+        self._decoded = decoded
+        if decoded is not None:
+            self._sample = decoded.audio
+            self._loop = decoded.loop
+        else:
+            self._sample = to_storage(sample, self._storage)
+            self._loop = tuple(loop) if loop is not None else None
         self._frames = int(self._sample.shape[1])
         self._voices: list[dict[str, float | int]] = []
+        self._mipmaps: Optional[MipmapSet] = None
+        self.mipmaps = mipmaps
 
     @classmethod
     def from_file(
@@ -44,34 +78,123 @@ class WavSamplerPlugin:
         output_channels: int,
         root_note: int = 60,
         max_voices: int = 32,
+        quality: str = DEFAULT_PLAYBACK_QUALITY,
+        import_quality: str = DEFAULT_IMPORT_QUALITY,
+        mipmaps: bool = False,
+        storage: str = DEFAULT_STORAGE,
     ) -> "WavSamplerPlugin":
         path = Path(wav_path).expanduser()
         if not path.exists() or not path.is_file():
             raise FileNotFoundError(f"WAV not found: {path}")
 
-        audio, src_rate = read_wav(path)
-        audio = resample_linear(audio, src_rate, target_sample_rate)
-        audio = adapt_channels(audio, output_channels)
+        decoded = load_sample(path, target_sample_rate, output_channels,
+                              import_quality, storage)
 
         return cls(
             path=str(path),
-            sample=audio,
+            sample=decoded.audio,
             output_channels=output_channels,
             root_note=root_note,
             max_voices=max_voices,
+            quality=quality,
+            mipmaps=mipmaps,
+            decoded=decoded,
+            storage=storage,
+            import_quality=import_quality,
         )
 
-    def send_midi(self, msg):
-        """Handle note_on messages by spawning a one-shot sample voice."""
-        msg_type = getattr(msg, "type", "")
-        if msg_type != "note_on":
+    @property
+    def quality(self) -> str:
+        """Realtime interpolation preset (see ``sampler.resample``)."""
+        return self._quality_name
+
+    @quality.setter
+    def quality(self, value: str):
+        preset = resolve_quality(value)
+        self._quality_name = value.strip().lower()
+        self._quality = preset
+
+    @property
+    def mipmaps(self) -> bool:
+        """Whether pitched-up notes read from pre-decimated octave tables."""
+        return self._mipmaps is not None
+
+    @mipmaps.setter
+    def mipmaps(self, enabled: bool):
+        if not enabled:
+            self._mipmaps = None
             return
+        if self._mipmaps is None:
+            if self._decoded is not None:
+                self._mipmaps = self._decoded.mipmaps()
+            else:
+                self._mipmaps = MipmapSet(self._sample).start()
+
+    @property
+    def storage(self) -> str:
+        """Requested in-memory storage mode (see ``sampler.storage``)."""
+        return self._storage
+
+    @storage.setter
+    def storage(self, value: str):
+        storage = resolve_storage(value)
+        if storage == self._storage:
+            return
+        self._storage = storage
+        if self._decoded is not None:
+            decoded = load_sample(Path(self._decoded.path), self._decoded.sample_rate,
+                                  self.output_channels, self._import_quality, storage)
+            sample = decoded.audio
+        else:
+            decoded, sample = None, to_storage(self._sample, storage)
+        mipmaps = self.mipmaps
+        self._mipmaps = None
+        # Reference swaps are atomic; the render thread sees old or new.
+        self._decoded = decoded
+        self._sample = sample
+        if decoded is not None:
+            self._loop = decoded.loop
+        self.mipmaps = mipmaps
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held by this slot's sample data (shared buffers included)."""
+        total = int(self._sample.nbytes)
+        if self._mipmaps is not None:
+            total += self._mipmaps.nbytes
+        return total
+
+    @property
+    def sample_dtype(self) -> str:
+        return str(self._sample.dtype)
 
-        velocity = int(getattr(msg, "velocity", 0))
-        if velocity <= 0:
+    @property
+    def loop(self) -> Optional[tuple[int, int]]:
+        """Sustain loop as ``(start, end)`` engine-rate frames, or None."""
+        return self._loop
+
+    def send_midi(self, msg, offset: int = 0):
+        """Play a message object (mido or alike); see ``send_raw``."""
+        self.send_raw(raw_bytes(msg), offset)
+
+    def send_raw(self, data, offset: int = 0):
+        """Spawn a voice on note-on; note-off releases looping voices.
+
+        *data* is the raw ``(status, data1[, data2])`` of a channel
+        message; anything but notes is ignored.  *offset* delays the voice
+        start by that many frames into the next block, for sample-accurate
+        sequencing.  Releases apply at once.
+        """
+        if len(data) < 3:
+            return
+        kind = data[0] & 0xF0
+        note, velocity = data[1], data[2]
+        if kind == NOTE_OFF or (kind == NOTE_ON and velocity == 0):
+            self._release_note(note)
+            return
+        if kind != NOTE_ON:
             return
 
-        note = int(getattr(msg, "note", self.root_note))
         semitones = note - self.root_note
         rate = float(2.0 ** (semitones / 12.0))
 
@@ -83,50 +206,145 @@ class WavSamplerPlugin:
             "rate": rate,
             "gain": max(0.0, min(1.0, velocity / 127.0)),
             "note": note,
+            "held": True,
+            "delay": max(0, int(offset)),
         })
 
+    def _release_note(self, note: int):
+        for voice in self._voices:
+            if voice["note"] == note:
+                voice["held"] = False
+
     def process(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
         """Render active voices into an output block (channels, frames)."""
-        del sample_rate
-
         frames = int(audio.shape[1])
         out = np.zeros((self.output_channels, frames), dtype=np.float32)
 
-        if frames <= 0 or self._frames <= 0 or not self._voices:
+        if frames <= 0 or not self._voices:
             return out
 
         block_positions = np.arange(frames, dtype=np.float32)
+        release_frames = max(1.0, LOOP_RELEASE_SECONDS * sample_rate)
         alive: list[dict[str, float | int]] = []
 
         for voice in self._voices:
+            source = self._voice_source(voice)
+            if source is None:
+                # Sample still decoding; the voice starts once it is ready.
+                alive.append(voice)
+                continue
+            if source is False:
+                continue
+            sample, mipmaps, loop = source
+            total = int(sample.shape[1])
+
             start = float(voice["position"])
             rate = float(voice["rate"])
             gain = float(voice["gain"])
 
-            if start >= self._frames:
+            if start >= total:
                 continue
 
-            positions = start + (block_positions * rate)
-            valid = positions < self._frames
-            sample_count = int(valid.sum())
-            if sample_count <= 0:
+            delay = int(voice.get("delay", 0))
+            if delay >= frames:
+                voice["delay"] = delay - frames
+                alive.append(voice)
                 continue
+            voice["delay"] = 0
+            span = frames - delay
 
-            pos = positions[:sample_count]
-            idx0 = np.floor(pos).astype(np.int64)
-            idx1 = np.minimum(idx0 + 1, self._frames - 1)
-            frac = pos - idx0
+            looping = loop is not None and (voice.get("held", False) or "fade" in voice)
+            if loop is not None and not looping and total - loop[1] < release_frames:
+                # No tail to play after the loop: keep looping and fade out.
+                voice["fade"] = release_frames
+                looping = True
 
-            left = self._sample[:, idx0]
-            right = self._sample[:, idx1]
-            rendered = left * (1.0 - frac) + right * frac
+            positions = start + (block_positions[:span] * rate)
+            if looping:
+                positions = wrap_positions(positions, loop[0], loop[1])
+                sample_count = span
+            else:
+                sample_count = int((positions < total).sum())
+                if sample_count <= 0:
+                    continue
 
-            out[:, :sample_count] += rendered * gain
+            pos = positions[:sample_count]
+            table, level = sample, 0
+            if mipmaps is not None and rate > 1.0:
+                table, level = mipmaps.pick(rate)
+                if looping:
+                    while level and (loop[1] - loop[0]) >> level < MIN_LOOP_FRAMES:
+                        level -= 1
+                    table = mipmaps.levels[level]
+            wrap = None
+            if looping:
+                wrap = (loop[0] >> level, loop[1] >> level)
+            if level:
+                scale = float(1 << level)
+                rendered = self._interpolate(table, pos / scale, rate / scale, wrap)
+            else:
+                rendered = self._interpolate(table, pos, rate, wrap)
+            if table.dtype == np.int16:
+                # Only the gathered frames are converted, folded into the gain.
+                gain *= INT16_SCALE
+            if "fade" in voice:
+                fade = float(voice["fade"])
+                envelope = np.clip((fade - block_positions[:sample_count]) / release_frames,
+                                   0.0, 1.0)
+                rendered = rendered * envelope
+                voice["fade"] = fade - span
+            out[:, delay:delay + sample_count] += rendered * gain
+            if voice.get("fade", 1.0) <= 0:
+                continue
 
-            next_pos = start + (frames * rate)
-            if next_pos < self._frames:
+            next_pos = start + (span * rate)
+            if looping:
+                voice["position"] = wrap_position(next_pos, loop[0], loop[1])
+                alive.append(voice)
+            elif next_pos < total:
                 voice["position"] = next_pos
                 alive.append(voice)
 
         self._voices = alive
         return out
+
+    def _voice_source(self, voice: dict):
+        """Return ``(sample, mipmaps, loop)`` for *voice*.
+
+        Subclasses may return ``None`` to hold a voice until its sample is
+        decoded, or ``False`` to drop it.
+        """
+        del voice
+        if self._frames <= 0:
+            return False
+        return self._sample, self._mipmaps, self._loop
+
+    def _interpolate(
+        self,
+        source: np.ndarray,
+        pos: np.ndarray,
+        rate: float,
+        wrap: Optional[tuple[int, int]] = None,
+    ) -> np.ndarray:
+        """Read *source* at fractional positions using the slot's quality.
+
+        With *wrap* ``(start, end)``, frames read at or past *end* come from
+        the loop start instead.  The result is in *source* units: int16
+        tables are scaled by the caller.
+        """
+        quality = self._quality
+        if quality is None:
+            last = source.shape[1] - 1
+            idx0 = np.minimum(np.floor(pos).astype(np.int64), last)
+            idx1 = idx0 + 1
+            if wrap is not None:
+                idx1 -= (wrap[1] - wrap[0]) * (idx1 >= wrap[1])
+            idx1 = np.minimum(idx1, last)
+            frac = pos - idx0
+
+            left = source[:, idx0]
+            right = source[:, idx1]
+            return left * (1.0 - frac) + right * frac
+
+        bank = bank_for_step(quality, rate)
+        return sinc_gather(source, pos, bank, quality.phases, wrap)
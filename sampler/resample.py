@@ -0,0 +1,162 @@
+"""Windowed-sinc polyphase resampling with cached filter banks.
+
+A filter bank holds one Kaiser-windowed sinc kernel per fractional phase
+(``phases + 1`` rows so phase 1.0 is exact).  Every read position is split
+into an integer frame index and a phase row; the output is the dot product
+of the surrounding ``2 * half_taps`` frames with that row.  Banks only
+depend on (taps, phases, cutoff, beta) so they are built once and shared
+by every import conversion and every playing voice.
+
+Quality presets trade CPU for aliasing rejection:
+
+  linear  -- two-point interpolation (original behaviour, cheapest)
+  medium  -- 16-tap sinc, good for realtime pitch playback on a Pi
+  high    -- 48-tap sinc, used for load-time sample-rate conversion
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from core.deps import np
+from sampler.wav import resample_linear
+
+
+@dataclass(frozen=True)
+class SincQuality:
+    """Kernel shape for one quality preset."""
+    half_taps: int   # taps on each side of the read position
+    rolloff: float   # passband edge as a fraction of the target Nyquist
+    beta: float      # Kaiser window shape
+    phases: int      # fractional phase resolution
+
+
+RESAMPLE_QUALITIES: dict[str, SincQuality | None] = {
+    "linear": None,
+    "medium": SincQuality(half_taps=8, rolloff=0.90, beta=6.0, phases=128),
+    "high": SincQuality(half_taps=24, rolloff=0.95, beta=8.6, phases=512),
+}
+
+DEFAULT_IMPORT_QUALITY = "high"
+DEFAULT_PLAYBACK_QUALITY = "linear"
+
+# Pitch-up lowpass cutoffs are quantised so a keyboard's worth of notes
+# shares a handful of banks instead of building one per semitone.
+_CUTOFF_STEPS = 64
+# Kernel length grows with 1/cutoff when pitching up; cap the growth so a
+# three-octave jump cannot blow up per-block CPU.
+_MAX_TAP_SCALE = 4
+# Output frames per vectorised chunk in offline conversion.
+_CHUNK_FRAMES = 8192
+
+
+def resolve_quality(name: str) -> SincQuality | None:
+    """Return the preset for *name*, raising ValueError if unknown."""
+    key = name.strip().lower()
+    if key not in RESAMPLE_QUALITIES:
+        choices = ", ".join(RESAMPLE_QUALITIES)
+        raise ValueError(f"unknown resample quality '{name}' (choose: {choices})")
+    return RESAMPLE_QUALITIES[key]
+
+
+@lru_cache(maxsize=64)
+def filter_bank(half_taps: int, phases: int, cutoff: float, beta: float) -> np.ndarray:
+    """Return a read-only (phases + 1, 2 * half_taps) float32 kernel table.
+
+    Row *p* holds the taps for a read position ``p / phases`` of a frame
+    past the integer index; tap *j* multiplies frame ``index - half_taps
+    + 1 + j``.  Each row is normalised to unity DC gain.
+    """
+    offsets = np.arange(-half_taps + 1, half_taps + 1, dtype=np.float64)
+    frac = np.arange(phases + 1, dtype=np.float64) / phases
+    t = offsets[None, :] - frac[:, None]
+
+    kernel = cutoff * np.sinc(cutoff * t)
+    window_arg = np.clip(1.0 - (t / half_taps) ** 2, 0.0, 1.0)
+    kernel *= np.i0(beta * np.sqrt(window_arg)) / np.i0(beta)
+    kernel /= kernel.sum(axis=1, keepdims=True)
+
+    bank = kernel.astype(np.float32)
+    bank.setflags(write=False)
+    return bank
+
+
+def bank_for_step(quality: SincQuality, step: float) -> np.ndarray:
+    """Return the cached bank for reading the source *step* frames per output frame.
+
+    Steps above 1.0 (downsampling or pitching up) lower the cutoff to the
+    new Nyquist and lengthen the kernel to keep the transition band sharp.
+    """
+    cutoff = quality.rolloff
+    half_taps = quality.half_taps
+    if step > 1.0:
+        quantised = max(1, math.floor(_CUTOFF_STEPS / step)) / _CUTOFF_STEPS
+        cutoff *= quantised
+        half_taps = min(
+            quality.half_taps * _MAX_TAP_SCALE,
+            int(math.ceil(quality.half_taps / quantised)),
+        )
+    return filter_bank(half_taps, quality.phases, round(cutoff, 6), quality.beta)
+
+
+def sinc_gather(
+    source: np.ndarray,
+    positions: np.ndarray,
+    bank: np.ndarray,
+    phases: int,
+    wrap: Optional[tuple[int, int]] = None,
+) -> np.ndarray:
+    """Interpolate (channels, frames) *source* at fractional *positions*.
+
+    Taps that fall outside the source are treated as silence.  With *wrap*
+    ``(start, end)``, taps at or past *end* read from the loop start.
+    """
+    frames = source.shape[1]
+    taps = bank.shape[1]
+    half_taps = taps // 2
+
+    idx = np.floor(positions).astype(np.int64)
+    phase = np.rint((positions - idx) * phases).astype(np.int64)
+    weights = bank[phase]
+
+    tap_idx = idx[:, None] + np.arange(-half_taps + 1, half_taps + 1)
+    if wrap is not None:
+        tap_idx -= (wrap[1] - wrap[0]) * (tap_idx >= wrap[1])
+    inside = (tap_idx >= 0) & (tap_idx < frames)
+    if not inside.all():
+        weights = weights * inside
+        np.clip(tap_idx, 0, frames - 1, out=tap_idx)
+
+    # np.take is several times faster than fancy indexing for this shape.
+    gathered = np.take(source, tap_idx, axis=1)  # (channels, n, taps)
+    return np.einsum("cnt,nt->cn", gathered, weights, optimize=False).astype(np.float32)
+
+
+def resample_sinc(
+    audio: np.ndarray,
+    src_rate: int,
+    dst_rate: int,
+    quality: str = DEFAULT_IMPORT_QUALITY,
+) -> np.ndarray:
+    """Resample (channels, frames) audio with a windowed-sinc polyphase filter."""
+    preset = resolve_quality(quality)
+    if preset is None:
+        return resample_linear(audio, src_rate, dst_rate)
+    if src_rate == dst_rate or audio.shape[1] <= 1:
+        return audio
+
+    src_frames = audio.shape[1]
+    dst_frames = max(1, int(round(src_frames * (dst_rate / src_rate))))
+    step = src_rate / dst_rate
+    bank = bank_for_step(preset, step)
+    source = audio.astype(np.float32, copy=False)
+
+    out = np.empty((audio.shape[0], dst_frames), dtype=np.float32)
+    for start in range(0, dst_frames, _CHUNK_FRAMES):
+        stop = min(dst_frames, start + _CHUNK_FRAMES)
+        positions = np.arange(start, stop, dtype=np.float64) * step
+        out[:, start:stop] = sinc_gather(source, positions, bank, preset.phases)
+    return out
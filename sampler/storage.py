@@ -0,0 +1,41 @@
+"""In-memory sample storage modes.
+
+  float32  -- samples held as float32 (4 bytes per sample)
+  int16    -- 8/16-bit sources held as int16 (2 bytes per sample); the
+              render loop converts only the frames it gathers for a block.
+              24/32-bit and float sources stay float32 so no resolution
+              is lost.
+"""
+
+from __future__ import annotations
+
+from core.deps import np
+
+STORAGE_MODES = ("float32", "int16")
+DEFAULT_STORAGE = "float32"
+INT16_SCALE = 1.0 / 32768.0
+
+
+def resolve_storage(name: str) -> str:
+    """Validate and normalise a storage mode name."""
+    key = str(name).strip().lower()
+    if key not in STORAGE_MODES:
+        raise ValueError(f"unknown sample storage '{name}' (use {', '.join(STORAGE_MODES)})")
+    return key
+
+
+def to_storage(audio: np.ndarray, storage: str) -> np.ndarray:
+    """Convert float audio in [-1, 1] to *storage*; int16 input passes through."""
+    if storage == "int16":
+        if audio.dtype == np.int16:
+            return audio
+        scaled = np.rint(np.asarray(audio, dtype=np.float32) * 32768.0)
+        return np.clip(scaled, -32768, 32767).astype(np.int16)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) * np.float32(INT16_SCALE)
+    return audio.astype(np.float32, copy=False)
+
+
+def as_float(audio: np.ndarray) -> np.ndarray:
+    """Float32 view of stored audio (converting int16 storage)."""
+    return to_storage(audio, "float32")
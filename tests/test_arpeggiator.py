@@ -0,0 +1,166 @@
+"""Tests for the per-slot arpeggiator."""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import deps  # noqa: E402
+from core.arpeggiator import RANDOM_STEPS, Arpeggiator, ArpRouter  # noqa: E402
+from core.midi import NOTE_OFF, NOTE_ON, raw_bytes  # noqa: E402
+from core.scheduler import MidiScheduler  # noqa: E402
+from core.sequencer import Sequencer  # noqa: E402
+from test_sequencer import _FakeEngine, _FakeLink  # noqa: E402
+
+SIXTEENTH = 6000  # frames at 120 BPM
+
+
+def _host(clock: str = "audio") -> SimpleNamespace:
+    host = SimpleNamespace(engine=_FakeEngine(), link=_FakeLink(), scheduler=MidiScheduler())
+    host.sequencer = Sequencer(host)
+    host.sequencer.set_clock(clock)
+    host.arpeggiators = ArpRouter(host)
+    return host
+
+
+class ArpPatternTests(unittest.TestCase):
+    def test_modes_order_the_held_keys(self) -> None:
+        arp = Arpeggiator(held={67: 90, 60: 100, 64: 110})
+        rng = random.Random(1)
+        expected = {"up": [60, 64, 67], "down": [67, 64, 60], "order": [67, 60, 64]}
+        for mode, notes in expected.items():
+            with self.subTest(mode=mode):
+                arp.mode = mode
+                self.assertEqual([n for n, _ in arp.order(rng)], notes)
+        arp.mode = "random"
+        notes = [n for n, _ in arp.order(rng)]
+        self.assertEqual(len(notes), RANDOM_STEPS)
+        self.assertLessEqual(set(notes), {60, 64, 67})
+
+    def test_pattern_is_rotated_to_start_on_the_given_step(self) -> None:
+        arp = Arpeggiator(held={60: 100, 64: 100, 67: 100}, rate=16, gate=0.5)
+        pattern = arp.compile(5 * 240, random.Random())
+        self.assertEqual(pattern.length, 720)
+        self.assertEqual(pattern.ticks, (0, 240, 480))
+        # Step 5 of the timeline is 5 % 3 == 2 steps into the loop: note 0 there.
+        self.assertEqual(pattern.notes, (64, 67, 60))
+        self.assertEqual(pattern.durations, (120, 120, 120))
+
+
+@unittest.skipIf(deps.mido is None, "mido not installed")
+class ArpRoutingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.host = _host()
+        self.arps = self.host.arpeggiators
+
+    def tearDown(self) -> None:
+        self.host.sequencer.stop()
+        self.host.scheduler.stop(flush=False)
+
+    def _send(self, slot: int, kind: str, **kw) -> None:
+        self.arps.enqueue(slot, deps.mido.Message(kind, **kw))
+
+    def _ons(self, blocks: int) -> list[tuple[int, int, int]]:
+        out = []
+        for block in range(blocks):
+            for slot, msg, offset in self.host.sequencer._render_block(block * 500, 500):
+                if msg[0] == NOTE_ON:
+                    out.append((block * 500 + offset, msg[1], slot))
+        return out
+
+    def test_held_chord_plays_one_note_per_step_on_the_sequencer_clock(self) -> None:
+        self.arps.configure(1, mode="up")
+        for note in (67, 60, 64):
+            self._send(1, "note_on", note=note, velocity=100)
+        self._send(1, "control_change", control=1, value=64)
+        self.assertEqual([(s, m.type) for s, m in self.host.engine.queued],
+                         [(1, "control_change")])  # only the CC reached the engine
+        self.assertEqual(self.host.engine.sources, [self.host.sequencer._render_block])
+
+        ons = self._ons(48)  # one bar of 500-frame blocks
+        self.assertEqual(ons[:4], [(0, 60, 1), (SIXTEENTH, 64, 1),
+                                   (2 * SIXTEENTH, 67, 1), (3 * SIXTEENTH, 60, 1)])
+
+        self._send(1, "note_off", note=60)
+        self._send(1, "note_off", note=64)
+        self._send(1, "note_off", note=67)
+        self.assertEqual(self.host.sequencer._arps, {})
+
+    def test_arps_play_alongside_song_parts_and_other_slots_pass_through(self) -> None:
+        seq = self.host.sequencer
+        seq.set_bank(0, ["c2"] * 2)
+        seq.banks[0].linked_slot = 0
+        seq.set_song([([0], 1)])
+        seq.song_play(0)
+        self.arps.configure(3, mode="order", rate="1/4", gate=0.5)
+        self._send(3, "note_on", note=72, velocity=80)
+        self._send(5, "note_on", note=50, velocity=80)
+        self.assertEqual([(s, m.note) for s, m in self.host.engine.queued], [(5, 50)])
+        ons = self._ons(192)  # one bar
+        self.assertEqual([(f, n) for f, n, s in ons if s == 3],
+                         [(0, 72), (24000, 72), (48000, 72), (72000, 72)])
+        self.assertEqual([(f, n) for f, n, s in ons if s == 0], [(0, 36), (48000, 36)])
+
+    def test_disable_and_session_round_trip(self) -> None:
+        self.arps.configure(2, mode="down", rate=8, gate=0.3)
+        self._send(2, "note_on", note=60, velocity=100)
+        self.assertIn(2, self.host.sequencer._arps)
+        data = self.arps.snapshot()
+        self.assertEqual(data, {"3": {"mode": "down", "rate": 8, "gate": 0.3}})
+        self.arps.disable(2)
+        self.assertEqual(self.host.sequencer._arps, {})
+        self.assertEqual(self.host.engine.sources, [])  # nothing routed: clock stopped
+        self._send(2, "note_on", note=62, velocity=100)
+        self.assertEqual(self.host.engine.queued[-1][1].note, 62)
+
+        for bad in ({"mode": "sideways"}, {"rate": "fit"}, {"gate": 0}):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                self.arps.configure(0, **bad)
+        errors = self.arps.restore({**data, "12": {"mode": "up"}})
+        self.assertEqual(self.arps.snapshot(), data)
+        self.assertEqual(len(errors), 1)
+
+
+@unittest.skipIf(deps.mido is None, "mido not installed")
+class ArpThreadClockTests(unittest.TestCase):
+    def test_chords_neither_restart_the_playback_thread_nor_its_timebase(self) -> None:
+        host = _host("thread")
+        host.link.bpm = 960.0  # a sixteenth every ~15.6 ms
+        seq, arps = host.sequencer, host.arpeggiators
+        try:
+            arps.configure(0, mode="up")
+            thread = seq._thread
+            self.assertIsNotNone(thread)
+            beat = seq.timebase_beat()
+            for chord in ((60, 64), (62, 65)):
+                for note in chord:
+                    arps.enqueue(0, (NOTE_ON, note, 100))
+                deadline = time.monotonic() + 2.0
+                while (chord[0] not in [raw_bytes(m)[1] for _, m in host.engine.queued]
+                       and time.monotonic() < deadline):
+                    time.sleep(0.005)
+                for note in chord:
+                    arps.enqueue(0, (NOTE_OFF, note, 0))
+                self.assertIs(seq._thread, thread)
+                self.assertGreater(seq.timebase_beat(), beat)  # never back to 0
+                beat = seq.timebase_beat()
+            self.assertEqual(seq._arps, {})
+            arps.disable(0)
+            self.assertIsNone(seq._thread)
+        finally:
+            seq.stop()
+            host.scheduler.stop(flush=False)
+        ons = {raw_bytes(m)[1] for _, m in host.engine.queued if raw_bytes(m)[0] == NOTE_ON}
+        self.assertLessEqual({60, 62}, ons)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests for the MIDI capture ring buffer and its .mid export."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import deps  # noqa: E402
+from core.capture import MidiCapture, write_midi_file  # noqa: E402
+from core.engine import AudioEngine  # noqa: E402
+
+
+class MidiCaptureTests(unittest.TestCase):
+    def test_full_buffer_keeps_the_newest_events_and_counts_overflow(self) -> None:
+        capture = MidiCapture(4)
+        for note in range(6):
+            capture.record(note % 2, (0x90, 60 + note, 100), at_ns=note)
+        self.assertEqual(capture.stats(), {"enabled": True, "capacity": 4,
+                                           "events": 4, "overflow": 2})
+        self.assertEqual([(at, slot, data[1]) for at, slot, data in capture.events()],
+                         [(2, 0, 62), (3, 1, 63), (4, 0, 64), (5, 1, 65)])
+        capture.clear()
+        self.assertEqual(capture.events(), [])
+        with self.assertRaises(ValueError):
+            MidiCapture(0)
+
+    def test_two_byte_and_system_messages(self) -> None:
+        capture = MidiCapture(8)
+        capture.record(2, (0xC1, 5), at_ns=1)
+        capture.record(2, (0xE0, 0, 64), at_ns=2)
+        capture.record(2, (0xF8,), at_ns=3)
+        capture.record(2, (0xF0, 1, 2), at_ns=4)
+        self.assertEqual(capture.events(), [(1, 2, (0xC1, 5)), (2, 2, (0xE0, 0, 64))])
+
+    def test_events_for_unpackable_slots_are_dropped(self) -> None:
+        capture = MidiCapture(8)
+        capture.record(-1, (0x90, 36, 100), at_ns=1)
+        capture.record(256, (0x90, 36, 100), at_ns=2)
+        capture.record(7, (0x90, 36, 100), at_ns=3)
+        self.assertEqual(capture.events(), [(3, 7, (0x90, 36, 100))])
+        self.assertEqual(capture.written, 1)
+
+    @unittest.skipUnless(deps.HAS_MIDO, "mido not installed")
+    def test_export_writes_one_track_per_slot_at_the_tempo(self) -> None:
+        capture = MidiCapture()
+        capture.record(0, deps.mido.Message("note_on", note=60, velocity=90), at_ns=1_000)
+        capture.record(3, (0x91, 64, 80), at_ns=1_000 + 250_000_000)
+        capture.record(0, (0x80, 60, 0), at_ns=1_000 + 500_000_000)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "take.mid"
+            self.assertEqual(write_midi_file(path, capture.events(), 120.0, {0: "Piano"}), 2)
+            midi = deps.mido.MidiFile(path)
+        self.assertEqual((midi.type, len(midi.tracks)), (1, 3))
+        tempo = [m.tempo for m in midi.tracks[0] if m.type == "set_tempo"]
+        self.assertEqual(tempo, [500_000])
+        piano = [(m.type, m.time) for m in midi.tracks[1] if not m.is_meta]
+        self.assertEqual(piano, [("note_on", 0), ("note_off", 480)])
+        self.assertEqual(midi.tracks[1].name, "Slot 1: Piano")
+        self.assertEqual([m.time for m in midi.tracks[2] if not m.is_meta], [240])
+
+    def test_engine_captures_queued_midi(self) -> None:
+        engine = AudioEngine()
+        try:
+            engine.enqueue_midi(1, (0x90, 60, 100))
+            engine.capture.enabled = False
+            engine.enqueue_midi(1, (0x80, 60, 0))
+            self.assertEqual([(slot, data) for _, slot, data in engine.capture.events()],
+                             [(1, (0x90, 60, 100))])
+        finally:
+            engine.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
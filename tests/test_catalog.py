@@ -0,0 +1,105 @@
+"""Sample catalog index tests."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import catalog as catalog_module  # noqa: E402
+from core.catalog import CATALOG_INDEX_NAME, PEAK_BINS, SampleCatalog  # noqa: E402
+
+
+def _write_wav(path: Path, frames: int = 4410, rate: int = 44100, channels: int = 1) -> None:
+    data = bytearray()
+    for i in range(frames):
+        value = 16000 if (i // 50) % 2 else -8000
+        data += value.to_bytes(2, "little", signed=True) * channels
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(bytes(data))
+
+
+class SampleCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "808").mkdir()
+        _write_wav(self.root / "808" / "kick.wav")
+        _write_wav(self.root / "808" / "snare.wav", frames=22050, rate=22050, channels=2)
+        (self.root / "808" / "notes.txt").write_text("not a wav")
+        (self.root / ".hidden").mkdir()
+        _write_wav(self.root / ".hidden" / "secret.wav")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_indexes_metadata_and_peaks(self) -> None:
+        catalog = SampleCatalog(self.root)
+        self.assertTrue(catalog.refresh())
+
+        self.assertEqual(catalog.packs(), ["808"])
+        self.assertEqual(catalog.samples("808"), ["kick", "snare"])
+        snare = catalog.entries("808")[1]
+        self.assertEqual(snare["sample_rate"], 22050)
+        self.assertEqual(snare["channels"], 2)
+        self.assertEqual(snare["duration"], 1.0)
+        self.assertNotIn("peaks", snare)
+
+        peaks = catalog.entry("808", "kick")["peaks"]
+        self.assertEqual(len(peaks["min"]), PEAK_BINS)
+        self.assertAlmostEqual(max(peaks["max"]), 16000 / 32768, places=3)
+        self.assertAlmostEqual(min(peaks["min"]), -8000 / 32768, places=3)
+
+    def test_refresh_is_incremental_and_persisted(self) -> None:
+        catalog = SampleCatalog(self.root)
+        catalog.refresh()
+        self.assertTrue((self.root / CATALOG_INDEX_NAME).is_file())
+
+        with mock.patch.object(catalog_module, "_scan_wav", wraps=catalog_module._scan_wav) as scan:
+            self.assertFalse(catalog.refresh(full=True))
+            # A fresh process reads the saved index instead of decoding again.
+            self.assertFalse(SampleCatalog(self.root).refresh(full=True))
+            self.assertEqual(scan.call_count, 0)
+
+            _write_wav(self.root / "808" / "clap.wav")
+            self.assertTrue(catalog.refresh())
+            self.assertEqual(scan.call_count, 1)
+
+            stat = (self.root / "808" / "kick.wav").stat()
+            _write_wav(self.root / "808" / "kick.wav", frames=100)
+            os.utime(self.root / "808" / "kick.wav", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertTrue(catalog.refresh(full=True))
+            self.assertEqual(scan.call_count, 2)
+            self.assertEqual(catalog.entry("808", "kick")["frames"], 100)
+
+        (self.root / "808" / "snare.wav").unlink()
+        catalog.refresh()
+        self.assertEqual(catalog.samples("808"), ["clap", "kick"])
+
+    def test_unreadable_wav_is_listed_without_metadata(self) -> None:
+        (self.root / "808" / "broken.wav").write_bytes(b"")
+        catalog = SampleCatalog(self.root)
+        catalog.refresh()
+
+        self.assertEqual(catalog.entries("808")[0], {"name": "broken", "filename": "broken.wav"})
+        self.assertIn("error", catalog.entry("808", "broken"))
+
+    def test_missing_root_yields_empty_catalog(self) -> None:
+        catalog = SampleCatalog(self.root / "missing")
+        self.assertFalse(catalog.refresh())
+        self.assertEqual(catalog.packs(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Tests for control-surface maps, MIDI learn and the MIDI Mix layout."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.akai_midimix import MidiMixController, default_control_map  # noqa: E402
+from controllers.control_map import (  # noqa: E402
+    ControlMap, ControlMaps, make_target, parse_target, target_from_dict,
+)
+from controllers.midi_input import MidiInputController  # noqa: E402
+from core.routing import compile_routes  # noqa: E402
+
+
+def _param(lo: float, hi: float):
+    return SimpleNamespace(range=(lo, hi))
+
+
+def _maps(engine) -> ControlMaps:
+    maps = ControlMaps(engine)
+    maps.add_surface("input", ControlMap("input"))
+    return maps
+
+
+def _engine():
+    plugin = SimpleNamespace(parameters={"cutoff": _param(20.0, 20000.0),
+                                         "resonance": _param(0.0, 1.0)})
+    slot = SimpleNamespace(name="Keys", plugin=plugin, gain=0.8, muted=False, solo=False)
+    engine = SimpleNamespace(slots=[slot] + [None] * 7, master_gain=1.0, changes=[],
+                             sent=[], routes=compile_routes({0: 0}, []))
+    engine.enqueue_param_change = lambda slot, name, value: engine.changes.append(
+        (slot, name, value))
+    engine.enqueue_midi = lambda slot, msg: engine.sent.append((slot, msg))
+    return engine
+
+
+class MidiMixMapTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = _engine()
+        self.maps = _maps(self.engine)
+        self.maps.params.build(0)
+        self.mix = MidiMixController(self.engine, self.maps)
+
+    def test_stock_layout_drives_faders_knobs_and_buttons(self) -> None:
+        for raw in ([0xB0, 19, 127], [0xB0, 62, 0], [0xB0, 17, 127], [0xB0, 18, 0],
+                    [0x90, 1, 127], [0x80, 1, 0], [0x90, 3, 127], [0xB0, 90, 1]):
+            self.mix.on_midi((raw, 0.0))
+        slot = self.engine.slots[0]
+        self.assertEqual((slot.gain, self.engine.master_gain), (1.0, 0.0))
+        # knob 3 has no third parameter; knob 2 is resonance, at its maximum
+        self.assertEqual(self.engine.changes, [(0, "resonance", 1.0)])
+        self.assertEqual((slot.muted, slot.solo), (True, True))
+        self.assertEqual((self.mix.leds.value(0x90, 1), self.mix.leds.value(0x90, 3)), (127, 127))
+        self.assertIsNone(self.mix.leds.value(0x90, 4))
+
+    def test_learn_binds_the_touched_control_to_a_named_param(self) -> None:
+        self.maps.create("live", "midimix")
+        self.maps.use("midimix", "live")
+        self.maps.learn("midimix")
+        self.mix.on_midi(([0xB0, 16, 64], 0.0))
+        self.assertEqual(self.engine.changes, [])  # captured, not applied
+        self.assertEqual(self.maps.bind_learned("midimix", parse_target(["param", "1", "cutoff"])),
+                         ("cc", 16))
+        self.mix.on_midi(([0xB0, 16, 127], 0.0))
+        self.assertEqual(self.engine.changes, [(0, "cutoff", 20000.0)])
+        self.assertEqual(self.maps.presets["midimix"].cc[16].kind, "knob")  # the copy changed
+        with self.assertRaises(ValueError):
+            self.maps.delete("live")
+
+
+class InputMapTests(unittest.TestCase):
+    def test_mapped_ccs_drive_targets_and_the_rest_reach_the_slot(self) -> None:
+        engine = _engine()
+        maps = _maps(engine)
+        maps.add_surface("midimix", default_control_map())
+        maps.params.build(0)
+        maps.bind("input", "cc", 74, make_target("param", 0, param="cutoff"))
+        controller = MidiInputController(engine, mapper=maps.mapper("input"))
+        for raw in ([0xB3, 74, 0], [0xB0, 1, 64], [0x90, 60, 100]):
+            controller.on_midi((raw, 0.0))
+        self.assertEqual(engine.changes, [(0, "cutoff", 20.0)])
+        self.assertEqual(engine.sent, [(0, (0xB0, 1, 64)), (0, (0x90, 60, 100))])
+
+    def test_presets_round_trip_through_snapshots(self) -> None:
+        engine = _engine()
+        maps = _maps(engine)
+        maps.add_surface("midimix", default_control_map())
+        maps.create("pads")
+        maps.bind("pads", "note", 36, make_target("solo", 3))
+        maps.use("input", "pads")
+        snapshot = maps.snapshot()
+        self.assertEqual(snapshot["presets"]["pads"], {"cc": {}, "note": {
+            "36": {"target": "solo", "slot": 4}}})
+
+        restored = _maps(engine)
+        snapshot["presets"]["bad"] = {"cc": {"7": {"target": "gain", "slot": 9}}}
+        errors = restored.restore(snapshot)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(restored.active(), {"input": "pads"})
+        self.assertIsNotNone(restored.mapper("input").note[36])
+        # A surface opened after the restore gets the map chosen for it.
+        self.assertEqual(len(restored.add_surface("midimix", default_control_map()).cc), 128)
+        self.assertEqual(restored.active(), {"input": "pads", "midimix": "midimix"})
+        for data in ({"target": "knob", "slot": 1}, {"target": "param", "slot": 1},
+                     {"target": "fader", "slot": 1}):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                target_from_dict(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
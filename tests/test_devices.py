@@ -0,0 +1,185 @@
+"""Tests for cached port lists, the device monitor and non-blocking restores."""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import deps, session  # noqa: E402
+from core import host as host_module  # noqa: E402
+from core.devices import DeviceMonitor, PortCache, Watch  # noqa: E402
+from core.host import VcpiCore  # noqa: E402
+
+
+class _FakeDevice:
+    def __init__(self) -> None:
+        self.port: str | None = None
+        self.opened: list[str] = []
+        self.fail: str | None = None
+
+    def open(self, name: str) -> None:
+        if self.fail:
+            raise RuntimeError(self.fail)
+        self.port = name
+        self.opened.append(name)
+
+    def close(self) -> None:
+        self.port = None
+
+
+class PortCacheTests(unittest.TestCase):
+    def test_lists_are_enumerated_once_per_max_age(self) -> None:
+        now = [0.0]
+        calls: list[str] = []
+        cache = PortCache({"midi_in": lambda: calls.append("in") or ["A"]}, max_age=1.0,
+                          clock=lambda: now[0])
+        self.assertEqual(cache.get("midi_in"), ["A"])
+        now[0] = 0.9
+        cache.get("midi_in")
+        now[0] = 2.0
+        cache.get("midi_in")
+        self.assertEqual(calls, ["in", "in"])
+        with self.assertRaises(ValueError):
+            cache.get("nope")
+
+
+class DeviceMonitorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ports: list[str] = []
+        self.monitor = DeviceMonitor(PortCache({"midi_in": lambda: list(self.ports)}),
+                                     VcpiCore._match_port)
+        self.monitor.start = lambda: None  # poll by hand
+        self.device = _FakeDevice()
+        self.monitor.watch(Watch("midimix_in", "MIDI Mix in", "midi_in",
+                                 "MIDI Mix:MIDI Mix MIDI 1 20:0", self.device.open,
+                                 self.device.close, lambda: self.device.port is not None))
+
+    def _events(self) -> list[str]:
+        return [e.event for e in self.monitor.events()]
+
+    def test_unplug_closes_and_replug_reopens_by_fuzzy_name(self) -> None:
+        self.monitor.poll()
+        self.assertEqual(self.device.opened, [])
+        self.ports[:] = ["Keyboard 24:0", "MIDI Mix:MIDI Mix MIDI 1 28:0"]
+        self.monitor.poll()
+        self.assertEqual(self.device.port, "MIDI Mix:MIDI Mix MIDI 1 28:0")
+        self.ports[:] = ["Keyboard 24:0"]
+        self.monitor.poll()
+        self.assertIsNone(self.device.port)
+        self.assertEqual(self.monitor.waiting(), {"midimix_in": "MIDI Mix:MIDI Mix MIDI 1 20:0"})
+        self.ports.append("MIDI Mix:MIDI Mix MIDI 1 32:0")
+        self.monitor.poll()
+        self.assertEqual(self._events(), ["waiting", "connected", "disconnected", "connected"])
+        self.assertEqual(self.monitor.waiting(), {})
+
+    def test_failed_open_is_retried_when_the_ports_change(self) -> None:
+        self.device.fail = "port busy"
+        self.ports[:] = ["MIDI Mix:MIDI Mix MIDI 1 20:0"]
+        self.monitor.poll()
+        self.monitor.poll()
+        self.assertEqual(self._events(), ["waiting", "failed"])
+        self.device.fail = None
+        self.monitor.poll()  # same ports: not retried
+        self.assertEqual(self.device.opened, [])
+        self.ports.append("Keyboard 24:0")
+        self.monitor.poll()
+        self.assertEqual(self.device.opened, ["MIDI Mix:MIDI Mix MIDI 1 20:0"])
+
+    def test_forgotten_watch_is_left_alone(self) -> None:
+        self.monitor.unwatch("midimix_in")
+        self.ports[:] = ["MIDI Mix:MIDI Mix MIDI 1 20:0"]
+        self.monitor.poll()
+        self.assertEqual(self.device.opened, [])
+
+
+class HostReconnectTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ports: list[str] = []
+        with mock.patch.object(host_module, "list_midi_input_ports", lambda: list(self.ports)):
+            self.host = VcpiCore()
+        self.addCleanup(self.host.engine.shutdown)
+        self.host.devices.start = lambda: None  # poll by hand
+
+    def test_reopening_from_a_watch_holds_the_device_lock_and_keeps_the_watch(self) -> None:
+        host = self.host
+        lock_free: list[bool] = []
+
+        def fake_open(index: int) -> str:
+            probe = threading.Thread(target=lambda: lock_free.append(
+                host._device_lock.acquire(blocking=False)))
+            probe.start()
+            probe.join()
+            host.midimix._in_port._name = self.ports[index]
+            return self.ports[index]
+
+        host.midimix.open_input = fake_open
+        with mock.patch.object(deps, "HAS_RTMIDI", True):
+            watch = host.watch_device("midimix_in", "MIDI Mix:MIDI Mix MIDI 1 20:0")
+            self.ports[:] = ["MIDI Mix:MIDI Mix MIDI 1 28:0"]
+            host.devices.poll()
+            host.devices.poll()
+        self.assertEqual(lock_free, [False])  # a command would have waited
+        self.assertEqual(host.devices.watches(), [watch])
+        self.assertTrue(watch.connected)
+        self.assertEqual([e.event for e in host.devices.events()], ["waiting", "connected"])
+
+    def test_audio_rescan_only_happens_when_asked_and_no_stream_is_open(self) -> None:
+        host = self.host
+        calls: list[str] = []
+        fake_sd = SimpleNamespace(
+            query_devices=lambda *args: [{"name": "USB DAC", "max_output_channels": 2},
+                                         {"name": "Mic", "max_output_channels": 0}],
+            _terminate=lambda: calls.append("terminate"),
+            _initialize=lambda: calls.append("initialize"))
+        with mock.patch.object(deps, "HAS_SOUNDDEVICE", True), \
+                mock.patch.object(deps, "sd", fake_sd):
+            self.assertEqual(host._audio_output_names(), ["USB DAC"])
+            self.assertFalse(host.rescan_audio_devices())  # nothing waited for
+            host.watch_device("audio_output", "USB DAC")
+            host.engine._stream = object()
+            self.assertFalse(host.rescan_audio_devices())
+            host.engine._stream = None
+            self.assertTrue(host.rescan_audio_devices())
+        self.assertEqual(calls, ["terminate", "initialize"])
+
+
+class SessionRestoreTests(unittest.TestCase):
+    def test_missing_devices_are_waited_for_in_the_background(self) -> None:
+        host = VcpiCore()
+        self.addCleanup(host.engine.shutdown)
+        self.addCleanup(host.devices.stop)
+        data = {"version": 1, "connections": {
+            "midi_inputs": ["Arturia BeatStep Pro:Arturia BeatStep Pro MIDI 1 24:0"],
+            "midi_mix_in": "MIDI Mix:MIDI Mix MIDI 1 20:0",
+            "midi_clock": {"mode": "out", "port": "BeatStep Pro 24:0"},
+        }}
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(deps, "HAS_RTMIDI", True):
+            path = Path(tmp) / "session.json"
+            path.write_text(json.dumps(data))
+            started = time.monotonic()
+            session.restore(host, path)
+            self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(set(host.devices.waiting()), {
+            "midi_in:arturia beatstep pro:arturia beatstep pro midi 1", "midimix_in",
+            "midi_clock:out"})
+        # Saving while they are still missing keeps them in the session.
+        connections = session.snapshot(host)["connections"]
+        self.assertEqual(connections["midi_inputs"], data["connections"]["midi_inputs"])
+        self.assertEqual(connections["midi_mix_in"], "MIDI Mix:MIDI Mix MIDI 1 20:0")
+        self.assertEqual(connections["midi_clock"], data["connections"]["midi_clock"])
+
+
+if __name__ == "__main__":
+    unittest.main()
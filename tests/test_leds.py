@@ -0,0 +1,91 @@
+"""Tests for diffed, off-thread controller LED feedback."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.akai_midimix import MidiMixController  # noqa: E402
+from controllers.leds import LedFeedback  # noqa: E402
+
+
+class _FakePort:
+    def __init__(self) -> None:
+        self.is_open = True
+        self.sent: list = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def send(self, data) -> None:
+        self.gate.wait(2.0)
+        self.sent.append(tuple(data))
+
+
+class LedFeedbackTests(unittest.TestCase):
+    def test_only_changed_leds_are_sent_and_reset_repaints(self) -> None:
+        port = _FakePort()
+        leds = LedFeedback(port)
+        leds.set(0x90, 1, 127)
+        leds.set(0x90, 3, 127)
+        leds.set(0x90, 3, 0)
+        self.assertEqual(leds.flush(), 2)
+        self.assertEqual(port.sent, [(0x90, 1, 127), (0x90, 3, 0)])
+        leds.set(0x90, 1, 0)
+        leds.set(0x90, 1, 127)  # back where the hardware already is
+        self.assertEqual(leds.flush(), 0)
+        leds.reset()
+        self.assertEqual(leds.flush(), 2)
+
+    def test_unsent_leds_stay_pending_until_the_port_takes_them(self) -> None:
+        port = _FakePort()
+        leds = LedFeedback(port)
+        leds.set(0x90, 1, 127)
+        leds.set(0x90, 3, 127)
+        port.is_open = False
+        self.assertEqual(leds.flush(), 0)
+        port.is_open = True
+        send = port.send
+
+        def fail_once(data) -> None:
+            port.send = send
+            raise OSError("device busy")
+
+        port.send = fail_once
+        with self.assertLogs("controllers.leds", "WARNING"):
+            self.assertEqual(leds.flush(), 1)
+        self.assertEqual(leds.flush(), 1)
+        self.assertEqual(sorted(port.sent), [(0x90, 1, 127), (0x90, 3, 127)])
+
+    def test_slow_port_never_blocks_the_input_callback(self) -> None:
+        slot = SimpleNamespace(name="Keys", muted=False, solo=False, gain=1.0)
+        engine = SimpleNamespace(slots=[slot] + [None] * 7, master_gain=1.0)
+        mix = MidiMixController(engine)
+        port = _FakePort()
+        mix.leds._port = port
+        port.gate.clear()  # the USB write hangs until released
+        mix.leds.start()
+        try:
+            for _ in range(3):
+                mix.on_midi(([0x90, 1, 127], 0.0))  # mute, unmute, mute
+            self.assertTrue(slot.muted)
+            port.gate.set()
+            for _ in range(200):
+                if (0x90, 1, 127) in port.sent:
+                    break
+                time.sleep(0.01)
+        finally:
+            mix.leds.stop()
+        self.assertEqual(port.sent.count((0x90, 1, 127)), 1)
+        self.assertLessEqual(len(port.sent), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
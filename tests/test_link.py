@@ -0,0 +1,91 @@
+"""Tests for the local Link timeline model."""
+
+from __future__ import annotations
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.link import LinkSync, LinkTimeline  # noqa: E402
+
+
+class _FakeAalink:
+    """A Link session whose beat runs from ``time.monotonic()``."""
+
+    def __init__(self, bpm: float, beat: float) -> None:
+        self.origin = time.monotonic()
+        self.start = beat
+        self._tempo = bpm
+        self.enabled = True
+        self.num_peers = 1
+        self.reads = 0
+
+    @property
+    def beat(self) -> float:
+        self.reads += 1
+        return self.start + (time.monotonic() - self.origin) * self._tempo / 60.0
+
+    @property
+    def tempo(self) -> float:
+        return self._tempo
+
+    @tempo.setter
+    def tempo(self, value: float) -> None:
+        self.start = self.beat
+        self.origin = time.monotonic()
+        self._tempo = value
+
+
+def _enabled_link(bpm: float = 120.0, beat: float = 100.0) -> tuple[LinkSync, _FakeAalink]:
+    link = LinkSync()
+    fake = _FakeAalink(bpm, beat)
+    link._link = fake
+    link._enabled = True
+    link._refresh_timeline()
+    return link, fake
+
+
+class LinkTimelineTests(unittest.TestCase):
+    def test_snapshot_maths(self) -> None:
+        timeline = LinkTimeline(time=10.0, beat=8.0, bpm=120.0)
+        self.assertEqual(timeline.beat_at(11.0), 10.0)
+        self.assertEqual(timeline.time_at(12.0), 12.0)
+        self.assertEqual(timeline.phase(11.25, 4.0), 2.5)
+
+    def test_beats_are_read_locally_between_refreshes(self) -> None:
+        link, fake = _enabled_link()
+        reads = fake.reads
+        beats = [link.beat for _ in range(100)]
+        self.assertEqual(fake.reads, reads)  # no round-trip to the session
+        self.assertEqual(beats, sorted(beats))
+        self.assertAlmostEqual(beats[-1], fake.beat, delta=0.01)
+        self.assertAlmostEqual(link.phase(4.0), fake.beat % 4.0, delta=0.01)
+
+    def test_tempo_changes_refresh_the_snapshot(self) -> None:
+        link, fake = _enabled_link(bpm=120.0)
+        link.bpm = 90.0
+        self.assertEqual(link.timeline().bpm, 90.0)
+        self.assertAlmostEqual(link.beat, fake.beat, delta=0.01)
+
+    def test_sync_sleeps_to_the_next_boundary(self) -> None:
+        link, fake = _enabled_link(bpm=960.0)  # 62.5 ms per beat
+        target = link.sync(1.0)
+        self.assertEqual(target, float(int(target)))
+        self.assertAlmostEqual(fake.beat, target, delta=0.1)
+
+    def test_disabled_link_has_no_timeline(self) -> None:
+        link = LinkSync(bpm=100.0)
+        self.assertIsNone(link.timeline())
+        self.assertIsNone(link.beat)
+        self.assertEqual(link.bpm, 100.0)
+        with self.assertRaises(RuntimeError):
+            link.sync(4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
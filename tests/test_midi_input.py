@@ -0,0 +1,129 @@
+"""Tests for the raw-bytes MIDI input path."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.midi_input import MidiInputController  # noqa: E402
+from core import deps  # noqa: E402
+from core.midi import coalesce_events, plugin_event, raw_bytes  # noqa: E402
+from core.routing import compile_routes  # noqa: E402
+
+np = deps.np
+
+
+class RawInputTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sent: list = []
+        engine = SimpleNamespace(routes=compile_routes({0: 2, 9: 5}, []),
+                                 enqueue_midi=lambda slot, msg: self.sent.append((slot, msg)))
+        self.controller = MidiInputController(engine)
+
+    def test_channel_messages_are_forwarded_as_raw_tuples(self) -> None:
+        for raw in ([0x90, 60, 100], [0x99, 36, 0], [0x80, 60, 40], [0xB0, 1, 64],
+                    [0xE0, 0, 64], [0xD0, 90], [0x91, 60, 100], [0xF0, 1, 2, 0xF7], [0xC0, 5]):
+            self.controller.on_midi((raw, 0.0))
+        self.assertEqual(self.sent, [
+            (2, (0x90, 60, 100)),
+            (5, (0x89, 36, 0)),  # note-on velocity 0 is a note-off
+            (2, (0x80, 60, 40)),
+            (2, (0xB0, 1, 64)),
+            (2, (0xE0, 0, 64)),
+            (2, (0xD0, 90)),
+        ])  # channel 2 is unrouted; sysex and program change are ignored
+
+    @unittest.skipIf(deps.mido is None, "mido not installed")
+    def test_raw_bytes_match_mido_encoding(self) -> None:
+        mido = deps.mido
+        for msg in (mido.Message("note_on", note=60, velocity=100, channel=3),
+                    mido.Message("control_change", control=7, value=100),
+                    mido.Message("pitchwheel", pitch=-8192)):
+            with self.subTest(msg=msg):
+                self.assertEqual(raw_bytes(msg), tuple(msg.bytes()))
+                self.assertEqual(raw_bytes(raw_bytes(msg)), tuple(msg.bytes()))
+        self.assertEqual(plugin_event((0x90, 60, 100), 0.25), (b"\x90\x3c\x64", 0.25))
+
+
+class CoalesceTests(unittest.TestCase):
+    def test_streams_keep_evenly_spaced_values_and_notes_keep_their_place(self) -> None:
+        events = [((0xE0, 0, v), 0) for v in range(8)]          # pitch bend sweep
+        events.insert(3, ((0x90, 60, 100), 0))
+        events += [((0xB0, 1, v), 0) for v in range(5)]         # mod wheel
+        events += [((0xB0, 64, 127), 0), ((0xB0, 64, 0), 0)]   # sustain: never thinned
+        events += [((0xB1, 1, 9), 0), ((0xD0, 40), 0), ((0xD0, 50), 0)]
+
+        kept = [msg for msg, _ in coalesce_events(events, 1)]
+        self.assertEqual(kept, [(0x90, 60, 100), (0xE0, 0, 7), (0xB0, 1, 4),
+                                (0xB0, 64, 127), (0xB0, 64, 0), (0xB1, 1, 9), (0xD0, 50)])
+        bends = [msg[2] for msg, _ in coalesce_events(events, 4) if msg[0] == 0xE0]
+        self.assertEqual(bends, [1, 3, 5, 7])
+        self.assertIs(coalesce_events(events, 8), events)
+
+
+class _FakePlugin:
+    def __init__(self) -> None:
+        self.midi: list = []
+
+    def process(self, midi, duration, sample_rate, num_channels, buffer_size, reset):
+        self.midi.extend(midi)
+        return np.zeros((num_channels, buffer_size), dtype=np.float32)
+
+
+@unittest.skipIf(np is None or deps.mido is None, "numpy/mido not installed")
+class SlotBoundaryTests(unittest.TestCase):
+    def test_plugins_get_bytes_and_timestamps_samplers_get_raw_bytes(self) -> None:
+        from core.engine import AudioEngine
+        from core.models import InstrumentSlot
+        from sampler.plugin import WavSamplerPlugin
+
+        engine = AudioEngine(48000, 480)
+        try:
+            plugin = _FakePlugin()
+            sampler = WavSamplerPlugin("tone", np.ones((1, 4800), dtype=np.float32), 2)
+            engine.slots[0] = InstrumentSlot("vst", "vst", plugin)
+            engine.slots[1] = InstrumentSlot("tone", "tone", sampler)
+            note_off = deps.mido.Message("note_off", note=60)
+            engine.add_block_source(lambda t, n: [(0, note_off, 240)])
+            engine.enqueue_midi(0, (0x90, 60, 100))
+            engine.enqueue_midi(1, (0x90, 72, 127))
+            engine._callback(np.zeros((480, 2), dtype=np.float32), 480, None, None)
+        finally:
+            engine.shutdown()
+
+        self.assertEqual(plugin.midi, [(b"\x90\x3c\x64", 0.0), (b"\x80\x3c\x40", 0.005)])
+        self.assertEqual([(v["note"], v["gain"]) for v in sampler._voices], [(72, 1.0)])
+
+    def test_drain_coalesces_enabled_slots_and_counts_drops(self) -> None:
+        from core.engine import AudioEngine
+        from core.models import InstrumentSlot
+
+        engine = AudioEngine(48000, 480)
+        try:
+            plugins = [_FakePlugin(), _FakePlugin()]
+            for idx, plugin in enumerate(plugins):
+                engine.slots[idx] = InstrumentSlot("vst", "vst", plugin)
+            engine.set_midi_coalesce(0, 1)
+            with self.assertRaises(ValueError):
+                engine.set_midi_coalesce(0, 17)
+            for value in range(100):
+                engine.enqueue_midi(0, (0xB0, 1, value))
+                engine.enqueue_midi(1, (0xB0, 1, value))
+            engine._callback(np.zeros((480, 2), dtype=np.float32), 480, None, None)
+        finally:
+            engine.shutdown()
+
+        self.assertEqual(plugins[0].midi, [(b"\xb0\x01\x63", 0.0)])
+        self.assertEqual(len(plugins[1].midi), 100)
+        self.assertEqual(engine.midi_stats(),
+                         {"coalesce": {"1": 1}, "dropped": {"1": 99}, "dropped_total": 99})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Tests for MIDI clock output and input sync."""
+
+from __future__ import annotations
+
+import sys
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.midiclock import CLOCK, PPQN, START, STOP, MidiClock  # noqa: E402
+from core.scheduler import MidiScheduler  # noqa: E402
+from core.sequencer import Sequencer  # noqa: E402
+
+
+class _FakeOut:
+    def __init__(self) -> None:
+        self.sent: list[tuple[float, int]] = []  # (monotonic time, status byte)
+        self.name: str | None = None
+
+    def open_output_port(self, port_index: int) -> str:
+        self.name = f"out-{port_index}"
+        return self.name
+
+    def send(self, data: list[int]) -> None:
+        self.sent.append((time.monotonic(), data[0]))
+
+    def close(self) -> None:
+        self.name = None
+
+
+def _host(bpm: float = 120.0) -> SimpleNamespace:
+    host = SimpleNamespace(
+        engine=SimpleNamespace(enqueue_midi=lambda slot, msg: None),
+        link=SimpleNamespace(bpm=bpm, enabled=False, beat=None),
+        scheduler=MidiScheduler(),
+    )
+    host.sequencer = Sequencer(host)
+    return host
+
+
+class ClockOutTests(unittest.TestCase):
+    def test_pulses_start_on_a_bar_and_follow_the_tempo(self) -> None:
+        host = _host(bpm=600.0)  # a bar every 0.4 s, a pulse every ~4.2 ms
+        clock = MidiClock(host)
+        out = clock._out = _FakeOut()
+        clock.start_out(0)
+        try:
+            deadline = time.monotonic() + 2.0
+            while (sum(b == CLOCK for _, b in out.sent) < 2 * PPQN
+                   and time.monotonic() < deadline):
+                time.sleep(0.01)
+        finally:
+            clock.stop()
+        kinds = [b for _, b in out.sent]
+        self.assertEqual(kinds[0], START)
+        self.assertEqual(kinds[-1], STOP)
+        pulses = [t for t, b in out.sent if b == CLOCK]
+        self.assertGreaterEqual(len(pulses), 2 * PPQN)
+
+        # The start pulse sits on a bar of the sequencer's freewheel timebase.
+        anchor_time, anchor_beat, bpm = host.sequencer._free_anchor
+        first_beat = anchor_beat + (pulses[0] - anchor_time) * bpm / 60.0
+        self.assertAlmostEqual(first_beat / 4, round(first_beat / 4), delta=0.01)
+        span = pulses[2 * PPQN - 1] - pulses[0]
+        self.assertAlmostEqual(span, (2 * PPQN - 1) * 60.0 / (600.0 * PPQN), delta=0.01)
+
+        stats = clock.stats()
+        self.assertIsNone(stats["mode"])
+        self.assertGreater(stats["pulses"], 0)
+        self.assertLess(stats["jitter_ms"]["mean"], 5.0)
+
+
+class ClockInTests(unittest.TestCase):
+    def test_smoothed_tempo_and_phase_follow_the_incoming_clock(self) -> None:
+        host = _host(bpm=120.0)
+        now = [1000.0]
+        clock = MidiClock(host, clock=lambda: now[0])
+        clock._begin("in")
+        interval = 60.0 / (125.0 * PPQN)
+        clock.on_midi(([START], 0.0))
+        for k in range(8 * PPQN):
+            clock.on_midi(([CLOCK], 0.0))
+            # +-0.3 ms of alternating jitter on every pulse
+            now[0] += interval + (0.0003 if k % 2 else -0.0003)
+
+        self.assertAlmostEqual(host.link.bpm, 125.0, delta=0.5)
+        stats = clock.stats()
+        self.assertAlmostEqual(stats["bpm"], 125.0, delta=0.5)
+        self.assertAlmostEqual(stats["jitter_ms"]["max"], 0.6, delta=0.1)
+
+        last = clock._last_pulse
+        anchor_time, anchor_beat, bpm = host.sequencer._free_anchor
+        beat = anchor_beat + (last - anchor_time) * bpm / 60.0
+        self.assertAlmostEqual(beat, (8 * PPQN - 1) / PPQN, delta=0.02)
+
+    def test_stop_freezes_phase_and_gaps_restart_the_filter(self) -> None:
+        host = _host()
+        now = [0.0]
+        clock = MidiClock(host, clock=lambda: now[0])
+        clock._begin("in")
+        clock.on_midi(([START], 0.0))
+        for _ in range(PPQN):
+            clock.on_midi(([CLOCK], 0.0))
+            now[0] += 0.02
+        clock.on_midi(([STOP], 0.0))
+        pulses = clock._pulses
+        now[0] += 1.0  # long gap: the next interval is not a tempo sample
+        clock.on_midi(([CLOCK], 0.0))
+        self.assertEqual(clock._pulses, pulses)
+        self.assertIsNone(clock._interval)
+        self.assertAlmostEqual(host.link.bpm, 125.0, delta=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,12 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 web = importlib.import_module("core.web")
+from core.capture import MidiCapture  # noqa: E402
+from core.devices import PORT_KINDS, DeviceMonitor, PortCache, Watch  # noqa: E402
+from core.midiclock import MidiClock  # noqa: E402
+from core.routing import RouteRule, make_rule  # noqa: E402
+from core.scheduler import MidiScheduler  # noqa: E402
+from core.sequencer import Sequencer  # noqa: E402
 try:
     server = importlib.import_module("core.server")
 except ModuleNotFoundError as exc:
@@ -101,6 +107,9 @@ class FakeEngine:
         self.routes: dict[int, int] = {1: 0, 10: 0}
         self.output_device: object | None = None
         self.param_changes: list[tuple[int, str, float]] = []
+        self.output_latency: float = 0.0116
+        self.latency_offset_ms: float = 0.0
+        self.capture: MidiCapture = MidiCapture(16)
 
     def start(self, output_device: object | None = None) -> None:
         self.running = True
@@ -115,6 +124,9 @@ class FakeEngine:
     def any_solo(self) -> bool:
         return any(slot.solo for slot in self.slots if slot is not None)
 
+    def midi_stats(self) -> dict[str, object]:
+        return {"coalesce": {}, "dropped": {}, "dropped_total": 0}
+
 
 class FakeHost:
     def __init__(self) -> None:
@@ -122,10 +134,16 @@ class FakeHost:
         self.buffer_size: int = 512
         self.engine: FakeEngine = FakeEngine()
         self.link: SimpleNamespace = SimpleNamespace(enabled=False, bpm=120.0)
+        self.scheduler: MidiScheduler = MidiScheduler()
+        self.sequencer: Sequencer = Sequencer(self)
+        self.midi_clock: MidiClock = MidiClock(self)
+        self.devices: DeviceMonitor = DeviceMonitor(
+            PortCache({kind: list for kind in PORT_KINDS}), lambda name, ports: None)
         self.session_path: Path = ROOT / "sessions"
         self.loaded_session_name: str | None = "demo"
         self.loaded_session_path: Path | None = ROOT / "sessions" / "demo.json"
         self.channel_map: dict[int, int] = {0: 0, 9: 0}
+        self.route_rules: list[RouteRule] = []
         self.midi_input_names: list[str] = ["BeatStep"]
         self.mixer_midi_name: str | None = "MIDI Mix"
         self.mixer_midi_out_name: str | None = "MIDI Mix Out"
@@ -143,6 +161,7 @@ class FakeHost:
         self.stop_link_calls: int = 0
         self.sent_notes: list[tuple[int, int, int, float]] = []
         self.loaded_wavs: list[tuple[int, str, str | None]] = []
+        self.loaded_packs: list[tuple[int, str, str | None]] = []
         self.loaded_effects: list[tuple[str, int | None, str | None]] = []
 
     def start_audio(self, output_device: object | None = None) -> None:
@@ -189,6 +208,17 @@ class FakeHost:
         self.engine.slots[slot_index] = slot
         return slot
 
+    def load_pack(self, slot_index: int, pack_path: str, name: str | None = None) -> FakeSlot:
+        self.loaded_packs.append((slot_index, pack_path, name))
+        slot = FakeSlot(
+            name=name or Path(pack_path).name,
+            source_type="pack",
+            path=pack_path,
+            effects=[],
+        )
+        self.engine.slots[slot_index] = slot
+        return slot
+
     def load_effect(self, path: str, slot_index: int | None = None, name: str | None = None) -> None:
         self.loaded_effects.append((path, slot_index, name))
         effect = SimpleNamespace(name=name or Path(path).stem, parameters={})
@@ -233,6 +263,18 @@ class FakeHost:
             if previous_slot is not None:
                 previous_slot.midi_channels.discard(midi_channel)
 
+    def add_route_rule(self, midi_channel: int, slot_indices: list[int], notes=None,
+                       velocities=None, transpose: int = 0) -> RouteRule:
+        rule = make_rule(midi_channel, slot_indices, notes, velocities, transpose)
+        self.route_rules.append(rule)
+        return rule
+
+    def remove_route_rule(self, index: int) -> RouteRule:
+        return self.route_rules.pop(index)
+
+    def clear_route_rules(self) -> None:
+        self.route_rules.clear()
+
     def open_midi_input(self, port_index: int) -> SimpleNamespace:
         self.opened_midi_ports.append(port_index)
         if 0 <= port_index < len(self.available_midi_input_ports):
@@ -287,11 +329,41 @@ class TypedDaemonApiContractTests(unittest.TestCase):
         self.assertEqual(status["status"]["sample_rate"], 44100)
         self.assertEqual(status["status"]["audio"]["output"], "Built-in Output")
         self.assertEqual(status["status"]["audio"]["master_effects"], 1)
+        self.assertEqual(status["status"]["audio"]["latency_ms"], {"output": 11.6, "offset": 0.0})
+        self.assertEqual(status["status"]["scheduler"]["depth"], 0)
+        self.assertIn("p99", status["status"]["scheduler"]["late_ms"])
+        self.assertIsNone(status["status"]["midi"]["clock"]["mode"])
         self.assertTrue(slots["ok"])
         self.assertEqual(slots["slots"][0]["slot"], 1)
         self.assertEqual(slots["slots"][0]["midi_channels"], [1, 10])
         self.assertFalse(slots["slots"][1]["loaded"])
 
+    def test_device_events_reach_status_json_and_cli_clients(self) -> None:
+        if server is None:
+            self.skipTest("core.server import needs optional native dependencies in this checkout")
+
+        host = FakeHost()
+        self.addCleanup(host.devices.stop)
+        daemon = server.VcpiServer(host)
+        daemon._device_cursors["client-test"] = host.devices.last_seq
+        host.devices.watch(Watch("midimix_in", "MIDI Mix in", "midi_in", "MIDI Mix",
+                                 print, print, lambda: False))
+
+        status = daemon._handle_json_operation("status", {})["status"]["devices"]
+        self.assertEqual(status["watching"], [{"device": "MIDI Mix in", "port": "MIDI Mix",
+                                               "connected": False, "error": None}])
+        events = daemon._handle_json_operation("devices.events", {"since": 0})
+        self.assertEqual([e["event"] for e in events["events"]], ["waiting"])
+        self.assertEqual(daemon._handle_json_operation(
+            "devices.events", {"since": events["last_event"]})["events"], [])
+        with self.assertRaises(server._JsonOperationError):
+            daemon._handle_json_operation("devices.events", {"since": -1})
+
+        output, _ = daemon._run_command("about", "client-test")
+        self.assertTrue(output.startswith("[Devices] MIDI Mix in 'MIDI Mix' waiting\n"))
+        output, _ = daemon._run_command("about", "client-test")
+        self.assertNotIn("[Devices]", output)
+
     def test_json_audio_devices_lists_output_devices_only(self) -> None:
         if server is None:
             self.skipTest("core.server import needs optional native dependencies in this checkout")
@@ -373,6 +445,43 @@ class TypedDaemonApiContractTests(unittest.TestCase):
         )
         self.assertEqual(result["samples"], {"808": ["kick"]})
 
+    def test_json_samples_includes_indexed_metadata_and_peaks_op(self) -> None:
+        if server is None:
+            self.skipTest("core.server import needs optional native dependencies in this checkout")
+        if not hasattr(sys.modules.get("numpy"), "frombuffer"):
+            self.skipTest("peak overviews need real numpy")
+
+        import wave
+
+        daemon = server.VcpiServer(FakeHost())
+        with tempfile.TemporaryDirectory() as tmp:
+            samples_root = Path(tmp) / "sampler" / "samples"
+            pack_root = samples_root / "808"
+            pack_root.mkdir(parents=True)
+            with wave.open(str(pack_root / "kick.wav"), "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(8000)
+                wf.writeframes(b"\x00\x40" * 4000)
+            daemon._samples_root = lambda: samples_root
+
+            result = daemon._handle_json_operation("samples", {})
+            peaks = daemon._handle_json_operation("samples.peaks", {"pack": "808", "sample": "kick.wav"})
+            missing = json.loads(daemon._run_json_request(
+                json.dumps({"op": "samples.peaks", "payload": {"pack": "808", "sample": "snare"}}),
+                "test",
+            ))
+
+        self.assertEqual(
+            result["packs"][0]["samples"],
+            [{"name": "kick", "filename": "kick.wav", "sample_rate": 8000,
+              "channels": 1, "frames": 4000, "duration": 0.5}],
+        )
+        self.assertTrue(peaks["ok"])
+        self.assertEqual(peaks["duration"], 0.5)
+        self.assertEqual(set(peaks["peaks"]["max"]), {0.5})
+        self.assertEqual(missing["status"], 404)
+
     def test_json_slot_wav_load_loads_catalog_sample_and_returns_updated_state(self) -> None:
         if server is None:
             self.skipTest("core.server import needs optional native dependencies in this checkout")
@@ -450,6 +559,63 @@ class TypedDaemonApiContractTests(unittest.TestCase):
                     self.assertEqual(host.loaded_wavs, [])
                     self.assertIsNone(host.engine.slots[1])
 
+    def test_json_slot_pack_load_loads_catalog_pack_and_returns_updated_state(self) -> None:
+        if server is None:
+            self.skipTest("core.server import needs optional native dependencies in this checkout")
+
+        host = FakeHost()
+        daemon = server.VcpiServer(host)
+        with tempfile.TemporaryDirectory() as tmp:
+            samples_root = Path(tmp) / "sampler" / "samples"
+            pack_root = samples_root / "piano"
+            pack_root.mkdir(parents=True)
+            daemon._samples_root = lambda: samples_root
+
+            result = daemon._handle_json_operation(
+                "slot.pack.load",
+                {"slot": 3, "pack": "piano", "name": "Keys"},
+            )
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(host.loaded_packs, [(2, str(pack_root.resolve()), "Keys")])
+        self.assertEqual(result["slot"]["source_type"], "pack")
+        self.assertEqual(result["slot"]["name"], "Keys")
+        self.assertEqual(result["slots"][2]["source_type"], "pack")
+
+    def test_json_slot_pack_load_rejects_invalid_inputs_before_mutation(self) -> None:
+        if server is None:
+            self.skipTest("core.server import needs optional native dependencies in this checkout")
+
+        cases = [
+            ({"slot": 2, "pack": "piano", "sample": "c4"}, 400, "only slot, pack"),
+            ({"slot": 9, "pack": "piano"}, 400, "slot must be 1-8"),
+            ({"slot": 2, "pack": ""}, 400, "pack must not be empty"),
+            ({"slot": 2, "pack": "../piano"}, 400, "pack must not contain '..'"),
+            ({"slot": 2, "pack": "pi/ano"}, 400, "pack must not contain path separators"),
+            ({"slot": 2, "pack": "piano", "name": "Bad/Name"}, 400, "name must not contain path separators"),
+            ({"slot": 2, "pack": "organ"}, 404, "sample pack not found"),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            samples_root = Path(tmp) / "sampler" / "samples"
+            (samples_root / "piano").mkdir(parents=True)
+
+            for payload, status, message in cases:
+                with self.subTest(payload=payload):
+                    host = FakeHost()
+                    daemon = server.VcpiServer(host)
+                    daemon._samples_root = lambda: samples_root
+                    response = json.loads(
+                        daemon._run_json_request(
+                            json.dumps({"op": "slot.pack.load", "payload": payload}),
+                            "test",
+                        )
+                    )
+                    self.assertFalse(response["ok"])
+                    self.assertEqual(response["status"], status)
+                    self.assertIn(message, response["error"])
+                    self.assertEqual(host.loaded_packs, [])
+
     def test_json_fx_plugins_lists_safe_top_level_bundled_vst3_catalog(self) -> None:
         if server is None:
             self.skipTest("core.server import needs optional native dependencies in this checkout")
@@ -1377,6 +1543,94 @@ class TypedDaemonApiContractTests(unittest.TestCase):
         self.assertEqual(result["status"]["midi"]["routing"], {"10": 1})
         self.assertEqual(result["slots"][0]["midi_channels"], [10])
 
+    def test_json_midi_routes_add_remove_and_reject_invalid_rules(self) -> None:
+        if server is None:
+            self.skipTest("core.server import needs optional native dependencies in this checkout")
+
+        host = FakeHost()
+        daemon = server.VcpiServer(host)
+
+        result = daemon._handle_json_operation(
+            "midi.routes.add",
+            {"channel": 2, "slots": [1, 3], "notes": [0, 59], "transpose": 12},
+        )
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["routes"]["channels"], {"1": 1, "10": 1})
+        self.assertEqual(result["routes"]["rules"], [{
+            "rule": 1, "channel": 2, "slots": [1, 3], "notes": [0, 59],
+            "velocities": [1, 127], "transpose": 12,
+        }])
+        self.assertEqual(host.route_rules[0].slots, (0, 2))
+        self.assertEqual(daemon._handle_json_operation("status", {})["status"]["midi"]["route_rules"], 1)
+
+        for payload in ({"channel": 2, "slots": []}, {"channel": 2, "slots": [9]},
+                        {"channel": 2, "slots": [1], "notes": [60]},
+                        {"channel": 2, "slots": [1], "velocities": [0, 127]},
+                        {"channel": 2, "slots": [1], "transpose": True},
+                        {"channel": 2, "slots": [1], "bank": 1}):
+            with self.subTest(payload=payload):
+                response = json.loads(daemon._run_json_request(
+                    json.dumps({"op": "midi.routes.add", "payload": payload}), "test"))
+                self.assertFalse(response["ok"])
+
+        result = daemon._handle_json_operation("midi.routes.remove", {"rule": 1})
+        self.assertEqual(result["routes"]["rules"], [])
+        response = json.loads(daemon._run_json_request(
+            '{"op":"midi.routes.remove","payload":{"rule":1}}', "test"))
+        self.assertFalse(response["ok"])
+
+    def test_json_song_ops_set_play_queue_and_stop(self) -> None:
+        if server is None:
+            self.skipTest("core.server import needs optional native dependencies in this checkout")
+
+        host = FakeHost()
+        daemon = server.VcpiServer(host)
+        host.sequencer.set_bank(0, ["c"])
+        host.sequencer.set_bank(1, ["g"])
+
+        result = daemon._handle_json_operation("song.set", {
+            "parts": [{"banks": [1, 2], "bars": 4}, {"banks": [2], "bars": 2}],
+            "loop": False,
+            "quantum": 8,
+        })
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["song"]["parts"][1], {"banks": [2], "bars": 2})
+        self.assertEqual((result["song"]["loop"], result["song"]["quantum"]), (False, 8.0))
+
+        played = daemon._handle_json_operation("song.play", {"part": 2})
+        self.assertEqual(played["song"]["pending"], [{"tick": None, "bar": None, "change": "song part 2"}])
+
+        queued = daemon._handle_json_operation("seq.queue", {"bank": 1, "steps": ["e", "-"]})
+        self.assertEqual(queued["bank"], 1)
+        self.assertEqual(host.sequencer.banks[0].notes, [64])  # stopped: applied at once
+
+        stopped = daemon._handle_json_operation("song.stop", {})
+        self.assertEqual(stopped["song"]["pending"], [{"tick": None, "bar": None, "change": "song off"}])
+        self.assertEqual(daemon._handle_json_operation("song", {})["song"], stopped["song"])
+
+    def test_json_song_ops_reject_invalid_payloads(self) -> None:
+        if server is None:
+            self.skipTest("core.server import needs optional native dependencies in this checkout")
+
+        daemon = server.VcpiServer(FakeHost())
+        cases = [
+            ("song.set", {"parts": "1,2"}),
+            ("song.set", {"parts": [{"banks": [], "bars": 1}]}),
+            ("song.set", {"parts": [{"banks": [17], "bars": 1}]}),
+            ("song.set", {"parts": [{"banks": [1], "bars": 0}]}),
+            ("song.set", {"parts": [], "quantum": True}),
+            ("song.play", {"part": 1}),  # no parts yet
+            ("seq.queue", {"bank": 0, "steps": ["c"]}),
+            ("seq.queue", {"bank": 1, "steps": []}),
+            ("seq.queue", {"bank": 1, "steps": ["h9"]}),
+        ]
+        for operation, payload in cases:
+            with self.subTest(operation=operation, payload=payload):
+                response = json.loads(daemon._run_json_request(
+                    json.dumps({"op": operation, "payload": payload}), "test"))
+                self.assertFalse(response["ok"])
+                self.assertEqual(response["status"], 400)
+
     def test_json_midi_cut_unrouted_channel_is_noop(self) -> None:
         if server is None:
             self.skipTest("core.server import needs optional native dependencies in this checkout")
@@ -1862,6 +2116,22 @@ class WebSafetyTests(unittest.TestCase):
                 with self.assertRaises(ValueError):
                     web.VcpiWebHandler._validate_wav_load_payload(value)
 
+    def test_typed_web_pack_load_validation(self) -> None:
+        payload: dict[str, object] = {"slot": 2, "pack": " piano ", "name": " Keys "}
+        web.VcpiWebHandler._validate_pack_load_payload(payload)
+        self.assertEqual(payload, {"slot": 2, "pack": "piano", "name": "Keys"})
+
+        invalid_payloads = [
+            {"slot": 2, "pack": "piano", "sample": "c4"},
+            {"slot": 2, "pack": ""},
+            {"slot": 2, "pack": "../piano"},
+            {"slot": 2, "pack": "piano", "name": "Bad/Name"},
+        ]
+        for value in invalid_payloads:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    web.VcpiWebHandler._validate_pack_load_payload(value)
+
     def test_typed_web_fx_load_validation_accepts_safe_catalog_payload(self) -> None:
         slot_payload: dict[str, object] = {"slot": 1, "plugin": " Room.vst3 ", "name": " Small Room "}
         master_payload: dict[str, object] = {"plugin": " Room ", "name": " Master Room "}
@@ -2526,6 +2796,36 @@ class WebSafetyTests(unittest.TestCase):
                 self.assertEqual(send_json.call_args.args[0], handler)
                 self.assertEqual(send_json.call_args.args[1], web.HTTPStatus.BAD_REQUEST)
 
+    def test_typed_web_sample_peaks_route_maps_to_read_only_operation(self) -> None:
+        handler = web.VcpiWebHandler.__new__(web.VcpiWebHandler)
+        handler.path = "/api/samples/808/kick/peaks"
+        handler.server = SimpleNamespace(sock_path=Path("/tmp/vcpi.sock"), daemon_timeout=1.0)
+        payload: dict[str, object] = {"ok": True, "peaks": {"min": [], "max": []}}
+
+        with mock.patch.object(
+            web,
+            "execute_json_operation",
+            return_value=SimpleNamespace(payload=payload),
+        ) as execute_json_operation, mock.patch.object(web, "_send_json") as send_json:
+            handler.do_GET()
+
+        execute_json_operation.assert_called_once_with(
+            "samples.peaks",
+            {"pack": "808", "sample": "kick"},
+            Path("/tmp/vcpi.sock"),
+            daemon_timeout=1.0,
+        )
+        send_json.assert_called_once_with(handler, web.HTTPStatus.OK, payload)
+
+        for path in ("/api/samples/808/peaks", "/api/samples/..%2F808/kick/peaks"):
+            with self.subTest(path=path):
+                handler.path = path
+                with mock.patch.object(web, "execute_json_operation") as execute_json_operation, \
+                        mock.patch.object(web, "_send_json") as send_json:
+                    handler.do_GET()
+                execute_json_operation.assert_not_called()
+                self.assertEqual(send_json.call_args.args[1], web.HTTPStatus.BAD_REQUEST)
+
     def test_typed_web_sessions_route_maps_to_sessions_operation(self) -> None:
         handler = web.VcpiWebHandler.__new__(web.VcpiWebHandler)
         handler.path = "/api/sessions"
@@ -0,0 +1,83 @@
+"""Tests for the compiled MIDI routing matrix."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.midi_input import MidiInputController  # noqa: E402
+from core.routing import (  # noqa: E402
+    MASK_SLOTS, RouteRule, compile_routes, make_rule, rule_from_dict,
+)
+from graph.signal_flow import render_signal_flow  # noqa: E402
+
+
+class RouteTableTests(unittest.TestCase):
+    def test_splits_layers_zones_and_transpose_compile_to_masks(self) -> None:
+        rules = [
+            make_rule(0, [0], notes=(0, 59), transpose=12),      # left hand, up an octave
+            make_rule(0, [1, 2], notes=(60, 127)),                # right hand, layered
+            make_rule(0, [3], notes=(60, 127), velocities=(100, 127)),  # hard hits
+            make_rule(0, [4], notes=(120, 127), transpose=12),   # runs off the top
+        ]
+        table = compile_routes({9: 7}, rules)
+        self.assertEqual(MASK_SLOTS[table.note_on_mask(48, 127)], (0,))
+        self.assertEqual(table.notes[0][48], 60)
+        self.assertEqual(MASK_SLOTS[table.note_on_mask(64, 80)], (1, 2))
+        self.assertEqual(MASK_SLOTS[table.note_on_mask(64, 110)], (1, 2, 3))
+        self.assertEqual(MASK_SLOTS[table.off_masks[64]], (1, 2, 3))
+        self.assertEqual(MASK_SLOTS[table.note_on_mask(125, 80)], (1, 2))  # 137 is dropped
+        self.assertEqual(MASK_SLOTS[table.note_on_mask(9 << 7 | 36, 100)], (7,))
+        self.assertEqual(MASK_SLOTS[table.channel_masks[0]], (0, 1, 2, 3, 4))
+        self.assertEqual(table.channel_masks[1], 0)
+
+    def test_rules_validate_and_round_trip(self) -> None:
+        rule = make_rule(2, [5, 4, 5], notes=(36, 47), velocities=(1, 63), transpose=-24)
+        self.assertEqual(rule.slots, (4, 5))
+        self.assertEqual(rule.describe(), "ch 3 notes 36-47 vel 1-63 transpose -24 -> slot 5,6")
+        self.assertEqual(rule_from_dict(rule.to_dict()), rule)
+        for bad in ({"channel": 16}, {"slots": []}, {"slots": [8]}, {"notes": (60, 50)},
+                    {"velocities": (0, 127)}, {"transpose": 49}):
+            args = {"channel": 0, "slots": [0], **bad}
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                make_rule(args.pop("channel"), args.pop("slots"), **args)
+
+
+class RoutedInputTests(unittest.TestCase):
+    def test_events_reach_every_routed_slot_with_its_transpose(self) -> None:
+        sent: list = []
+        engine = SimpleNamespace(enqueue_midi=lambda slot, msg: sent.append((slot, msg)))
+        engine.routes = compile_routes({}, [
+            make_rule(0, [0], notes=(0, 59), transpose=-12),
+            make_rule(0, [1, 2], notes=(60, 127)),
+            make_rule(0, [3], velocities=(100, 127)),
+        ])
+        controller = MidiInputController(engine)
+        for raw in ([0x90, 48, 64], [0x90, 72, 110], [0x80, 72, 0], [0xB0, 64, 127]):
+            controller.on_midi((raw, 0.0))
+        self.assertEqual(sent, [
+            (0, (0x90, 36, 64)),
+            (1, (0x90, 72, 110)), (2, (0x90, 72, 110)), (3, (0x90, 72, 110)),
+            (1, (0x80, 72, 0)), (2, (0x80, 72, 0)), (3, (0x80, 72, 0)),
+            (0, (0xB0, 64, 127)), (1, (0xB0, 64, 127)), (2, (0xB0, 64, 127)),
+            (3, (0xB0, 64, 127)),
+        ])
+
+    def test_signal_flow_lists_rules_per_slot(self) -> None:
+        slot = SimpleNamespace(plugin=SimpleNamespace(name="Keys"), effects=[],
+                               muted=False, solo=False, gain=1.0)
+        engine = SimpleNamespace(slots=[slot] + [None] * 7, master_effects=[],
+                                 master_gain=1.0, any_solo=lambda: False)
+        flow = render_signal_flow(engine, {1: 0}, [RouteRule(0, (0,), notes=(0, 59))])
+        self.assertIn("ch02,R1", flow)
+        self.assertIn("R1: ch 1 notes 0-59 -> slot 1", flow)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,587 @@
+"""WAV sampler DSP tests.
+
+These run against real numpy but need no audio or MIDI devices.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - depends on dev environment
+    np = None
+
+if np is not None:
+    from sampler.cache import load_sample
+    from sampler.loop import crossfade_loop, scale_loop, wrap_positions
+    from sampler.mipmap import MipmapSet
+    from sampler.multisample import MultisamplePlugin, build_keymap, note_number
+    from sampler.plugin import WavSamplerPlugin
+    from sampler.resample import RESAMPLE_QUALITIES, bank_for_step, filter_bank, resample_sinc
+    from sampler.wav import parse_wav, read_wav, resample_linear
+
+
+def _sine(freq: float, rate: int, seconds: float = 0.25):
+    t = np.arange(int(rate * seconds), dtype=np.float64) / rate
+    return np.sin(2 * np.pi * freq * t)[None, :].astype(np.float32), t
+
+
+def _render(plugin, note: int, blocks: int = 4):
+    plugin.send_midi(SimpleNamespace(type="note_on", note=note, velocity=127))
+    silence = np.zeros((1, 256), dtype=np.float32)
+    return np.concatenate([plugin.process(silence, 48000) for _ in range(blocks)], axis=1)
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class ResampleTests(unittest.TestCase):
+    def test_filter_banks_are_cached_and_read_only(self) -> None:
+        quality = RESAMPLE_QUALITIES["medium"]
+        first = bank_for_step(quality, 44100 / 48000)
+        second = bank_for_step(quality, 44100 / 48000)
+
+        self.assertIs(first, second)
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual(first.shape, (quality.phases + 1, 2 * quality.half_taps))
+        np.testing.assert_allclose(first.sum(axis=1), 1.0, atol=1e-5)
+
+    def test_pitch_up_lowers_cutoff_and_widens_kernel(self) -> None:
+        quality = RESAMPLE_QUALITIES["medium"]
+        unity = bank_for_step(quality, 1.0)
+        octave_up = bank_for_step(quality, 2.0)
+        self.assertGreater(octave_up.shape[1], unity.shape[1])
+        self.assertIs(octave_up, filter_bank(16, quality.phases, round(quality.rolloff * 0.5, 6), quality.beta))
+
+    def test_sinc_resample_is_closer_to_ideal_than_linear(self) -> None:
+        audio, _ = _sine(9000.0, 44100)
+        expected_frames = int(round(audio.shape[1] * 48000 / 44100))
+        t_out = np.arange(expected_frames) / 48000
+        ideal = np.sin(2 * np.pi * 9000.0 * t_out)
+
+        sinc = resample_sinc(audio, 44100, 48000, "high")[0]
+        linear = resample_linear(audio, 44100, 48000)[0]
+
+        self.assertEqual(sinc.shape[0], expected_frames)
+        core = slice(200, expected_frames - 200)
+        sinc_err = np.abs(sinc[core] - ideal[core]).max()
+        linear_err = np.abs(linear[core] - ideal[core]).max()
+        self.assertLess(sinc_err, 0.01)
+        self.assertLess(sinc_err, linear_err / 10)
+
+    def test_linear_quality_falls_back_to_linear_path(self) -> None:
+        audio, _ = _sine(440.0, 32000)
+        np.testing.assert_array_equal(
+            resample_sinc(audio, 32000, 48000, "linear"),
+            resample_linear(audio, 32000, 48000),
+        )
+
+    def test_unknown_quality_is_rejected(self) -> None:
+        audio, _ = _sine(440.0, 32000)
+        with self.assertRaises(ValueError):
+            resample_sinc(audio, 32000, 48000, "ultra")
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class SamplerPlaybackTests(unittest.TestCase):
+    def test_quality_setting_is_validated_and_normalised(self) -> None:
+        audio, _ = _sine(440.0, 48000)
+        plugin = WavSamplerPlugin("test.wav", audio, 1, quality="Medium")
+        self.assertEqual(plugin.quality, "medium")
+        with self.assertRaises(ValueError):
+            plugin.quality = "ultra"
+
+    def test_sinc_playback_at_root_matches_source(self) -> None:
+        audio, _ = _sine(440.0, 48000)
+        plugin = WavSamplerPlugin("test.wav", audio, 1, quality="high")
+        rendered = _render(plugin, 60)
+        np.testing.assert_allclose(rendered[0, 64:900], audio[0, 64:900], atol=1e-3)
+
+    def test_sinc_playback_suppresses_aliasing_when_pitched_up(self) -> None:
+        # 15 kHz pitched up an octave folds to 18 kHz with linear reads.
+        audio, _ = _sine(15000.0, 48000)
+        energies = {}
+        for quality in ("linear", "high"):
+            plugin = WavSamplerPlugin("test.wav", audio, 1, quality=quality)
+            rendered = _render(plugin, 72)[0, 128:]
+            energies[quality] = float(np.sqrt(np.mean(rendered ** 2)))
+        self.assertGreater(energies["linear"], 0.3)
+        self.assertLess(energies["high"], 0.05)
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class MipmapTests(unittest.TestCase):
+    def test_levels_halve_length_and_drop_content_above_nyquist(self) -> None:
+        # 15 kHz sits above the 12 kHz Nyquist of the first decimated level.
+        audio, _ = _sine(15000.0, 48000)
+        mipmaps = MipmapSet(audio, max_levels=2).start()
+        self.assertTrue(mipmaps.wait(10.0))
+
+        self.assertEqual(len(mipmaps.levels), 3)
+        self.assertEqual(mipmaps.levels[1].shape[1], audio.shape[1] // 2)
+        level1 = mipmaps.levels[1][0, 200:-200]
+        self.assertLess(float(np.sqrt(np.mean(level1 ** 2))), 0.01)
+        self.assertGreater(mipmaps.nbytes, 0)
+
+    def test_pick_keeps_residual_ratio_near_unity(self) -> None:
+        audio, _ = _sine(440.0, 48000)
+        mipmaps = MipmapSet(audio, max_levels=3).start()
+        mipmaps.wait(10.0)
+        self.assertEqual(mipmaps.pick(1.2)[1], 0)
+        self.assertEqual(mipmaps.pick(2.0)[1], 1)
+        self.assertEqual(mipmaps.pick(3.5)[1], 2)
+        self.assertEqual(mipmaps.pick(64.0)[1], 3)
+
+    def test_mipmapped_linear_playback_suppresses_aliasing(self) -> None:
+        audio, _ = _sine(15000.0, 48000)
+        plugin = WavSamplerPlugin("test.wav", audio, 1, quality="linear", mipmaps=True)
+        self.assertTrue(plugin._mipmaps.wait(10.0))
+        rendered = _render(plugin, 72)[0, 128:]
+        self.assertLess(float(np.sqrt(np.mean(rendered ** 2))), 0.05)
+
+    def test_mipmapped_playback_keeps_pitch(self) -> None:
+        audio, _ = _sine(1000.0, 48000)
+        plugin = WavSamplerPlugin("test.wav", audio, 1, mipmaps=True)
+        plugin._mipmaps.wait(10.0)
+        rendered = _render(plugin, 72)[0, 256:]
+        spectrum = np.abs(np.fft.rfft(rendered * np.hanning(rendered.shape[0])))
+        peak_hz = np.argmax(spectrum) * 48000 / rendered.shape[0]
+        self.assertAlmostEqual(peak_hz, 2000.0, delta=60.0)
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class SampleCacheTests(unittest.TestCase):
+    def _write_wav(self, path: Path, rate: int = 44100) -> None:
+        data = (np.sin(np.linspace(0, 200, 4410)) * 20000).astype("<i2")
+        with wave.open(str(path), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(data.tobytes())
+
+    def test_same_file_shares_one_decoded_buffer_and_mipmaps(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "kick.wav"
+            self._write_wav(path)
+            first = WavSamplerPlugin.from_file(str(path), 48000, 2, mipmaps=True)
+            second = WavSamplerPlugin.from_file(str(path), 48000, 2, mipmaps=True)
+
+            self.assertIs(first._sample, second._sample)
+            self.assertIs(first._mipmaps, second._mipmaps)
+            self.assertFalse(first._sample.flags.writeable)
+            first._mipmaps.wait(10.0)
+
+    def test_rewritten_file_is_decoded_again(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "kick.wav"
+            self._write_wav(path)
+            first = load_sample(path, 48000, 1)
+            self._write_wav(path, rate=22050)
+            second = load_sample(path, 48000, 1)
+            self.assertIsNot(first, second)
+            self.assertNotEqual(first.audio.shape, second.audio.shape)
+
+
+def _riff(chunks: list[tuple[bytes, bytes]], rf64_data_size: int | None = None) -> bytes:
+    body = b"WAVE"
+    if rf64_data_size is not None:
+        ds64 = struct.pack("<QQQI", 0, rf64_data_size, 0, 0)
+        body += b"ds64" + struct.pack("<I", len(ds64)) + ds64
+    for chunk_id, data in chunks:
+        size = 0xFFFFFFFF if rf64_data_size is not None and chunk_id == b"data" else len(data)
+        body += chunk_id + struct.pack("<I", size) + data + b"\0" * (len(data) & 1)
+    magic = b"RF64" if rf64_data_size is not None else b"RIFF"
+    return magic + struct.pack("<I", len(body)) + body
+
+
+def _fmt(tag: int, channels: int, rate: int, bits: int, extensible: bool = False) -> bytes:
+    align = channels * bits // 8
+    head = (0xFFFE if extensible else tag, channels, rate, rate * align, align, bits)
+    if not extensible:
+        return struct.pack("<HHIIHH", *head)
+    guid_tail = b"\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71"
+    return struct.pack("<HHIIHHHHI", *head, 22, bits, 0) + struct.pack("<H", tag) + guid_tail
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class WavParserTests(unittest.TestCase):
+    def _write(self, tmp: str, data: bytes) -> Path:
+        path = Path(tmp) / "test.wav"
+        path.write_bytes(data)
+        return path
+
+    def test_float32_and_float64_decode_exactly(self) -> None:
+        values = np.array([0.0, 0.5, -0.25, 1.0], dtype=np.float64)
+        for bits, dtype in ((32, "<f4"), (64, "<f8")):
+            with self.subTest(bits=bits), tempfile.TemporaryDirectory() as tmp:
+                path = self._write(tmp, _riff([
+                    (b"fmt ", _fmt(3, 1, 44100, bits)),
+                    (b"data", values.astype(dtype).tobytes()),
+                ]))
+                audio, rate = read_wav(path)
+                self.assertEqual(rate, 44100)
+                self.assertEqual(audio.dtype, np.float32)
+                np.testing.assert_array_equal(audio[0], values.astype(np.float32))
+
+    def test_extensible_24bit_stereo_sign_extends(self) -> None:
+        left = np.array([0, 1, -1, 8388607, -8388608], dtype=np.int32)
+        right = -left - 1
+        interleaved = np.stack([left, right], axis=1).reshape(-1)
+        raw = interleaved.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._write(tmp, _riff([
+                (b"fmt ", _fmt(1, 2, 48000, 24, extensible=True)),
+                (b"LIST", b"INFOjunk!"),  # odd-sized chunk exercises padding
+                (b"data", raw),
+            ]))
+            info = parse_wav(path)
+            audio, _ = read_wav(path)
+        self.assertEqual((info.encoding, info.sample_width, info.frames), ("pcm", 3, 5))
+        np.testing.assert_array_equal(audio[0], left / 8388608.0)
+        np.testing.assert_array_equal(audio[1], right / 8388608.0)
+
+    def test_8bit_and_32bit_pcm(self) -> None:
+        cases = (
+            (8, np.array([128, 255, 0], dtype=np.uint8).tobytes(), [0.0, 127 / 128, -1.0]),
+            (32, np.array([0, 1 << 30, -(1 << 31)], dtype="<i4").tobytes(), [0.0, 0.5, -1.0]),
+        )
+        for bits, raw, expected in cases:
+            with self.subTest(bits=bits), tempfile.TemporaryDirectory() as tmp:
+                path = self._write(tmp, _riff([(b"fmt ", _fmt(1, 1, 8000, bits)), (b"data", raw)]))
+                audio, _ = read_wav(path)
+                np.testing.assert_allclose(audio[0], expected)
+
+    def test_smpl_chunk_gives_root_note_and_loops(self) -> None:
+        smpl = struct.pack("<9I", 0, 0, 0, 57, 1 << 31, 0, 0, 1, 0)
+        smpl += struct.pack("<6I", 0, 0, 100, 899, 0, 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._write(tmp, _riff([
+                (b"fmt ", _fmt(1, 1, 48000, 16)),
+                (b"smpl", smpl),
+                (b"data", np.zeros(1000, dtype="<i2").tobytes()),
+            ]))
+            info = parse_wav(path)
+        self.assertEqual(info.root_note, 57)
+        self.assertAlmostEqual(info.fine_tune_cents, 50.0)
+        self.assertEqual(len(info.loops), 1)
+        self.assertEqual((info.loops[0].start, info.loops[0].end), (100, 899))
+
+    def test_rf64_uses_ds64_data_size(self) -> None:
+        raw = np.arange(-4, 4, dtype="<i2").tobytes()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._write(tmp, _riff(
+                [(b"fmt ", _fmt(1, 2, 48000, 16)), (b"data", raw)],
+                rf64_data_size=len(raw),
+            ))
+            audio, _ = read_wav(path)
+        self.assertEqual(audio.shape, (2, 4))
+        np.testing.assert_array_equal(audio[0] * 32768.0, [-4, -2, 0, 2])
+
+    def test_unsupported_or_malformed_files_raise_value_error(self) -> None:
+        cases = {
+            "adpcm": _riff([(b"fmt ", _fmt(2, 1, 8000, 4)), (b"data", b"\0" * 8)]),
+            "no data": _riff([(b"fmt ", _fmt(1, 1, 8000, 16))]),
+            "not wave": b"RIFF\x04\x00\x00\x00AVI ",
+        }
+        for label, data in cases.items():
+            with self.subTest(label), tempfile.TemporaryDirectory() as tmp:
+                with self.assertRaises(ValueError):
+                    read_wav(self._write(tmp, data))
+
+    def test_float_sources_stay_float32_in_int16_storage(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._write(tmp, _riff([
+                (b"fmt ", _fmt(3, 1, 48000, 32)),
+                (b"data", np.zeros(480, dtype="<f4").tobytes()),
+            ]))
+            decoded = load_sample(path, 48000, 1, storage="int16")
+        self.assertEqual(decoded.storage, "float32")
+
+
+def _write_tone(path: Path, freq: float, rate: int = 48000, frames: int = 4800) -> None:
+    t = np.arange(frames) / rate
+    data = (np.sin(2 * np.pi * freq * t) * 20000).astype("<i2")
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(data.tobytes())
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class MultisampleTests(unittest.TestCase):
+    def test_note_names_parse_with_c4_as_middle_c(self) -> None:
+        self.assertEqual(note_number("c4"), 60)
+        self.assertEqual(note_number("F#3"), 54)
+        self.assertEqual(note_number("bb2"), 46)
+        self.assertEqual(note_number(72), 72)
+        for bad in ("h4", "c10", True, "c4-soft"):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                note_number(bad)
+
+    def test_filename_keymap_uses_nearest_root_and_velocity_layers(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pack = Path(tmp)
+            for stem in ("c3-low", "c4-a", "c4-b", "c5-high", "noise"):
+                _write_tone(pack / f"{stem}.wav", 440.0)
+            keymap = build_keymap(pack)
+
+        self.assertEqual(keymap.roots, [48, 60, 72])
+        self.assertEqual(keymap.lookup(54, 100).sample, "c3-low")
+        self.assertEqual(keymap.lookup(55, 100).sample, "c4-b")
+        self.assertEqual(keymap.lookup(55, 20).sample, "c4-a")
+        self.assertEqual(keymap.lookup(67, 100).sample, "c5-high")
+        self.assertEqual(keymap.lookup(0, 1).sample, "c3-low")
+        self.assertEqual(keymap.lookup(127, 127).sample, "c5-high")
+        self.assertIsNone(keymap.lookup(60, 0))
+
+    def test_manifest_overrides_roots_ranges_and_layers(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pack = Path(tmp)
+            for stem in ("soft", "loud", "high"):
+                _write_tone(pack / f"{stem}.wav", 440.0)
+            (pack / "keymap.json").write_text(json.dumps({"zones": [
+                {"sample": "soft", "root": "c4", "velocity": [1, 90]},
+                {"sample": "loud.wav", "root": 60, "velocity": [91, 127]},
+                {"sample": "high", "root": "c5", "keys": [70, 100]},
+            ]}))
+            keymap = build_keymap(pack)
+
+            self.assertEqual(keymap.lookup(62, 90).sample, "soft")
+            self.assertEqual(keymap.lookup(62, 91).sample, "loud")
+            self.assertEqual(keymap.lookup(101, 64), None)
+
+            (pack / "keymap.json").write_text(json.dumps({"zones": [{"sample": "../soft"}]}))
+            with self.assertRaises(ValueError):
+                build_keymap(pack)
+
+    def test_builtin_piano_pack_layers_soft_below_bright(self) -> None:
+        keymap = build_keymap(ROOT / "sampler" / "samples" / "piano")
+        self.assertEqual(keymap.lookup(60, 40).sample, "c4-soft")
+        self.assertEqual(keymap.lookup(61, 120).sample, "c4-bright")
+        self.assertEqual(keymap.lookup(40, 100).sample, "c3-low")
+
+    def test_zones_decode_lazily_and_play_from_nearest_root(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pack = Path(tmp)
+            _write_tone(pack / "c4.wav", 1000.0)
+            _write_tone(pack / "c5.wav", 3000.0)
+            plugin = MultisamplePlugin.from_pack(str(pack), 48000, 1)
+
+            self.assertEqual(plugin.loaded_zones, 0)
+            plugin.preload()  # deterministic stand-in for the background loader
+            self.assertEqual(plugin.loaded_zones, 2)
+            # Note 74 maps to the c5 zone, two semitones up.
+            rendered = _render(plugin, 74)[0]
+
+        spectrum = np.abs(np.fft.rfft(rendered * np.hanning(rendered.shape[0])))
+        peak_hz = np.argmax(spectrum) * 48000 / rendered.shape[0]
+        self.assertAlmostEqual(peak_hz, 3000.0 * 2 ** (2 / 12), delta=60.0)
+
+    def test_voice_waits_for_pending_zone(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pack = Path(tmp)
+            _write_tone(pack / "c4.wav", 1000.0)
+            plugin = MultisamplePlugin.from_pack(str(pack), 48000, 1)
+            plugin._request_zone = lambda idx: None  # keep the zone undecoded
+
+            silent = _render(plugin, 60, blocks=1)
+            self.assertEqual(float(np.abs(silent).max()), 0.0)
+            self.assertEqual(len(plugin._voices), 1)
+
+            plugin.preload()
+            block = plugin.process(np.zeros((1, 256), dtype=np.float32), 48000)
+            self.assertGreater(float(np.abs(block).max()), 0.1)
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class SampleStorageTests(unittest.TestCase):
+    def _write(self, path: Path, width: int) -> None:
+        t = np.arange(4800) / 48000
+        tone = np.sin(2 * np.pi * 440.0 * t) * 0.5
+        if width == 2:
+            raw = (tone * 32767).astype("<i2").tobytes()
+        else:
+            ints = (tone * 8388607).astype("<i4")
+            raw = b"".join(int(v).to_bytes(4, "little", signed=True)[:3] for v in ints)
+        with wave.open(str(path), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(width)
+            wf.setframerate(48000)
+            wf.writeframes(raw)
+
+    def test_int16_storage_halves_memory_and_renders_the_same(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tone.wav"
+            self._write(path, 2)
+            wide = WavSamplerPlugin.from_file(str(path), 48000, 2)
+            compact = WavSamplerPlugin.from_file(str(path), 48000, 2, storage="int16")
+
+        self.assertEqual(compact.sample_dtype, "int16")
+        self.assertEqual(compact.memory_bytes * 2, wide.memory_bytes)
+        for note in (60, 67):
+            with self.subTest(note=note):
+                np.testing.assert_allclose(
+                    _render(compact, note), _render(wide, note), atol=1e-4)
+
+    def test_int16_storage_keeps_24_bit_sources_as_float(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tone24.wav"
+            self._write(path, 3)
+            plugin = WavSamplerPlugin.from_file(str(path), 48000, 1, storage="int16")
+        self.assertEqual(plugin.storage, "int16")
+        self.assertEqual(plugin.sample_dtype, "float32")
+
+    def test_cache_hits_skip_the_header_probe_and_share_fallback_buffers(self) -> None:
+        from sampler import cache
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tone24.wav"
+            self._write(path, 3)
+            compact = load_sample(path, 48000, 1, storage="int16")
+            with mock.patch.object(cache, "read_wav_with_info",
+                                   side_effect=AssertionError("file read again")):
+                self.assertIs(load_sample(path, 48000, 1, storage="int16"), compact)
+                self.assertIs(load_sample(path, 48000, 1, storage="float32"), compact)
+
+    def test_storage_can_switch_at_runtime_and_mipmaps_follow(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tone.wav"
+            self._write(path, 2)
+            plugin = WavSamplerPlugin.from_file(str(path), 48000, 1, mipmaps=True)
+            before = plugin.memory_bytes
+            plugin.storage = "int16"
+            self.assertTrue(plugin._mipmaps.wait(10.0))
+
+        self.assertEqual(plugin.sample_dtype, "int16")
+        self.assertTrue(all(level.dtype == np.int16 for level in plugin._mipmaps.levels))
+        self.assertLess(plugin.memory_bytes, before)
+        with self.assertRaises(ValueError):
+            plugin.storage = "float16"
+
+    def test_multisample_memory_counts_loaded_zones_only(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pack = Path(tmp)
+            self._write(pack / "c4.wav", 2)
+            self._write(pack / "c5.wav", 2)
+            plugin = MultisamplePlugin.from_pack(str(pack), 48000, 1, storage="int16")
+            self.assertEqual(plugin.memory_bytes, 0)
+            plugin._decode_zone(0)
+
+        self.assertEqual(plugin.memory_bytes, 4800 * 2)
+        self.assertEqual(plugin.sample_dtype, "int16")
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+def _write_looped(path: Path, frames: int, loop: tuple[int, int], rate: int = 48000,
+                  period: int = 48) -> None:
+    """Sine with an exact *period* and a smpl loop over whole periods."""
+    tone = np.sin(2 * np.pi * np.arange(frames) / period) * 0.5
+    smpl = struct.pack("<9I", 0, 0, 0, 60, 0, 0, 0, 1, 0)
+    smpl += struct.pack("<6I", 0, 0, loop[0], loop[1], 0, 0)
+    path.write_bytes(_riff([
+        (b"fmt ", _fmt(1, 1, rate, 16)),
+        (b"smpl", smpl),
+        (b"data", (tone * 32767).astype("<i2").tobytes()),
+    ]))
+
+
+def _note_off(plugin, note: int = 60) -> None:
+    plugin.send_midi(SimpleNamespace(type="note_off", note=note, velocity=0))
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class SustainLoopTests(unittest.TestCase):
+    def test_wrap_positions_folds_only_past_the_end(self) -> None:
+        pos = np.array([5.0, 10.0, 19.5, 20.0, 25.0, 41.0], dtype=np.float32)
+        np.testing.assert_allclose(wrap_positions(pos, 10.0, 20.0),
+                                   [5.0, 10.0, 19.5, 10.0, 15.0, 11.0])
+
+    def test_crossfade_ends_loop_on_the_pre_start_frames(self) -> None:
+        audio = np.arange(200, dtype=np.float32)[None, :]
+        faded = crossfade_loop(audio, 50, 150, 20)
+        self.assertEqual(float(faded[0, 149]), 49.0)
+        self.assertEqual(float(faded[0, 139]), 0.5 * (139 + 39))
+        np.testing.assert_array_equal(faded[0, :130], audio[0, :130])
+        np.testing.assert_array_equal(faded[0, 150:], audio[0, 150:])
+
+    def test_loop_points_scale_to_the_engine_rate(self) -> None:
+        self.assertEqual(scale_loop((100, 199), 24000, 48000, 1000), (200, 400))
+        self.assertIsNone(scale_loop((100, 104), 48000, 48000, 1000))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "pad.wav"
+            _write_looped(path, 2400, (480, 1439), rate=24000)
+            decoded = load_sample(path, 48000, 1)
+        self.assertEqual(decoded.loop, (960, 2880))
+
+    def test_held_note_sustains_and_release_fades_out(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "pad.wav"
+            _write_looped(path, 4800, (960, 4799))
+            plugin = WavSamplerPlugin.from_file(str(path), 48000, 1)
+
+        held = _render(plugin, 60, blocks=60)  # 15360 frames, 3x the sample
+        self.assertGreater(float(np.abs(held[:, -256:]).max()), 0.4)
+        # A seamless loop of whole periods reproduces the continuous sine.
+        expected = np.sin(2 * np.pi * np.arange(held.shape[1]) / 48) * 0.5
+        np.testing.assert_allclose(held[0], expected, atol=2e-3)
+
+        _note_off(plugin)
+        silence = np.zeros((1, 256), dtype=np.float32)
+        released = np.concatenate([plugin.process(silence, 48000) for _ in range(12)], axis=1)
+        self.assertLess(float(np.abs(released[:, 2400:]).max()), 1e-6)
+        self.assertEqual(plugin._voices, [])
+
+    def test_release_plays_the_tail_after_the_loop(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "pad.wav"
+            _write_looped(path, 9600, (960, 1919))
+            plugin = WavSamplerPlugin.from_file(str(path), 48000, 1, quality="high")
+
+        _render(plugin, 60, blocks=40)
+        self.assertLess(plugin._voices[0]["position"], 1920)
+        _note_off(plugin)
+        silence = np.zeros((1, 256), dtype=np.float32)
+        tail = np.concatenate([plugin.process(silence, 48000) for _ in range(34)], axis=1)
+        self.assertGreater(float(np.abs(tail[:, 7000:7600]).max()), 0.4)
+        self.assertEqual(plugin._voices, [])
+
+    def test_samples_without_loops_stay_one_shots(self) -> None:
+        sine, _ = _sine(440.0, 48000, 0.01)
+        plugin = WavSamplerPlugin("tone", sine, 1)
+        _render(plugin, 60, blocks=1)
+        _note_off(plugin)
+        self.assertEqual(len(plugin._voices), 1)
+        self.assertIsNone(plugin.loop)
+
+    def test_manifest_loop_overrides_the_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pack = Path(tmp) / "pads"
+            pack.mkdir()
+            _write_tone(pack / "c4.wav", 1000.0, frames=9600)
+            (pack / "keymap.json").write_text(json.dumps(
+                {"zones": [{"sample": "c4", "loop": [2400, 7199]}]}))
+            plugin = MultisamplePlugin.from_pack(str(pack), 48000, 1)
+            plugin.preload()
+            self.assertEqual(plugin.keymap.zones[0].loop, (2400, 7199))
+            held = _render(plugin, 60, blocks=80)
+            self.assertGreater(float(np.abs(held[:, -256:]).max()), 0.4)
+
+            (pack / "keymap.json").write_text(json.dumps(
+                {"zones": [{"sample": "c4", "loop": [10, 5]}]}))
+            with self.assertRaises(ValueError):
+                build_keymap(pack)
@@ -0,0 +1,134 @@
+"""Tests for the shared MIDI event scheduler and its sequencer/host users."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.scheduler import MidiScheduler  # noqa: E402
+from core.sequencer import Sequencer  # noqa: E402
+
+_fake_mido = SimpleNamespace(Message=lambda kind, **kw: SimpleNamespace(type=kind, **kw))
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.calls: list[object] = []
+        self.done = threading.Event()
+        self.expected = 0
+
+    def __call__(self, *args) -> None:
+        self.calls.append(args)
+        if len(self.calls) >= self.expected:
+            self.done.set()
+
+
+class MidiSchedulerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.scheduler = MidiScheduler()
+
+    def tearDown(self) -> None:
+        self.scheduler.stop(flush=False)
+
+    def test_events_run_in_due_order_on_one_thread(self) -> None:
+        record = _Recorder()
+        record.expected = 3
+        threads: set[str] = set()
+
+        def _cb(tag: str) -> None:
+            threads.add(threading.current_thread().name)
+            record(tag)
+
+        for tag, delay in (("c", 0.03), ("a", 0.01), ("b", 0.02)):
+            self.scheduler.call_later(delay, _cb, tag)
+
+        self.assertTrue(record.done.wait(2.0))
+        self.assertEqual(record.calls, [("a",), ("b",), ("c",)])
+        self.assertEqual(threads, {"vcpi-scheduler"})
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["depth"], stats["fired"]), (0, 3))
+        self.assertGreaterEqual(stats["late_ms"]["max"], stats["late_ms"]["mean"])
+
+    def test_earlier_event_wakes_a_sleeping_thread(self) -> None:
+        record = _Recorder()
+        record.expected = 1
+        self.scheduler.call_later(10.0, record, "late")
+        time.sleep(0.01)
+        start = time.monotonic()
+        self.scheduler.call_later(0.01, record, "soon")
+        self.assertTrue(record.done.wait(2.0))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(record.calls, [("soon",)])
+        self.assertEqual(self.scheduler.depth, 1)
+
+    def test_cancel_by_slot_drops_and_by_bank_flushes(self) -> None:
+        record = _Recorder()
+        record.expected = 99
+        self.scheduler.call_later(10.0, record, "slot1", slot=1, bank=0)
+        self.scheduler.call_later(10.0, record, "slot2", slot=2, bank=1)
+        self.scheduler.call_later(10.0, record, "bank1", slot=3, bank=1)
+
+        self.assertEqual(self.scheduler.cancel_matching(slot=1), 1)
+        self.assertEqual(record.calls, [])
+        self.assertEqual(self.scheduler.cancel_matching(bank=1, flush=True), 2)
+        self.assertEqual(record.calls, [("slot2",), ("bank1",)])
+        self.assertEqual(self.scheduler.depth, 0)
+        self.assertEqual(self.scheduler.stats()["cancelled"], 1)
+
+    def test_cancel_single_event(self) -> None:
+        record = _Recorder()
+        event = self.scheduler.call_later(10.0, record, "x")
+        self.assertTrue(self.scheduler.cancel(event))
+        self.assertFalse(self.scheduler.cancel(event))
+        self.assertEqual(self.scheduler.depth, 0)
+
+    def test_stop_flushes_pending_events(self) -> None:
+        record = _Recorder()
+        self.scheduler.call_later(10.0, record, "off")
+        self.scheduler.stop()
+        self.assertEqual(record.calls, [("off",)])
+        self.assertFalse(self.scheduler.stats()["running"])
+
+
+class SequencerNoteOffTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sent: list[tuple[int, object]] = []
+        self.host = SimpleNamespace(
+            scheduler=MidiScheduler(),
+            engine=SimpleNamespace(enqueue_midi=lambda si, msg: self.sent.append((si, msg))),
+            link=SimpleNamespace(bpm=120.0, enabled=False),
+        )
+        self.seq = Sequencer(self.host)
+
+    def tearDown(self) -> None:
+        self.host.scheduler.stop(flush=False)
+
+    def test_note_offs_go_through_the_scheduler_and_flush_on_clear(self) -> None:
+        self.seq.set_bank(0, ["C4", "E4"])
+        self.seq.banks[0].linked_slot = 2
+        self.seq._replan()
+        before = threading.active_count()
+
+        fired = self.seq._fire_due(0, 1, _fake_mido)
+
+        self.assertEqual(fired, 1)
+        self.assertEqual(self.host.scheduler.depth, 1)
+        self.assertLessEqual(threading.active_count(), before + 1)
+        self.assertEqual([m.type for _, m in self.sent], ["note_on"])
+
+        self.seq.clear_bank(0)
+        self.assertEqual([(si, m.type, m.note) for si, m in self.sent],
+                         [(2, "note_on", 60), (2, "note_off", 60)])
+        self.assertEqual(self.host.scheduler.depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
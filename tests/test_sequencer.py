@@ -0,0 +1,634 @@
+"""Tests for the step sequencer: pattern compilation and both clocks."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - depends on dev environment
+    np = None
+
+from core import deps  # noqa: E402
+from core import sequencer as sequencer_module  # noqa: E402
+from core.midi import NOTE_ON  # noqa: E402
+from core.scheduler import MidiScheduler  # noqa: E402
+from core.sequencer import (  # noqa: E402
+    PPQ, Sequencer, SequenceBank, format_step, parse_step,
+)
+
+RATE = 48000
+
+
+class _FakeLink:
+    def __init__(self, bpm: float = 120.0) -> None:
+        self.bpm = bpm
+        self.enabled = False
+        self.beat: float | None = None
+
+
+class _FakeEngine:
+    def __init__(self) -> None:
+        self.sample_rate = RATE
+        self.sources: list = []
+        self.queued: list = []
+        self.output_delay = 0.0
+
+    def add_block_source(self, source) -> None:
+        self.sources.append(source)
+
+    def remove_block_source(self, source) -> None:
+        self.sources = [s for s in self.sources if s != source]
+
+    def enqueue_midi(self, slot_index: int, msg) -> None:
+        self.queued.append((slot_index, msg))
+
+
+def _host() -> SimpleNamespace:
+    return SimpleNamespace(engine=_FakeEngine(), link=_FakeLink(), scheduler=MidiScheduler())
+
+
+def _attach(seq: Sequencer, bank: int, slot: int) -> None:
+    """Link without starting playback, so tests drive the clock themselves."""
+    seq.banks[bank].linked_slot = slot
+    seq._replan()
+
+
+def _kind(msg: tuple) -> str:
+    return "note_on" if msg[0] & 0xF0 == NOTE_ON else "note_off"
+
+
+def _run_blocks(seq: Sequencer, frames: int, blocks: int) -> list[tuple[int, str, int, int]]:
+    """Return (absolute frame, type, note, slot) for every emitted event."""
+    out = []
+    for block in range(blocks):
+        for slot, msg, offset in seq._render_block(block * frames, frames):
+            out.append((block * frames + offset, _kind(msg), msg[1], slot))
+    return out
+
+
+def _steps(*tokens: str) -> list:
+    return [parse_step(t) for t in tokens]
+
+
+class PatternCompileTests(unittest.TestCase):
+    def test_step_tokens_round_trip(self) -> None:
+        tokens = ["C4", "-", "E4:110", "_", "G4::0.5", "A4:90:0.25"]
+        self.assertEqual([format_step(s) for s in _steps(*tokens)], tokens)
+        self.assertEqual(format_step(parse_step(".")), "-")
+        for bad in ("H4", "C4:0", "C4:100:0", "C4:100:1.5", "C4:1:0.5:2"):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                parse_step(bad)
+
+    def test_plain_notes_spread_over_one_bar(self) -> None:
+        bank = SequenceBank(steps=_steps("d", "c", "b", "a"))
+        pattern = bank.pattern
+        self.assertEqual(pattern.length, 4 * PPQ)
+        self.assertEqual(pattern.ticks, (0, 960, 1920, 2880))
+        self.assertEqual(pattern.notes, (62, 60, 71, 69))
+        self.assertEqual(pattern.durations, (864,) * 4)
+        self.assertEqual(bank.notes, [62, 60, 71, 69])
+
+    def test_rests_ties_and_per_step_overrides(self) -> None:
+        bank = SequenceBank(steps=_steps("c", "_", "-", "e:30:0.5"), velocity=80)
+        pattern = bank.pattern
+        self.assertEqual(pattern.ticks, (0, 2880))
+        self.assertEqual(pattern.velocities, (80, 30))
+        # The tie holds C through step 2; E keeps half its step.
+        self.assertEqual(pattern.durations, (960 + 864, 480))
+        self.assertEqual(bank.notes, [60, 64])
+
+    def test_resolution_and_bars(self) -> None:
+        bank = SequenceBank(steps=_steps("c", "d", "e"), resolution=16)
+        self.assertEqual(bank.pattern.length, 720)  # three sixteenths
+        self.assertEqual(bank.pattern.ticks, (0, 240, 480))
+        bank.bars = 1
+        bank.compile()
+        self.assertEqual(bank.pattern.length, 4 * PPQ)
+        self.assertEqual(bank.pattern.ticks, (0, 240, 480))
+        spread = SequenceBank(steps=_steps("c", "d"), bars=2)
+        self.assertEqual(spread.pattern.ticks, (0, 4 * PPQ))
+        clipped = SequenceBank(steps=_steps(*["c"] * 5), resolution=4, bars=1)
+        self.assertEqual(len(clipped.pattern.ticks), 4)
+        odd = SequenceBank(steps=_steps(*["c"] * 7))
+        self.assertTrue(all(isinstance(t, int) for t in odd.pattern.ticks))
+
+    def test_configure_bank_validates(self) -> None:
+        seq = Sequencer(_host())
+        with self.assertRaises(ValueError):
+            seq.configure_bank(0, bars=2)  # empty bank
+        seq.set_bank(0, ["c", "d"])
+        for bad in ({"resolution": 7}, {"bars": 0.5}, {"velocity": 200}, {"gate": 0}):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                seq.configure_bank(0, **bad)
+        bank = seq.configure_bank(0, resolution="1/8", bars="auto", velocity="90", gate="0.5")
+        self.assertEqual((bank.resolution, bank.bars, bank.velocity, bank.gate), (8, None, 90, 0.5))
+        self.assertEqual(bank.pattern.durations, (240, 240))
+        # Re-entering the notes keeps the bank's timing settings.
+        self.assertEqual(seq.set_bank(0, ["e"]).resolution, 8)
+
+    def test_pointer_walk_matches_a_single_walk(self) -> None:
+        seq = Sequencer(_host())
+        seq.set_bank(0, ["c", "-", "e"])
+        seq.configure_bank(0, resolution=16)
+        seq.set_bank(1, ["g"] * 3)
+        _attach(seq, 0, 0)
+        _attach(seq, 1, 1)
+        whole = seq._due(0, 8 * PPQ)
+        seq._walks = [None] * len(seq._walks)
+        pieces = []
+        for t in range(0, 8 * PPQ, 77):
+            pieces.extend(seq._due(t, min(t + 77, 8 * PPQ)))
+        self.assertEqual(pieces, whole)
+        self.assertEqual([t for t, bi, *_ in whole if bi == 0][:4], [0, 480, 720, 1200])
+        self.assertEqual(seq._next_tick(721), 1200)
+
+    def test_snapshot_round_trip_and_legacy_notes(self) -> None:
+        seq = Sequencer(_host())
+        seq.set_bank(2, ["c:100:0.5", "_", "-", "e"])
+        seq.configure_bank(2, resolution=8, bars=2, gate=0.75)
+        data = seq.snapshot()
+        other = Sequencer(_host())
+        other.restore(data)
+        self.assertEqual(other.banks[2].pattern, seq.banks[2].pattern)
+        self.assertEqual(other.snapshot(), data)
+
+        other.restore([{"notes": ["D4", "C4"], "velocity": 90, "linked_slot": None}])
+        self.assertEqual(other.banks[0].pattern.ticks, (0, 1920))
+        self.assertEqual(other.banks[0].pattern.velocities, (90, 90))
+
+
+@unittest.skipIf(deps.mido is None, "mido not installed")
+class ThreadClockTests(unittest.TestCase):
+    def test_freewheel_thread_plays_steps_in_order(self) -> None:
+        host = _host()
+        host.link.bpm = 960.0  # a sixteenth every ~15.6 ms
+        seq = Sequencer(host)
+        seq.set_bank(0, ["c", "d", "-", "e"])
+        seq.configure_bank(0, resolution=16)
+        try:
+            seq.link(0, 4)
+            deadline = time.monotonic() + 2.0
+            while (sum(m.type == "note_on" for _, m in host.engine.queued) < 6
+                   and time.monotonic() < deadline):
+                time.sleep(0.01)
+        finally:
+            seq.stop()
+            host.scheduler.stop(flush=False)
+        ons = [m.note for slot, m in host.engine.queued if m.type == "note_on"]
+        self.assertGreaterEqual(len(ons), 6)
+        self.assertEqual(ons[:6], [60, 62, 64, 60, 62, 64])
+        self.assertEqual({slot for slot, _ in host.engine.queued}, {4})
+
+
+    def test_thread_clock_switches_song_parts_on_bars(self) -> None:
+        # Beats (50 ms) as long as the longest sleep: the thread must not
+        # mistake an ordinary wait for a stall and skip steps.
+        host = _host()
+        host.link.bpm = 1200.0
+        seq = Sequencer(host)
+        seq.set_bank(0, ["c"] * 4)
+        seq.set_bank(1, ["g"] * 4)
+        seq.set_song([([0], 1), ([1], 1)])
+        seq.song_play(0)
+        try:
+            seq.link(0, 0)
+            seq.link(1, 1)
+            deadline = time.monotonic() + 3.0
+            while (sum(m.type == "note_on" for _, m in host.engine.queued) < 12
+                   and time.monotonic() < deadline):
+                time.sleep(0.01)
+        finally:
+            seq.stop()
+            host.scheduler.stop(flush=False)
+        slots = [slot for slot, m in host.engine.queued if m.type == "note_on"]
+        self.assertEqual(slots[:12], [0] * 4 + [1] * 4 + [0] * 4)
+
+
+@unittest.skipIf(deps.mido is None, "mido not installed")
+class AudioClockTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.host = _host()
+        self.seq = Sequencer(self.host)
+        self.seq.set_clock("audio")
+
+    def tearDown(self) -> None:
+        self.seq.stop()
+        self.host.scheduler.stop(flush=False)
+
+    def test_link_registers_a_block_source_instead_of_a_thread(self) -> None:
+        self.seq.set_bank(0, ["c"])
+        self.seq.link(0, 1)
+        self.assertEqual(self.host.engine.sources, [self.seq._render_block])
+        self.assertIsNone(self.seq._thread)
+        self.seq.stop()
+        self.assertEqual(self.host.engine.sources, [])
+
+    def test_steps_land_on_exact_frames_across_block_sizes(self) -> None:
+        # 120 BPM at 48 kHz: one beat is 24000 frames, a bar 96000.
+        self.seq.set_bank(0, ["c", "d", "e", "f"])
+        _attach(self.seq, 0, 2)
+        self.seq._running = True
+        for frames in (64, 500, 512, 1000):
+            with self.subTest(frames=frames):
+                self.seq._anchor = None
+                self.seq._audio_offs = []
+                events = _run_blocks(self.seq, frames, -(-96000 // frames))
+                ons = [(f, n) for f, kind, n, _ in events if kind == "note_on" and f < 96000]
+                offs = [f for f, kind, _, _ in events if kind == "note_off" and f < 96000]
+                self.assertEqual(ons, [(0, 60), (24000, 62), (48000, 64), (72000, 65)])
+                self.assertEqual(offs, [21600, 45600, 69600, 93600])
+
+    def test_polyrhythmic_banks_and_offs_before_ons(self) -> None:
+        self.seq.set_bank(0, ["c"] * 4)
+        self.seq.set_bank(1, ["g"] * 3)
+        _attach(self.seq, 0, 0)
+        _attach(self.seq, 1, 1)
+        self.seq.configure_bank(0, gate=1.0)  # each off lands on the next on
+        self.seq.configure_bank(1, gate=1.0)
+        self.seq._running = True
+        events = _run_blocks(self.seq, 256, 376)  # one bar plus a block
+        triplets = [f for f, kind, _, slot in events if kind == "note_on" and slot == 1]
+        self.assertEqual(triplets, [0, 32000, 64000, 96000])
+        at_bar = [(kind, slot) for f, kind, _, slot in events if f == 96000]
+        self.assertEqual([kind for kind, _ in at_bar], ["note_off", "note_off", "note_on", "note_on"])
+
+    def test_polymeter_bank_drifts_against_the_bar(self) -> None:
+        self.seq.set_bank(0, ["c", "d", "e"])
+        self.seq.configure_bank(0, resolution=16)  # loops every 3/16 of a bar
+        _attach(self.seq, 0, 0)
+        self.seq._running = True
+        events = _run_blocks(self.seq, 480, 200)  # one bar
+        ons = [(f, n) for f, kind, n, _ in events if kind == "note_on"]
+        self.assertEqual(ons[:5], [(0, 60), (6000, 62), (12000, 64), (18000, 60), (24000, 62)])
+        self.assertEqual(len(ons), 16)
+
+    def test_clear_bank_releases_pending_notes_in_the_next_block(self) -> None:
+        self.seq.set_bank(0, ["c"])
+        self.seq.link(0, 3)
+        first = self.seq._render_block(0, 512)
+        self.assertEqual([(s, _kind(m)) for s, m, _ in first], [(3, "note_on")])
+        self.seq.clear_bank(0)
+        second = self.seq._render_block(512, 512)
+        self.assertEqual(second, [(3, (0x80, 60, 64), 0)])
+
+    def test_follows_link_by_slewing_and_resyncs_on_jumps(self) -> None:
+        link = self.host.link
+        link.enabled, link.beat = True, 8.0
+        self.seq._running = True
+        b0, b1 = self.seq._advance_clock(0, 480)
+        self.assertEqual(b0, 8.0)
+        self.assertAlmostEqual(b1 - b0, 0.02)
+        link.beat = b1 + 0.01  # Link slightly ahead: the block stretches
+        b2, b3 = self.seq._advance_clock(480, 480)
+        self.assertEqual(b2, b1)
+        self.assertGreater(b3 - b2, 0.02)
+        link.beat = 100.0  # a peer jumped the timeline
+        b4, _ = self.seq._advance_clock(960, 480)
+        self.assertEqual(b4, 100.0)
+
+    def test_link_target_leads_by_the_output_delay(self) -> None:
+        link = self.host.link
+        link.enabled, link.beat = True, 8.0
+        self.host.engine.output_delay = 0.05  # 0.1 beat at 120 BPM
+        self.seq.set_bank(0, ["c"] * 4)
+        _attach(self.seq, 0, 0)
+        self.seq._running = True
+        b0, _ = self.seq._advance_clock(0, 480)
+        self.assertAlmostEqual(b0, 8.1)
+        # The beat-9 step is rendered 0.1 beat (2400 frames) ahead of it.
+        self.seq._anchor = None
+        ons = []
+        for block in range(30):
+            link.beat = 8.5 + block * 480 / 24000
+            ons += [block * 480 + offset for _, msg, offset in self.seq._render_block(block * 480, 480)
+                    if _kind(msg) == "note_on"]
+        self.assertEqual(ons[0], 12000 - 2400)
+
+    def test_stop_leaves_pending_note_offs_to_the_audio_thread(self) -> None:
+        self.seq.set_bank(0, ["c"])
+        self.seq.link(0, 3)
+        self.host.engine.running = True
+        self.seq._render_block(0, 512)
+        stopper = threading.Thread(target=self.seq.stop)
+        stopper.start()
+        deadline = time.monotonic() + 1.0
+        while self.seq._audio_stop is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(self.host.engine.queued, [])  # the off list is not touched here
+        last = self.seq._render_block(512, 512)
+        stopper.join(1.0)
+        self.assertFalse(stopper.is_alive())
+        self.assertEqual(last, [(3, (0x80, 60, 64), 0)])
+        self.assertEqual(self.host.engine.sources, [])
+        self.assertEqual(self.seq._audio_offs, [])
+
+    def test_busy_lock_defers_a_switch_instead_of_blocking_the_block(self) -> None:
+        self.seq.set_bank(0, ["c"] * 4)
+        _attach(self.seq, 0, 0)
+        self.seq._running = True
+        events = _run_blocks(self.seq, 480, 100)
+        self.seq.queue_bank(0, ["d"] * 4)  # lands on bar 2: frame 96000, block 200
+
+        def render(first: int, last: int) -> None:
+            for block in range(first, last):
+                for slot, msg, offset in self.seq._render_block(block * 480, 480):
+                    events.append((block * 480 + offset, _kind(msg), msg[1], slot))
+
+        with self.seq._lock:  # e.g. an edit replanning on the main thread
+            worker = threading.Thread(target=render, args=(100, 201))
+            worker.start()
+            worker.join(2.0)
+            self.assertFalse(worker.is_alive())
+        render(201, 300)
+        ons = [(f, n) for f, kind, n, _ in events if kind == "note_on"]
+        self.assertEqual(ons[3:6], [(72000, 60), (96000, 60), (120000, 62)])
+
+    def test_timebase_and_clock_in_follow_the_audio_clock(self) -> None:
+        now = [50.0]
+        self.seq.set_bank(0, ["c"])
+        self.seq.link(0, 0)
+
+        def render(blocks: int) -> None:
+            for _ in range(blocks):  # 480 frames: 10 ms, 0.02 beat at 120 BPM
+                self.seq._render_block(int(round((now[0] - 50.0) * RATE)), 480)
+                now[0] += 0.01
+
+        def external() -> float:
+            return (now[0] - 50.0) * 2.0 + 0.25  # a quarter beat ahead
+
+        with mock.patch.object(sequencer_module, "time", SimpleNamespace(monotonic=lambda: now[0])):
+            render(100)
+            # Clock out reads the beat being played, not a freewheel clock.
+            self.assertAlmostEqual(self.seq.timebase_beat(), 2.0)
+            self.assertIsNone(self.seq._free_anchor)
+            for _ in range(300):
+                self.seq.align_clock(external(), now[0], 0.1)
+                render(1)
+            self.assertAlmostEqual(self.seq.timebase_beat(), external(), delta=0.01)
+            self.seq.align_clock(external() + 8.0, now[0], 0.1)
+            render(1)
+            self.assertAlmostEqual(self.seq.timebase_beat(), external() + 8.0, delta=0.01)
+
+    def test_clock_switch_validates_and_restarts(self) -> None:
+        with self.assertRaises(ValueError):
+            self.seq.set_clock("midi")
+        self.seq.set_bank(0, ["c"])
+        self.seq.link(0, 0)
+        self.seq.set_clock("thread")
+        self.assertEqual(self.host.engine.sources, [])
+        self.assertIsNotNone(self.seq._thread)
+        self.seq.set_clock("audio")
+        self.assertEqual(self.host.engine.sources, [self.seq._render_block])
+
+
+@unittest.skipIf(deps.mido is None, "mido not installed")
+class SongModeTests(unittest.TestCase):
+    BAR = 96000  # frames per bar at 120 BPM / 48 kHz
+
+    def setUp(self) -> None:
+        self.host = _host()
+        self.seq = Sequencer(self.host)
+        self.seq.set_clock("audio")
+        self.seq.set_bank(0, ["c"] * 4)
+        self.seq.set_bank(1, ["g"] * 4)
+        _attach(self.seq, 0, 0)
+        _attach(self.seq, 1, 1)
+
+    def tearDown(self) -> None:
+        self.host.scheduler.stop(flush=False)
+
+    def _bars(self, events, bars: int) -> list[set[int]]:
+        """Slots that played a note-on in each bar."""
+        out: list[set[int]] = [set() for _ in range(bars)]
+        for frame, kind, _, slot in events:
+            if kind == "note_on" and frame < bars * self.BAR:
+                out[frame // self.BAR].add(slot)
+        return out
+
+    def test_parts_follow_their_bar_counts_and_loop(self) -> None:
+        self.seq.set_song([([0], 1), ([1], 2)])
+        self.seq.song_play(0)
+        self.seq._running = True
+        events = _run_blocks(self.seq, 512, 4 * self.BAR // 512)
+        self.assertEqual(self._bars(events, 4), [{0}, {1}, {1}, {0}])
+        self.assertEqual(self.seq.song_part, 0)
+
+    def test_song_without_loop_ends_in_silence(self) -> None:
+        self.seq.set_song([([0, 1], 1)])
+        self.seq.set_song_loop(False)
+        self.seq.song_play(0)
+        self.seq._running = True
+        events = _run_blocks(self.seq, 1000, 2 * self.BAR // 1000)
+        self.assertEqual(self._bars(events, 2), [{0, 1}, set()])
+        self.assertIsNone(self.seq.song_part)
+
+    def test_jump_and_stop_wait_for_the_next_bar(self) -> None:
+        self.seq.set_song([([0], 4), ([1], 4)])
+        self.seq.song_play(0)
+        self.seq._running = True
+        events = _run_blocks(self.seq, 480, 100)  # half a bar
+        self.seq.song_play(1)
+        pending = self.seq._switches[0]
+        self.assertEqual(pending.tick, 4 * PPQ)
+        # Prepared when queued: the boundary only swaps references.
+        self.assertEqual([bi for bi, _, _ in pending.plan], [1])
+        self.assertEqual(self.seq.pending(), [{"tick": 4 * PPQ, "bar": 2, "change": "song part 2"}])
+        for block in range(100, 400):
+            for slot, msg, offset in self.seq._render_block(block * 480, 480):
+                events.append((block * 480 + offset, _kind(msg), msg[1], slot))
+        self.seq.song_stop()
+        for block in range(400, 600):
+            for slot, msg, offset in self.seq._render_block(block * 480, 480):
+                events.append((block * 480 + offset, _kind(msg), msg[1], slot))
+        self.assertEqual(self._bars(events, 3), [{0}, {1}, {0, 1}])
+        self.assertIsNone(self.seq.song_part)
+
+    def test_queued_bank_edit_switches_on_the_bar(self) -> None:
+        self.seq.detach_bank(1)
+        self.seq._running = True
+        events = _run_blocks(self.seq, 480, 100)
+        self.seq.queue_bank(0, ["d"] * 4)
+        self.assertEqual(self.seq.banks[0].notes, [60] * 4)  # not yet
+        for block in range(100, 300):
+            for slot, msg, offset in self.seq._render_block(block * 480, 480):
+                events.append((block * 480 + offset, _kind(msg), msg[1], slot))
+        ons = [(f, n) for f, kind, n, _ in events if kind == "note_on"]
+        self.assertEqual(ons[:5], [(0, 60), (24000, 60), (48000, 60), (72000, 60), (96000, 62)])
+        self.assertEqual(self.seq.banks[0].notes, [62] * 4)
+        self.assertEqual(self.seq.banks[0].linked_slot, 0)
+
+    def test_queue_applies_immediately_when_stopped(self) -> None:
+        self.seq.queue_bank(0, ["e"])
+        self.assertEqual(self.seq.banks[0].notes, [64])
+        self.assertEqual(self.seq._switches, [])
+
+    def test_validation_and_session_round_trip(self) -> None:
+        with self.assertRaises(ValueError):
+            self.seq.song_play(0)  # no parts
+        for bad in ([([], 1)], [([0], 0)], [([16], 1)]):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                self.seq.set_song(bad)
+        with self.assertRaises(ValueError):
+            self.seq.set_quantum(0.1)
+        self.seq.set_song([([0, 1], 2), ([1], 1)])
+        self.seq.set_quantum(8)
+        self.seq.song_play(1)
+        self.seq._running = True
+        self.seq._render_block(0, 512)
+        data = self.seq.song_snapshot()
+        self.assertEqual(data, {"parts": [{"banks": [1, 2], "bars": 2}, {"banks": [2], "bars": 1}],
+                                "loop": True, "quantum": 8.0, "playing": True, "part": 2})
+        other = Sequencer(_host())
+        other.song_restore(data)
+        self.assertEqual(other.song, self.seq.song)
+        self.assertEqual(other.quantum, 8.0)
+        self.assertEqual(other.pending()[0]["change"], "song part 2")
+
+
+@unittest.skipIf(deps.mido is None, "mido not installed")
+class DrumBankTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.host = _host()
+        self.seq = Sequencer(self.host)
+        self.seq.set_clock("audio")
+
+    def tearDown(self) -> None:
+        self.seq.stop()
+        self.host.scheduler.stop(flush=False)
+
+    def test_lanes_compile_into_one_event_list(self) -> None:
+        self.seq.set_lane(4, 0, 0, "36", "x... x... X... x...")
+        self.seq.set_lane(4, 1, 1, "D2", "....X.......x")
+        self.seq.configure_bank(4, accent=120)
+        pattern = self.seq.banks[4].pattern
+        self.assertEqual(pattern.length, 3840)  # longest lane: 16 sixteenths
+        self.assertEqual(pattern.ticks, (0, 960, 960, 1920, 2880, 2880))
+        self.assertEqual(pattern.slots, (0, 0, 1, 0, 0, 1))
+        self.assertEqual(pattern.notes, (36, 36, 38, 36, 36, 38))
+        self.assertEqual(pattern.velocities, (100, 100, 120, 120, 100, 100))
+        self.assertEqual(self.seq._plan, ((4, pattern, None),))
+
+        self.seq.mute_lane(4, 0)
+        self.assertEqual(self.seq.banks[4].pattern.notes, (38, 38))
+        self.seq.mute_lane(4, 0, False)
+        self.seq.clear_lane(4, 1)
+        self.assertEqual(self.seq.banks[4].pattern.slots, (0, 0, 0, 0))
+
+    def test_kit_plays_to_each_lane_slot_from_one_walk(self) -> None:
+        # 120 BPM at 48 kHz: a sixteenth is 6000 frames.
+        self.seq.set_lane(0, 0, 2, "36", "x.x.")
+        self.seq.set_lane(0, 1, 5, "42", "xxxx")
+        self.assertEqual(self.host.engine.sources, [self.seq._render_block])
+        ons = [(f, n, slot) for f, kind, n, slot in _run_blocks(self.seq, 500, 48)
+               if kind == "note_on"]
+        self.assertEqual(ons, [(0, 36, 2), (0, 42, 5), (6000, 42, 5),
+                               (12000, 36, 2), (12000, 42, 5), (18000, 42, 5)])
+
+    def test_validation_cut_and_session_round_trip(self) -> None:
+        self.seq.set_bank(1, ["c"])
+        with self.assertRaises(ValueError):
+            self.seq.set_lane(1, 0, 0, "36", "x")  # a note bank
+        with self.assertRaises(ValueError):
+            self.seq.set_lane(2, 1, 0, "36", "x")  # lanes are contiguous
+        for note, hits in (("200", "x"), ("36", "xo"), ("36", "||")):
+            with self.subTest(note=note, hits=hits), self.assertRaises(ValueError):
+                self.seq.set_lane(2, 0, 0, note, hits)
+        self.seq.set_lane(2, 0, 0, "36", "x-X.")
+        self.seq.set_lane(2, 1, 3, "38", "..x.")
+        with self.assertRaises(ValueError):
+            self.seq.link(2, 0)
+        with self.assertRaises(ValueError):
+            self.seq.set_bank(2, ["c"])
+
+        self.seq.detach_slot(3)
+        self.assertTrue(self.seq.banks[2].lanes[1].muted)
+        self.assertEqual(set(self.seq.banks[2].pattern.slots), {0})
+
+        data = self.seq.snapshot()
+        self.assertEqual(data[2]["lanes"][0], {"slot": 1, "note": 36, "hits": "x.X.", "mute": False})
+        other = Sequencer(_host())
+        other.set_clock("audio")
+        other.restore(data)
+        self.assertEqual(other.banks[2].pattern, self.seq.banks[2].pattern)
+        self.assertEqual(other.snapshot(), data)
+        self.assertTrue(other._running)
+        other.stop()
+
+    def test_out_of_range_slots_are_refused_and_their_banks_not_restored(self) -> None:
+        for slot in (-1, 8):
+            with self.subTest(slot=slot), self.assertRaises(ValueError):
+                self.seq.set_lane(0, 0, slot, "36", "x")
+        self.assertIsNone(self.seq.banks[0])
+        lane = {"note": 36, "hits": "x.x."}
+        self.seq.restore([
+            {"steps": [], "lanes": [{**lane, "slot": 0}]},
+            {"steps": [], "lanes": [{**lane, "slot": 2}, {**lane, "slot": 9}]},
+            {"steps": ["C4"], "linked_slot": 0},
+            {"steps": [], "lanes": [{**lane, "slot": 8}]},
+        ])
+        self.assertEqual(self.seq.banks[:3], [None, None, None])
+        self.assertEqual(self.seq.banks[3].pattern.slots, (7, 7))
+        events = _run_blocks(self.seq, 500, 24)
+        self.assertEqual({slot for _, _, _, slot in events}, {7})
+
+
+@unittest.skipIf(np is None or deps.mido is None, "numpy/mido not installed")
+class SampleAccurateEngineTests(unittest.TestCase):
+    def test_sampler_voice_starts_at_the_event_offset(self) -> None:
+        from core.engine import AudioEngine
+        from core.models import InstrumentSlot
+        from sampler.plugin import WavSamplerPlugin
+
+        engine = AudioEngine(RATE, 256)
+        try:
+            click = np.ones((1, 64), dtype=np.float32)
+            plugin = WavSamplerPlugin("click", click, 2)
+            engine.slots[0] = InstrumentSlot("click", "click", plugin, gain=1.0)
+            msg = deps.mido.Message("note_on", note=60, velocity=127)
+            engine.add_block_source(lambda t, n: [(0, msg, 300)] if t == 256 else [])
+
+            blocks = []
+            for _ in range(3):
+                out = np.zeros((256, 2), dtype=np.float32)
+                engine._callback(out, 256, None, None)
+                blocks.append(out)
+            audio = np.concatenate(blocks)[:, 0]
+        finally:
+            engine.shutdown()
+
+        onset = int(np.flatnonzero(audio)[0])
+        self.assertEqual(onset, 256 + 255)  # offsets clamp to the block
+        self.assertEqual(engine.frame_time, 768)
+
+    def test_output_latency_from_dac_time_or_stream(self) -> None:
+        from core.engine import AudioEngine
+
+        engine = AudioEngine(RATE, 256)
+        try:
+            engine._measure_latency(SimpleNamespace(outputBufferDacTime=10.012, currentTime=10.0))
+            self.assertAlmostEqual(engine.output_latency, 0.012)
+            engine._stream = SimpleNamespace(latency=0.02)
+            engine._measure_latency(SimpleNamespace(outputBufferDacTime=0.0, currentTime=10.0))
+            self.assertAlmostEqual(engine.output_latency, 0.02)
+            engine.set_latency_offset(-5)
+            self.assertAlmostEqual(engine.output_delay, 0.015)
+            with self.assertRaises(ValueError):
+                engine.set_latency_offset(1000)
+        finally:
+            engine._stream = None
+            engine.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
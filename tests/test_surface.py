@@ -0,0 +1,88 @@
+"""Tests for control-surface driver profiles, pages and soft takeover."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from controllers.surface import SurfaceDriver, driver_names, load_profile  # noqa: E402
+
+
+def _engine():
+    params = {f"p{n}": SimpleNamespace(range=(0.0, 127.0)) for n in range(1, 7)}
+    slot = SimpleNamespace(name="Synth", plugin=SimpleNamespace(parameters=params),
+                           gain=0.8, muted=False, solo=False)
+    engine = SimpleNamespace(slots=[slot] + [None] * 7, master_gain=1.0, changes=[])
+    engine.enqueue_param_change = lambda slot, name, value: engine.changes.append(
+        (slot, name, value))
+    return engine
+
+
+class DriverProfileTests(unittest.TestCase):
+    def test_every_driver_builds_and_discovery_imports_none(self) -> None:
+        names = driver_names()
+        self.assertTrue({"midimix", "launch_control_xl", "beatstep_pro"} <= set(names))
+        for name in names:
+            with self.subTest(driver=name):
+                driver = SurfaceDriver(_engine(), load_profile(name))
+                self.assertEqual(len(driver.mappers), len(driver.profile.pages))
+        with self.assertRaises(ValueError):
+            load_profile("nope")
+        probe = ("import sys; from controllers.surface import driver_names; driver_names(); "
+                 "print(sorted(m for m in sys.modules if m.startswith('controllers.drivers.')))")
+        out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        self.assertNotIn("launch_control_xl", out)
+        self.assertNotIn("beatstep_pro", out)
+
+
+class PagedSurfaceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = _engine()
+        self.driver = SurfaceDriver(self.engine, load_profile("launch_control_xl"))
+        self.driver.control_maps.params.build(0)
+
+    def _send(self, *messages) -> None:
+        for raw in messages:
+            self.driver.on_midi((list(raw), 0.0))
+
+    def test_page_buttons_switch_the_knob_rows_to_other_params(self) -> None:
+        self._send((0xB8, 13, 10), (0xB8, 107, 127), (0xB8, 107, 0), (0xB8, 29, 20),
+                   (0xB8, 107, 127))  # no page 3: stays on 2
+        self.assertEqual(self.driver.page, 1)
+        self.assertEqual(self.engine.changes, [(0, "p1", 10.0), (0, "p5", 20.0)])
+        self._send((0xB8, 106, 127))
+        self.assertEqual(self.driver.page, 0)
+
+    def test_faders_and_knobs_take_over_instead_of_jumping(self) -> None:
+        slot = self.engine.slots[0]
+        self._send((0xB8, 77, 0), (0xB8, 77, 50))
+        self.assertEqual(slot.gain, 0.8)            # 102 not reached yet
+        self._send((0xB8, 77, 110))                 # crossed it: picked up
+        self._send((0xB8, 77, 30))
+        self.assertAlmostEqual(slot.gain, 30 / 127)
+        slot.gain = 1.0                             # changed elsewhere
+        self._send((0xB8, 77, 40))
+        self.assertEqual(slot.gain, 1.0)
+        # Knobs pick up from the last value the surface set: the knob left
+        # page 1 at 64 and page 2 moved it to 0.
+        self._send((0xB8, 13, 64), (0xB8, 107, 127), (0xB8, 13, 0),
+                   (0xB8, 106, 127), (0xB8, 13, 10), (0xB8, 13, 70))
+        self.assertEqual(self.engine.changes, [(0, "p1", 64.0), (0, "p4", 0.0),
+                                               (0, "p1", 70.0)])
+
+    def test_button_leds_use_the_profile_colours(self) -> None:
+        self._send((0x98, 41, 127), (0x98, 73, 127), (0x98, 73, 127))
+        leds = self.driver.leds
+        self.assertEqual((leds.value(0x98, 41), leds.value(0x98, 73)), (0x3F, 0x0C))
+
+
+if __name__ == "__main__":
+    unittest.main()